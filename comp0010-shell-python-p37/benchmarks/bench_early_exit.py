@@ -0,0 +1,62 @@
+"""
+Benchmarks pipelines that only need the start of their input, such as
+cat FILE | head -n 5, on files of growing size. Once head has its lines, the
+stages before it are cancelled, so the time should stay flat however big the
+file is, unlike cat FILE | wc -l, which has to read all of it.
+"""
+import argparse
+import os
+import tempfile
+from io import StringIO
+
+from bench_utils import format_seconds, print_table, time_per_call
+
+# pylint: disable=wrong-import-position
+from python_shell import PythonShell  # noqa: E402
+
+SIZES = (10_000, 100_000, 1_000_000)
+LINE = 'the quick brown fox jumps over the lazy dog 0123456789\n'
+CMDLINES = (
+    'cat {} | head -n 5',
+    'cat {} | grep -m 5 fox',
+    'cat {} | sed s/fox/cat/ | head -n 5',
+    'cat {} | wc -l',
+)
+
+
+def run(shell: PythonShell, cmdline: str) -> None:
+    """
+    Evaluates a command line, with a fresh input stream, as running a command
+    line closes it
+    """
+    shell.in_stream = StringIO()
+    shell.eval(cmdline)
+
+
+def main() -> None:
+    """
+    Runs the benchmark
+    """
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--iterations', type=int, default=3,
+                        help='runs per command line per round')
+    args = parser.parse_args()
+
+    shell = PythonShell(StringIO(), StringIO())
+    rows = []
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'input.txt')
+        for size in SIZES:
+            with open(path, 'w', encoding='utf-8') as file:
+                file.write(LINE * size)
+            rows.append([size] + [
+                format_seconds(time_per_call(
+                    lambda c=cmdline: run(shell, c.format(path)),
+                    args.iterations))
+                for cmdline in CMDLINES])
+    print_table(['lines'] + [cmdline.format('FILE') for cmdline in CMDLINES],
+                rows)
+
+
+if __name__ == '__main__':
+    main()
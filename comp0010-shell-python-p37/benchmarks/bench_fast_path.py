@@ -0,0 +1,60 @@
+"""
+Benchmarks the fast path parser against the full ANTLR chain (substitution,
+then re-parsing with the RunnerVisitor) on simple command lines.
+"""
+import argparse
+
+from bench_utils import format_seconds, print_table, time_per_call
+
+# pylint: disable=wrong-import-position
+from commands.builder import Builder  # noqa: E402
+from commands.command_registry import get_command_registry  # noqa: E402
+from parse.fast_path_parser import FastPathParser  # noqa: E402
+from parse.parse_tree_factory import create_parse_tree  # noqa: E402
+from parse.runner_visitor import RunnerVisitor  # noqa: E402
+from parse.substitution_visitor import SubstitutionVisitor  # noqa: E402
+
+CORPUS = {
+    'simple': 'echo hello world',
+    'typical': 'grep foo dir1/file1.txt | sort -r | uniq -i',
+    'long args': 'echo ' + ' '.join(f'arg{i}' for i in range(200)),
+    'long pipe': ' | '.join(['cat file.txt'] + ['sort'] * 50),
+    'long seq': '; '.join(['echo 0', 'echo 1 | sort'] +
+                          [f'echo {i}' for i in range(2, 100)]),
+}
+
+
+def parse_with_antlr(cmdline: str) -> Builder:
+    """
+    Parses a command line the way the shell did before the fast path
+    """
+    tree = create_parse_tree(cmdline)
+    substitutions = SubstitutionVisitor().visit(tree)
+    return RunnerVisitor(get_command_registry(), substitutions).visit(tree)
+
+
+def main() -> None:
+    """
+    Runs the benchmark
+    """
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--iterations', type=int, default=20,
+                        help='parses per line per round')
+    args = parser.parse_args()
+
+    fast_path = FastPathParser(get_command_registry())
+    rows = []
+    for name, cmdline in CORPUS.items():
+        # warm the DFA caches and import every command
+        parse_with_antlr(cmdline)
+        antlr = time_per_call(lambda c=cmdline: parse_with_antlr(c),
+                              args.iterations)
+        fast = time_per_call(lambda c=cmdline: fast_path.parse(c),
+                             args.iterations)
+        rows.append((name, len(cmdline), format_seconds(antlr),
+                     format_seconds(fast), f'{antlr / fast:.1f}x'))
+    print_table(('line', 'chars', 'ANTLR', 'fast path', 'speedup'), rows)
+
+
+if __name__ == '__main__':
+    main()
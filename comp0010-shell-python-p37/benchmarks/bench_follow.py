@@ -0,0 +1,70 @@
+"""
+Benchmarks following an idle file, as tail -f does: how often it is polled,
+how much CPU time polling takes, and how long a line appended after a while
+takes to be read. Polls back off while the file stays the same, so the cost
+of idling should be low, at the price of reading a line a little later the
+longer the file was idle.
+"""
+import argparse
+import os
+import queue
+import tempfile
+import threading
+import time
+
+from bench_utils import format_seconds, print_table
+
+# pylint: disable=wrong-import-position
+from commands.file_follower import FileFollower  # noqa: E402
+
+IDLE_SECONDS = (0.05, 0.5, 2.0)
+
+
+def follow(path: str, idle: float) -> list:
+    """
+    Follows a file for idle seconds, then appends a line, returning the
+    polls per second, the share of CPU time spent, and how long the line
+    took to be read
+    """
+    chunks: 'queue.Queue[bytes]' = queue.Queue()
+    with open(path, 'rb') as file, \
+            FileFollower(path, file.fileno(), 0) as follower:
+        thread = threading.Thread(
+            target=lambda: [chunks.put(chunk)
+                            for chunk in follower.chunks()])
+        start, cpu_start = time.monotonic(), time.process_time()
+        thread.start()
+        time.sleep(idle)
+        wall = time.monotonic() - start
+        cpu = time.process_time() - cpu_start
+        polls = follower.polls
+        with open(path, 'ab') as log:
+            written = time.monotonic()
+            log.write(b'line\n')
+        chunks.get()
+        latency = time.monotonic() - written
+        follower.stop()
+        thread.join()
+    return [f'{idle}s', f'{polls / wall:.1f}', f'{cpu / wall:.2%}',
+            format_seconds(latency)]
+
+
+def main() -> None:
+    """
+    Runs the benchmark
+    """
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.parse_args()
+
+    rows = []
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'app.log')
+        for idle in IDLE_SECONDS:
+            with open(path, 'wb'):
+                pass
+            rows.append(follow(path, idle))
+    print_table(['idle for', 'polls/s', 'cpu', 'latency'], rows)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+"""
+Benchmarks head on files of growing size. head -n and head -c counting from
+the start only read what they print, so their time should not grow with the
+file. Counting from the end prints nearly the whole file, so its time grows,
+for comparison, though head -c holds nothing back as the file size is known.
+"""
+import argparse
+import os
+import tempfile
+from io import StringIO
+
+from bench_utils import format_seconds, print_table, time_per_call
+
+# pylint: disable=wrong-import-position
+from commands.headcommand import Head  # noqa: E402
+from flag import Flag  # noqa: E402
+from python_shell import PythonShell  # noqa: E402
+
+SIZES = (10_000, 100_000, 1_000_000)
+LINE = 'the quick brown fox jumps over the lazy dog 0123456789\n'
+CMDLINES = (
+    'head -n 10 {} > /dev/null',
+    'head -c 100 {} > /dev/null',
+    'cat {} | head -n 10 > /dev/null',
+)
+
+
+def run(shell: PythonShell, cmdline: str) -> None:
+    """
+    Evaluates a command line, with a fresh input stream, as running a command
+    line closes it
+    """
+    shell.in_stream = StringIO()
+    shell.eval(cmdline)
+
+
+def run_head(flag: str, count: int, path: str) -> None:
+    """
+    Runs head directly, as the shell cannot parse negative counts
+    """
+    Head(StringIO(), StringIO(), [Flag(flag, count, 'benchmark')],
+         [path]).run()
+
+
+def main() -> None:
+    """
+    Runs the benchmark
+    """
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--iterations', type=int, default=5,
+                        help='runs per command per size per round')
+    args = parser.parse_args()
+
+    shell = PythonShell(StringIO(), StringIO())
+    rows = []
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'input.txt')
+        for size in SIZES:
+            with open(path, 'w', encoding='utf-8') as file:
+                file.write(LINE * size)
+            for template in CMDLINES:
+                cmdline = template.format(path)
+                seconds = time_per_call(lambda: run(shell, cmdline),
+                                        args.iterations)
+                rows.append([template.format('FILE'), size,
+                             format_seconds(seconds)])
+            for flag, count in (('c', -100), ('n', -10)):
+                seconds = time_per_call(
+                    lambda: run_head(flag, count, path), args.iterations)
+                rows.append([f'head -{flag} {count} FILE', size,
+                             format_seconds(seconds)])
+    print_table(['command', 'lines', 'time'], rows)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+"""
+Benchmarks pipelines of commands that pass lines on lazily, such as
+cat FILE | grep a | head, chained on one thread, and with every stage on a
+thread of its own, connected by channels, as other pipelines are. Chaining
+should pay off most for long pipelines of cheap stages, where passing lines
+through channels costs more than the stages themselves.
+"""
+import argparse
+import os
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from bench_utils import format_seconds, print_table, time_per_call
+
+# pylint: disable=wrong-import-position
+from python_shell import PythonShell  # noqa: E402
+
+SIZES = (10_000, 100_000)
+LINE = 'the quick brown fox jumps over the lazy dog 0123456789\n'
+CMDLINES = (
+    'cat {} | grep o | head -n 1000000',
+    'cat {} | sed s/fox/cat/ | grep cat | cut -b 1-20 | uniq',
+    'cat {} | grep fox | head -n 10',
+)
+
+
+def run(shell: PythonShell, cmdline: str) -> None:
+    """
+    Evaluates a command line, with a fresh input stream, as running a command
+    line closes it
+    """
+    shell.in_stream = StringIO()
+    shell.eval(cmdline)
+
+
+def main() -> None:
+    """
+    Runs the benchmark
+    """
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--iterations', type=int, default=3,
+                        help='runs per command per size per round')
+    args = parser.parse_args()
+
+    shell = PythonShell(StringIO(), StringIO())
+    rows = []
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'input.txt')
+        for size in SIZES:
+            with open(path, 'w', encoding='utf-8') as file:
+                file.write(LINE * size)
+            for template in CMDLINES:
+                cmdline = template.format(path)
+                chained = time_per_call(lambda: run(shell, cmdline),
+                                        args.iterations)
+                # No pipeline is short enough to chain
+                with mock.patch('commands.pipeline_builder.MAX_CHAIN_LENGTH',
+                                0):
+                    threaded = time_per_call(lambda: run(shell, cmdline),
+                                             args.iterations)
+                rows.append([template.format('FILE'), size,
+                             format_seconds(threaded),
+                             format_seconds(chained),
+                             f'{threaded / chained:.2f}x'])
+    print_table(['command', 'lines', 'threaded', 'chained', 'speedup'], rows)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+"""
+Benchmarks commands reading large files, such as cat FILE > /dev/null and
+wc -l FILE, with the files memory-mapped, and with every file read through a
+buffer instead, as pipes and special files are. Mapping should pay off most
+for cat, which writes straight from the mapping.
+"""
+import argparse
+import os
+import sys
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from bench_utils import format_seconds, print_table, time_per_call
+
+# pylint: disable=wrong-import-position
+from python_shell import PythonShell  # noqa: E402
+
+SIZES = (100_000, 1_000_000)
+LINE = 'the quick brown fox jumps over the lazy dog 0123456789\n'
+CMDLINES = (
+    'cat {} > /dev/null',
+    'wc -l {}',
+    'head -n 1000000 {} > /dev/null',
+    'tail -n 1 {}',
+)
+
+
+def run(shell: PythonShell, cmdline: str) -> None:
+    """
+    Evaluates a command line, with a fresh input stream, as running a command
+    line closes it
+    """
+    shell.in_stream = StringIO()
+    shell.eval(cmdline)
+
+
+def main() -> None:
+    """
+    Runs the benchmark
+    """
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--iterations', type=int, default=1,
+                        help='runs per command per size per round')
+    args = parser.parse_args()
+
+    shell = PythonShell(StringIO(), StringIO())
+    rows = []
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'input.txt')
+        for size in SIZES:
+            with open(path, 'w', encoding='utf-8') as file:
+                file.write(LINE * size)
+            for template in CMDLINES:
+                cmdline = template.format(path)
+                mapped = time_per_call(lambda: run(shell, cmdline),
+                                       args.iterations)
+                # No file is big enough to map
+                with mock.patch('commands.command_helpers.MMAP_MIN_SIZE',
+                                sys.maxsize):
+                    buffered = time_per_call(lambda: run(shell, cmdline),
+                                             args.iterations)
+                rows.append([template.format('FILE'), size,
+                             format_seconds(buffered), format_seconds(mapped),
+                             f'{buffered / mapped:.2f}x'])
+    print_table(['command', 'lines', 'buffered', 'mapped', 'speedup'], rows)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+"""
+Benchmarks create_parse_tree, comparing the two-stage SLL/LL parse with a
+parse that only uses full LL prediction, and with a two-stage parse that
+creates a new lexer and parser for every line.
+"""
+import argparse
+
+from bench_utils import format_seconds, print_table, time_per_call
+
+# pylint: disable=wrong-import-position
+from antlr4.error.Errors import (  # type: ignore # noqa: E402
+    ParseCancellationException)
+
+from parse.parse_tree_factory import (create_parse_tree,  # noqa: E402
+                                      create_parser, parse_ll, parse_sll)
+
+CORPUS = {
+    'simple': 'echo hello world',
+    'typical': "grep 'A..' dir1/file1.txt | sort -r | uniq -i",
+    'quoted': 'echo "a `echo b`" \'c d\' e"f"g > out.txt',
+    'long args': 'echo ' + ' '.join(f'arg{i}' for i in range(200)),
+    'long pipe': ' | '.join(['cat file.txt'] + ['sort'] * 50),
+    'long seq': '; '.join(f'echo {i}' for i in range(100)),
+}
+
+
+def parse_fresh(cmdline: str) -> None:
+    """
+    Parses in two stages without reusing a parser context
+    """
+    parser = create_parser(cmdline)
+    try:
+        parse_sll(parser)
+    except ParseCancellationException:
+        parse_ll(parser)
+
+
+def main() -> None:
+    """
+    Runs the benchmark
+    """
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--iterations', type=int, default=20,
+                        help='parses per line per round')
+    args = parser.parse_args()
+
+    rows = []
+    for name, cmdline in CORPUS.items():
+        # warm the DFA caches so that both modes are measured when warm
+        create_parse_tree(cmdline)
+        two_stage = time_per_call(lambda c=cmdline: create_parse_tree(c),
+                                  args.iterations)
+        ll_only = time_per_call(lambda c=cmdline: parse_ll(create_parser(c)),
+                                args.iterations)
+        fresh = time_per_call(lambda c=cmdline: parse_fresh(c),
+                              args.iterations)
+        rows.append((name, len(cmdline), format_seconds(ll_only),
+                     format_seconds(fresh), format_seconds(two_stage),
+                     f'{ll_only / two_stage:.2f}x'))
+    print_table(('line', 'chars', 'LL only', 'SLL then LL (new parser)',
+                 'SLL then LL (reused)', 'speedup'), rows)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,122 @@
+"""
+Benchmarks the latency and throughput of command lines run through the
+sh --serve daemon against starting a new shell with sh -c for each one.
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from io import StringIO
+from typing import Callable
+from unittest.mock import patch
+
+from bench_utils import SRC_DIR, format_seconds, print_table, time_per_call
+
+# pylint: disable=wrong-import-position
+from shell_client import run_client  # noqa: E402
+
+SHELL = os.path.join(SRC_DIR, 'shell.py')
+
+CORPUS = {
+    'simple': 'echo hello world',
+    'quoted': "echo 'hello' \"world\" | cat",
+    'substitution': 'echo `echo hello` | sort',
+}
+
+
+def start_server(path: str, workers: int) -> subprocess.Popen:
+    """
+    Starts the daemon, and waits until it is listening
+    """
+    server = subprocess.Popen([sys.executable, SHELL, '--serve', path,
+                               '--workers', str(workers)])
+    while not os.path.exists(path):
+        if server.poll() is not None:
+            raise RuntimeError('the daemon did not start')
+        time.sleep(0.05)
+    return server
+
+
+def spawn(args: list) -> None:
+    """
+    Runs a new shell process, discarding its output
+    """
+    subprocess.run([sys.executable, SHELL, *args], check=True,
+                   stdout=subprocess.DEVNULL)
+
+
+def in_process_client(path: str, cmdline: str) -> None:
+    """
+    Runs the client without starting a process, like a long-lived caller
+    """
+    with patch('sys.stdout', new_callable=StringIO):
+        run_client(path, cmdline)
+
+
+def throughput(fn: Callable[[], None], requests: int,
+               concurrency: int) -> float:
+    """
+    Returns how many calls of fn per second concurrency threads manage
+    """
+    start = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as pool:
+        list(pool.map(lambda _: fn(), range(requests)))
+    return requests / (time.perf_counter() - start)
+
+
+def main() -> None:
+    """
+    Runs the benchmark
+    """
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--iterations', type=int, default=10,
+                        help='command lines per line per round')
+    parser.add_argument('--workers', type=int, default=4,
+                        help='workers forked by the daemon')
+    parser.add_argument('--requests', type=int, default=200,
+                        help='command lines for the throughput test')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'shell.sock')
+        server = start_server(path, args.workers)
+        try:
+            rows = []
+            for name, cmdline in CORPUS.items():
+                plain = time_per_call(lambda c=cmdline: spawn(['-c', c]),
+                                      args.iterations)
+                client = time_per_call(
+                    lambda c=cmdline: spawn(['--client', path, '-c', c]),
+                    args.iterations)
+                direct = time_per_call(
+                    lambda c=cmdline: in_process_client(path, c),
+                    args.iterations)
+                rows.append((name, format_seconds(plain),
+                             format_seconds(client), format_seconds(direct),
+                             f'{plain / client:.1f}x'))
+            print_table(('line', 'sh -c', 'sh --client', 'in-process client',
+                         'speedup'), rows)
+
+            cmdline = CORPUS['simple']
+            modes = {
+                'sh -c': lambda: spawn(['-c', cmdline]),
+                'sh --client': lambda: spawn(['--client', path, '-c',
+                                              cmdline]),
+                'in-process client': lambda: in_process_client(path,
+                                                               cmdline),
+            }
+            print()
+            print_table(
+                ('mode', f'command lines/s ({args.workers} at a time)'),
+                [(mode, f'{throughput(fn, args.requests, args.workers):.0f}')
+                 for mode, fn in modes.items()])
+        finally:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+"""
+Benchmarks pipelines of CPU bound stages, such as
+cat FILE | grep PATTERN | sed s/A/B/ | cut -b 1-20, on files of growing size,
+with every stage on a thread of the shell, and with grep, sed and cut in their
+own processes, as with sh --stage-procs. Threads share one core, so the
+processes should be faster once there is enough text to cover forking them.
+"""
+import argparse
+import os
+import tempfile
+from io import StringIO
+
+from bench_utils import format_seconds, print_table, time_per_call
+
+# pylint: disable=wrong-import-position
+from python_shell import PythonShell  # noqa: E402
+
+SIZES = (10_000, 100_000, 1_000_000)
+LINE = 'the quick brown fox jumps over the lazy dog 0123456789\n'
+CMDLINE = 'cat {} | grep o | sed s/fox/cat/ | sed s/dog/cow/ | cut -b 1-20 ' \
+    '| wc -l'
+
+
+def run(shell: PythonShell, cmdline: str) -> None:
+    """
+    Evaluates a command line, with a fresh input stream, as running a command
+    line closes it
+    """
+    shell.in_stream = StringIO()
+    shell.eval(cmdline)
+
+
+def main() -> None:
+    """
+    Runs the benchmark
+    """
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--iterations', type=int, default=1,
+                        help='runs per size per round')
+    args = parser.parse_args()
+
+    threads = PythonShell(StringIO(), StringIO())
+    processes = PythonShell(StringIO(), StringIO(), stage_processes=True)
+    rows = []
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'input.txt')
+        for size in SIZES:
+            with open(path, 'w', encoding='utf-8') as file:
+                file.write(LINE * size)
+            cmdline = CMDLINE.format(path)
+            on_threads = time_per_call(lambda: run(threads, cmdline),
+                                       args.iterations)
+            in_processes = time_per_call(lambda: run(processes, cmdline),
+                                         args.iterations)
+            rows.append([size, format_seconds(on_threads),
+                         format_seconds(in_processes),
+                         f'{on_threads / in_processes:.2f}x'])
+    print(CMDLINE.format('FILE'))
+    print_table(['lines', 'threads', 'processes', 'speedup'], rows)
+
+
+if __name__ == '__main__':
+    main()
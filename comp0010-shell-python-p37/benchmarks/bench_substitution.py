@@ -0,0 +1,75 @@
+"""
+Benchmarks parsing a command line whose substitution outputs many words.
+The words are passed to the RunnerVisitor as arguments, so the time per word
+should stay flat as the output grows. For comparison, the words are also
+spliced back into the command line and parsed again, as the shell used to.
+Plain words like these take the fast path when re-parsed, so the difference
+shows the cost of splicing rather than of ANTLR.
+"""
+import argparse
+import os
+import tempfile
+
+from bench_utils import format_seconds, print_table, time_per_call
+
+# pylint: disable=wrong-import-position
+from commands.builder import Builder  # noqa: E402
+from commands.command_registry import get_command_registry  # noqa: E402
+from parse.parse_tree_factory import create_parse_tree  # noqa: E402
+from parse.raw_shell_parser import RawShellParser  # noqa: E402
+from parse.runner_visitor import RunnerVisitor  # noqa: E402
+from parse.substitution_visitor import SubstitutionVisitor  # noqa: E402
+
+SIZES = (1_000, 10_000, 100_000)
+CMDLINE = 'echo `cat words.txt`'
+
+
+def parse_words(cmdline: str) -> Builder:
+    """
+    Parses the command line once, passing the substituted words on
+    """
+    tree = create_parse_tree(cmdline)
+    substitutions = SubstitutionVisitor().visit(tree)
+    return RunnerVisitor(get_command_registry(), substitutions).visit(tree)
+
+
+def parse_spliced(cmdline: str) -> Builder:
+    """
+    Splices the substituted words back into the command line, and parses it
+    again
+    """
+    tree = create_parse_tree(cmdline)
+    words = next(iter(SubstitutionVisitor().visit(tree).values()))
+    return RawShellParser().parse('echo ' + ' '.join(words))
+
+
+def main() -> None:
+    """
+    Runs the benchmark
+    """
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--iterations', type=int, default=3,
+                        help='parses per size per round')
+    args = parser.parse_args()
+
+    rows = []
+    with tempfile.TemporaryDirectory() as directory:
+        os.chdir(directory)
+        for size in SIZES:
+            with open('words.txt', 'w', encoding='utf-8') as words:
+                words.write(''.join(f'file{i}.csv\n' for i in range(size)))
+            assert parse_words(CMDLINE).options == \
+                parse_spliced(CMDLINE).options
+            tokenised = time_per_call(lambda: parse_words(CMDLINE),
+                                      args.iterations)
+            spliced = time_per_call(lambda: parse_spliced(CMDLINE),
+                                    args.iterations)
+            rows.append((size, format_seconds(tokenised),
+                         format_seconds(tokenised / size),
+                         format_seconds(spliced)))
+    print_table(('words', 'as arguments', 'per word',
+                 'spliced and re-parsed'), rows)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+"""
+Benchmarks tail on files of growing size, and on the same files piped in.
+Files are read backwards from their end, so tail -n and tail -c on a file
+should take the same time whatever its size, while piped input has to be
+read in full.
+"""
+import argparse
+import os
+import tempfile
+from io import StringIO
+
+from bench_utils import format_seconds, print_table, time_per_call
+
+# pylint: disable=wrong-import-position
+from python_shell import PythonShell  # noqa: E402
+
+SIZES = (10_000, 100_000, 1_000_000)
+LINE = 'the quick brown fox jumps over the lazy dog 0123456789\n'
+CMDLINES = (
+    'tail -n 10 {}',
+    'tail -n 1000 {} > /dev/null',
+    'tail -c 100 {}',
+    'cat {} | tail -n 10',
+)
+
+
+def run(shell: PythonShell, cmdline: str) -> None:
+    """
+    Evaluates a command line, with a fresh input and output stream, as
+    running a command line closes them
+    """
+    shell.in_stream = StringIO()
+    shell.out_stream = StringIO()
+    shell.eval(cmdline)
+
+
+def main() -> None:
+    """
+    Runs the benchmark
+    """
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--iterations', type=int, default=5,
+                        help='runs per command per size per round')
+    args = parser.parse_args()
+
+    shell = PythonShell(StringIO(), StringIO())
+    rows = []
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'input.txt')
+        for size in SIZES:
+            with open(path, 'w', encoding='utf-8') as file:
+                file.write(LINE * size)
+            for template in CMDLINES:
+                cmdline = template.format(path)
+                seconds = time_per_call(lambda: run(shell, cmdline),
+                                        args.iterations)
+                rows.append([template.format('FILE'), size,
+                             format_seconds(seconds)])
+    print_table(['command', 'lines', 'time'], rows)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,52 @@
+"""
+Helpers shared by the benchmark scripts. Benchmarks are run by hand, e.g.
+
+    python benchmarks/bench_parser.py
+
+and are not part of the unit tests.
+"""
+import os
+import sys
+import time
+from typing import Callable, List, Sequence
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.realpath(__file__)), '..',
+                       'src')
+
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
+
+
+def time_per_call(fn: Callable[[], object], iterations: int) -> float:
+    """
+    Times fn, returning the best mean time per call in seconds over three
+    rounds of the given number of iterations.
+    """
+    best = float('inf')
+    for _ in range(3):
+        start = time.perf_counter()
+        for _ in range(iterations):
+            fn()
+        best = min(best, (time.perf_counter() - start) / iterations)
+    return best
+
+
+def print_table(headers: Sequence[str], rows: List[Sequence[object]]) -> None:
+    """
+    Prints rows as a left-aligned plain text table.
+    """
+    cells = [list(map(str, headers))] + [list(map(str, row)) for row in rows]
+    widths = [max(len(row[i]) for row in cells) for i in range(len(headers))]
+    for row in cells:
+        print('  '.join(cell.ljust(width) for cell, width in zip(row, widths)))
+
+
+def format_seconds(seconds: float) -> str:
+    """
+    Formats a duration with a unit that keeps it readable.
+    """
+    if seconds < 1e-3:
+        return f'{seconds * 1e6:.1f}us'
+    if seconds < 1:
+        return f'{seconds * 1e3:.2f}ms'
+    return f'{seconds:.2f}s'
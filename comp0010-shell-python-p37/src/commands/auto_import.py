@@ -14,6 +14,9 @@ class AutoImport:
     """
     A Class which reads from the commands directory, and returns a list of
     class objects for the shell commands which have been correctly implemented
+
+    This is slow, and is only used to generate the command manifest. The shell
+    itself looks commands up through the CommandRegistry.
     """
 
     def __init__(self):
@@ -24,7 +27,8 @@ class AutoImport:
 
         self.directory = os.path.dirname(__file__)
 
-        sys.path.append(self.directory)
+        if self.directory not in sys.path:
+            sys.path.append(self.directory)
 
     def get_command_objects(self) -> List[type]:
         """
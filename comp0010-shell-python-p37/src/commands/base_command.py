@@ -3,16 +3,23 @@ Interface: A base command. Uses the chain of responsibilty + command
 architecture
 """
 from abc import abstractmethod
-from io import StringIO
-from typing import Generic, List, TypeVar
+from io import BytesIO, StringIO
+from threading import Thread
+from typing import (Any, Generic, Iterable, Iterator, List, Optional, TypeVar,
+                    cast)
 
 from errors import check_arguments
 from flag import FlagSpecification, FlagValue, WildcardFlagSpecification
 
+from .byte_streams import byte_output
+from .channel import ByteChannel, Channel, TextChannel
 from .command_spec import AbstractCommandSpecification, CommandSpecification
+from .idle_flush import flushed_when_idle
+from .read_tracker import carry_tracker
 from .runnable import Runnable
 
 T = TypeVar("T", bool, str, int, float, List[str], List[int], List[float])
+X = TypeVar("X")
 HELP_TEXT_FORMAT = """
 Usage: {:s} {:s}
 {:s}
@@ -45,6 +52,20 @@ class BaseCommand(Runnable, Generic[T]):
     HELP_FLAG = FlagSpecification("h", str, "Displays this help text")
     COMMAND_SPECIFICATION: CommandSpecification = \
         AbstractCommandSpecification()
+    # Whether running the command can change the state of the shell, such as
+    # its working directory. See Builder.mutates_shell_state()
+    MUTATES_SHELL_STATE = False
+    # Whether the command spends its time working on its input rather than
+    # waiting for it, so that it is worth running in its own process as a
+    # stage of a pipeline. See ProcessStage
+    CPU_BOUND = False
+    # Whether the command reads and writes bytes rather than text, through
+    # byte_input() and byte_output(), so that it can be given binary streams
+    # and nothing has to be decoded for it. See commands/byte_streams.py
+    BYTES_NATIVE = False
+    # Whether the command implements iter_lines() itself, so that it can be
+    # chained with other such commands on one thread. See LineChain
+    ITER_LINES = False
 
     @check_arguments
     def __init__(
@@ -78,6 +99,92 @@ class BaseCommand(Runnable, Generic[T]):
         """
         raise NotImplementedError("Subclasses must implement this method.")
 
+    def iter_lines(self, lines: Optional[Iterable[Any]] = None
+                   ) -> Iterator[Any]:
+        """
+        The pull-based form of run(): yields the lines of the output as they
+        are asked for, reading no more lines of the input than it needs to.
+        Lines are bytes if the command is BYTES_NATIVE, or text otherwise.
+
+        Commands that set ITER_LINES implement this themselves. Otherwise, the
+        command is run on its own thread, and the lines it writes are yielded
+        as they come. Closing the iterator early cancels the command.
+
+        Args:
+            lines (Optional[Iterable[Any]]): The lines of the input, or None
+                                             to read the input stream of the
+                                             command
+
+        Returns:
+            Iterator[Any]: The lines of the output
+        """
+        if lines is not None:
+            # Commands that do not implement this read their input as a whole
+            self.input = cast(StringIO, BytesIO(b''.join(lines))
+                              if self.BYTES_NATIVE
+                              else StringIO(''.join(lines)))
+        channel: Channel
+        if self.BYTES_NATIVE:
+            channel = ByteChannel()
+        else:
+            channel = TextChannel()
+        self.output = cast(StringIO, channel.writer)
+        errors: List[BaseException] = []
+
+        def produce() -> None:
+            try:
+                with flushed_when_idle(channel.writer):
+                    self.run()
+            except BrokenPipeError:
+                pass  # nothing reads the lines any more
+            # Errors are raised on the thread reading the lines instead
+            except BaseException as error:  # pylint: disable=broad-except
+                errors.append(error)
+            finally:
+                channel.writer.close()
+
+        thread = Thread(target=carry_tracker(produce),
+                        name=f'{type(self).__name__}-lines', daemon=True)
+        thread.start()
+        try:
+            yield from channel.reader
+        finally:
+            channel.reader.close()
+            self.cancel()
+            thread.join()
+        if errors:
+            raise errors[0]
+
+    def write_lines(self, lines: Iterable[Any]) -> None:
+        """
+        Writes lines to the output, such as those yielded by iter_lines()
+
+        Args:
+            lines (Iterable[Any]): The lines, which are bytes if the command
+                                   is BYTES_NATIVE, or text otherwise
+        """
+        if self.BYTES_NATIVE:
+            with byte_output(self.output) as output:
+                output.writelines(lines)
+        else:
+            self.output.writelines(lines)
+
+    def until_cancelled(self, items: Iterable[X]) -> Iterator[X]:
+        """
+        Yields items, such as the lines of the input, until the command is
+        cancelled, so that it stops reading promptly. See Runnable.cancel()
+
+        Args:
+            items (Iterable[X]): The items to go through
+
+        Returns:
+            Iterator[X]: The items, up to the first after the cancellation
+        """
+        for item in items:
+            if self.cancelled:
+                return
+            yield item
+
     def help(self) -> str:
         """
         Gets the helptext returned to the user whenever they run command --help
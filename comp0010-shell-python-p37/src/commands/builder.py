@@ -3,12 +3,13 @@ Interface: The builder interface for multiple builders available.
 
 Intended for:
 - CommandBuilder
-- PipeBuilder
-- SeqBuilder
+- PipeBuilder and PipelineBuilder
+- SeqBuilder and SequenceBuilder
 """
 
 from abc import ABC, abstractmethod
 from io import TextIOBase
+from typing import List
 
 from typing_extensions import Self
 
@@ -38,6 +39,40 @@ class Builder(ABC):
         """
         raise NotImplementedError('subclasses should implement this class')
 
+    def clone(self) -> 'Builder':  # pragma: no cover
+        """
+        Creates an unbuilt copy of this builder and every builder it wraps,
+        with fresh streams. Used to cache parsed command lines as templates.
+
+        Returns:
+            Builder: An independent copy of this builder
+        """
+        raise NotImplementedError('this builder cannot be cloned')
+
+    def mutates_shell_state(self) -> bool:
+        """
+        Whether running the built runnable can change anything that other
+        command lines can see, such as the working directory or files. Only
+        command lines that do not can be run concurrently with others.
+
+        Builders that cannot tell are assumed to.
+
+        Returns:
+            bool: Whether the runnable can change the state of the shell
+        """
+        return True
+
+    def handles_bytes(self) -> bool:
+        """
+        Whether the built runnable can read and write binary streams as well
+        as text streams, so that it can be connected to another such runnable
+        without decoding what passes between them.
+
+        Returns:
+            bool: Whether the runnable works on bytes
+        """
+        return False
+
     @abstractmethod
     def set_in_stream(self, in_stream: TextIOBase) -> Self:  # pragma: no cover
         """
@@ -58,3 +93,29 @@ class Builder(ABC):
             out_stream (StringIO): The output stream for writing data
         """
         raise NotImplementedError('subclasses should implement this class')
+
+
+def flatten_builders(builders: List[Builder],
+                     builder_type: type) -> List[Builder]:
+    """
+    Replaces every builder of builder_type in builders with the builders it
+    holds, at any depth. This uses a stack rather than recursion, so that
+    deeply nested builders cannot hit the recursion limit.
+
+    Args:
+        builders (List[Builder]): The builders to flatten
+        builder_type (type): The type of builder to flatten, which must keep
+                             its builders in a list called builders
+
+    Returns:
+        List[Builder]: The flattened builders, in order
+    """
+    flattened: List[Builder] = []
+    stack = list(reversed(builders))
+    while stack:
+        builder = stack.pop()
+        if isinstance(builder, builder_type):
+            stack.extend(reversed(getattr(builder, 'builders')))
+        else:
+            flattened.append(builder)
+    return flattened
@@ -0,0 +1,173 @@
+"""
+Binary views of the streams of a command, for commands that work on bytes
+rather than text, which declare BaseCommand.BYTES_NATIVE.
+
+Most streams of the shell carry text. The files redirected to and from a
+command that works on bytes, and the channels between two such commands in a
+pipeline, carry bytes instead, so nothing is decoded on the way. Text streams
+are only encoded and decoded at the edge, where a command that works on bytes
+meets one that works on text.
+
+Text is encoded as UTF-8, with surrogateescape, so bytes that are not valid
+UTF-8, such as half a character cut by cut -b, come out exactly as they went
+in.
+"""
+import codecs
+from contextlib import contextmanager
+from io import (BufferedIOBase, BufferedReader, BufferedWriter, FileIO,
+                RawIOBase, TextIOBase)
+from typing import IO, Iterator, Union, cast
+
+from .idle_flush import flushed_when_idle
+
+ENCODING = 'utf-8'
+ERRORS = 'surrogateescape'
+# How much text is encoded or decoded at a time
+CODING_CHUNK_SIZE = 1 << 16
+
+AnyStream = Union[IO, TextIOBase, BufferedIOBase]
+
+
+def is_binary(stream: AnyStream) -> bool:
+    """
+    Checks whether a stream carries bytes rather than text
+    """
+    return isinstance(stream, BufferedIOBase)
+
+
+class _EncodingReader(RawIOBase):
+    """
+    Reads a text stream as the bytes encoding it
+
+    Args:
+        stream (TextIOBase): The text stream to read
+        whole_lines (bool): Whether to read the text stream a line at a time,
+                            so that no more is taken from it than the lines
+                            read from the binary stream
+    """
+
+    def __init__(self, stream: TextIOBase, whole_lines: bool) -> None:
+        super().__init__()
+        self.stream = stream
+        # Streams that can return what is ready, such as channels, do, so
+        # that text trickling in is passed on as it comes
+        self._read = stream.readline if whole_lines \
+            else getattr(stream, 'read1', stream.read)
+        self._pending = memoryview(b'')
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:  # type: ignore[no-untyped-def]
+        """
+        Fills buffer with the encoding of the next text read
+        """
+        while not self._pending:
+            text = self._read(CODING_CHUNK_SIZE)
+            if not text:
+                return 0
+            self._pending = memoryview(text.encode(ENCODING, ERRORS))
+        size = min(len(buffer), len(self._pending))
+        buffer[:size] = self._pending[:size]
+        self._pending = self._pending[size:]
+        return size
+
+
+class _DecodingWriter(RawIOBase):
+    """
+    Writes bytes to a text stream, decoding them as they come. Characters
+    split between two writes are decoded once they are whole.
+    """
+
+    def __init__(self, stream: TextIOBase) -> None:
+        super().__init__()
+        self.stream = stream
+        self._decoder = codecs.getincrementaldecoder(ENCODING)(ERRORS)
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:  # type: ignore[no-untyped-def]
+        """
+        Writes the decoding of data to the text stream
+        """
+        text = self._decoder.decode(bytes(data))
+        if text:
+            self.stream.write(text)
+        return len(data)
+
+    def finish(self) -> None:
+        """
+        Writes whatever is left of a character split at the end
+        """
+        text = self._decoder.decode(b'', True)
+        if text:
+            self.stream.write(text)
+
+
+def byte_input(stream: AnyStream, whole_lines: bool = False
+               ) -> BufferedIOBase:
+    """
+    Gets a binary stream to read the input of a command from.
+
+    Args:
+        stream (AnyStream): The input of the command, text or binary
+        whole_lines (bool): Whether to take no more from a text stream than
+                            the lines read, for commands that stop reading
+                            early, so the rest is left for whoever reads next
+
+    Returns:
+        BufferedIOBase: The stream itself if it is binary, or the encoding of
+                        the text read from it otherwise
+    """
+    if isinstance(stream, BufferedIOBase):
+        return stream
+    return BufferedReader(_EncodingReader(cast(TextIOBase, stream),
+                                          whole_lines),
+                          CODING_CHUNK_SIZE)
+
+
+@contextmanager
+def byte_output(stream: AnyStream) -> Iterator[BufferedIOBase]:
+    """
+    Gets a binary stream to write the output of a command to, while the
+    context is active. Everything written is passed on when it ends, or
+    whenever the command waits for input, see idle_flush.py.
+
+    Args:
+        stream (AnyStream): The output of the command, text or binary
+
+    Returns:
+        Iterator[BufferedIOBase]: The stream itself if it is binary, the
+                                  binary buffer under a UTF-8 text stream,
+                                  such as a file, or a stream decoding bytes
+                                  into text otherwise
+    """
+    if isinstance(stream, BufferedIOBase):
+        yield stream
+        return
+    buffer = getattr(stream, 'buffer', None)
+    encoding = getattr(stream, 'encoding', None)
+    if isinstance(buffer, (BufferedIOBase, FileIO)) and \
+            encoding is not None and codecs.lookup(encoding).name == ENCODING:
+        # Anything written as text must reach the file first
+        stream.flush()
+        if isinstance(buffer, BufferedIOBase):
+            with flushed_when_idle(buffer):
+                yield buffer
+            return
+        # Unbuffered text streams, as with python -u, sit on a raw file,
+        # which may write only part of what it is given, so the file is
+        # written through a buffer of its own, leaving it open when done
+        with open(buffer.fileno(), 'wb', closefd=False) as buffered, \
+                flushed_when_idle(buffered):
+            yield buffered
+        return
+    raw = _DecodingWriter(cast(TextIOBase, stream))
+    writer = BufferedWriter(raw, CODING_CHUNK_SIZE)
+    try:
+        with flushed_when_idle(writer):
+            yield writer
+    finally:
+        writer.flush()
+        raw.finish()
@@ -1,14 +1,20 @@
 """
 module for the cat command, which implements the BaseCommand interface
 """
-from io import StringIO
-from typing import List
+from functools import partial
+from io import BufferedIOBase, StringIO
+from typing import Iterable, Iterator, List, Optional, Union
 
 from commands.base_command import BaseCommand
-from commands.command_helpers import exception_handled_open, is_stream_empty
+from commands.byte_streams import byte_input, byte_output
+from commands.command_helpers import FileSource, is_stream_empty, peek
 from commands.command_spec import CommandSpecification
 from errors.command_errors import CommandError, UnknownFlagError
 from flag import FlagValue
+from stdin_source import StdinSource
+
+# How many bytes are copied at a time
+COPY_CHUNK_SIZE = 1 << 16
 
 
 class CAT(BaseCommand):
@@ -19,6 +25,8 @@ class CAT(BaseCommand):
     COMMAND_SPECIFICATION = CommandSpecification(
         "cat", [], ("[FILE]...", "Concatenate FILE(s) to standard output.")
     )
+    BYTES_NATIVE = True
+    ITER_LINES = True
 
     def __init__(
         self,
@@ -40,6 +48,58 @@ class CAT(BaseCommand):
         if self.flags:
             raise UnknownFlagError
 
+    def _copy(self, chunks: Iterable[Union[bytes, memoryview]],
+              output: BufferedIOBase) -> None:
+        """
+        Copies chunks to output one at a time, which keeps memory bounded and
+        lets the next stage of a pipeline start on the first chunk. Stops
+        early if the command is cancelled.
+
+        Args:
+            chunks (Iterable[Union[bytes, memoryview]]): What to copy
+            output (BufferedIOBase): Where to copy it to
+        """
+        for chunk in self.until_cancelled(chunks):
+            output.write(chunk)
+
+    def _reads_stdin(self) -> bool:
+        """
+        Whether to read the input rather than the files. The input is read if
+        there is any, but the shell's own stdin only if there are no files,
+        like in other shells, as it may never be written to.
+        """
+        if isinstance(self.input, StdinSource):
+            return not self.options
+        return not is_stream_empty(self.input)
+
+    def iter_lines(self, lines: Optional[Iterable[bytes]] = None
+                   ) -> Iterator[bytes]:
+        """
+        see BaseCommand.iter_lines()
+
+        Like run(), the lines of the input are passed on if there are any, or
+        those of the files otherwise.
+        """
+        stdin: Optional[Iterable[bytes]]
+        if lines is not None:
+            stdin = peek(lines)
+        elif not self._reads_stdin():
+            stdin = None
+        else:
+            stdin = byte_input(self.input, whole_lines=True)
+        if stdin is not None:
+            yield from self.until_cancelled(stdin)
+            return
+
+        if not self.options:
+            raise CommandError("cat requires a file passed as an option")
+
+        for option in self.options:
+            if self.cancelled:
+                break
+            with FileSource(option) as file:
+                yield from self.until_cancelled(file.lines())
+
     def run(self) -> int:
         """
         see BaseCommand.run()
@@ -47,16 +107,23 @@ class CAT(BaseCommand):
             ShellFileNotFoundError: if the file option does not exist
             CommandError: if invalid or no options are provided
         """
-        if not is_stream_empty(self.input):
-            self.output.write(self.input.read())
+        if self._reads_stdin():
+            source = byte_input(self.input)
+            with byte_output(self.output) as output:
+                # What is ready is copied, rather than waiting to fill a
+                # chunk, so input trickling in is passed on as it comes
+                self._copy(iter(partial(source.read1, COPY_CHUNK_SIZE), b''),
+                           output)
             return 0
 
         if not self.options:
             raise CommandError("cat requires a file passed as an option")
 
-        for option in self.options:
-            with exception_handled_open(option, 'r') as file:
-                self.output.write(file.read())
-
-            self.output.write("")
+        with byte_output(self.output) as output:
+            for option in self.options:
+                if self.cancelled:
+                    break
+                # Mapped files are written straight from the mapping
+                with FileSource(option) as file:
+                    self._copy(file.chunks(COPY_CHUNK_SIZE), output)
         return 0
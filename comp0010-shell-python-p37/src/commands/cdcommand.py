@@ -23,6 +23,7 @@ class CD(BaseCommand):
         CommandSpecification("cd", [], (
             "PATH", "Change the current working directory\n  "
             "PATH is a relative path to the target directory"))
+    MUTATES_SHELL_STATE = True
 
     def __init__(self, in_stream: StringIO, out_stream: StringIO,
                  flags: List[FlagValue], options: List[str]) -> None:
@@ -0,0 +1,401 @@
+"""
+A bounded, thread-safe channel of text, which connects the stages of a
+pipeline that run at the same time.
+
+The writing stage writes to the channel's writer, and the reading stage reads
+from its reader, like the two ends of a Unix pipe. Once the channel holds
+capacity characters, writing blocks until the reader catches up, so a stage
+can never get far ahead of the next one. Closing the writer ends the input of
+the reader. Closing the reader throws away anything not read yet, and writing
+after that raises BrokenPipeError, like writing to a pipe nobody reads.
+
+The writer passes on what is written in chunks, or whenever it is flushed.
+Before the reader waits for more, whatever the reading stage has written is
+flushed, see idle_flush.py, so what trickles in flows on through the stages.
+
+A ByteChannel carries bytes instead, between two stages that both work on
+bytes, so that nothing is decoded and encoded again in between. Its ends are
+binary streams, but otherwise behave exactly like those of a TextChannel.
+"""
+from collections import deque
+from io import BufferedIOBase, BytesIO, StringIO, TextIOBase
+from threading import Condition
+from typing import Any, AnyStr, Deque, Generic, Iterator, List, Optional
+
+from .idle_flush import flush_idle_outputs
+
+# How many characters a channel holds before writing blocks
+DEFAULT_CHANNEL_CAPACITY = 1 << 16
+# How many characters the writer collects before passing them on, so that
+# stages writing one line at a time do not take the lock for every line
+CHUNK_SIZE = 1 << 13
+
+
+class Channel(Generic[AnyStr]):
+    """
+    A channel of chunks of text or bytes between two threads. Use TextChannel
+    or ByteChannel, which create the two ends.
+
+    Args:
+        capacity (Optional[int]): How many characters or bytes the channel
+                                  holds before writing blocks, or None to
+                                  never block, for stages that run one after
+                                  another
+    """
+
+    reader: '_ChannelReader[AnyStr]'
+    writer: '_ChannelWriter[AnyStr]'
+
+    def __init__(self,
+                 capacity: Optional[int] = DEFAULT_CHANNEL_CAPACITY) -> None:
+        self.capacity = capacity
+        self._chunks: Deque[AnyStr] = deque()
+        self._size = 0
+        self._reader_closed = False
+        self._writer_closed = False
+        self._condition = Condition()
+
+    def put(self, chunk: AnyStr) -> None:
+        """
+        Adds a chunk, waiting for there to be room for it.
+
+        Raises:
+            BrokenPipeError: If the reader is closed, even while waiting
+        """
+        with self._condition:
+            while self.capacity is not None and self._size >= self.capacity \
+                    and not self._reader_closed:
+                self._condition.wait()
+            if self._reader_closed:
+                raise BrokenPipeError('the reader of the channel is closed')
+            self._chunks.append(chunk)
+            self._size += len(chunk)
+            self._condition.notify_all()
+
+    def get(self, consume: bool = True) -> Optional[AnyStr]:
+        """
+        Gets the next chunk, waiting for one to be written.
+
+        Args:
+            consume (bool): Whether to take the chunk out of the channel,
+                            rather than only wait for it
+
+        Returns:
+            Optional[AnyStr]: The chunk, or None once the writer is closed and
+                              every chunk has been read
+        """
+        with self._condition:
+            waiting = not self._chunks and not self._writer_closed
+        if waiting:
+            flush_idle_outputs()
+        with self._condition:
+            while not self._chunks and not self._writer_closed:
+                self._condition.wait()
+            if not self._chunks:
+                return None
+            if not consume:
+                return self._chunks[0]
+            chunk = self._chunks.popleft()
+            self._size -= len(chunk)
+            self._condition.notify_all()
+            return chunk
+
+    def close_writer(self) -> None:
+        """
+        Ends the input of the reader, once it has read every chunk
+        """
+        with self._condition:
+            self._writer_closed = True
+            self._condition.notify_all()
+
+    def close_reader(self) -> None:
+        """
+        Throws away every chunk, and stops the writer from waiting on a
+        reader that has stopped reading
+        """
+        with self._condition:
+            self._reader_closed = True
+            self._chunks.clear()
+            self._size = 0
+            self._condition.notify_all()
+
+
+class TextChannel(Channel[str]):
+    """
+    A channel of text between two threads.
+
+    Args:
+        capacity (Optional[int]): How many characters the channel holds
+                                  before writing blocks, or None to never
+                                  block, for stages that run one after
+                                  another
+    """
+
+    def __init__(self,
+                 capacity: Optional[int] = DEFAULT_CHANNEL_CAPACITY) -> None:
+        super().__init__(capacity)
+        self.reader: ChannelReader = ChannelReader(self)
+        self.writer: ChannelWriter = ChannelWriter(self)
+
+
+class ByteChannel(Channel[bytes]):
+    """
+    A channel of bytes between two threads.
+
+    Args:
+        capacity (Optional[int]): How many bytes the channel holds before
+                                  writing blocks, or None to never block
+    """
+
+    def __init__(self,
+                 capacity: Optional[int] = DEFAULT_CHANNEL_CAPACITY) -> None:
+        super().__init__(capacity)
+        self.reader: ByteChannelReader = ByteChannelReader(self)
+        self.writer: ByteChannelWriter = ByteChannelWriter(self)
+
+
+class _ChannelWriter(Generic[AnyStr]):
+    """
+    The end of a channel that a stage writes to, for either kind of channel.
+    The stream base class comes after this class, so these methods win.
+    """
+    EMPTY: Any = ''
+    closed: bool
+
+    def __init__(self, channel: Channel[AnyStr]) -> None:
+        super().__init__()
+        self.channel: Channel[AnyStr] = channel
+        self._buffer: List[AnyStr] = []
+        self._buffered = 0
+
+    def writable(self) -> bool:
+        """
+        see IOBase.writable()
+        """
+        return True
+
+    def write(self, data: AnyStr) -> int:
+        """
+        Writes to the channel, passing it on in chunks
+        """
+        if self.closed:
+            raise ValueError('write to closed channel')
+        self._buffer.append(data)
+        self._buffered += len(data)
+        if self._buffered >= CHUNK_SIZE:
+            self.flush()
+        return len(data)
+
+    def flush(self) -> None:
+        """
+        Passes on everything written so far
+        """
+        if self._buffered:
+            chunk = self.EMPTY.join(self._buffer)
+            self._buffer = []
+            self._buffered = 0
+            self.channel.put(chunk)
+
+    def close(self) -> None:
+        """
+        Passes on everything written, and ends the input of the reader.
+        Whatever is left is thrown away if the reader is already closed.
+        """
+        if not self.closed:
+            try:
+                super().close()  # type: ignore[misc]
+            except BrokenPipeError:
+                pass
+            finally:
+                self.channel.close_writer()
+
+
+class _ChannelReader(Generic[AnyStr]):
+    """
+    The end of a channel that a stage reads from, for either kind of channel.
+    The stream base class comes after this class, so these methods win.
+    """
+    EMPTY: Any = ''
+    NEWLINE: Any = '\n'
+    closed: bool
+
+    def __init__(self, channel: Channel[AnyStr]) -> None:
+        super().__init__()
+        self.channel: Channel[AnyStr] = channel
+        self._pending: AnyStr = self.EMPTY
+        self._offset = 0
+
+    def readable(self) -> bool:
+        """
+        see IOBase.readable()
+        """
+        return True
+
+    def at_eof(self) -> bool:
+        """
+        Waits until there is something to read, or the writer is closed.
+
+        Returns:
+            bool: Whether nothing more will ever be read
+        """
+        self._check_open()
+        return self._offset == len(self._pending) and \
+            self.channel.get(consume=False) is None
+
+    def read(self, size: Optional[int] = -1) -> AnyStr:
+        """
+        Reads up to size characters or bytes, or until the writer is closed
+        if size is negative or None
+        """
+        self._check_open()
+        if size is None or size < 0:
+            parts = [self._take(len(self._pending))]
+            while True:
+                chunk = self.channel.get()
+                if chunk is None:
+                    return self.EMPTY.join(parts)
+                parts.append(chunk)
+        parts = []
+        while size > 0:
+            if self._offset == len(self._pending) and \
+                    not self._next_chunk():
+                break
+            parts.append(self._take(size))
+            size -= len(parts[-1])
+        return self.EMPTY.join(parts)
+
+    def read1(self, size: int = -1) -> AnyStr:
+        """
+        Reads up to size characters or bytes, from at most one chunk, so only
+        waits for more if nothing is left to read
+        """
+        self._check_open()
+        if self._offset == len(self._pending) and not self._next_chunk():
+            return self.EMPTY
+        return self._take(len(self._pending) if size < 0 else size)
+
+    def readline(self, size: Optional[int] = -1) -> AnyStr:
+        """
+        Reads up to and including the next newline, or until the writer is
+        closed
+        """
+        self._check_open()
+        parts: List[AnyStr] = []
+        while True:
+            end = self._pending.find(self.NEWLINE, self._offset)
+            if end != -1:
+                parts.append(self._take(end + 1 - self._offset))
+                break
+            parts.append(self._take(len(self._pending)))
+            if not self._next_chunk():
+                break
+        line = self.EMPTY.join(parts)
+        if size is not None and 0 <= size < len(line):
+            # Put back what does not fit, ahead of the pending text
+            self._pending = line[size:] + self._pending[self._offset:]
+            self._offset = 0
+            line = line[:size]
+        return line
+
+    def __iter__(self) -> Iterator[AnyStr]:
+        self._check_open()
+        return self._lines()
+
+    def _split_lines(self, block: AnyStr) -> Iterator[AnyStr]:
+        """
+        Splits a block of whole lines into lines, ending only at newlines
+        """
+        raise NotImplementedError  # pragma: no cover
+
+    def _lines(self) -> Iterator[AnyStr]:
+        """
+        Yields every line, splitting whole chunks into lines at once, which is
+        much faster than calling readline for every line. Reading the channel
+        any other way in between carries on from where that left off.
+        """
+        while True:
+            pending, offset = self._pending, self._offset
+            end = pending.rfind(self.NEWLINE, offset)
+            if end == -1:
+                # The line carries on in the next chunk
+                line = self.readline()
+                if not line:
+                    return
+                yield line
+                continue
+            for line in self._split_lines(pending[offset:end + 1]):
+                offset += len(line)
+                self._offset = offset
+                yield line
+                if self._offset != offset or self._pending is not pending:
+                    break
+
+    def close(self) -> None:
+        """
+        Stops reading, so that the writer no longer waits for room
+        """
+        if not self.closed:
+            super().close()  # type: ignore[misc]
+            self.channel.close_reader()
+
+    def _check_open(self) -> None:
+        if self.closed:
+            raise ValueError('read from closed channel')
+
+    def _take(self, size: int) -> AnyStr:
+        """
+        Takes up to size characters or bytes of the pending chunk
+        """
+        end = min(self._offset + size, len(self._pending))
+        text = self._pending[self._offset:end]
+        self._offset = end
+        return text
+
+    def _next_chunk(self) -> bool:
+        """
+        Replaces the pending chunk with the next one, if there is one
+        """
+        chunk = self.channel.get()
+        self._pending = self.EMPTY if chunk is None else chunk
+        self._offset = 0
+        return bool(self._pending)
+
+
+class ChannelWriter(_ChannelWriter[str], TextIOBase):
+    """
+    The end of a text channel that a stage writes to
+    """
+
+
+class ChannelReader(  # type: ignore[misc]
+        _ChannelReader[str], TextIOBase):
+    """
+    The end of a text channel that a stage reads from
+    """
+
+    def _split_lines(self, block: str) -> Iterator[str]:
+        return iter(StringIO(block, newline='\n'))
+
+
+class ByteChannelWriter(  # type: ignore[misc]
+        _ChannelWriter[bytes], BufferedIOBase):
+    """
+    The end of a byte channel that a stage writes to
+    """
+    EMPTY = b''
+
+    def write(self, data: bytes) -> int:  # type: ignore[override]
+        # Memory views may be of buffers that the caller reuses
+        return super().write(bytes(data))
+
+
+class ByteChannelReader(  # type: ignore[misc]
+        _ChannelReader[bytes], BufferedIOBase):
+    """
+    The end of a byte channel that a stage reads from
+    """
+    EMPTY = b''
+    NEWLINE = b'\n'
+
+    def _split_lines(self, block: bytes) -> Iterator[bytes]:
+        return iter(BytesIO(block))
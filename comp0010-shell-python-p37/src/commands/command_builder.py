@@ -72,6 +72,31 @@ class CommandBuilder(Builder):
         self.options.append(option)
         return self
 
+    def clone(self) -> 'CommandBuilder':
+        """
+        Copies the command type, flags and options into a new builder. Flag
+        values are never mutated, so they are shared with the copy.
+
+        Returns:
+            CommandBuilder: An independent copy of this builder
+        """
+        builder = CommandBuilder(self.command_type)
+        builder.flags = list(self.flags)
+        builder.options = list(self.options)
+        return builder
+
+    def mutates_shell_state(self) -> bool:
+        """
+        see Builder.mutates_shell_state()
+        """
+        return self.command_type.MUTATES_SHELL_STATE
+
+    def handles_bytes(self) -> bool:
+        """
+        see Builder.handles_bytes()
+        """
+        return self.command_type.BYTES_NATIVE
+
     def build(self) -> Runnable:
         """
         Builds the command from the added flags and options.
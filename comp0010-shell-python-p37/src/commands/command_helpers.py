@@ -2,20 +2,39 @@
 Some helper functions for the commands to use
 """
 
-from io import TextIOWrapper, SEEK_SET, SEEK_END
-from typing import cast
+import mmap
+import os
+import stat
+from io import (BufferedIOBase, BufferedReader, BytesIO, TextIOBase,
+                TextIOWrapper, SEEK_SET, SEEK_END)
+from itertools import chain
+from types import TracebackType
+from typing import (IO, Any, Iterable, Iterator, Optional, Type, TypeVar,
+                    Union, cast)
 from errors.command_errors import ShellFileNotFoundError, CommandError
+from errors.errors import BaseShellError
+from commands.base_command import BaseCommand
+from commands.byte_streams import ENCODING, ERRORS, byte_input
+from commands.channel import ByteChannelReader, ChannelReader
+from commands.process_stage import BytePipeReader, PipeReader
+from commands.read_tracker import record_read
+from stdin_source import StdinSource
 
 
-def is_stream_empty(stream: TextIOWrapper) -> bool:
+def is_stream_empty(stream: Union[TextIOBase, BufferedIOBase]) -> bool:
     """
     Checks if the stream is empty using arbitrary heuristics.
 
-    Heuristics: If the stream is not seekable, we can't tell, so we say it is
-    not empty. If the stream is seekable, and there is still content towards
-    the end of the stream, then the stream is not empty. Otherwise, it is
-    empty.
+    Heuristics: If the stream is the channel from the previous stage of a
+    pipeline, the pipe it reaches a stage running in a process through, or
+    the shell's own stdin, we wait until it writes something or finishes. If
+    the stream is not seekable otherwise, we can't tell, so we say it is not
+    empty. If the stream is seekable, and there is still content towards the
+    end of the stream, then the stream is not empty. Otherwise, it is empty.
     """
+    if isinstance(stream, (ChannelReader, ByteChannelReader, PipeReader,
+                           BytePipeReader, StdinSource)):
+        return stream.at_eof()
     if not stream.seekable():
         return False
 
@@ -26,6 +45,76 @@ def is_stream_empty(stream: TextIOWrapper) -> bool:
     return endpos == pos
 
 
+def is_input_missing(stream: Union[TextIOBase, BufferedIOBase]) -> bool:
+    """
+    Checks whether a command with no files to read has no input either, so
+    should report that it needs some. The shell's own stdin is never missing
+    once it is attached, even if it ends straight away, as in
+    printf '' | sh -c sort, where the command reads no lines, like in other
+    shells. Otherwise, the input is missing if the stream is empty.
+    """
+    if isinstance(stream, StdinSource):
+        return False
+    if isinstance(stream, (PipeReader, BytePipeReader)) and \
+            stream.from_stdin:
+        return False
+    return is_stream_empty(stream)
+
+
+X = TypeVar('X')
+
+
+def peek(items: Iterable[X]) -> Optional[Iterator[X]]:
+    """
+    Waits for the first item, such as the first line of the input, to tell
+    whether there are any items at all.
+
+    Args:
+        items (Iterable[X]): The items
+
+    Returns:
+        Optional[Iterator[X]]: Every item, including the first, or None if
+                               there are none
+    """
+    iterator = iter(items)
+    for first in iterator:
+        return chain((first,), iterator)
+    return None
+
+
+def input_lines(command: BaseCommand, lines: Optional[Iterable[Any]],
+                empty_error: Optional[BaseShellError] = None
+                ) -> Iterable[Any]:
+    """
+    Gets the lines a command implementing BaseCommand.iter_lines() reads:
+    the lines it is given, or the lines of its input stream, as bytes if the
+    command is BYTES_NATIVE. The input stream is read a line at a time, so
+    that whatever the command does not read is left in it.
+
+    Args:
+        command (BaseCommand): The command
+        lines (Optional[Iterable[Any]]): The lines given to iter_lines()
+        empty_error (Optional[BaseShellError]): Raised if there is no input,
+                                                if given, see
+                                                is_input_missing()
+
+    Returns:
+        Iterable[Any]: The lines to read
+    """
+    if lines is None:
+        if empty_error is not None and is_input_missing(command.input):
+            raise empty_error
+        if command.BYTES_NATIVE:
+            return byte_input(command.input, whole_lines=True)
+        return command.input
+    if empty_error is None:
+        return lines
+    peeked = peek(lines)
+    if peeked is None:
+        raise empty_error
+    return peeked
+
+
 def exception_handled_open(file: str, open_mode: str) -> TextIOWrapper:
     """
     This function is used in place of with open(), with automatic error
@@ -43,12 +132,39 @@ def exception_handled_open(file: str, open_mode: str) -> TextIOWrapper:
     Returns:
         TextIOWrapper: an opened IO file object
     """
-    try:
-        # The open function returns an IO[Any] object, which has the same
-        # methods as TextIOWrapper, but clashes with our type checking.
-        # Therefore, we cast it to TextIOWrapper.
+    # The open function returns an IO[Any] object, which has the same
+    # methods as TextIOWrapper, but clashes with our type checking.
+    # Therefore, we cast it to TextIOWrapper.
+    return cast(TextIOWrapper, _handled_open(
+        file, open_mode, encoding=ENCODING, errors=ERRORS))
+
+
+def exception_handled_open_binary(file: str,
+                                  open_mode: str) -> BufferedIOBase:
+    """
+    Like exception_handled_open(), but opens the file to read or write bytes,
+    for commands that work on bytes
+
+    Arguments:
+        file (str): the name or path of the file to be opened
+        open_mode (str): 'r' or 'w' defining the readability of the opened file
+
+    Raises:
+        ShellFileNotFoundError: if the file specified cannot be found in the
+            path or directory
+        CommandError: if permission is denied, or an OS Error occurs
+
+    Returns:
+        BufferedIOBase: an opened binary file object
+    """
+    return cast(BufferedIOBase, _handled_open(file, open_mode + 'b'))
 
-        return cast(TextIOWrapper,  open(file, open_mode, encoding='utf-8'))
+
+def _handled_open(file: str, open_mode: str, **kwargs: str) -> IO[Any]:
+    if 'r' in open_mode:
+        record_read(file)
+    try:
+        return open(file, open_mode, **kwargs)  # type: ignore[call-overload]
 
     except FileNotFoundError as e:
         raise ShellFileNotFoundError(
@@ -64,3 +180,145 @@ def exception_handled_open(file: str, open_mode: str) -> TextIOWrapper:
         raise CommandError(
             f"OS Error opening {file}: {e}"
         ) from e
+
+
+# Files smaller than this are read through a buffer rather than mapped, as
+# mapping them costs more than it saves
+MMAP_MIN_SIZE = 1 << 16
+# How many bytes of a mapped file are split into lines at a time
+LINE_BLOCK_SIZE = 1 << 20
+
+
+class FileSource:
+    """
+    A file opened for a command to read as bytes. Regular files on disk are
+    memory-mapped, so commands can read them through views of the mapping,
+    without copying them into buffers first. Pipes, special files such as
+    /dev/zero, and small files are read through a buffer instead, which
+    every method falls back to.
+
+    Use as a context manager, which closes the file and its mapping.
+
+    Arguments:
+        file (str): the name or path of the file to read
+
+    Raises:
+        ShellFileNotFoundError: if the file cannot be found
+        CommandError: if permission is denied, or an OS Error occurs
+    """
+
+    def __init__(self, file: str) -> None:
+        self.file = exception_handled_open_binary(file, 'r')
+        self._map: Optional[mmap.mmap] = None
+        self.view: Optional[memoryview] = None
+        # The size of a regular file, which can be read from anywhere
+        self.size: Optional[int] = None
+        if isinstance(self.file, BufferedReader):
+            self.size = self._regular_size(self.file.fileno())
+        if self.size is not None and self.size >= MMAP_MIN_SIZE:
+            self._map = self._try_map(self.file.fileno())
+        if self._map is not None:
+            if hasattr(mmap, 'MADV_SEQUENTIAL'):
+                self._map.madvise(mmap.MADV_SEQUENTIAL)
+            self.view = memoryview(self._map)
+
+    @staticmethod
+    def _regular_size(fd: int) -> Optional[int]:
+        """
+        Gets the size of the file, if it is a regular file
+        """
+        try:
+            info = os.fstat(fd)
+        except OSError:
+            return None
+        return info.st_size if stat.S_ISREG(info.st_mode) else None
+
+    @staticmethod
+    def _try_map(fd: int) -> Optional[mmap.mmap]:
+        """
+        Maps the file, which is a regular file big enough to be worth it
+        """
+        try:
+            return mmap.mmap(fd, 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            # The file cannot be mapped, so it is read through its buffer
+            return None
+
+    @property
+    def mapped(self) -> bool:
+        """
+        Whether the file is memory-mapped, rather than read through a buffer
+        """
+        return self.view is not None
+
+    def chunks(self, size: int,
+               start: int = 0) -> Iterator[Union[bytes, memoryview]]:
+        """
+        Reads the file in chunks. The chunks of a mapped file are views of the
+        mapping, which are only valid until the source is closed.
+
+        Args:
+            size (int): How many bytes to read at a time
+            start (int): Where to start reading, which only regular files can
+                         start anywhere but the beginning. Regular files are
+                         read from there wherever they were read up to.
+
+        Returns:
+            Iterator[Union[bytes, memoryview]]: The chunks, in order
+        """
+        if self.view is None:
+            if self.size is not None:
+                self.file.seek(start)
+            yield from iter(lambda: self.file.read(size), b'')
+            return
+        for offset in range(start, len(self.view), size):
+            yield self.view[offset:offset + size]
+
+    def lines(self) -> Iterator[bytes]:
+        """
+        Reads the file one line at a time. Mapped files are split into lines
+        a block of whole lines at a time, which is faster than searching for
+        every newline separately.
+
+        Returns:
+            Iterator[bytes]: The lines, each ending with its newline, except
+                             maybe the last
+        """
+        if self._map is None:
+            yield from self.file
+            return
+        mapping, start, size = self._map, 0, len(self._map)
+        while start < size:
+            block_end = min(start + LINE_BLOCK_SIZE, size)
+            end = size if block_end == size \
+                else mapping.rfind(b'\n', start, block_end) + 1
+            if end == 0:
+                # The line is longer than a block
+                end = mapping.find(b'\n', block_end) + 1 or size
+            yield from BytesIO(mapping[start:end])
+            start = end
+
+    def close(self) -> None:
+        """
+        Closes the mapping, if any, and the file
+        """
+        if self.view is not None:
+            self.view.release()
+            self.view = None
+        if self._map is not None:
+            try:
+                self._map.close()
+            except BufferError:
+                # A view of a chunk is still held, so the mapping is closed
+                # once it is let go of instead
+                pass
+            self._map = None
+        self.file.close()
+
+    def __enter__(self) -> 'FileSource':
+        return self
+
+    def __exit__(self, exception_type: Optional[Type[BaseException]],
+                 exception: Optional[BaseException],
+                 traceback: Optional[TracebackType]) -> None:
+        self.close()
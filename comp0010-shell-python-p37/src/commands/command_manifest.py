@@ -0,0 +1,26 @@
+"""
+The command manifest, mapping every command name to the module and class that
+implements it.
+
+This file is generated by tools/generate_manifest; do not edit it by hand.
+Regenerate it whenever a command is added, renamed or removed.
+"""
+from typing import Dict, Tuple
+
+COMMAND_MANIFEST: Dict[str, Tuple[str, str]] = {
+    "cat": ("catcommand", "CAT"),
+    "cd": ("cdcommand", "CD"),
+    "cut": ("cutcommand", "Cut"),
+    "echo": ("echocommand", "Echo"),
+    "exit": ("exitcommand", "Exit"),
+    "find": ("findcommand", "Find"),
+    "grep": ("grepcommand", "Grep"),
+    "head": ("headcommand", "Head"),
+    "ls": ("lscommand", "LS"),
+    "pwd": ("pwdcommand", "Pwd"),
+    "sed": ("sedcommand", "Sed"),
+    "sort": ("sortcommand", "Sort"),
+    "tail": ("tailcommand", "Tail"),
+    "uniq": ("uniqcommand", "Uniq"),
+    "wc": ("wccommand", "WC"),
+}
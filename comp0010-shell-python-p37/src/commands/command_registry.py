@@ -0,0 +1,149 @@
+"""
+A process-wide registry of the commands available to the shell.
+
+The registry is keyed by command name and is backed by a generated manifest
+(see command_manifest.py), so no globbing or module scanning happens at
+runtime. Command modules are only imported the first time that their command
+is looked up.
+"""
+import importlib
+import os.path
+from typing import (Dict, Iterator, List, Mapping, Optional, Tuple, Type,
+                    cast)
+
+from errors.error_dsi import DeveloperSkillIssue
+
+from .base_command import BaseCommand
+from .command_manifest import COMMAND_MANIFEST
+
+MANIFEST_PATH = os.path.join(os.path.dirname(__file__), 'command_manifest.py')
+
+MANIFEST_TEMPLATE = '''"""
+The command manifest, mapping every command name to the module and class that
+implements it.
+
+This file is generated by tools/generate_manifest; do not edit it by hand.
+Regenerate it whenever a command is added, renamed or removed.
+"""
+from typing import Dict, Tuple
+
+COMMAND_MANIFEST: Dict[str, Tuple[str, str]] = {{
+{entries}}}
+'''
+
+
+class CommandRegistry(Mapping[str, Type[BaseCommand]]):
+    """
+    A read-only mapping of command names to command classes. Modules are
+    imported lazily on the first lookup of a command, and the resulting class
+    is cached for the rest of the process.
+
+    Args:
+        manifest (Dict[str, Tuple[str, str]]): Maps command names to a tuple
+            of (module name within the commands package, class name)
+    """
+
+    def __init__(self, manifest: Dict[str, Tuple[str, str]]) -> None:
+        self.manifest = manifest
+        self.loaded: Dict[str, Type[BaseCommand]] = {}
+
+    def __getitem__(self, command_name: str) -> Type[BaseCommand]:
+        """
+        Gets the command class for the command name, importing its module if
+        this is the first time the command has been used.
+
+        Raises:
+            KeyError: If the command is not in the manifest
+            DeveloperSkillIssue: If the manifest entry does not point to a
+                command class
+        """
+        if command_name in self.loaded:
+            return self.loaded[command_name]
+
+        module_name, class_name = self.manifest[command_name]
+        module = importlib.import_module(f'{__package__}.{module_name}')
+        command = getattr(module, class_name, None)
+        if not isinstance(command, type) or \
+                not issubclass(command, BaseCommand):
+            raise DeveloperSkillIssue(
+                f'{module_name}.{class_name} is not a command. Is the '
+                'command manifest out of date?')
+
+        self.loaded[command_name] = command
+        return command
+
+    def __contains__(self, command_name: object) -> bool:
+        return command_name in self.manifest
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.manifest)
+
+    def __len__(self) -> int:
+        return len(self.manifest)
+
+
+_REGISTRY: Optional[CommandRegistry] = None
+
+
+def get_command_registry() -> CommandRegistry:
+    """
+    Gets the process-wide command registry, creating it on the first call.
+
+    Returns:
+        CommandRegistry: The registry shared by every parser in this process
+    """
+    global _REGISTRY  # pylint: disable=global-statement
+    if _REGISTRY is None:
+        _REGISTRY = CommandRegistry(COMMAND_MANIFEST)
+    return _REGISTRY
+
+
+def build_manifest() -> Dict[str, Tuple[str, str]]:
+    """
+    Discovers every command in the commands folder with AutoImport and builds
+    the manifest from them. This is slow, so it should only be used when
+    generating the manifest.
+
+    Returns:
+        Dict[str, Tuple[str, str]]: The manifest, sorted by command name
+    """
+    # Imported here, because AutoImport should never run on the hot path
+    # pylint: disable=import-outside-toplevel
+    from .auto_import import AutoImport
+
+    # AutoImport has already checked that these inherit from BaseCommand
+    commands = cast(List[Type[BaseCommand]],
+                    AutoImport().get_command_objects())
+    return {
+        command.COMMAND_SPECIFICATION.command_name:
+            (command.__module__.rsplit('.', 1)[-1], command.__name__)
+        for command in sorted(
+            commands, key=lambda c: c.COMMAND_SPECIFICATION.command_name)
+    }
+
+
+def render_manifest(manifest: Dict[str, Tuple[str, str]]) -> str:
+    """
+    Renders the manifest as the source of command_manifest.py
+
+    Args:
+        manifest (Dict[str, Tuple[str, str]]): The manifest to render
+
+    Returns:
+        str: Python source code for the manifest module
+    """
+    entries = ''.join(
+        f'    "{name}": ("{module}", "{cls}"),\n'
+        for name, (module, cls) in manifest.items())
+    return MANIFEST_TEMPLATE.format(entries=entries)
+
+
+def write_manifest(path: str = MANIFEST_PATH) -> None:
+    """
+    Regenerates the manifest file from the commands folder.
+
+    Args:
+        path (str): Where to write the manifest to
+    """
+    with open(path, 'w', encoding='utf-8') as manifest_file:
+        manifest_file.write(render_manifest(build_manifest()))
@@ -1,19 +1,18 @@
 """
 Module containing the cut command
 """
+import sys
 from io import TextIOBase
-from typing import Generator, Iterator, List, Tuple, cast
+from typing import Generator, Iterable, Iterator, List, Optional, Tuple, cast
 
 from commands.base_command import BaseCommand
-from commands.command_helpers import exception_handled_open, is_stream_empty
+from commands.command_helpers import exception_handled_open_binary, input_lines
 from commands.command_spec import (HELP_FLAG, AbstractCommandSpecification,
                                    CommandSpecification)
 from errors.command_errors import (CommandError, UnknownFlagError,
                                    UnknownFlagValueError)
 from flag import FlagSpecification, FlagValue, WildcardFlagSpecification
 
-# With open has to be encoding agnostic
-
 
 class CutCommandSpecification(AbstractCommandSpecification):
     """
@@ -46,20 +45,16 @@ class Cut(BaseCommand):
     class for the cut command, which implements the BaseCommand interface
     """
     COMMAND_SPECIFICATION: CommandSpecification = CutCommandSpecification()
+    CPU_BOUND = True
+    # -b counts bytes, so lines are cut as bytes, even within a character
+    BYTES_NATIVE = True
+    ITER_LINES = True
 
     def __init__(self, in_stream: TextIOBase, out_stream: TextIOBase,
                  flags: List[FlagValue], options: List[str]) -> None:
         super().__init__(in_stream, out_stream, flags, options)
         self._check_and_set_args()
 
-    def _get_target(self) -> List[str]:
-        if len(self.options) == 0:
-            if is_stream_empty(self.input):
-                raise CommandError("cut: no file provided and stdin is empty")
-            return self.input.readlines()
-        with exception_handled_open(self.options[0], 'r') as f:
-            return f.readlines()
-
     def get_start_to_end_from_str(
             self, value: str, max_num: int) -> Tuple[int, int]:
         """
@@ -166,13 +161,6 @@ class Cut(BaseCommand):
         return self.unionized_iterator(
             map(lambda x: self.get_start_to_end_from_str(x, max_num), value))
 
-    def _get_max_columns(self, lines: List[str]) -> int:
-        try:
-            return max(len(line) for line in lines)
-        except ValueError:
-            # this happens when there is an empty sequence
-            return 0
-
     def _check_and_set_args(self) -> None:
         # there is a guarantee by the parser that we'll only be able to get -b
         # so we don't have to check for that
@@ -183,20 +171,37 @@ class Cut(BaseCommand):
             raise UnknownFlagError(
                 'you must specify a list of bytes, characters or fields')
 
-    def run(self) -> int:
-        target_lines = [
-            line.rstrip('\r\n') for line in self._get_target()]
-
-        range_iteration = self._get_array_iterator(
-            cast(List[str], self.flags[0].value),
-            self._get_max_columns(target_lines))
+    def _cut(self, lines: Iterable[bytes]) -> Iterator[bytes]:
+        """
+        Cuts the bytes out of every line, one line at a time. Lines are
+        separated by newlines, but the last one does not end with one, so
+        each line is passed on as soon as it is read, and the newline before
+        it only with the next one, rather than holding the line back.
 
-        ret_lines = [''] * len(target_lines)
+        Open ranges run to the end of every line, however long, so the
+        ranges are worked out before reading any line.
+        """
+        ranges = list(self._get_array_iterator(
+            cast(List[str], self.flags[0].value), sys.maxsize))
+        separator = b''
+        for line in self.until_cancelled(lines):
+            line = line.rstrip(b'\r\n')
+            yield separator + b''.join(line[a - 1:b] for (a, b) in ranges)
+            separator = b'\n'
+
+    def iter_lines(self, lines: Optional[Iterable[bytes]] = None
+                   ) -> Iterator[bytes]:
+        """
+        see BaseCommand.iter_lines()
+        """
+        if len(self.options) == 0:
+            yield from self._cut(input_lines(
+                self, lines,
+                CommandError("cut: no file provided and stdin is empty")))
+            return
+        with exception_handled_open_binary(self.options[0], 'r') as f:
+            yield from self._cut(f)
 
-        for (a, b) in range_iteration:
-            for ind, _ in enumerate(ret_lines):
-                ret_lines[ind] += target_lines[ind][a - 1:b]
-        self.output.writelines(line + '\n' for line in ret_lines[:-1])
-        if len(ret_lines) > 0:
-            self.output.write(ret_lines[-1])
+    def run(self) -> int:
+        self.write_lines(self.iter_lines())
         return 0
@@ -15,6 +15,7 @@ class Exit(BaseCommand):
     COMMAND_SPECIFICATION = CommandSpecification(
         "exit", [WildcardFlagSpecification()], ("", "Exits the shell")
     )
+    MUTATES_SHELL_STATE = True
 
     def run(self) -> int:
         """
@@ -0,0 +1,121 @@
+"""
+Follows a file as it grows, for tail -f, reading only what is appended to it.
+
+The file is kept open, and read from where the last read ended. When there is
+nothing new, the follower polls the file, sleeping between polls for longer
+and longer, up to a limit, so a log that is written to in bursts is followed
+closely while it is busy, and costs a few system calls a second while it is
+idle. Each poll checks the size of the open file, to notice the file being
+truncated, and what the path now names, to notice the file being rotated, as
+by logrotate, in which case the new file is followed from its start.
+"""
+import os
+from threading import Event
+from types import TracebackType
+from typing import Iterator, Optional, Type
+
+# How many bytes are read at a time
+FOLLOW_CHUNK_SIZE = 1 << 16
+# How long to sleep before the first poll once there is nothing new, and the
+# longest to sleep between polls, in seconds
+MIN_POLL_INTERVAL = 0.01
+MAX_POLL_INTERVAL = 0.5
+
+
+class FileFollower:
+    """
+    Reads what is appended to a file as it comes, until stopped. Use as a
+    context manager, which closes the follower's own descriptor of the file.
+
+    Args:
+        path (str): The path of the file, checked for rotation
+        fd (int): A descriptor of the file, which the follower duplicates
+        offset (int): How much of the file has already been read
+        min_interval (float): How long to sleep before the first poll
+        max_interval (float): The longest to sleep between polls
+    """
+
+    def __init__(self, path: str, fd: int, offset: int,
+                 min_interval: float = MIN_POLL_INTERVAL,
+                 max_interval: float = MAX_POLL_INTERVAL) -> None:
+        self.path = path
+        self.offset = offset
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        # How many times the file was polled, having nothing new
+        self.polls = 0
+        self._fd = os.dup(fd)
+        self._stopped = Event()
+
+    def stop(self) -> None:
+        """
+        Stops following the file as soon as possible. This can be called from
+        any thread, even before following starts.
+        """
+        self._stopped.set()
+
+    def chunks(self) -> Iterator[bytes]:
+        """
+        Reads what is appended to the file, a chunk at a time, as soon as it
+        is polled, until stopped
+
+        Returns:
+            Iterator[bytes]: The appended bytes, in order
+        """
+        interval = self.min_interval
+        while not self._stopped.is_set():
+            chunk = os.pread(self._fd, FOLLOW_CHUNK_SIZE, self.offset)
+            if chunk:
+                self.offset += len(chunk)
+                interval = self.min_interval
+                yield chunk
+                continue
+            self.polls += 1
+            if self._replaced():
+                continue
+            self._stopped.wait(interval)
+            interval = min(interval * 2, self.max_interval)
+
+    def _replaced(self) -> bool:
+        """
+        Checks whether the file was truncated to less than has been read, in
+        which case it is read again from the start, or whether the path now
+        names another file, in which case the new file is followed from its
+        start. Everything written to the old file has already been read.
+        While the path names no file, the old file is still followed.
+
+        Returns:
+            bool: Whether there may be something new to read
+        """
+        current = os.fstat(self._fd)
+        if current.st_size < self.offset:
+            self.offset = 0
+            return True
+        try:
+            named = os.stat(self.path)
+            if (named.st_dev, named.st_ino) == \
+                    (current.st_dev, current.st_ino):
+                return False
+            fd = os.open(self.path, os.O_RDONLY)
+        except OSError:
+            return False
+        os.close(self._fd)
+        self._fd = fd
+        self.offset = 0
+        return True
+
+    def close(self) -> None:
+        """
+        Closes the follower's descriptor of the file
+        """
+        if self._fd != -1:
+            os.close(self._fd)
+            self._fd = -1
+
+    def __enter__(self) -> 'FileFollower':
+        return self
+
+    def __exit__(self, exception_type: Optional[Type[BaseException]],
+                 exception: Optional[BaseException],
+                 traceback: Optional[TracebackType]) -> None:
+        self.close()
@@ -17,6 +17,7 @@ from errors.error_dsi import DeveloperSkillIssue
 from flag import FlagValue, FlagSpecification
 from commands.base_command import BaseCommand
 from commands.command_spec import CommandSpecification
+from commands.read_tracker import record_read
 
 
 class Find(BaseCommand):
@@ -53,7 +54,6 @@ class Find(BaseCommand):
         self.path = ""
         self.search_expr = ""
         self._check_flags_and_options(flags, options)
-        self.found_items: List[str] = []
         super().__init__(in_stream, out_stream, flags, options)
 
     def _check_flags_and_options(self, flags, options) -> None:
@@ -102,8 +102,9 @@ class Find(BaseCommand):
 
     def find(self, path) -> None:
         """
-        A helper function which recurses through a file structure, returning
+        A helper function which recurses through a file structure, writing
         the path to files which match the search expression stated by the flag
+        as soon as they are found. Stops once the command is cancelled.
 
         Arguments:
             path (str): the current path in the recursive traversal of the file
@@ -115,16 +116,9 @@ class Find(BaseCommand):
             CommandError: if permission is denied, or the path specified was
                 not a directory
         """
+        record_read(path)
         try:
-            for item in os.listdir(path):
-                item_path = os.path.join(path, item)
-                if os.path.isdir(item_path):
-                    self.find(item_path)
-
-                search_path = os.path.join(path, self.search_expr)
-
-                if fnmatch.fnmatch(item_path, search_path):
-                    self.found_items.append(item_path)
+            items = os.listdir(path)
 
         except FileNotFoundError as e:
             raise ShellFileNotFoundError(
@@ -139,6 +133,15 @@ class Find(BaseCommand):
         except OSError as e:
             raise CommandError(f"OS Error: {e}") from e
 
+        search_path = os.path.join(path, self.search_expr)
+        for item in self.until_cancelled(items):
+            item_path = os.path.join(path, item)
+            if os.path.isdir(item_path):
+                self.find(item_path)
+
+            if fnmatch.fnmatch(item_path, search_path):
+                self.output.write(f"{item_path}\n")
+
     def run(self) -> int:
         """
         see BaseCommand.run()
@@ -150,13 +153,5 @@ class Find(BaseCommand):
         Returns:
             int: exit code of the function (0 for successful)
         """
-
         self.find(self.path)
-        if self.found_items:
-            for path in self.found_items:
-                self.output.write(f"{path}\n")
-
-        else:
-            self.output.write("")
-
         return 0
@@ -2,14 +2,15 @@
 Imports the base commmand, and implements the interface for the grep command
 """
 import re
-from io import StringIO, TextIOWrapper
-from typing import List
+from io import StringIO
+from itertools import islice
+from typing import Iterable, Iterator, List, Optional
 
 from commands.base_command import BaseCommand
-from commands.command_helpers import exception_handled_open, is_stream_empty
+from commands.command_helpers import exception_handled_open, input_lines
 from commands.command_spec import CommandSpecification
 from errors.command_errors import CommandError
-from flag import FlagValue
+from flag import FlagSpecification, FlagValue
 
 
 class Grep(BaseCommand):
@@ -18,15 +19,22 @@ class Grep(BaseCommand):
     """
 
     COMMAND_SPECIFICATION = \
-        CommandSpecification("grep", [],
+        CommandSpecification("grep", [
+                                 FlagSpecification(
+                                     "m", int,
+                                     "Stop reading a file after NUM matching "
+                                     "lines"),
+                             ],
                              (
-                                 "PATTERN [FILE]...",
+                                 "[OPTIONS] PATTERN [FILE]...",
                                  "Searches [FILE]... for lines containing a"
                                  " match to PATTERN\n"
                                  "  PATTERN is a regular expression in PCRE "
                                  "format.\n"
                                  "  FILE is the name of a file.",
                              ))
+    CPU_BOUND = True
+    ITER_LINES = True
 
     def __init__(
         self,
@@ -49,48 +57,77 @@ class Grep(BaseCommand):
         except re.error as e:
             raise CommandError("Invalid pattern: " + options[0]) from e
 
+        self.max_count: Optional[int] = self._check_max_count(flags)
         super().__init__(in_stream, out_stream, flags, options)
 
-    def _grep(self, file: TextIOWrapper) -> List[str]:
+    @staticmethod
+    def _check_max_count(flags: List[FlagValue]) -> Optional[int]:
         """
-        Helper function to grep a file
+        Gets the number of matching lines to stop after, given with -m
+
+        Raises:
+            CommandError: if the number is negative
+        """
+        max_count = None
+        for flag in flags:
+            if flag.name == "m":
+                if not isinstance(flag.value, int) or flag.value < 0:
+                    raise CommandError(f"Invalid max count: {flag.value}")
+                max_count = flag.value
+        return max_count
+
+    def _grep(self, file: Iterable[str]) -> Iterator[str]:
+        """
+        Helper function to grep a file, one line at a time, so that matches
+        are written as soon as they are found. No more of the file is read
+        once -m matching lines are found, or the command is cancelled.
 
         Args:
-            file (TextIOWrapper): The file to grep
+            file (Iterable[str]): The lines of the file to grep
 
         Returns:
-            List[str]: The lines that match the pattern
+            Iterator[str]: The lines that match the pattern
         """
-        lines = []
-        for line in file:
-            if self.pattern.search(line):
-                lines.append(line)
-        return lines
+        search = self.pattern.search
+        matches = (line for line in self.until_cancelled(file)
+                   if search(line))
+        if self.max_count is None:
+            return matches
+        return islice(matches, self.max_count)
 
-    def run(self) -> int:
+    def iter_lines(self, lines: Optional[Iterable[str]] = None
+                   ) -> Iterator[str]:
         """
-        see BaseCommand.run()
-
-        Returns:
-            int: exit code of the function
+        see BaseCommand.iter_lines()
 
         Raises:
-            CommandError: if an OSError or PermissionError is thrown
+            CommandError: if there is no input, or an OSError or
+                          PermissionError is thrown
             ShellFileNotFoundError: if the given file cannot be found
         """
-
         if len(self.options) < 2:
-            if is_stream_empty(self.input):
-                raise CommandError("No input provided")
-            self.output.writelines(self._grep(self.input))
-            return 0
+            yield from self._grep(input_lines(
+                self, lines, CommandError("No input provided")))
+            return
         files = self.options[1:]
-        for file in files:
+        for file in self.until_cancelled(files):
             with exception_handled_open(file, "r") as f:
                 for line in self._grep(f):
                     if len(files) > 1:
-                        self.output.write(f"{file}:{line}")
+                        yield f"{file}:{line}"
                     else:
-                        self.output.write(line)
+                        yield line
 
+    def run(self) -> int:
+        """
+        see BaseCommand.run()
+
+        Returns:
+            int: exit code of the function
+
+        Raises:
+            CommandError: if an OSError or PermissionError is thrown
+            ShellFileNotFoundError: if the given file cannot be found
+        """
+        self.write_lines(self.iter_lines())
         return 0
@@ -1,15 +1,22 @@
 """
 Imports the base commmand, and implements the interface for the head command
 """
-from typing import List
-from io import StringIO, TextIOWrapper
+from collections import deque
+from typing import (Deque, Iterable, Iterator, List, Optional, Union,
+                    cast)
+from io import BufferedIOBase, StringIO
+from itertools import islice
 
 from flag import FlagValue, FlagSpecification, Flag
 from errors.command_errors import CommandError
 from errors.error_dsi import DeveloperSkillIssue
 from commands.base_command import BaseCommand
 from commands.command_spec import CommandSpecification
-from commands.command_helpers import exception_handled_open, is_stream_empty
+from commands.command_helpers import (FileSource, input_lines,
+                                      is_stream_empty)
+
+# How many bytes are read at a time with -c
+BYTE_CHUNK_SIZE = 1 << 16
 
 
 class Head(BaseCommand):
@@ -19,12 +26,16 @@ class Head(BaseCommand):
 
     COMMAND_SPECIFICATION = CommandSpecification(
         "head",
-        [FlagSpecification("n", int, "Number of lines to print")],
+        [FlagSpecification("n", int, "Number of lines to print"),
+         FlagSpecification("c", int, "Number of bytes to print")],
         (
             "[OPTIONS] [FILE]",
-            "Prints the first 10 lines of FILE if -n is not provided.\n",
+            "Prints the first 10 lines of FILE if -n or -c is not "
+            "provided.\n",
         ),
     )
+    BYTES_NATIVE = True
+    ITER_LINES = True
 
     def __init__(
         self,
@@ -44,14 +55,17 @@ class Head(BaseCommand):
             options (List[str]): List of options supported by the command.
 
         Raises:
-            DeveloperSkillIssue: if the number of lines is not valid
+            DeveloperSkillIssue: if the number of lines or bytes is not valid
         """
+        # Whichever of -n and -c comes last is used
+        self.num_bytes: Optional[int] = None
         self.num_lines: int = self._check_num_lines(flags)
         super().__init__(in_stream, out_stream, flags, options)
 
     def _check_num_lines(self, flags: List[Flag]) -> int:
         """
-        Checks if the number of lines to be read is valid,
+        Checks if the number of lines or bytes to be read is valid, setting
+        num_bytes if bytes are counted rather than lines
 
         Args:
             flags (List[Flag]): the number of lines to be read from the file
@@ -60,7 +74,7 @@ class Head(BaseCommand):
         """
         num_lines: int = 10
         for flag in flags:
-            if flag.name == "n":
+            if flag.name in ("n", "c"):
                 if not isinstance(flag.value, int):
                     raise DeveloperSkillIssue(
                         f"Invalid number of lines \
@@ -68,7 +82,11 @@ class Head(BaseCommand):
                                                 been caught by flag \
                                                 parser"
                     )
-                num_lines = int(flag.value)
+                if flag.name == "c":
+                    self.num_bytes = int(flag.value)
+                else:
+                    num_lines = int(flag.value)
+                    self.num_bytes = None
             else:
                 raise DeveloperSkillIssue(
                     f"Invalid flag {flag.name}, should \
@@ -77,28 +95,119 @@ class Head(BaseCommand):
         return num_lines
 
     def _read_lines_from_file(
-        self, f: TextIOWrapper, num_lines: int
-    ) -> List[str]:
+        self, f: Iterable[bytes], num_lines: int
+    ) -> Iterator[bytes]:
         """
-        Reads up to num_lines from the specified file.
+        Reads up to num_lines from the specified file, one line at a time. No
+        more of the file is read than needed. If num_lines counts from the
+        end, only that many lines are held back at a time.
 
         Args:
-            file (TextIOWrapper): file object
+            file (Iterable[bytes]): The lines of the file
             num_lines (int): Maximum number of lines to read.
 
         Returns:
-            List[str]: List of lines read from the file.
+            Iterator[bytes]: The lines read from the file.
+        """
+        if num_lines >= 0:
+            yield from islice(f, num_lines)
+            return
+        # Count from the end if num_lines is negative, by yielding each line
+        # once -num_lines lines come after it
+        held_back: Deque[bytes] = deque()
+        for line in f:
+            held_back.append(line)
+            if len(held_back) > -num_lines:
+                yield held_back.popleft()
+
+    @staticmethod
+    def _read_bytes(chunks: Iterable[Union[bytes, memoryview]],
+                    num_bytes: int) -> Iterator[bytes]:
+        """
+        Reads up to num_bytes from chunks, one chunk at a time. No more
+        chunks are read than needed. If num_bytes counts from the end, only
+        that many bytes are held back at a time.
+
+        Args:
+            chunks (Iterable[Union[bytes, memoryview]]): The chunks to read
+            num_bytes (int): Maximum number of bytes to read
+
+        Returns:
+            Iterator[bytes]: The bytes read, a chunk at a time
+        """
+        if num_bytes >= 0:
+            for chunk in chunks:
+                if num_bytes <= 0:
+                    return
+                yield bytes(chunk[:num_bytes])
+                num_bytes -= len(chunk)
+            return
+        held_back = bytearray()
+        for chunk in chunks:
+            held_back += chunk
+            if len(held_back) > -num_bytes:
+                yield bytes(held_back[:num_bytes])
+                del held_back[:num_bytes]
+
+    @staticmethod
+    def _read_chunks(reader: BufferedIOBase,
+                     num_bytes: int) -> Iterator[bytes]:
+        """
+        Reads a stream in chunks, taking no more than num_bytes from it if
+        they count from the start, so the rest is left for whoever reads next
+        """
+        while True:
+            size = BYTE_CHUNK_SIZE if num_bytes < 0 \
+                else min(num_bytes, BYTE_CHUNK_SIZE)
+            chunk = reader.read(size) if size else b''
+            if not chunk:
+                return
+            yield chunk
+            if num_bytes >= 0:
+                num_bytes -= len(chunk)
+
+    def _read_bytes_from_file(self, f: FileSource,
+                              num_bytes: int) -> Iterator[bytes]:
+        """
+        Reads up to num_bytes from the file. The size of a regular file is
+        known, so counting from its end takes no buffer, and in either case
+        nothing past the bytes printed is read.
+        """
+        if num_bytes < 0 and f.size is not None:
+            num_bytes = max(f.size + num_bytes, 0)
+        return self._read_bytes(f.chunks(BYTE_CHUNK_SIZE), num_bytes)
+
+    def iter_lines(self, lines: Optional[Iterable[bytes]] = None
+                   ) -> Iterator[bytes]:
+        """
+        see BaseCommand.iter_lines(). With -c, the bytes are not split into
+        lines.
 
         Raises:
-            FileNotFoundError: If the file is not found.
+            ShellFileNotFoundError: if the file cannot be found
+            CommandError: if there is no input, or the opening of the file
+                raises an OSError, or if unauthorised
         """
-        lines: List[str] = f.readlines()
-        # Count from the end if num_lines is negative
-        if num_lines < 0:
-            num_lines = len(lines) + num_lines
-        # Keep num_lines within the range [0, file_len]
-        num_lines = min(max(num_lines, 0), len(lines))
-        return lines[:num_lines]
+        if self.options:
+            if len(self.options) > 1 and lines is None and \
+                    is_stream_empty(self.input):
+                raise CommandError()
+            with FileSource(self.options[0]) as f:
+                if self.num_bytes is not None:
+                    yield from self._read_bytes_from_file(f, self.num_bytes)
+                else:
+                    yield from self._read_lines_from_file(
+                        f.lines(), self.num_lines)
+            return
+        source = input_lines(self, lines, CommandError())
+        if self.num_bytes is None:
+            yield from self._read_lines_from_file(source, self.num_lines)
+            return
+        if lines is None:
+            # Read in chunks rather than lines, which can be any size
+            source = self._read_chunks(cast(BufferedIOBase, source),
+                                       self.num_bytes)
+        yield from self._read_bytes(source, self.num_bytes)
 
     def run(self) -> int:
         """
@@ -111,21 +220,5 @@ class Head(BaseCommand):
         Returns:
             int: exit code of the function (0 if successful)
         """
-        if len(self.options) != 1 and is_stream_empty(self.input):
-            raise CommandError()
-
-        lines_to_output: List[str]
-
-        if self.options:
-            file = self.options[0]
-            with exception_handled_open(file, "r") as f:
-                lines_to_output = self._read_lines_from_file(f, self.num_lines)
-        else:
-            lines_to_output = self._read_lines_from_file(
-                self.input, self.num_lines
-            )
-
-        for line in lines_to_output:
-            self.output.write(line)
-
+        self.write_lines(self.iter_lines())
         return 0
@@ -0,0 +1,64 @@
+"""
+Passes on what the stages of a pipeline have written whenever they run out of
+input, so that output trickling in, such as that of tail -f, flows through
+every stage as it comes, rather than waiting in each stage's buffers until
+they fill.
+
+A stage registers the streams it writes to with flushed_when_idle while it
+runs. The streams a stage reads from, the channels between stages and the
+pipes of stages running in processes, call flush_idle_outputs just before
+they wait for more input, which flushes every stream registered on the
+current thread, the last registered first. A stage that reads input as fast
+as it comes never waits, so never flushes more than it would anyway.
+"""
+import threading
+from contextlib import contextmanager
+from typing import Any, Iterator, List
+
+_REGISTERED = threading.local()
+
+
+def _outputs() -> List[Any]:
+    outputs = getattr(_REGISTERED, 'outputs', None)
+    if outputs is None:
+        outputs = _REGISTERED.outputs = []
+    return outputs
+
+
+@contextmanager
+def flushed_when_idle(stream: Any) -> Iterator[None]:
+    """
+    Flushes stream whenever the current thread is about to wait for input,
+    while the context is active. Streams wrapping another stream must be
+    registered after it, so that they are flushed into it first.
+
+    Args:
+        stream (Any): The stream to flush
+    """
+    outputs = _outputs()
+    outputs.append(stream)
+    try:
+        yield
+    finally:
+        outputs.remove(stream)
+
+
+def flush_idle_outputs() -> None:
+    """
+    Flushes every stream registered on the current thread, as it is about to
+    wait for input
+
+    Raises:
+        BrokenPipeError: If nothing reads a stream that is flushed any more
+    """
+    for stream in reversed(getattr(_REGISTERED, 'outputs', ())):
+        if not stream.closed:
+            stream.flush()
+
+
+def forget_idle_outputs() -> None:
+    """
+    Forgets every stream registered on the current thread, as in a forked
+    process, where they belong to the parent
+    """
+    _REGISTERED.outputs = []
@@ -0,0 +1,133 @@
+"""
+A module implementing a runnable chain of commands, which runs the stages of a
+pipeline lazily on one thread.
+
+Every command in the chain pulls lines from the one before it through
+BaseCommand.iter_lines(), and the last command's lines are written to the
+output as they are pulled. Nothing is buffered between the commands and no
+thread is started for them, so a line is passed on by a few generator steps
+rather than through a channel. Once a command stops asking for lines, such as
+head once it has enough, the commands before it are never run any further.
+"""
+from typing import Any, AnyStr, Iterable, Iterator, List, Optional
+
+from errors import check_arguments
+from errors.error_dsi import DeveloperSkillIssue
+
+from .base_command import BaseCommand
+from .byte_streams import ENCODING, ERRORS, AnyStream, byte_output, is_binary
+from .idle_flush import flushed_when_idle
+from .runnable import Runnable
+
+
+def _whole_lines(chunks: Iterable[AnyStr],
+                 newline: AnyStr) -> Iterator[AnyStr]:
+    """
+    Splits what a command yields into lines, as commands may yield several
+    lines at once, such as sed replacing with a newline, or part of a line
+    """
+    rest = newline[:0]
+    for chunk in chunks:
+        if not rest and chunk.find(newline) == len(chunk) - 1:
+            # Most commands yield one whole line at a time
+            if chunk:
+                yield chunk
+            continue
+        lines = (rest + chunk).split(newline)
+        rest = lines.pop()
+        for line in lines:
+            yield line + newline
+    if rest:
+        yield rest
+
+
+def _encoded(lines: Iterable[str]) -> Iterator[bytes]:
+    return (line.encode(ENCODING, ERRORS) for line in lines)
+
+
+def _decoded(lines: Iterable[bytes]) -> Iterator[str]:
+    # Lines end at newlines, so no character is ever split between two
+    return (line.decode(ENCODING, ERRORS) for line in lines)
+
+
+class LineChain(Runnable):
+    """
+    Class for a chain of commands, run on one thread. Commands that do not
+    implement BaseCommand.iter_lines() themselves can still be part of the
+    chain, through its default, which runs them on a thread of their own.
+
+    Args:
+        stages (List[BaseCommand]): The commands, in the order they are run.
+                                    The first command reads its own input.
+        out_stream (AnyStream): The stream to write the lines of the last
+                                command to
+    """
+
+    @check_arguments
+    def __init__(self, stages: List[BaseCommand],
+                 out_stream: AnyStream) -> None:
+        if not stages:
+            raise DeveloperSkillIssue('a chain needs at least one stage')
+        self.stages: List[BaseCommand] = stages
+        self.out_stream = out_stream
+
+    def close(self) -> None:
+        """
+        Closes all resources used by every command, and the output
+        """
+        for stage in self.stages:
+            stage.close()
+        self.out_stream.close()
+
+    def cancel(self) -> None:
+        """
+        see Runnable.cancel()
+        """
+        super().cancel()
+        for stage in self.stages:
+            stage.cancel()
+
+    @check_arguments
+    def run(self) -> int:
+        """
+        Pulls every line through the chain, writing each line of the last
+        command as soon as it comes. Lines are encoded or decoded only where a
+        command that works on bytes meets one that works on text, and every
+        command is given whole lines, however the one before it yields them.
+
+        Returns:
+            int: The exit code of the chain
+
+        Raises:
+            BaseShellError: The first error raised by any command
+        """
+        iterators: List[Iterator[Any]] = []
+        lines: Optional[Iterator[Any]] = None
+        binary = False
+        for stage in self.stages:
+            if lines is not None:
+                lines = _whole_lines(lines, b'\n' if binary else '\n')
+            if lines is not None and stage.BYTES_NATIVE != binary:
+                lines = _encoded(lines) if stage.BYTES_NATIVE \
+                    else _decoded(lines)
+            lines = stage.iter_lines(lines)
+            iterators.append(lines)
+            binary = stage.BYTES_NATIVE
+        last = iterators[-1]
+        try:
+            # Lines are passed on whenever the chain waits for more input
+            with flushed_when_idle(self.out_stream):
+                if binary or is_binary(self.out_stream):
+                    with byte_output(self.out_stream) as output:
+                        output.writelines(last if binary else _encoded(last))
+                else:
+                    self.out_stream.writelines(last)
+        finally:
+            # Commands the lines stopped being pulled from finish now, last
+            # first, such as one run on a thread of its own, or a file left
+            # open
+            for iterator in reversed(iterators):
+                close = getattr(iterator, 'close', None)
+                if close is not None:
+                    close()
+        return 0
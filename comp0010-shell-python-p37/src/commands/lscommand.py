@@ -5,6 +5,7 @@ import os
 
 from commands.base_command import BaseCommand
 from commands.command_spec import CommandSpecification
+from commands.read_tracker import record_read
 from errors.command_errors import CommandError, ShellNotADirectoryError, \
     ShellFileNotFoundError
 
@@ -40,6 +41,7 @@ class LS(BaseCommand):
         else:
             ls_directory = self.options[0]
 
+        record_read(ls_directory)
         try:
             for file in os.listdir(ls_directory):
                 if not file.startswith("."):
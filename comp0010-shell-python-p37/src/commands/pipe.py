@@ -34,6 +34,14 @@ class Pipe(Runnable):
         self.left.close()
         self.right.close()
 
+    def cancel(self) -> None:
+        """
+        see Runnable.cancel()
+        """
+        super().cancel()
+        self.left.cancel()
+        self.right.cancel()
+
     @check_arguments
     def run(self) -> int:
         """
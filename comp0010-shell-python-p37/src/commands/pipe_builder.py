@@ -2,14 +2,17 @@
 Builds a pipe when given either two command builders or a pipe builder and a
 command builder.
 """
-from io import StringIO
+from io import BytesIO, StringIO
+from typing import List, Union
 from typing_extensions import Self
 
 from errors import check_arguments
 
 from commands.builder import Builder
+from commands.line_chain import LineChain
 from commands.runnable import Runnable
 from commands.pipe import Pipe
+from commands.pipeline_builder import build_chain, chains_lines
 
 
 class PipeBuilder(Builder):
@@ -27,7 +30,6 @@ class PipeBuilder(Builder):
         self.right: Builder = right
         self.in_stream: StringIO = StringIO()
         self.out_stream: StringIO = StringIO()
-        self.mid_stream: StringIO = StringIO()
         self.left_runnable: Runnable
         self.right_runnable: Runnable
 
@@ -53,19 +55,57 @@ class PipeBuilder(Builder):
         self.out_stream = out_stream
         return self
 
-    def build(self) -> Pipe:
+    def clone(self) -> 'PipeBuilder':
         """
-        Builds a pipe
+        Copies this pipe builder, along with both of its sides.
 
         Returns:
-            Builder: A pipe
+            PipeBuilder: An independent copy of this builder
         """
+        return PipeBuilder(self.left.clone(), self.right.clone())
+
+    def mutates_shell_state(self) -> bool:
+        """
+        see Builder.mutates_shell_state()
+        """
+        return self.left.mutates_shell_state() or \
+            self.right.mutates_shell_state()
+
+    def stages(self) -> List[Builder]:
+        """
+        Gets the builders of every command in the pipe, including those of
+        pipes on the left
+
+        Returns:
+            List[Builder]: The builders, in order
+        """
+        left = self.left.stages() if isinstance(self.left, PipeBuilder) \
+            else [self.left]
+        return left + [self.right]
+
+    def build(self) -> Union[Pipe, LineChain]:
+        """
+        Builds a pipe. Commands that can pass lines on lazily are chained on
+        one thread instead, without a stream in the middle, see
+        chains_lines().
+
+        Returns:
+            Union[Pipe, LineChain]: A pipe
+        """
+        stages = self.stages()
+        if chains_lines(stages):
+            return build_chain(stages, self.in_stream, self.out_stream)
+        # Every pipe built gets its own stream in the middle
+        mid_stream = StringIO()
+        if self.left.handles_bytes() and self.right.handles_bytes():
+            # Nothing needs decoding between two commands that work on bytes
+            mid_stream = BytesIO()  # type: ignore[assignment]
         self.left.set_in_stream(self.in_stream)
-        self.left.set_out_stream(self.mid_stream)
-        self.right.set_in_stream(self.mid_stream)
+        self.left.set_out_stream(mid_stream)
+        self.right.set_in_stream(mid_stream)
         self.right.set_out_stream(self.out_stream)
 
         self.left_runnable = self.left.build()
         self.right_runnable = self.right.build()
 
-        return Pipe(self.left_runnable, self.right_runnable, self.mid_stream)
+        return Pipe(self.left_runnable, self.right_runnable, mid_stream)
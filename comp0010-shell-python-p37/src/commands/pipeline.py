@@ -0,0 +1,135 @@
+"""
+A module implementing a runnable pipeline of any number of stages
+"""
+from functools import partial
+from threading import Thread
+from typing import List, Optional
+
+from errors import check_arguments
+from .channel import Channel
+from .idle_flush import flushed_when_idle
+from .process_stage import ProcessStage
+from .read_tracker import carry_tracker
+from .runnable import Runnable
+
+
+class Pipeline(Runnable):
+    """
+    Class for a pipeline. Unlike nested pipes, a pipeline runs its stages in a
+    loop, so it can be arbitrarily long.
+
+    By default, every stage runs on its own thread, at the same time as the
+    others, reading what the stage before it writes as soon as it is written.
+    The channels between stages are bounded, so the pipeline holds a bounded
+    amount of text however much flows through it. Once a stage finishes, the
+    stage before it is cancelled. Stages that change the shell itself, such as
+    cd, are run one after another instead, with unbounded channels.
+
+    Args:
+        stages (List[Runnable]): The stages, in the order they are run
+        channels (List[Channel]): The channels between every stage and the
+                                  next one
+        concurrent (bool): Whether to run the stages at the same time
+    """
+
+    @check_arguments
+    def __init__(self, stages: List[Runnable], channels: List[Channel],
+                 concurrent: bool = True) -> None:
+        self.stages: List[Runnable] = stages
+        self.channels: List[Channel] = channels
+        self.concurrent = concurrent
+
+    def close(self) -> None:
+        """
+        Closes all resources used by every stage. Channels are closed by both
+        of the stages using them, which only closes their own end.
+        """
+        for stage in self.stages:
+            stage.close()
+
+    @check_arguments
+    def run(self) -> int:
+        """
+        Runs every stage, each reading what the previous stage wrote
+
+        Returns:
+            int: The exit code of the pipeline
+
+        Raises:
+            BaseShellError: The error of the first stage that failed
+        """
+        if not self.concurrent:
+            for index in range(len(self.stages)):
+                error = self._run_stage(index)
+                if error is not None:
+                    self._close_channels()
+                    raise error
+            return 0
+
+        errors: List[Optional[BaseException]] = [None] * len(self.stages)
+
+        def run_stage(index: int) -> None:
+            errors[index] = self._run_stage(index)
+
+        for stage in self.stages:
+            if isinstance(stage, ProcessStage):
+                stage.start()
+        threads = [
+            Thread(target=carry_tracker(partial(run_stage, index)),
+                   name=f'pipeline-stage-{index}', daemon=True)
+            for index in range(len(self.stages) - 1)
+        ]
+        for thread in threads:
+            thread.start()
+        # The last stage runs on this thread, which has to wait anyway
+        run_stage(len(self.stages) - 1)
+        for thread in threads:
+            thread.join()
+        for error in errors:
+            if error is not None:
+                raise error
+        return 0
+
+    def cancel(self) -> None:
+        """
+        see Runnable.cancel()
+        """
+        super().cancel()
+        for stage in self.stages:
+            stage.cancel()
+
+    def _run_stage(self, index: int) -> Optional[BaseException]:
+        """
+        Runs one stage, then ends the input of the next stage. As nothing
+        reads the output of the previous stage any more, that stage is
+        cancelled, so that e.g. cat stops reading once head has enough lines.
+
+        Returns:
+            Optional[BaseException]: What the stage raised, if anything
+        """
+        try:
+            if index < len(self.channels):
+                # What the stage wrote is passed on whenever it waits for
+                # input, see idle_flush.py
+                with flushed_when_idle(self.channels[index].writer):
+                    self.stages[index].run()
+            else:
+                self.stages[index].run()
+            return None
+        except BrokenPipeError as error:
+            # The next stage stopped reading, which ends this one normally
+            return None if index < len(self.channels) else error
+        # Errors are raised on the thread running the pipeline instead
+        except BaseException as error:  # pylint: disable=broad-except
+            return error
+        finally:
+            if index < len(self.channels):
+                self.channels[index].writer.close()
+            if index > 0:
+                self.channels[index - 1].reader.close()
+                self.stages[index - 1].cancel()
+
+    def _close_channels(self) -> None:
+        for channel in self.channels:
+            channel.writer.close()
+            channel.reader.close()
@@ -0,0 +1,197 @@
+"""
+Builds a pipeline from any number of builders. Nested pipeline builders are
+flattened into one pipeline.
+"""
+from io import StringIO, TextIOBase
+from typing import List, Optional, Union, cast
+
+from typing_extensions import Self
+
+from errors import check_arguments
+from errors.error_dsi import DeveloperSkillIssue
+
+from commands.base_command import BaseCommand
+from commands.builder import Builder, flatten_builders
+from commands.channel import (DEFAULT_CHANNEL_CAPACITY, ByteChannel, Channel,
+                              TextChannel)
+from commands.command_builder import CommandBuilder
+from commands.line_chain import LineChain
+from commands.pipeline import Pipeline
+from commands.process_stage import ProcessStage, stage_processes_enabled
+from commands.redirect_builder import RedirectBuilder
+from commands.runnable import Runnable
+
+# How many stages a LineChain may have, as each one nests a few generators
+MAX_CHAIN_LENGTH = 64
+
+
+class PipelineBuilder(Builder):
+    """
+    Builds a pipeline
+
+    Args:
+        builders (List[Builder]): The builders of the stages, of which there
+                                  must be at least two
+    """
+
+    @check_arguments
+    def __init__(self, builders: List[Builder]) -> None:
+        if len(builders) < 2:
+            raise DeveloperSkillIssue('a pipeline needs at least two stages')
+        self.builders: List[Builder] = flatten_builders(builders,
+                                                        PipelineBuilder)
+        self.in_stream: StringIO = StringIO()
+        self.out_stream: StringIO = StringIO()
+
+    @check_arguments
+    def set_in_stream(self, in_stream: StringIO) -> Self:
+        """
+        Sets the in_stream for the command in question
+
+        Args:
+            in_stream (StringIO): The input stream for reading data
+        """
+        self.in_stream = in_stream
+        return self
+
+    @check_arguments
+    def set_out_stream(self, out_stream: StringIO) -> Self:
+        """
+        Sets the out_stream for the command in question
+
+        Args:
+            out_stream (StringIO): The output stream for writing data
+        """
+        self.out_stream = out_stream
+        return self
+
+    def clone(self) -> 'PipelineBuilder':
+        """
+        Copies this pipeline builder, along with every stage.
+
+        Returns:
+            PipelineBuilder: An independent copy of this builder
+        """
+        return PipelineBuilder([builder.clone() for builder in self.builders])
+
+    def mutates_shell_state(self) -> bool:
+        """
+        see Builder.mutates_shell_state()
+        """
+        return any(builder.mutates_shell_state() for builder in self.builders)
+
+    def changes_shell(self) -> bool:
+        """
+        Whether a stage changes the shell itself, like cd or exit, so that the
+        stages after it have to wait for it. Writing files is not enough, as
+        stages that only read and write files can run at the same time, like
+        they do in other shells.
+
+        Returns:
+            bool: Whether the stages have to run one after another
+        """
+        return any(builder.command_type.MUTATES_SHELL_STATE
+                   if isinstance(builder, CommandBuilder)
+                   else builder.mutates_shell_state()
+                   for builder in self.builders)
+
+    def build(self) -> Union[Pipeline, LineChain]:
+        """
+        Builds a pipeline, connecting every stage to the next with a new
+        channel. Two stages that both work on bytes are connected with a
+        byte channel, so that nothing is decoded between them. Within
+        stage_processes(), commands that are CPU bound are run in their own
+        processes, unless the stages run one after another. Stages that can
+        pass lines on lazily are chained on one thread instead, see
+        chains_lines().
+
+        Returns:
+            Union[Pipeline, LineChain]: A pipeline
+        """
+        if not stage_processes_enabled() and chains_lines(self.builders):
+            return build_chain(self.builders, self.in_stream, self.out_stream)
+        concurrent = not self.changes_shell()
+        # Stages run one after another must be able to write everything
+        # before the next one starts reading
+        capacity = DEFAULT_CHANNEL_CAPACITY if concurrent else None
+        channels = [_connect(writer, reader, capacity)
+                    for writer, reader
+                    in zip(self.builders, self.builders[1:])]
+        # The ends of byte channels are passed along like any other stream
+        in_streams = [self.in_stream,
+                      *(cast(TextIOBase, channel.reader)
+                        for channel in channels)]
+        out_streams = [*(cast(TextIOBase, channel.writer)
+                         for channel in channels),
+                       self.out_stream]
+        stages: List[Runnable] = [
+            builder.set_in_stream(in_stream)
+            .set_out_stream(out_stream)
+            .build()
+            for builder, in_stream, out_stream
+            in zip(self.builders, in_streams, out_streams)
+        ]
+        if concurrent and stage_processes_enabled():
+            stages = [ProcessStage(stage)
+                      if isinstance(stage, BaseCommand) and stage.CPU_BOUND
+                      else stage
+                      for stage in stages]
+        return Pipeline(stages, channels, concurrent)
+
+
+def _connect(writer: Builder, reader: Builder,
+             capacity: Optional[int]) -> Channel:
+    """
+    Creates the channel between two stages, which carries bytes if both
+    stages work on bytes, or text otherwise
+    """
+    if writer.handles_bytes() and reader.handles_bytes():
+        return ByteChannel(capacity)
+    return TextChannel(capacity)
+
+
+def chains_lines(builders: List[Builder]) -> bool:
+    """
+    Whether stages can run as a LineChain on one thread: every stage is a
+    plain command, without redirections, none of them changes the shell, and
+    every stage after the first implements BaseCommand.iter_lines() itself.
+    Pipelines longer than MAX_CHAIN_LENGTH are left to threads, as every
+    stage adds to the depth of the stack.
+
+    Args:
+        builders (List[Builder]): The builders of the stages
+
+    Returns:
+        bool: Whether to build a LineChain
+    """
+    commands = [builder for builder in builders
+                if isinstance(builder, CommandBuilder)
+                and not isinstance(builder, RedirectBuilder)]
+    return len(commands) == len(builders) <= MAX_CHAIN_LENGTH and \
+        not any(builder.command_type.MUTATES_SHELL_STATE
+                for builder in commands) and \
+        all(builder.command_type.ITER_LINES for builder in commands[1:])
+
+
+def build_chain(builders: List[Builder], in_stream: StringIO,
+                out_stream: StringIO) -> LineChain:
+    """
+    Builds stages as a LineChain. Only the first command reads the input
+    stream, and the chain writes the output of the last one to the output
+    stream. See chains_lines()
+
+    Args:
+        builders (List[Builder]): The builders of the stages
+        in_stream (StringIO): The input stream of the first stage
+        out_stream (StringIO): The output stream of the last stage
+
+    Returns:
+        LineChain: The chain
+    """
+    in_streams = [in_stream] + [StringIO() for _ in builders[1:]]
+    commands = [cast(BaseCommand,
+                     builder.set_in_stream(stage_in_stream)
+                     .set_out_stream(StringIO())
+                     .build())
+                for builder, stage_in_stream in zip(builders, in_streams)]
+    return LineChain(commands, out_stream)
@@ -0,0 +1,388 @@
+"""
+Runs a stage of a pipeline in its own process, so that stages that spend
+their time working on their input, such as grep, sed and cut, are not held
+back by the global interpreter lock of the shell.
+
+The stage is forked, and reads its input from and writes its output to OS
+pipes. Threads of the shell copy the input of the stage into its input pipe,
+and its output pipe into the output of the stage, so the stage still reads
+and writes the same streams as a stage run on a thread, in the same order.
+Errors raised by the command are sent back to the shell through a third pipe
+and raised again there. What the process writes is passed on through the
+pipes whenever it waits for more input, see idle_flush.py.
+
+Stages are only run in processes inside the stage_processes context, which
+the shell enters for sh --stage-procs.
+"""
+import os
+import pickle
+import select
+import signal
+import threading
+import time
+from codecs import getincrementaldecoder
+from contextlib import contextmanager
+from functools import partial
+from io import BufferedIOBase, BufferedReader, FileIO, StringIO, TextIOWrapper
+from typing import Any, Iterator, List, Optional, Union, cast
+
+from errors.command_errors import StageProcessError
+from errors.error_dsi import DeveloperSkillIssue
+from stdin_source import StdinSource
+
+from .base_command import BaseCommand
+from .byte_streams import ENCODING, ERRORS, is_binary
+from .idle_flush import flush_idle_outputs, flushed_when_idle, \
+    forget_idle_outputs
+from .runnable import Runnable
+
+# How many bytes are copied through a pipe at a time
+PIPE_CHUNK_SIZE = 1 << 16
+# Where the open file descriptors of a process are listed, on Linux and BSD
+FD_DIRECTORIES = ('/proc/self/fd', '/dev/fd')
+# Where they cannot be listed, how far up descriptors are closed
+MAX_CLOSED_FD = 1 << 16
+# Whether a process can be waited for without reaping it, which only Linux
+# supports. Elsewhere, it is polled this often, in seconds.
+WAIT_WITHOUT_REAPING = hasattr(os, 'waitid')
+WAIT_POLL_INTERVAL = 0.01
+
+_SETTINGS = threading.local()
+
+
+@contextmanager
+def stage_processes(enabled: bool = True) -> Iterator[None]:
+    """
+    Runs the stages of the pipelines built on the current thread that are
+    worth it in their own processes, while the context is active.
+
+    Args:
+        enabled (bool): Whether to run stages in processes
+    """
+    previous = getattr(_SETTINGS, 'enabled', False)
+    _SETTINGS.enabled = enabled
+    try:
+        yield
+    finally:
+        _SETTINGS.enabled = previous
+
+
+def stage_processes_enabled() -> bool:
+    """
+    Checks whether pipelines built on the current thread should run stages
+    in processes. See stage_processes()
+    """
+    return getattr(_SETTINGS, 'enabled', False)
+
+
+class _InputPipe(FileIO):
+    """
+    The read end of the input pipe of a stage process, which flushes the
+    outputs of the process before waiting for more input
+    """
+
+    def readinto(self, buffer: Any) -> Optional[int]:
+        if not select.select([self], [], [], 0)[0]:
+            flush_idle_outputs()
+        return super().readinto(buffer)
+
+
+class PipeReader(TextIOWrapper):
+    """
+    The input of a stage running in its own process, read from an OS pipe
+    """
+    # Whether the shell's own stdin is copied into the pipe
+    from_stdin = False
+
+    def at_eof(self) -> bool:
+        """
+        Waits until there is something to read, or the pipe is closed. Like
+        is_stream_empty(), this is meant to be called before reading.
+
+        Returns:
+            bool: Whether nothing more will ever be read
+        """
+        return not cast(BufferedReader, self.buffer).peek(1)
+
+
+class BytePipeReader(BufferedReader):
+    """
+    The input of a stage running in its own process, read from an OS pipe as
+    bytes, for commands that work on bytes
+    """
+    # Whether the shell's own stdin is copied into the pipe
+    from_stdin = False
+
+    def at_eof(self) -> bool:
+        """
+        Waits until there is something to read, or the pipe is closed.
+
+        Returns:
+            bool: Whether nothing more will ever be read
+        """
+        return not self.peek(1)
+
+
+class ProcessStage(Runnable):
+    """
+    A command run in its own process, as a stage of a pipeline. Only commands
+    that set BaseCommand.CPU_BOUND are worth the cost of a process.
+
+    The process is forked by start(), which the pipeline calls before it
+    starts any threads, since forking a process that runs other threads can
+    leave locks held in the child. Otherwise, run() starts it.
+
+    Args:
+        command (BaseCommand): The command, built with the streams of the
+                               stage
+    """
+
+    def __init__(self, command: BaseCommand) -> None:
+        self.command = command
+        self.input = command.input
+        self.output = command.output
+        self._pid: Optional[int] = None
+        self._in_fd = -1
+        self._out_fd = -1
+        self._error_fd = -1
+        self._lock = threading.Lock()
+
+    def start(self) -> None:
+        """
+        Forks the process running the command, unless it is already running
+        """
+        if self._pid is not None:
+            return
+        in_read, self._in_fd = os.pipe()
+        self._out_fd, out_write = os.pipe()
+        self._error_fd, error_write = os.pipe()
+        pid = os.fork()
+        if pid == 0:  # pragma: no cover
+            # Coverage is not collected in forked processes
+            code = 1
+            try:
+                code = _run_child(self.command, in_read, out_write,
+                                  error_write)
+            finally:
+                os._exit(code)
+        os.close(in_read)
+        os.close(out_write)
+        os.close(error_write)
+        self._pid = pid
+
+    def run(self) -> int:
+        """
+        Runs the command in its process, copying its input in and its output
+        out as they come.
+
+        Returns:
+            int: The exit code of the command
+
+        Raises:
+            BaseShellError: Whatever the command raised
+            BrokenPipeError: If the output of the stage was closed
+        """
+        self.start()
+        # The threads copying through the pipes close them once done
+        in_fd, self._in_fd = self._in_fd, -1
+        out_fd, self._out_fd = self._out_fd, -1
+        error_fd, self._error_fd = self._error_fd, -1
+        feeder = threading.Thread(target=self._feed, args=(in_fd,),
+                                  daemon=True,
+                                  name=f'process-stage-{self._pid}-input')
+        feeder.start()
+        broken_pipe = False
+        try:
+            self._drain(out_fd)
+        except BrokenPipeError:
+            broken_pipe = True
+            self._stop()
+        with open(error_fd, 'rb') as errors:
+            error = errors.read()
+        status = self._wait()
+        if error:
+            raise _load_error(error)
+        if broken_pipe:
+            raise BrokenPipeError('the output of the stage is closed')
+        if os.WIFSIGNALED(status):
+            if self.cancelled:
+                return 0
+            raise DeveloperSkillIssue(
+                f'stage process killed by signal {os.WTERMSIG(status)}')
+        return os.WEXITSTATUS(status)
+
+    def cancel(self) -> None:
+        """
+        see Runnable.cancel(). The process is stopped straight away.
+        """
+        super().cancel()
+        self._stop()
+
+    def close(self) -> None:
+        """
+        Closes the streams of the stage, stopping its process if it was never
+        run
+        """
+        self._stop()
+        self._wait()
+        # Pipes are only left over if the stage was never run
+        for fd in (self._in_fd, self._out_fd, self._error_fd):
+            if fd != -1:
+                os.close(fd)
+        self._in_fd = self._out_fd = self._error_fd = -1
+        self.command.close()
+
+    def _feed(self, in_fd: int) -> None:
+        """
+        Copies the input of the stage into its process, until either ends
+        """
+        # Channels return what is ready rather than wait to fill a chunk, and
+        # the pipe is flushed whenever they wait for more
+        read = getattr(self.input, 'read1', self.input.read)
+        try:
+            with open(in_fd, 'wb') as pipe, flushed_when_idle(pipe):
+                while True:
+                    chunk = read(PIPE_CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    pipe.write(chunk if isinstance(chunk, bytes)
+                               else chunk.encode(ENCODING, ERRORS))
+        except (BrokenPipeError, ValueError):
+            # The process stopped reading, or the stage was closed
+            pass
+
+    def _drain(self, out_fd: int) -> None:
+        """
+        Copies the output of the process to the output of the stage as soon
+        as it is written, until the process closes it. Each chunk is passed on
+        straight away, as the process passes on its output whenever it waits.
+        """
+        chunks = iter(partial(os.read, out_fd, PIPE_CHUNK_SIZE), b'')
+        try:
+            if is_binary(self.output):
+                output = cast(BufferedIOBase, self.output)
+                for chunk in chunks:
+                    output.write(chunk)
+                    output.flush()
+                return
+            decoder = getincrementaldecoder(ENCODING)(ERRORS)
+            for chunk in chunks:
+                self.output.write(decoder.decode(chunk))
+                self.output.flush()
+            tail = decoder.decode(b'', True)
+            if tail:
+                self.output.write(tail)
+        finally:
+            os.close(out_fd)
+
+    def _stop(self) -> None:
+        with self._lock:
+            if self._pid is not None:
+                os.kill(self._pid, signal.SIGKILL)
+
+    def _wait(self) -> int:
+        pid = self._pid
+        if pid is None:
+            return 0
+        # The process is only reaped while holding the lock, so that _stop
+        # can never kill another process given the same ID
+        if WAIT_WITHOUT_REAPING:
+            os.waitid(os.P_PID, pid, os.WEXITED | os.WNOWAIT)
+        while True:
+            with self._lock:
+                if self._pid is None:
+                    return 0
+                reaped, status = os.waitpid(
+                    pid, 0 if WAIT_WITHOUT_REAPING else os.WNOHANG)
+                if reaped:
+                    self._pid = None
+                    return status
+            time.sleep(WAIT_POLL_INTERVAL)
+
+
+def _dump_error(error: BaseException) -> bytes:
+    """
+    Pickles what a stage process raised, along with its type and message,
+    which are all the shell gets if the error cannot be rebuilt there
+    """
+    try:
+        data = pickle.dumps(error)
+    except Exception:  # pylint: disable=broad-except
+        data = b''
+    return pickle.dumps((f'{type(error).__name__}: {error}', data))
+
+
+def _load_error(data: bytes) -> BaseException:
+    description, error = pickle.loads(data)
+    try:
+        return cast(BaseException, pickle.loads(error))
+    except Exception:  # pylint: disable=broad-except
+        return StageProcessError(description)
+
+
+def _close_other_fds(keep: List[int]) -> None:  # pragma: no cover
+    """
+    Closes every file descriptor other than the standard streams and keep,
+    like subprocess with close_fds, so that the child does not hold open the
+    pipes of the other stages, which would stop them ever reaching the end
+    of their input. Only the descriptors that are open are closed where they
+    can be listed, rather than every one up to the limit, which can be huge.
+    """
+    for directory in FD_DIRECTORIES:
+        try:
+            fds = [int(name) for name in os.listdir(directory)]
+        except OSError:
+            continue
+        for fd in fds:
+            if fd > 2 and fd not in keep:
+                try:
+                    os.close(fd)
+                except OSError:
+                    # Such as the descriptor listdir() read the directory with
+                    pass
+        return
+    low = 3
+    for fd in sorted(keep):
+        os.closerange(low, fd)
+        low = fd + 1
+    os.closerange(low, min(os.sysconf('SC_OPEN_MAX'), MAX_CLOSED_FD))
+
+
+def _run_child(command: BaseCommand, in_fd: int, out_fd: int,
+               error_fd: int) -> int:  # pragma: no cover
+    """
+    Runs the command in the forked child, reading in_fd and writing out_fd,
+    and sends whatever it raises to error_fd.
+
+    Returns:
+        int: The exit status of the child
+    """
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    _close_other_fds([in_fd, out_fd, error_fd])
+    # The outputs registered by the thread that forked belong to the shell
+    forget_idle_outputs()
+    # Commands are typed as taking StringIO, but any stream they can read
+    # will do
+    reader: Union[PipeReader, BytePipeReader]
+    if command.BYTES_NATIVE:
+        reader = BytePipeReader(_InputPipe(in_fd))
+        command.output = cast(StringIO, open(out_fd, 'wb'))
+    else:
+        reader = PipeReader(BufferedReader(_InputPipe(in_fd)),
+                            encoding=ENCODING, errors=ERRORS, newline='\n')
+        command.output = cast(StringIO, open(out_fd, 'w', encoding=ENCODING,
+                                             errors=ERRORS, newline='\n'))
+    reader.from_stdin = isinstance(command.input, StdinSource)
+    command.input = cast(StringIO, reader)
+    try:
+        with flushed_when_idle(command.output):
+            code = command.run()
+        command.output.flush()
+        return code & 0xff
+    except BrokenPipeError:
+        return 0
+    except BaseException as error:  # pylint: disable=broad-except
+        with open(error_fd, 'wb') as errors:
+            errors.write(_dump_error(error))
+        return 1
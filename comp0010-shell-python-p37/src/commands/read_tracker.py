@@ -0,0 +1,123 @@
+"""
+Records which files and directories a command line reads, so that a cached
+result of the command line can be thrown away once any of them changes.
+
+Commands report every file they open for reading and every directory they
+list with record_read. Reads are only recorded while a ReadTracker is active
+on the current thread, so tracking costs nothing otherwise.
+"""
+import os
+import threading
+from os import PathLike
+from typing import Callable, Dict, Optional, Tuple, TypeVar, Union
+
+# The modification time in nanoseconds and the size of a file or directory, or
+# None if it does not exist
+Fingerprint = Optional[Tuple[int, int]]
+
+_ACTIVE = threading.local()
+
+T = TypeVar('T')
+
+
+def fingerprint(path: Union[str, PathLike]) -> Fingerprint:
+    """
+    Fingerprints a file or directory by its modification time and size.
+    Listing a directory depends on its entries, which change its modification
+    time.
+
+    Args:
+        path (Union[str, PathLike]): The path of the file or directory
+
+    Returns:
+        Fingerprint: Its fingerprint, or None if it cannot be found
+    """
+    try:
+        status = os.stat(path)
+    except OSError:
+        return None
+    return status.st_mtime_ns, status.st_size
+
+
+class ReadTracker:
+    """
+    Collects the fingerprints of everything read while it is active. A
+    tracker is activated with a with statement, and can be activated again
+    later, on any thread, to carry on collecting.
+
+    Attributes:
+        reads (Dict[str, Fingerprint]): The fingerprint of every path read,
+                                        taken when it was first read
+        untracked (bool): Whether something was read that could not be
+                          recorded, such as the directories searched by a
+                          glob like */*.txt
+    """
+
+    def __init__(self) -> None:
+        self.reads: Dict[str, Fingerprint] = {}
+        self.untracked = False
+        # The tracker each thread had active before this one, as it can be
+        # active on several threads at once
+        self._previous: Dict[int, Optional[ReadTracker]] = {}
+
+    def __enter__(self) -> 'ReadTracker':
+        self._previous[threading.get_ident()] = \
+            getattr(_ACTIVE, 'tracker', None)
+        _ACTIVE.tracker = self
+        return self
+
+    def __exit__(self, *_) -> None:
+        _ACTIVE.tracker = self._previous.pop(threading.get_ident())
+
+    def is_unchanged(self) -> bool:
+        """
+        Checks whether everything read still has the fingerprint it had when
+        it was read.
+        """
+        return not self.untracked and all(
+            fingerprint(path) == before for path, before in self.reads.items())
+
+
+def carry_tracker(target: Callable[[], T]) -> Callable[[], T]:
+    """
+    Wraps target so that, on whichever thread it runs, it records reads in the
+    tracker active on the current thread, if any. Used to run the stages of a
+    pipeline on other threads.
+
+    Args:
+        target (Callable[[], T]): The function to run on another thread
+
+    Returns:
+        Callable[[], T]: The wrapped function
+    """
+    tracker: Optional[ReadTracker] = getattr(_ACTIVE, 'tracker', None)
+    if tracker is None:
+        return target
+
+    def run_tracked() -> T:
+        with tracker:
+            return target()
+    return run_tracked
+
+
+def record_read(path: Union[str, PathLike]) -> None:
+    """
+    Records that path is about to be read by the active tracker, if any.
+
+    Args:
+        path (Union[str, PathLike]): The file about to be opened, or the
+                                     directory about to be listed
+    """
+    tracker: Optional[ReadTracker] = getattr(_ACTIVE, 'tracker', None)
+    if tracker is not None:
+        tracker.reads.setdefault(str(os.path.abspath(path)), fingerprint(path))
+
+
+def record_untracked_read() -> None:
+    """
+    Records that something was read that cannot be fingerprinted, so that
+    whatever was read can never be assumed to be unchanged.
+    """
+    tracker: Optional[ReadTracker] = getattr(_ACTIVE, 'tracker', None)
+    if tracker is not None:
+        tracker.untracked = True
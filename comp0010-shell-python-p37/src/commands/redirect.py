@@ -2,9 +2,7 @@
 The redirect runnable that wraps the inner command.
 """
 
-import shutil
-import os
-from io import StringIO, TextIOBase
+from io import TextIOBase
 from errors.error_dsi import DeveloperSkillIssue
 
 from .runnable import Runnable
@@ -12,82 +10,58 @@ from .runnable import Runnable
 
 class Redirect(Runnable):
     """
-    The redirect runnable. The arguments to this function needs to also be
-    linked to the Runnable some way or another.
+    The redirect runnable. The wrapped runnable is built to read from
+    in_stream and write to out_stream itself, which are the files opened by
+    the redirect builder, if any, so nothing is copied in between, and
+    redirecting a file holds no more of it in memory than the command does.
 
     Args:
-        in_stream (TextIOBase): Input stream to the Redirect object
-        out_stream (TextIOBase): Output stream to the Redirect object
-        wrapped_in_stream (StringIO): Input stream for the wrapped runnable
-        wrapped_out_stream (StringIO): Output stream for the wrapped runnable
+        in_stream (TextIOBase): Input stream of the wrapped runnable
+        out_stream (TextIOBase): Output stream of the wrapped runnable
         runnable (Runnable): The wrapped runnable object
+        cancellable (bool): Whether the runnable may be cancelled, which it
+                            must not be if its output goes to a file rather
+                            than to whoever cancels it
     """
-    def __init__(self,  # pylint: disable=too-many-arguments
+    def __init__(self,
                  in_stream: TextIOBase,
                  out_stream: TextIOBase,
-                 wrapped_in_stream: StringIO,
-                 wrapped_out_stream: StringIO,
-                 runnable: Runnable) -> None:
+                 runnable: Runnable,
+                 cancellable: bool = True) -> None:
         self.in_stream = in_stream
         self.out_stream = out_stream
-        self.wrapped_in_stream = wrapped_in_stream
-        self.wrapped_out_stream = wrapped_out_stream
         self.runnable = runnable
+        self.cancellable = cancellable
 
     def __streams_are_open_guard(self):
-        if self.in_stream.closed or \
-           self.out_stream.closed or \
-           self.wrapped_in_stream.closed or \
-           self.wrapped_out_stream.closed:
+        if self.in_stream.closed or self.out_stream.closed:
             raise DeveloperSkillIssue('one of the streams are closed')
 
-    def stream_is_empty(self, stream: TextIOBase) -> bool:
-        """
-        If the stream is not seekable, we treat it as non-empty, so we return
-        true. Otherwise, checks if the end of the stream > current pos.
-
-        Args:
-            stream (TextIOBase): The stream to check the emptiness of
-
-        Returns:
-            bool: True if the stream is empty and False otherwise (or if can't
-                  tell)
-        """
-        if not stream.seekable():
-            return True
-
-        pos = stream.tell()
-        stream.seek(0, os.SEEK_END)
-        rtn_val = stream.tell() > pos
-        stream.seek(pos, os.SEEK_SET)
-        return not rtn_val
-
     def run(self) -> int:
         """
-        Streams the input stream into the wrapped input stream and runs the
-        wrapped runnable. Subsequently, streams the runnable output to an
-        output stream.
+        Runs the wrapped runnable, then flushes its output, so that the
+        commands after it can read the file it was redirected to.
 
         Raises:
             DeveloperSkillIssue: If any of the streams are closed.
         """
         self.__streams_are_open_guard()
-
-        if not self.stream_is_empty(self.in_stream):
-            in_pos = self.wrapped_in_stream.tell()
-            shutil.copyfileobj(self.in_stream, self.wrapped_in_stream)
-            self.wrapped_in_stream.seek(in_pos)
-
-        with self.runnable:
-            out_pos = self.wrapped_out_stream.tell()
+        try:
             # NOTE: any exception from the runnable will propagate
-            rtn_val = self.runnable.run()
-            self.wrapped_out_stream.seek(out_pos)
-            if not self.stream_is_empty(self.wrapped_out_stream):
-                shutil.copyfileobj(self.wrapped_out_stream, self.out_stream)
-            return rtn_val
+            return self.runnable.run()
+        finally:
+            if not self.out_stream.closed:
+                self.out_stream.flush()
+
+    def cancel(self) -> None:
+        """
+        see Runnable.cancel()
+        """
+        if self.cancellable:
+            super().cancel()
+            self.runnable.cancel()
 
     def close(self):
+        self.runnable.close()
         self.in_stream.close()
         self.out_stream.close()
-        # self.runnable has already been closed in run()
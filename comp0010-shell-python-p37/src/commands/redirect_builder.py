@@ -5,9 +5,9 @@ A redirect builder, where files are redirected.
 # The encoding of the file doesn't matter to the builder
 # pylint: disable=consider-using-with
 
-from io import StringIO
+from io import TextIOBase
 from os import PathLike
-from typing import Optional
+from typing import Optional, cast
 
 from typing_extensions import Self
 
@@ -17,6 +17,7 @@ from errors.command_errors import ShellFileNotFoundError
 from flag import FlagValue
 
 from .command_builder import CommandBuilder
+from .read_tracker import record_read
 from .redirect import Redirect
 from .runnable import Runnable
 
@@ -82,13 +83,50 @@ class RedirectBuilder(CommandBuilder):
         self.child_buildable.add_option(option)
         return self
 
+    def clone(self) -> 'RedirectBuilder':
+        """
+        Copies this redirect builder, along with the builder it wraps.
+
+        Returns:
+            RedirectBuilder: An independent copy of this builder
+        """
+        builder = RedirectBuilder(self.child_buildable.clone())
+        builder.in_file = self.in_file
+        builder.out_file = self.out_file
+        return builder
+
+    def handles_bytes(self) -> bool:
+        """
+        see Builder.handles_bytes()
+        """
+        return self.child_buildable.handles_bytes()
+
+    def mutates_shell_state(self) -> bool:
+        """
+        Writing to a file changes what other command lines can read
+        """
+        return self.out_file is not None or \
+            self.child_buildable.mutates_shell_state()
+
     def build(self) -> Runnable:
+        """
+        Opens the files to redirect, and builds the wrapped command to read
+        and write them directly.
+
+        Returns:
+            Runnable: The redirect, wrapping the built command
+        """
         # The closure of the following streams are handled by the runnables
+        if self.in_file is not None:
+            record_read(self.in_file)
+        # Commands that work on bytes read and write the files as bytes,
+        # which are passed along like any other stream
+        binary = 'b' if self.child_buildable.handles_bytes() else ''
         try:
-            target_in = open(self.in_file) if self.in_file is not None \
-                else self.in_stream
-            target_out = open(self.out_file, 'w') if self.out_file is not None\
-                else self.out_stream
+            target_in = cast(TextIOBase, open(self.in_file, 'r' + binary)) \
+                if self.in_file is not None else self.in_stream
+            target_out = cast(TextIOBase, open(self.out_file, 'w' + binary)) \
+                if self.out_file is not None else self.out_stream
         except FileNotFoundError as e:
             raise ShellFileNotFoundError from e
         except PermissionError as e:
@@ -98,12 +136,10 @@ class RedirectBuilder(CommandBuilder):
         except OSError as e:
             raise RedirectError('unknown error') from e
 
-        child_in, child_out = StringIO(), StringIO()
         return Redirect(target_in,
                         target_out,
-                        child_in,
-                        child_out,
                         self.child_buildable
-                        .set_in_stream(child_in)
-                        .set_out_stream(child_out)
-                        .build())
+                        .set_in_stream(target_in)
+                        .set_out_stream(target_out)
+                        .build(),
+                        cancellable=self.out_file is None)
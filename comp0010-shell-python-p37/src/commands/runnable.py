@@ -19,6 +19,9 @@ class Runnable(ContextManager, ABC):
 
     This class has 2 attributes: The input and output StringIOs
     """
+    # Set by cancel(), possibly from another thread
+    cancelled = False
+
     @abstractmethod
     def run(self) -> int:  # pragma: no cover
         """
@@ -39,6 +42,15 @@ class Runnable(ContextManager, ABC):
             'this function is meant to be re-implemented'
         )
 
+    def cancel(self) -> None:
+        """
+        Asks the runnable to stop as soon as it can, because nothing will read
+        its output any more, like SIGPIPE. Commands check cancelled between
+        lines, chunks or files, and return as if they had finished. This can
+        be called from any thread, before, while or after the runnable runs.
+        """
+        self.cancelled = True
+
     def run_and_close(self) -> int:
         """
         Runs the command and closes all resources immediately after.
@@ -2,12 +2,12 @@
 Sed command, implemented only exactly to spec.
 """
 import re
-from io import StringIO, TextIOWrapper
+from io import StringIO
 from re import Pattern
-from typing import List
+from typing import Iterable, Iterator, List, Optional
 
 from commands.base_command import BaseCommand
-from commands.command_helpers import exception_handled_open, is_stream_empty
+from commands.command_helpers import exception_handled_open, input_lines
 from commands.command_spec import CommandSpecification
 from errors.command_errors import CommandError
 from flag import FlagValue
@@ -28,6 +28,8 @@ class Sed(BaseCommand):
                               "A limited sed that performs only s/ prefix and"
                               " supports only the /g suffix. If no file is "
                               " specified, will use STDIN."))
+    CPU_BOUND = True
+    ITER_LINES = True
 
     def __init__(self,
                  in_stream: StringIO,
@@ -78,35 +80,42 @@ class Sed(BaseCommand):
             raise CommandError("Not enough arguments to command")
         self.__expression_guard(self.options[0])
 
-    def _sed(self, in_stream: TextIOWrapper, out_stream: TextIOWrapper) \
-            -> None:
+    def _sed(self, lines: Iterable[str]) -> Iterator[str]:
         """
-        Processes the sed command, replacing arbitrary strings from the
-        in_stream to the out_stream (these are parameters).
+        Processes the sed command, replacing arbitrary strings in every line,
+        one line at a time.
 
         This function assumes that self has been correctly configured.
 
         Args:
-            in_stream (TextIOWrapper): The input stream to run sed on
-            out_stream (TextIOWrapper): The output stream to dump sed output
-        """
-        for line in in_stream:
-            out_stream.write(
-                self.replace_from.sub(
-                    self.replace_to, line,
-                    count=int(not self.replace_global)))
+            lines (Iterable[str]): The lines to run sed on
 
-    def run(self) -> int:
+        Returns:
+            Iterator[str]: The lines, with the replacements made
         """
-        see BaseCommand.run()
+        sub = self.replace_from.sub
+        replace_to = self.replace_to
+        count = int(not self.replace_global)
+        for line in self.until_cancelled(lines):
+            yield sub(replace_to, line, count=count)
+
+    def iter_lines(self, lines: Optional[Iterable[str]] = None
+                   ) -> Iterator[str]:
+        """
+        see BaseCommand.iter_lines()
         """
         if len(self.options) < 2:
-            if is_stream_empty(self.input):
-                raise CommandError("No input provided")
-            self._sed(self.input, self.output)
-            return 0
+            yield from self._sed(input_lines(
+                self, lines, CommandError("No input provided")))
+            return
 
         file = self.options[1]
         with exception_handled_open(file, 'r') as f:
-            self._sed(f, self.output)
+            yield from self._sed(f)
+
+    def run(self) -> int:
+        """
+        see BaseCommand.run()
+        """
+        self.write_lines(self.iter_lines())
         return 0
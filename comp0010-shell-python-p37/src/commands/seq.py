@@ -29,6 +29,14 @@ class Seq(Runnable):
         self.right.run()
         return 0
 
+    def cancel(self) -> None:
+        """
+        see Runnable.cancel()
+        """
+        super().cancel()
+        self.left.cancel()
+        self.right.cancel()
+
     def close(self) -> None:
         self.left.close()
         self.right.close()
@@ -40,6 +40,22 @@ class SeqBuilder(Builder):
         self.out_stream = out_stream
         return self
 
+    def clone(self) -> 'SeqBuilder':
+        """
+        Copies this sequence builder, along with both of its sides.
+
+        Returns:
+            SeqBuilder: An independent copy of this builder
+        """
+        return SeqBuilder(self.left.clone(), self.right.clone())
+
+    def mutates_shell_state(self) -> bool:
+        """
+        see Builder.mutates_shell_state()
+        """
+        return self.left.mutates_shell_state() or \
+            self.right.mutates_shell_state()
+
     def build(self) -> Runnable:
         """
         Builds a Sequence runnable
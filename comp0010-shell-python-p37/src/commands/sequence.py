@@ -0,0 +1,45 @@
+"""
+module for sequences of any number of commands
+"""
+from typing import List
+
+from commands.runnable import Runnable
+
+
+class Sequence(Runnable):
+    """
+    A class to run a sequence (;) of commands. Unlike nested seqs, a sequence
+    runs its commands in a loop, so it can be arbitrarily long.
+
+    Args:
+        runnables (List[Runnable]): The commands, in the order they are run
+    """
+
+    def __init__(self, runnables: List[Runnable]) -> None:
+        self.runnables: List[Runnable] = runnables
+
+    def run(self) -> int:
+        """
+        Runs every command in order, stopping at the first that raises, or
+        once the sequence is cancelled
+
+        Returns:
+            int: exit code of the sequence
+        """
+        for runnable in self.runnables:
+            if self.cancelled:
+                break
+            runnable.run()
+        return 0
+
+    def cancel(self) -> None:
+        """
+        see Runnable.cancel()
+        """
+        super().cancel()
+        for runnable in self.runnables:
+            runnable.cancel()
+
+    def close(self) -> None:
+        for runnable in self.runnables:
+            runnable.close()
@@ -0,0 +1,79 @@
+"""
+module for the sequence builder
+"""
+from io import StringIO, TextIOBase
+from typing import List
+
+from typing_extensions import Self
+
+from commands.builder import Builder, flatten_builders
+from commands.sequence import Sequence
+from errors.error_dsi import DeveloperSkillIssue
+
+
+class SequenceBuilder(Builder):
+    """
+    a class to build a sequence of any number of commands. Nested sequence
+    builders are flattened into one sequence.
+
+    Args:
+        builders (List[Builder]): the builders of the commands, of which there
+                                  must be at least two
+    """
+
+    def __init__(self, builders: List[Builder]) -> None:
+        if len(builders) < 2:
+            raise DeveloperSkillIssue('a sequence needs at least two commands')
+        self.builders: List[Builder] = flatten_builders(builders,
+                                                        SequenceBuilder)
+        self.in_stream = TextIOBase()
+        self.out_stream = TextIOBase()
+
+    def set_in_stream(self, in_stream: TextIOBase) -> Self:
+        """
+        Sets the in_stream for the command in question
+        Args:
+            in_stream (StringIO): The input stream for reading data
+        """
+        self.in_stream = in_stream
+        return self
+
+    def set_out_stream(self, out_stream: TextIOBase) -> Self:
+        """
+        Sets the out_stream for the command in question
+        Args:
+            in_stream (StringIO): The output stream for reading data
+        """
+        self.out_stream = out_stream
+        return self
+
+    def clone(self) -> 'SequenceBuilder':
+        """
+        Copies this sequence builder, along with every command.
+
+        Returns:
+            SequenceBuilder: An independent copy of this builder
+        """
+        return SequenceBuilder([builder.clone() for builder in self.builders])
+
+    def mutates_shell_state(self) -> bool:
+        """
+        see Builder.mutates_shell_state()
+        """
+        return any(builder.mutates_shell_state() for builder in self.builders)
+
+    def build(self) -> Sequence:
+        """
+        Builds a Sequence runnable. Only the first command reads the input
+        stream, and every command writes to the output stream.
+
+        Returns:
+            Sequence: the runnable sequence
+        """
+        runnables = []
+        for index, builder in enumerate(self.builders):
+            in_stream = self.in_stream if index == 0 else StringIO()
+            runnables.append(builder.set_in_stream(in_stream)
+                             .set_out_stream(self.out_stream)
+                             .build())
+        return Sequence(runnables)
@@ -10,6 +10,8 @@ from errors.error_dsi import DeveloperSkillIssue
 from flag import FlagValue, FlagSpecification
 from commands.command_spec import CommandSpecification
 from commands.base_command import BaseCommand
+from commands.command_helpers import is_input_missing
+from commands.read_tracker import record_read
 
 
 class Sort(BaseCommand):
@@ -27,6 +29,7 @@ class Sort(BaseCommand):
             "  [FILE] is the file to sort",
         ),
     )
+    CPU_BOUND = True
 
     def __init__(
         self,
@@ -65,6 +68,7 @@ class Sort(BaseCommand):
         Args:
             file_name (str): Name of the file to sort.
         """
+        record_read(file_name)
         try:
             with open(file_name, "r") as file:
                 lines = file.readlines()
@@ -82,10 +86,16 @@ class Sort(BaseCommand):
         see BaseCommand.run()
         """
         if len(self.options) == 0:
-            self.input.seek(0, os.SEEK_END)
-            if self.input.tell() == 0:
+            # seekable stdin is read from the start, and the stage before
+            # in a pipeline is waited for
+            if self.input.seekable():
+                self.input.seek(0, os.SEEK_END)
+                empty = self.input.tell() == 0
+                self.input.seek(0)
+            else:
+                empty = is_input_missing(self.input)
+            if empty:
                 raise CommandError("sort needs a file or stdin")
-            self.input.seek(0)
         else:
             if not os.path.exists(self.options[0]):
                 raise ShellFileNotFoundError(self.options[0])
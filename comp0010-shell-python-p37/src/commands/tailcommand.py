@@ -1,16 +1,28 @@
 """
 Imports the base commmand, and implements the interface for the tail command
 """
-from io import StringIO, TextIOBase
-from typing import List
+from collections import deque
+from functools import partial
+from io import BufferedIOBase, StringIO
+from itertools import islice
+from typing import Iterable, Iterator, List, Optional, Union
 
 from commands.base_command import BaseCommand
-from commands.command_helpers import exception_handled_open, is_stream_empty
+from commands.byte_streams import byte_input, byte_output
+from commands.command_helpers import FileSource, is_input_missing
 from commands.command_spec import CommandSpecification
+from commands.file_follower import FileFollower
 from errors.command_errors import CommandError
 from errors.error_dsi import DeveloperSkillIssue
+from errors.parse_errors import UnknownFlagValueError
 from flag import Flag, FlagSpecification, FlagValue
 
+# How many bytes are read at a time, backwards from the end of a file or
+# forwards to print it
+TAIL_BLOCK_SIZE = 1 << 16
+
+Chunk = Union[bytes, memoryview]
+
 
 class Tail(BaseCommand):
     """
@@ -19,12 +31,19 @@ class Tail(BaseCommand):
 
     COMMAND_SPECIFICATION = CommandSpecification(
         "tail",
-        [FlagSpecification("n", int, "Number of lines to print")],
+        [FlagSpecification("n", str, "Number of lines to print, or +K to "
+                           "print from line K"),
+         FlagSpecification("c", str, "Number of bytes to print, or +K to "
+                           "print from byte K"),
+         FlagSpecification("f", bool, "Print what is appended to FILE as it "
+                           "grows")],
         (
             "[OPTIONS] [FILE]",
-            "Prints the last 10 lines of FILE if -n is not provided.\n",
+            "Prints the last 10 lines of FILE if -n or -c is not "
+            "provided.\n",
         ),
     )
+    BYTES_NATIVE = True
 
     def __init__(
         self,
@@ -44,16 +63,26 @@ class Tail(BaseCommand):
 
         Raises:
             DeveloperSkillIssue: if the number of lines is not valid
+            UnknownFlagValueError: if the number of lines or bytes is not a
+                number
             CommandError: if the number of options is not 1
         """
-        self.num_lines = self._check_num_lines(flags)
+        # Whichever of -n and -c comes last is used
+        self.num_bytes: Optional[int] = None
+        self.from_start = False
+        self.follow = any(flag.name == "f" and flag.value for flag in flags)
+        self.num_lines = self._check_num_lines(
+            [flag for flag in flags if flag.name != "f"])
+        self._follower: Optional[FileFollower] = None
         super().__init__(in_stream, out_stream, flags, options)
 
     def _check_num_lines(self, flags: List[Flag]) -> int:
         """
-        Checks if the number of lines to be read is valid, and returns the
-        number of lines to be read if it is valid. Returns 10 if the number
-        of lines is not specified.
+        Checks if the number of lines or bytes to be read is valid, and
+        returns the number of lines to be read if it is valid. Returns 10 if
+        the number of lines is not specified. Sets num_bytes if bytes are
+        counted rather than lines, and from_start if they count from the
+        start.
 
         Args:
             lines (int): the number of lines to be read from the file
@@ -63,44 +92,177 @@ class Tail(BaseCommand):
         # set the default number of lines to be read to 10
         num_lines: int = 10
         for flag in flags:
-            if flag.name == "n":
-                if not isinstance(flag.value, int):
-                    raise DeveloperSkillIssue(
-                        f"Invalid number of lines \
-                                                {flag.value}"
-                    )
-                num_lines = flag.value
-                break
+            if flag.name not in ("n", "c"):
+                raise DeveloperSkillIssue(
+                    f"Invalid flag {flag.name}, should have \
+                                          been caught by flag parser"
+                )
+            count = self._parse_count(flag)
+            if flag.name == "c":
+                self.num_bytes = count
+            else:
+                num_lines = count
+                self.num_bytes = None
+        return num_lines
+
+    def _parse_count(self, flag: Flag) -> int:
+        """
+        Parses the value of -n or -c. A count starting with + counts from the
+        start, and any other count from the end, whatever its sign.
+        """
+        value = flag.value
+        if isinstance(value, str):
+            self.from_start = value.startswith("+")
+            try:
+                value = int(value)
+            except ValueError as e:
+                raise UnknownFlagValueError(
+                    f"Invalid value for flag {flag.name}: {flag.value}"
+                ) from e
+        else:
+            self.from_start = False
+        if not isinstance(value, int) or isinstance(value, bool):
             raise DeveloperSkillIssue(
-                f"Invalid flag {flag.name}, should have \
-                                      been caught by flag parser"
+                f"Invalid number of lines \
+                                        {flag.value}"
             )
-        return num_lines
+        # Counting from the start, +0 is the same as +1
+        return max(value - 1, 0) if self.from_start else abs(value)
 
     def _read_lines_from_file(
-        self, f: TextIOBase, num_lines: int
-    ) -> List[str]:
+        self, f: Iterable[bytes], num_lines: int
+    ) -> Iterable[bytes]:
+        """
+        Reads the lines to print from a file or stream that can only be read
+        from the start, holding no more than num_lines at a time.
+
+        Args:
+            f (Iterable[bytes]): The lines of the file
+            num_lines (int): Maximum number of lines to read, or how many
+                lines to skip if counting from the start.
+
+        Returns:
+            Iterable[bytes]: The lines to print.
         """
-        Reads up to num_lines from the specified file.
+        if self.from_start:
+            return islice(f, num_lines, None)
+        return deque(f, maxlen=num_lines)
+
+    def _read_bytes(
+        self, chunks: Iterable[Chunk], num_bytes: int
+    ) -> Iterator[Chunk]:
+        """
+        Reads the bytes to print from a file or stream that can only be read
+        from the start, holding no more than num_bytes at a time.
 
         Args:
-            f (TextIOBase): A file stream
-            num_lines (int): Maximum number of lines to read.
+            chunks (Iterable[Chunk]): The chunks of the file
+            num_bytes (int): Maximum number of bytes to read, or how many
+                bytes to skip if counting from the start.
 
         Returns:
-            List[str]: List of lines read from the file.
+            Iterator[Chunk]: The bytes to print, a chunk at a time.
+        """
+        if self.from_start:
+            for chunk in chunks:
+                if num_bytes < len(chunk):
+                    yield chunk[num_bytes:]
+                num_bytes = max(num_bytes - len(chunk), 0)
+            return
+        held_back = bytearray()
+        for chunk in chunks:
+            held_back += chunk
+            if len(held_back) > num_bytes:
+                del held_back[:len(held_back) - num_bytes]
+        yield bytes(held_back)
 
-        Raises:
-            FileNotFoundError: If the file is not found.
+    @staticmethod
+    def _line_offset(file: BufferedIOBase, size: int, num_lines: int) -> int:
         """
-        lines = f.readlines()
-        # If the number of lines is negative, read the last abs(num_lines)
-        if num_lines < 0:
-            num_lines = abs(num_lines)
-        # Don't read more lines than there are in the file
-        num_lines = min(num_lines, len(lines))
+        Finds where the last num_lines lines of a file start, reading blocks
+        backwards from its end until it has seen enough newlines. Only as
+        much of the file is read as the lines take up.
 
-        return lines[len(lines) - num_lines:]
+        Args:
+            file (BufferedIOBase): The file, which must be seekable
+            size (int): The size of the file
+            num_lines (int): How many lines to find
+
+        Returns:
+            int: The offset of the first line to print
+        """
+        if num_lines == 0:
+            return size
+        end = size
+        while end > 0:
+            start = max(end - TAIL_BLOCK_SIZE, 0)
+            file.seek(start)
+            block = file.read(end - start)
+            index = len(block)
+            if end == size and block.endswith(b"\n"):
+                # The newline ending the file ends the last line
+                index -= 1
+            while True:
+                index = block.rfind(b"\n", 0, index)
+                if index == -1:
+                    break
+                num_lines -= 1
+                if num_lines == 0:
+                    return start + index + 1
+            end = start
+        return 0
+
+    def _read_file(self, f: FileSource) -> Iterable[Chunk]:
+        """
+        Reads what to print from a file. Regular files are read from where
+        the bytes or lines to print start, found from their size or by
+        reading backwards from their end, so only the lines to print are
+        read. Other files are read from the start.
+        """
+        if f.size is None or (self.from_start and self.num_bytes is None):
+            if self.num_bytes is not None:
+                return self._read_bytes(f.chunks(TAIL_BLOCK_SIZE),
+                                        self.num_bytes)
+            return self._read_lines_from_file(f.lines(), self.num_lines)
+        if self.num_bytes is None:
+            start = self._line_offset(f.file, f.size, self.num_lines)
+        elif self.from_start:
+            start = min(self.num_bytes, f.size)
+        else:
+            start = max(f.size - self.num_bytes, 0)
+        return f.chunks(TAIL_BLOCK_SIZE, start)
+
+    def _follow(self, f: FileSource, output: BufferedIOBase) -> None:
+        """
+        Prints what is appended to a regular file as soon as it is read,
+        until cancelled. Other files end once they are read.
+        """
+        if f.size is None:
+            return
+        # Mapped files are printed up to the size they were mapped at, and
+        # other files up to wherever they were read to
+        offset = f.size if f.mapped else f.file.tell()
+        with FileFollower(self.options[0], f.file.fileno(),
+                          offset) as follower:
+            self._follower = follower
+            if self.cancelled:
+                return
+            for chunk in follower.chunks():
+                output.write(chunk)
+                # Each chunk is passed on straight away, however long the
+                # file then stays the same
+                output.flush()
+                self.output.flush()
+
+    def cancel(self) -> None:
+        """
+        see Runnable.cancel(). A file being followed stops being followed
+        straight away.
+        """
+        super().cancel()
+        follower = self._follower
+        if follower is not None:
+            follower.stop()
 
     def run(self) -> int:
         """
@@ -109,19 +271,25 @@ class Tail(BaseCommand):
         Raises:
             ShellFileNotFoundError
         """
-        if len(self.options) != 1 and is_stream_empty(self.input):
+        if len(self.options) != 1 and is_input_missing(self.input):
             raise CommandError("No file specified")
 
-        if self.options:
-            file = self.options[0]
-            with exception_handled_open(file, "r") as f:
-                lines_to_output = self._read_lines_from_file(f, self.num_lines)
-        else:
-            lines_to_output = self._read_lines_from_file(
-                self.input, self.num_lines
-            )
-
-        for line in lines_to_output:
-            self.output.write(line)
+        with byte_output(self.output) as output:
+            if self.options:
+                with FileSource(self.options[0]) as f:
+                    output.writelines(self._read_file(f))
+                    if self.follow:
+                        output.flush()
+                        self.output.flush()
+                        self._follow(f, output)
+                return 0
+            source = byte_input(self.input)
+            if self.num_bytes is None:
+                output.writelines(
+                    self._read_lines_from_file(source, self.num_lines))
+            else:
+                output.writelines(self._read_bytes(
+                    iter(partial(source.read, TAIL_BLOCK_SIZE), b""),
+                    self.num_bytes))
 
         return 0
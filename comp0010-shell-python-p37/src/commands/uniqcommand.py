@@ -1,8 +1,8 @@
 """
 This module contains the UniqCommand class.
 """
-from io import StringIO, TextIOWrapper
-from typing import List
+from io import StringIO
+from typing import Iterable, Iterator, List, Optional
 import os
 
 from errors.command_errors import CommandError, ShellFileNotFoundError
@@ -11,7 +11,7 @@ from flag import FlagValue, FlagSpecification
 
 from commands.base_command import BaseCommand
 from commands.command_spec import CommandSpecification
-from commands.command_helpers import exception_handled_open
+from commands.command_helpers import exception_handled_open, input_lines
 
 
 class Uniq(BaseCommand):
@@ -29,6 +29,8 @@ class Uniq(BaseCommand):
             "  FILE is the name of a file.",
         ),
     )
+    CPU_BOUND = True
+    ITER_LINES = True
 
     def __init__(
         self,
@@ -63,37 +65,49 @@ class Uniq(BaseCommand):
         if len(options) > 1:
             raise CommandError("uniq only accepts one file")
 
-    def _uniq(self, file: TextIOWrapper) -> None:
+    def _uniq(self, file: Iterable[str]) -> Iterator[str]:
         """
         Core uniq functionality
         """
+        ignore_case = "i" in [x.name for x in self.flags]
         prev_line = ""
-        for line in map(lambda x: x.strip(), file):
-            if "i" in [x.name for x in self.flags]:
+        for line in map(lambda x: x.strip(), self.until_cancelled(file)):
+            if ignore_case:
                 if line.lower() != prev_line.lower():
-                    self.output.write(line + "\n")
+                    yield line + "\n"
             else:
                 if line != prev_line:
-                    self.output.write(line + "\n")
+                    yield line + "\n"
             prev_line = line
 
-    def run(self) -> int:
+    def iter_lines(self, lines: Optional[Iterable[str]] = None
+                   ) -> Iterator[str]:
         """
-        see BaseCommand.run()
+        see BaseCommand.iter_lines()
         """
         if len(self.options) == 0:
-            # check if stdin is empty, if so, raise an error
-            self.input.seek(0, os.SEEK_END)
-            if self.input.tell() == 0:
-                raise CommandError("uniq needs a file or stdin")
-            self.input.seek(0)
-            self._uniq(self.input)
-            return 0
+            empty_error = CommandError("uniq needs a file or stdin")
+            if lines is None and self.input.seekable():
+                # seekable stdin is read from the start
+                self.input.seek(0, os.SEEK_END)
+                if self.input.tell() == 0:
+                    raise empty_error
+                self.input.seek(0)
+                yield from self._uniq(self.input)
+                return
+            # the stage before in a pipeline is waited for
+            yield from self._uniq(input_lines(self, lines, empty_error))
+            return
 
         if not os.path.exists(self.options[0]):
             raise ShellFileNotFoundError(self.options[0])
 
         with exception_handled_open(self.options[0], "r") as file:
-            self._uniq(file)
+            yield from self._uniq(file)
 
+    def run(self) -> int:
+        """
+        see BaseCommand.run()
+        """
+        self.write_lines(self.iter_lines())
         return 0
@@ -34,6 +34,21 @@ class UnsafeBuilder(Builder):
         self.out_stream = out_stream
         return self
 
+    def clone(self) -> 'UnsafeBuilder':
+        """
+        Copies this unsafe builder, along with the builder it wraps.
+
+        Returns:
+            UnsafeBuilder: An independent copy of this builder
+        """
+        return UnsafeBuilder(self.wrapped_builder.clone())
+
+    def mutates_shell_state(self) -> bool:
+        """
+        see Builder.mutates_shell_state()
+        """
+        return self.wrapped_builder.mutates_shell_state()
+
     def build(self) -> Runnable:
         """
         Calls the super class' build, and wraps it around an unsafe decorator.
@@ -1,15 +1,20 @@
 """
 Module for the we command.
 """
-from io import StringIO, TextIOWrapper
-from typing import List
+from functools import partial
+from io import StringIO
+from typing import Iterable, Iterator, List, Union
 
 from commands.base_command import (BaseCommand, CommandSpecification,
                                    FlagSpecification)
-from commands.command_helpers import exception_handled_open, is_stream_empty
+from commands.byte_streams import byte_input, byte_output
+from commands.command_helpers import FileSource, is_input_missing
 from errors.command_errors import CommandError
 from flag import FlagValue
 
+# How many bytes are counted at a time
+COUNT_CHUNK_SIZE = 1 << 16
+
 
 class WC(BaseCommand):
     """
@@ -22,6 +27,8 @@ class WC(BaseCommand):
     ], (
         "[OPTIONS] [FILE]",
         "Prints the newline, word, and byte counts for FILE.\n"))
+    CPU_BOUND = True
+    BYTES_NATIVE = True
 
     def __init__(self, in_stream: StringIO, out_stream: StringIO,
                  flags: List[FlagValue], options: List[str]) -> None:
@@ -52,62 +59,92 @@ class WC(BaseCommand):
         if flags and flags[0].name not in ['l', 'w', 'm']:
             raise CommandError("Invalid Flag Name")
 
-    def _count_all(self, in_stream: TextIOWrapper) -> List[int]:
+    def _count_all(self,
+                   chunks: Iterable[Union[bytes, memoryview]]) -> List[int]:
         """
-        Counts the number of lines, words, and chars in the input stream.
+        Counts the number of lines, words, and bytes in the input, a chunk at
+        a time rather than a line at a time. A last line without a newline is
+        still counted.
 
         Args:
-            in_stream (TextIOWrapper): Input stream for the command.
+            chunks (Iterable[Union[bytes, memoryview]]): The input, in chunks
 
         Returns:
-            List[int]: A list of the number of lines, words, then chars
+            List[int]: A list of the number of lines, words, then bytes
         """
         num_lines = 0
         num_words = 0
         num_chars = 0
-
-        for line in in_stream:
+        in_word = False
+        last = b''
+
+        for view in chunks:
+            chunk = bytes(view)
+            if not chunk:
+                continue
+            num_lines += chunk.count(b'\n')
+            num_words += len(chunk.split())
+            num_chars += len(chunk)
+            # A word split between two chunks was counted in both
+            if in_word and not chunk[:1].isspace():
+                num_words -= 1
+            in_word = not chunk[-1:].isspace()
+            last = chunk[-1:]
+        if last and last != b'\n':
             num_lines += 1
-            num_words += len(line.split())
-            num_chars += len(line)
         return [num_lines, num_words, num_chars]
 
-    def _wc(self, in_stream: StringIO) -> None:
+    def _wc(self, in_stream: Iterable[Union[bytes, memoryview]]) -> bytes:
         """
-        Prints the wc of the input stream.
+        Gets the wc of the input stream.
 
         Args:
-            in_stream (StringIO): Input stream for the command.
+            in_stream (Iterable[Union[bytes, memoryview]]): The input, in
+                                                            chunks
+
+        Returns:
+            bytes: The counts to print
         """
         counts = self._count_all(in_stream)
 
         if not self.flags:
-            self.output.write(f"{counts[0]} {counts[1]} {counts[2]}")
-            return
+            return f"{counts[0]} {counts[1]} {counts[2]}".encode()
 
+        printed = ''
         for flag in self.flags:
             if flag.name == 'l':
-                self.output.write(f"{counts[0]}")
+                printed += f"{counts[0]}"
             elif flag.name == 'w':
-                self.output.write(f"{counts[1]}")
+                printed += f"{counts[1]}"
             else:
-                self.output.write(f"{counts[2]}")
+                printed += f"{counts[2]}"
+        return printed.encode()
 
     def run(self) -> int:
         """
         Runs the wc command.
         """
         if len(self.options) == 0:
-            if is_stream_empty(self.input):
+            if is_input_missing(self.input):
                 raise CommandError()
-            self._wc(self.input)
+            source = byte_input(self.input)
+            chunks = iter(partial(source.read, COUNT_CHUNK_SIZE), b'')
+            with byte_output(self.output) as output:
+                output.write(self._wc(chunks))
             return 0
 
-        combined_file = StringIO()
-        for file in self.options:
-            with exception_handled_open(file, 'r') as f:
-                combined_file.write(f.read())
-        combined_file.seek(0)
-        self._wc(combined_file)
-        self.output.write("\n")
+        counts = self._wc(self._combined_chunks())
+        with byte_output(self.output) as output:
+            output.write(counts + b"\n")
         return 0
+
+    def _combined_chunks(self) -> Iterator[Union[bytes, memoryview]]:
+        """
+        Reads every file, one after another, as if they were one file
+
+        Returns:
+            Iterator[Union[bytes, memoryview]]: The files, in chunks
+        """
+        for file in self.options:
+            with FileSource(file) as source:
+                yield from source.chunks(COUNT_CHUNK_SIZE)
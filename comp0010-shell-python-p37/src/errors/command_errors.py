@@ -40,3 +40,10 @@ class ShellNotADirectoryError(CommandError):
     """
     Represents an error when a path is not a directory
     """
+
+
+class StageProcessError(CommandError):
+    """
+    Represents an error raised by a command run in its own process that
+    could not be sent back to the shell as it was, by its type and message
+    """
@@ -0,0 +1,131 @@
+"""
+The stream that a command line writes its output to, which passes the output
+on to the caller as soon as it is written.
+
+Runnables close their output once they are done, but the caller's stream,
+such as stdout, has to outlive the command line. The sink stands in for it:
+everything written to the sink is written to the caller's stream straight
+away, the caller's stream is flushed every so often, so that a long running
+command line shows its output as it goes, and closing the sink only flushes
+the caller's stream.
+
+Output written less than the flush interval after the last flush is flushed
+by a thread of the sink once the interval has passed, so it still shows if
+nothing else is written for a while, such as the last lines of
+tail -f app.log | grep ERROR before the log grows again. The thread is only
+started once some output has to wait.
+"""
+import threading
+import time
+from io import BufferedIOBase, TextIOBase
+from typing import Optional, TextIO, Union
+
+# How many seconds may pass between flushes of the caller's stream
+FLUSH_INTERVAL = 0.1
+
+
+class OutputSink(TextIOBase):
+    """
+    Passes everything written to it on to another stream. Closing the sink
+    flushes that stream, but leaves it open.
+
+    Args:
+        target (Union[TextIO, TextIOBase]): The stream to pass the output on
+                                            to
+        flush_interval (float): How many seconds may pass between flushes of
+                                the target
+    """
+
+    def __init__(self, target: Union[TextIO, TextIOBase],
+                 flush_interval: float = FLUSH_INTERVAL) -> None:
+        super().__init__()
+        self.target = target
+        self.flush_interval = flush_interval
+        self._last_flush = time.monotonic()
+        # Whether anything was written since the last flush, and when it is
+        # due to be flushed
+        self._pending = False
+        self._due = 0.0
+        self._lock = threading.RLock()
+        self._wakeup = threading.Condition(self._lock)
+        self._flusher: Optional[threading.Thread] = None
+
+    @property
+    def encoding(self) -> Optional[str]:  # type: ignore[override]
+        """
+        The encoding of the target, if it has one
+        """
+        return getattr(self.target, 'encoding', None)
+
+    @property
+    def buffer(self) -> Optional[BufferedIOBase]:
+        """
+        The binary buffer under the target, if it has one, so that commands
+        that work on bytes can write to it without decoding anything
+        """
+        return getattr(self.target, 'buffer', None)
+
+    def writable(self) -> bool:
+        """
+        see IOBase.writable()
+        """
+        return True
+
+    def write(self, text: str) -> int:
+        """
+        Writes to the target, flushing it if it has not been flushed for a
+        while, or leaving the sink's thread to flush it once it is due
+        """
+        with self._lock:
+            if self.closed:
+                raise ValueError('write to closed sink')
+            self.target.write(text)
+            if time.monotonic() - self._last_flush >= self.flush_interval:
+                self.flush()
+            elif not self._pending:
+                self._pending = True
+                self._due = self._last_flush + self.flush_interval
+                if self._flusher is None:
+                    self._flusher = threading.Thread(
+                        target=self._flush_when_due, daemon=True,
+                        name='output-sink-flush')
+                    self._flusher.start()
+                self._wakeup.notify()
+        return len(text)
+
+    def flush(self) -> None:
+        """
+        Flushes the target
+        """
+        with self._lock:
+            self.target.flush()
+            self._last_flush = time.monotonic()
+            self._pending = False
+
+    def close(self) -> None:
+        """
+        Flushes the target, and stops the sink's thread
+        """
+        with self._lock:
+            super().close()
+            self._wakeup.notify()
+
+    def _flush_when_due(self) -> None:
+        """
+        Flushes output that was left waiting once the flush interval has
+        passed, until the sink is closed
+        """
+        with self._lock:
+            try:
+                while not self.closed:
+                    if not self._pending:
+                        self._wakeup.wait()
+                        continue
+                    if time.monotonic() < self._due:
+                        self._wakeup.wait(self._due - time.monotonic())
+                        continue
+                    self.flush()
+            except (OSError, ValueError):
+                # Nothing reads the target any more, which whatever writes
+                # to the sink next finds out too
+                pass
@@ -0,0 +1,246 @@
+"""
+Assembles command builders from command names, flags and arguments.
+
+This is shared by the RunnerVisitor and the fast path parser, so that both
+build exactly the same builders. It must not depend on ANTLR.
+"""
+import glob
+import os
+from typing import (Any, Iterable, List, Mapping, Optional, Tuple, Type,
+                    Union)
+
+from commands.base_command import BaseCommand
+from commands.builder import Builder
+from commands.command_builder import CommandBuilder
+from commands.read_tracker import record_read, record_untracked_read
+from commands.redirect_builder import RedirectBuilder
+from commands.unsafe_builder import UnsafeBuilder
+from errors.parse_errors import (UnknownCommandError, UnknownFlagError,
+                                 UnknownFlagValueError)
+from flag import FlagSpecification, WildcardFlagSpecification
+
+# We're conforming to ParserGrammerVisitor's naming convention, since the
+# RunnerVisitor inherits these methods
+# pylint: disable=invalid-name
+
+Commands = Union[Iterable[Type[BaseCommand]], Mapping[str, Type[BaseCommand]]]
+
+
+class CommandAssembler:
+    """
+    Turns the parts of a call command into a CommandBuilder.
+
+    Args:
+        command_list (Commands): The commands available, either as an iterable
+            of command classes or as a mapping of command names to classes
+    """
+
+    def __init__(self, command_list: Commands) -> None:
+        self.builder_stack: List[CommandBuilder] = []
+        self.command_list = command_list
+        # Mappings (such as the CommandRegistry) are already keyed by command
+        # name, and may import their commands lazily, so they are used as-is.
+        self.command_dict: Mapping[str, Type[BaseCommand]]
+        if isinstance(command_list, Mapping):
+            self.command_dict = command_list
+        else:
+            self.command_dict = {
+                command.COMMAND_SPECIFICATION.command_name: command
+                for command in command_list
+            }
+
+    def createCommandBuilder(self, literal_app_name: str
+                             ) -> Tuple[CommandBuilder, bool]:
+        """
+        Creates the builder for an application name, and pushes it onto the
+        builder stack.
+
+        Args:
+            literal_app_name (str): The application name, which is prefixed
+                                    with _ for unsafe applications
+
+        Returns:
+            Tuple[CommandBuilder, bool]: The builder, and whether the
+                                         application is unsafe
+
+        Raises:
+            UnknownCommandError: If there is no such application
+        """
+        is_unsafe = literal_app_name[0] == "_"
+        app_name = literal_app_name[int(is_unsafe):]
+        if app_name not in self.command_dict:
+            raise UnknownCommandError(f"Unknown command {app_name}")
+        builder = CommandBuilder(self.command_dict[app_name])
+        self.builder_stack.append(builder)
+        return builder, is_unsafe
+
+    def finishCommandBuilder(self, builder: CommandBuilder, is_unsafe: bool,
+                             backlog_flagspec: Optional[FlagSpecification]
+                             ) -> Builder:
+        """
+        Finishes the builder at the top of the builder stack, once all of its
+        arguments have been handled.
+
+        Raises:
+            UnknownFlagValueError: If the last flag is still missing its value
+        """
+        if backlog_flagspec is not None:
+            raise UnknownFlagValueError(
+                f"Flag {backlog_flagspec.name} requires a value"
+            )
+        self.builder_stack.pop()
+        return builder if not is_unsafe else UnsafeBuilder(builder)
+
+    def findFlagSpecification(self, flag: str
+                              ) -> Tuple[FlagSpecification, str]:
+        """
+        Finds the specification of a flag of the command being built.
+
+        Args:
+            flag (str): The flag name, without the leading -
+
+        Returns:
+            Tuple[FlagSpecification, str]: The specification, and the flag as
+                                           it was written
+
+        Raises:
+            UnknownFlagError: If the command does not accept the flag
+        """
+        flag_specifications = self.builder_stack[
+            -1
+        ].command_type.COMMAND_SPECIFICATION.flag_specifications
+        for flag_spec in flag_specifications:
+            if (
+                isinstance(flag_spec, WildcardFlagSpecification)
+                or flag_spec.name == flag
+            ):
+                return (flag_spec, '-' + flag)
+        raise UnknownFlagError(f"Unknown flag {flag}")
+
+    @classmethod
+    def handleWildcardFlagSpecification(
+            cls,
+            builder: CommandBuilder,
+            text: str,
+            backlog_flagspec: Optional[FlagSpecification]
+    ) -> None:
+        """
+        Handles instances of WildcardFlagSpecification
+
+        Args:
+            builder (CommandBuilder): The command builder involved
+            text (str): The flag name verbatim
+            backlog_flagspec (Optional[FlagSpecification]): Any backlog flags
+        """
+        if backlog_flagspec is not None:
+            flag = backlog_flagspec.build_flag_from_string(text)
+            builder.add_flag(flag)
+            return
+        builder.add_option(text)
+
+    @classmethod
+    def handleFlagSpecification(
+            cls,
+            arg: FlagSpecification,
+            builder: CommandBuilder,
+            backlog_flagspec: Optional[FlagSpecification]
+    ) -> Optional[FlagSpecification]:
+        """
+        Handles instances of FlagSpecification
+
+        Args:
+            arg (FlagSpecification): The Flag specification
+            builder (CommandBuilder): The command builder involved
+            backlog_flagspec (Optional[FlagSpecification]): Any backlog flag
+        """
+        if arg.value_type == bool:
+            builder.add_flag(arg.build_flag_with_value(True))
+            return backlog_flagspec
+        # Encountering another flag while there is an unresolved
+        # backlog flag means that the user has forgot to specify a
+        # value. Stop parsing.
+        if backlog_flagspec is not None:
+            raise UnknownFlagValueError(
+                f"Flag {backlog_flagspec.name} requires a value"
+            )
+        return arg
+
+    @classmethod
+    def handleFlagValue(cls, backlog_flagspec: FlagSpecification, arg: str,
+                        builder: CommandBuilder) -> None:
+        """
+        Handles flag values based on the backlog flag specificaiton. This must
+        exist.
+
+        Args:
+            builder (CommandBuilder): The command builder involved
+            arg (str): The value verbatim
+            backlog_flagspec (Optional[FlagSpecification]): Any backlog flag
+        """
+        flag = backlog_flagspec.build_flag_from_string(arg)
+        builder.add_flag(flag)
+
+    @classmethod
+    def handleGlob(cls, arg: str, builder: CommandBuilder) -> None:
+        """
+        Handles Globs, like *.py.
+
+        Args:
+            builder (CommandBuilder): The command builder involved
+            arg (str): The value verbatim
+        """
+        directory = os.path.dirname(arg)
+        if glob.has_magic(directory):
+            # Every directory matching the directory part is searched
+            record_untracked_read()
+        else:
+            record_read(directory or os.curdir)
+        globs = glob.glob(arg)
+        if len(globs) > 0:
+            for globbed in globs:
+                builder.add_option(globbed)
+        else:
+            builder.add_option(arg)
+
+    def handleCommandArg(self, builder: CommandBuilder, arg: Any,
+                         backlog_flagspec: Optional[FlagSpecification]
+                         ) -> Tuple[CommandBuilder,
+                                    Optional[FlagSpecification]]:
+        """
+        Handles arguments when visiting commands.
+
+        Args:
+            builder (CommandBuilder): The command builder involved
+            arg (Any): Any object of any time. This function will filter and
+                       redirect the call to the relevant handlers.
+            backlog_flagspec (Optional[FlagSpecification]): Any backlog flag
+
+        Returns:
+            (Tuple[CommandBuilder, Optional[FlagSpecification]]):
+                A tuple of the next command builder and new value of backlog
+                flag
+        """
+        if isinstance(arg, tuple):
+            if isinstance(arg[0], WildcardFlagSpecification):
+                return (builder, self.handleWildcardFlagSpecification(
+                    builder,
+                    arg[1],
+                    backlog_flagspec))
+
+            # arg[0] must be a FlagSpecification
+            return (builder, self.handleFlagSpecification(
+                arg[0], builder, backlog_flagspec))
+
+        if isinstance(arg, RedirectBuilder):
+            # Update the builder to use the current builder
+            builder = arg
+            self.builder_stack[-1] = builder
+
+        if isinstance(arg, str):
+            if backlog_flagspec is not None:
+                return (builder, self.handleFlagValue(
+                    backlog_flagspec, arg, builder))
+
+            self.handleGlob(arg, builder)
+
+        return (builder, None)
@@ -0,0 +1,310 @@
+"""
+An opt-in, on-disk cache of the ANTLR prediction DFAs, so that short-lived
+shells (e.g. sh -c) do not start every first parse with empty DFAs.
+
+A cache is written by replaying a warm-up corpus through the parser, and
+pickling the ATNs and DFAs of the generated lexer and parser together. When
+the COMP0010_PARSER_CACHE environment variable names a cache file, it is
+loaded before the first parser context is created, and replaces the ATNs and
+DFAs of the generated classes.
+
+A cache is only loaded if it was written for the same grammar, ANTLR runtime
+and Python version. Only the ANTLR classes of ATNs and DFAs are unpickled,
+but the cache file should still only be written by trusted users.
+"""
+import hashlib
+import io
+import os
+import pickle
+import sys
+import threading
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from antlr4.atn.ATNSimulator import ATNSimulator  # type: ignore
+from antlr4.atn.LexerAction import (LexerMoreAction,  # type: ignore
+                                    LexerPopModeAction, LexerSkipAction)
+from antlr4.atn.LexerActionExecutor import (  # type: ignore
+    LexerActionExecutor)
+from antlr4.atn.LexerATNSimulator import LexerATNSimulator  # type: ignore
+from antlr4.atn.SemanticContext import SemanticContext  # type: ignore
+from antlr4.dfa.DFA import DFA  # type: ignore
+from antlr4.PredictionContext import PredictionContext  # type: ignore
+
+from parse.ParserGrammarLexer import ParserGrammarLexer
+from parse.ParserGrammarLexer import serializedATN as serialized_lexer_atn
+from parse.ParserGrammarParser import ParserGrammarParser
+from parse.ParserGrammarParser import serializedATN as serialized_parser_atn
+
+CACHE_ENV_VAR = 'COMP0010_PARSER_CACHE'
+
+# Command lines covering every rule of the grammar, including lines that need
+# full LL prediction and lines with syntax errors
+WARM_UP_CORPUS = [
+    'echo hello world',
+    'echo',
+    'ls',
+    'pwd; cd dir1; ls -a',
+    "grep 'A..' dir1/file1.txt | sort -r | uniq -i",
+    'cat dir1/file1.txt dir1/file2.txt | head -n 2 | tail -n 1',
+    'cut -b 1,2-3,5- dir1/file1.txt',
+    'find . -name *.txt | wc -l -w -m',
+    'sed s/a/b/g dir1/file1.txt',
+    'echo "a `echo b`" \'c d\' e"f"g',
+    'echo "double \'quoted\'" \'single "quoted"\'',
+    'echo `echo foo` `echo`bar`echo baz`',
+    'echo a > out.txt; cat < out.txt',
+    '< dir1/file1.txt cat > out.txt',
+    '_cat missing | _sort; echo a',
+    'echo a | cat; echo b | cat',
+    'echo a; echo b; echo c',
+    'echo a\\"b',
+    'echo a |',
+    'echo "unterminated',
+    ' echo a',
+    'a;;b',
+]
+
+# The runtime compares these by identity, so they are pickled by reference
+SINGLETONS = (
+    SemanticContext.NONE,
+    PredictionContext.EMPTY,
+    ATNSimulator.ERROR,
+    LexerATNSimulator.ERROR,
+    LexerSkipAction.INSTANCE,
+    LexerMoreAction.INSTANCE,
+    LexerPopModeAction.INSTANCE,
+)
+SINGLETON_IDS = {id(singleton): index
+                 for index, singleton in enumerate(SINGLETONS)}
+
+RECOGNIZERS: Tuple[Any, ...] = (ParserGrammarLexer, ParserGrammarParser)
+
+# The ATN holds interval sets of ranges
+SAFE_BUILTINS = frozenset({'range', 'set', 'frozenset'})
+
+# The ANTLR classes that make up ATNs and DFAs, the only ones a cache may load
+ANTLR_CLASSES = frozenset(
+    (module, name) for module, names in {
+        'antlr4.IntervalSet': ('IntervalSet',),
+        'antlr4.PredictionContext': ('ArrayPredictionContext',
+                                     'EmptyPredictionContext',
+                                     'SingletonPredictionContext'),
+        'antlr4.atn.ATN': ('ATN',),
+        'antlr4.atn.ATNConfig': ('ATNConfig', 'LexerATNConfig'),
+        'antlr4.atn.ATNConfigSet': ('ATNConfigSet', 'OrderedATNConfigSet'),
+        'antlr4.atn.ATNState': ('BasicBlockStartState', 'BasicState',
+                                'BlockEndState', 'LoopEndState',
+                                'PlusBlockStartState', 'PlusLoopbackState',
+                                'RuleStartState', 'RuleStopState',
+                                'StarBlockStartState', 'StarLoopEntryState',
+                                'StarLoopbackState', 'TokensStartState'),
+        'antlr4.atn.ATNType': ('ATNType',),
+        'antlr4.atn.LexerAction': ('LexerChannelAction', 'LexerCustomAction',
+                                   'LexerIndexedCustomAction',
+                                   'LexerModeAction', 'LexerMoreAction',
+                                   'LexerPopModeAction',
+                                   'LexerPushModeAction', 'LexerSkipAction',
+                                   'LexerTypeAction'),
+        'antlr4.atn.LexerActionExecutor': ('LexerActionExecutor',),
+        'antlr4.atn.SemanticContext': ('AND', 'OR', 'EmptySemanticContext',
+                                       'PrecedencePredicate', 'Predicate'),
+        'antlr4.atn.Transition': ('ActionTransition', 'AtomTransition',
+                                  'EpsilonTransition', 'NotSetTransition',
+                                  'PrecedencePredicateTransition',
+                                  'PredicateTransition', 'RangeTransition',
+                                  'RuleTransition', 'SetTransition',
+                                  'WildcardTransition'),
+        'antlr4.dfa.DFAState': ('DFAState', 'PredPrediction'),
+    }.items() for name in names)
+
+# DFAs can be deeper than the default recursion limit allows to pickle
+RECURSION_LIMIT = 20000
+
+_LOCK = threading.Lock()
+_ENVIRONMENT_CHECKED = False
+
+
+def cache_key() -> str:
+    """
+    Returns:
+        str: A hash of the grammar, the ANTLR runtime version and the Python
+             version. Caches with a different key are never loaded.
+    """
+    # importlib.metadata is slow to import, and only needed with a cache
+    # pylint: disable=import-outside-toplevel
+    from importlib.metadata import PackageNotFoundError, version
+
+    try:
+        runtime_version = version('antlr4-python3-runtime')
+    except PackageNotFoundError:  # pragma: no cover
+        runtime_version = 'unknown'
+    digest = hashlib.sha256()
+    digest.update(repr(serialized_lexer_atn()).encode())
+    digest.update(repr(serialized_parser_atn()).encode())
+    digest.update(runtime_version.encode())
+    digest.update(repr(sys.version_info[:2]).encode())
+    return digest.hexdigest()
+
+
+def _restore_dfa(atn_start_state: Any, decision: int, s0: Any,
+                 precedence_dfa: bool, states: List[Any]) -> DFA:
+    """
+    Rebuilds a pickled DFA. Cached hashes can depend on the hash seed of the
+    process that wrote the cache, so they are dropped before the states are
+    hashed again.
+    """
+    dfa = DFA.__new__(DFA)
+    dfa.atnStartState = atn_start_state
+    dfa.decision = decision
+    dfa.s0 = s0
+    dfa.precedenceDfa = precedence_dfa
+    for state in states:
+        state.configs.cachedHashCode = -1
+    dfa._states = {state: state for state in states}
+    return dfa
+
+
+class _DFAPickler(pickle.Pickler):
+    """
+    Pickles runtime singletons by reference, and DFAs and lexer action
+    executors in a form that does not depend on cached hashes.
+    """
+
+    def persistent_id(self, obj: Any) -> Optional[int]:
+        return SINGLETON_IDS.get(id(obj))
+
+    def reducer_override(self, obj: Any) -> Any:
+        if isinstance(obj, DFA):
+            return (_restore_dfa, (obj.atnStartState, obj.decision, obj.s0,
+                                   obj.precedenceDfa,
+                                   list(obj._states.values())))
+        if isinstance(obj, LexerActionExecutor):
+            # The constructor recomputes the hash
+            return (LexerActionExecutor, (obj.lexerActions,))
+        return NotImplemented
+
+
+class _DFAUnpickler(pickle.Unpickler):
+    """
+    Resolves runtime singletons, and refuses to load anything but the ANTLR
+    classes of ATNs and DFAs. Names are looked up as they are, never as
+    dotted paths, which could reach anything the ANTLR modules import.
+    """
+
+    def persistent_load(self, pid: Any) -> Any:
+        return SINGLETONS[pid]
+
+    def find_class(self, module: str, name: str) -> Any:
+        if module == __name__ and name == _restore_dfa.__name__:
+            return _restore_dfa
+        if '.' not in name and (
+                (module == 'builtins' and name in SAFE_BUILTINS)
+                or (module, name) in ANTLR_CLASSES):
+            return super().find_class(module, name)
+        raise pickle.UnpicklingError(f'{module}.{name} is not allowed')
+
+
+def _with_recursion_limit(function: Callable[[], Any]) -> Any:
+    limit = sys.getrecursionlimit()
+    sys.setrecursionlimit(max(limit, RECURSION_LIMIT))
+    try:
+        return function()
+    finally:
+        sys.setrecursionlimit(limit)
+
+
+def save_dfa_cache(path: str) -> None:
+    """
+    Writes the current ATNs and DFAs of the lexer and parser to path. The
+    file is replaced atomically, so concurrent readers never see a partial
+    cache.
+
+    Args:
+        path (str): Where to write the cache to
+    """
+    payload = tuple((recognizer.atn, recognizer.decisionsToDFA)
+                    for recognizer in RECOGNIZERS)
+    buffer = io.BytesIO()
+    pickle.dump(cache_key(), buffer)
+    pickler = _DFAPickler(buffer, protocol=pickle.HIGHEST_PROTOCOL)
+    _with_recursion_limit(lambda: pickler.dump(payload))
+
+    temporary_path = f'{path}.{os.getpid()}.tmp'
+    with open(temporary_path, 'wb') as cache_file:
+        cache_file.write(buffer.getvalue())
+    os.replace(temporary_path, path)
+
+
+def load_dfa_cache(path: str) -> bool:
+    """
+    Replaces the ATNs and DFAs of the lexer and parser with the ones cached
+    at path. Parsers created before this keep their old DFAs.
+
+    Args:
+        path (str): The cache to load
+
+    Returns:
+        bool: Whether the cache was loaded. Missing, stale and corrupt caches
+              are ignored.
+    """
+    # A bad cache must never stop the shell from parsing, so any error while
+    # loading it means that there is no cache
+    # pylint: disable=broad-except
+    try:
+        with open(path, 'rb') as cache_file:
+            # Unpicklers keep their memo between loads, so every pickle in
+            # the file needs its own
+            if _DFAUnpickler(cache_file).load() != cache_key():
+                return False
+            payload: Tuple[Tuple[Any, List[DFA]], ...] = \
+                _with_recursion_limit(_DFAUnpickler(cache_file).load)
+    except Exception:
+        return False
+
+    for recognizer, (atn, decisions_to_dfa) in zip(RECOGNIZERS, payload):
+        recognizer.atn = atn
+        recognizer.decisionsToDFA = decisions_to_dfa
+    return True
+
+
+def load_dfa_cache_from_environment(
+        environ: Optional[Dict[str, str]] = None) -> bool:
+    """
+    Loads the cache named by COMP0010_PARSER_CACHE, if it is set. Only the
+    first call in a process does anything.
+
+    Args:
+        environ (Optional[Dict[str, str]]): The environment, which defaults to
+                                            os.environ
+
+    Returns:
+        bool: Whether this call loaded a cache
+    """
+    global _ENVIRONMENT_CHECKED  # pylint: disable=global-statement
+    with _LOCK:
+        if _ENVIRONMENT_CHECKED:
+            return False
+        _ENVIRONMENT_CHECKED = True
+        path = (os.environ if environ is None else environ).get(CACHE_ENV_VAR)
+        return bool(path) and load_dfa_cache(str(path))
+
+
+def warm_up(corpus: Iterable[str]) -> None:
+    """
+    Parses every command line in corpus to fill the DFAs. Syntax errors are
+    ignored, since parsing them still warms the DFAs.
+
+    Args:
+        corpus (Iterable[str]): The command lines to parse
+    """
+    # Imported here, since the parse tree factory loads the cache
+    # pylint: disable=import-outside-toplevel
+    from errors.parse_errors import UserParseError
+
+    from .parse_tree_factory import create_parse_tree
+
+    for cmdline in corpus:
+        try:
+            create_parse_tree(cmdline)
+        except UserParseError:
+            pass
@@ -0,0 +1,119 @@
+"""
+A hand-written parser for simple command lines, which builds the builders
+directly instead of going through ANTLR.
+
+A command line is simple if it only has unquoted words separated by spaces,
+pipes and semicolons, e.g. grep foo file.txt | sort | uniq. Anything else,
+including every simple looking command line that is a syntax error, is left to
+the ANTLR parser. It must not depend on ANTLR.
+"""
+from typing import List, Optional
+
+from commands.builder import Builder
+from commands.pipeline_builder import PipelineBuilder
+from commands.sequence_builder import SequenceBuilder
+from flag import FlagSpecification
+
+from .command_assembler import CommandAssembler, Commands
+
+# Quotes, substitutions, redirects and escapes need the full grammar. Tabs and
+# newlines are lexed differently to spaces, so they need it too.
+COMPLEX_CHARACTERS = frozenset('"\'`<>\\\t\r\n')
+
+# A call command, as the words it is made up of
+Words = List[str]
+
+
+class FastPathParser:
+    """
+    Parses simple command lines into the same builders as the RunnerVisitor.
+
+    Args:
+        command_list (Commands): The commands available, either as an iterable
+            of command classes or as a mapping of command names to classes
+    """
+
+    def __init__(self, command_list: Commands) -> None:
+        self.command_list = command_list
+
+    @classmethod
+    def split(cls, cmdline: str) -> Optional[List[List[Words]]]:
+        """
+        Splits a simple command line into sequenced pipes of call commands.
+
+        Args:
+            cmdline (str): The command line to split
+
+        Returns:
+            Optional[List[List[Words]]]: The words of every command of every
+                pipe, or None if the command line is not simple
+        """
+        # The grammar only allows leading spaces before redirects
+        if not cmdline or cmdline[0] == ' ' or \
+                not COMPLEX_CHARACTERS.isdisjoint(cmdline):
+            return None
+
+        sequence: List[List[Words]] = []
+        for index, pipe_text in enumerate(cmdline.split(';')):
+            pipe = [
+                [word for word in command_text.split(' ') if word]
+                for command_text in pipe_text.split('|')
+            ]
+            if not all(pipe):
+                return None
+            # Sequences are left-associative, and the grammar only allows a
+            # pipe on the right of the first semicolon
+            if index > 1 and len(pipe) > 1:
+                return None
+            sequence.append(pipe)
+        return sequence
+
+    def parse(self, cmdline: str) -> Optional[Builder]:
+        """
+        Parses a simple command line.
+
+        Args:
+            cmdline (str): The command line to parse
+
+        Returns:
+            Optional[Builder]: The builder for the command line, or None if the
+                               command line must be parsed by ANTLR
+        """
+        sequence = self.split(cmdline)
+        if sequence is None:
+            return None
+
+        assembler = CommandAssembler(self.command_list)
+        # Commands are built left to right, like the RunnerVisitor does, so
+        # that both raise the same error for a command line with many errors
+        pipes: List[Builder] = []
+        for pipe in sequence:
+            commands = [self.build_command(assembler, words)
+                        for words in pipe]
+            pipes.append(PipelineBuilder(commands)
+                         if len(commands) > 1 else commands[0])
+        return SequenceBuilder(pipes) if len(pipes) > 1 else pipes[0]
+
+    @classmethod
+    def build_command(cls, assembler: CommandAssembler,
+                      words: Words) -> Builder:
+        """
+        Builds a call command from its words. Words starting with - are flags,
+        unless they are a lone -.
+
+        Args:
+            assembler (CommandAssembler): The assembler to build with
+            words (Words): The application name, followed by its arguments
+
+        Returns:
+            Builder: The builder for the call command
+        """
+        builder, is_unsafe = assembler.createCommandBuilder(words[0])
+        backlog_flagspec: Optional[FlagSpecification] = None
+        for word in words[1:]:
+            arg = assembler.findFlagSpecification(word[1:]) \
+                if len(word) > 1 and word[0] == '-' else word
+            builder, backlog_flagspec = assembler.handleCommandArg(
+                builder, arg, backlog_flagspec)
+        return assembler.finishCommandBuilder(builder, is_unsafe,
+                                              backlog_flagspec)
@@ -0,0 +1,53 @@
+"""
+Helpers for walking the left-recursive pipe and sequence rules of the grammar
+without recursion.
+
+ANTLR parses a left-recursive rule in a loop, but still builds a tree that
+nests once for every operator, e.g. a; b; c is parsed as ((a; b); c). Long
+command lines therefore produce trees far deeper than the recursion limit
+allows visitors to descend, so visitors walk the nested contexts with these
+helpers instead.
+"""
+from typing import List
+
+from antlr4 import ParserRuleContext  # type: ignore
+
+
+def left_spine(ctx: ParserRuleContext) -> List[ParserRuleContext]:
+    """
+    Finds the contexts of the same rule nested on the left of ctx.
+
+    Args:
+        ctx (ParserRuleContext): A context of a left-recursive rule
+
+    Returns:
+        List[ParserRuleContext]: ctx and the contexts nested in it, innermost
+                                 first
+    """
+    spine = []
+    node = ctx
+    while isinstance(node, type(ctx)):
+        spine.append(node)
+        node = node.getChild(0)
+    spine.reverse()
+    return spine
+
+
+def left_operands(ctx: ParserRuleContext) -> List[ParserRuleContext]:
+    """
+    Finds the operands of a left-recursive rule, as if it were N-ary.
+
+    Args:
+        ctx (ParserRuleContext): A context of a left-recursive rule
+
+    Returns:
+        List[ParserRuleContext]: The operands, from left to right
+    """
+    spine = left_spine(ctx)
+    operands = [spine[0].getChild(0)]
+    for level in spine:
+        # The right operand is the last rule in every level; the rest are
+        # spaces and the operator
+        operands.append([child for child in level.getChildren()
+                         if isinstance(child, ParserRuleContext)][-1])
+    return operands
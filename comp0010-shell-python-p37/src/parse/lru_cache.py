@@ -0,0 +1,112 @@
+"""
+A small, bounded, thread-safe LRU cache that keeps hit, miss and eviction
+counters, so that callers can size their caches.
+"""
+from collections import OrderedDict
+from dataclasses import dataclass
+from threading import Lock
+from typing import Generic, Hashable, Optional, TypeVar
+
+from errors.error_dsi import DeveloperSkillIssue
+
+K = TypeVar('K', bound=Hashable)
+V = TypeVar('V')
+
+
+@dataclass
+class CacheStats:
+    """
+    A snapshot of the counters of a cache. Caches whose entries can go stale
+    count a stale entry as a miss, and also as an invalidation.
+    """
+    hits: int
+    misses: int
+    evictions: int
+    size: int
+    maxsize: int
+    invalidations: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        """
+        The fraction of lookups that were hits, or 0 if there were none.
+        """
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+class LRUCache(Generic[K, V]):
+    """
+    A least recently used cache holding at most maxsize entries.
+
+    Args:
+        maxsize (int): The maximum number of entries held by the cache
+
+    Raises:
+        DeveloperSkillIssue: If maxsize is not positive
+    """
+
+    def __init__(self, maxsize: int) -> None:
+        if maxsize < 1:
+            raise DeveloperSkillIssue('an LRU cache must hold an entry')
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: 'OrderedDict[K, V]' = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, key: K) -> Optional[V]:
+        """
+        Gets the value of key, marking it as the most recently used.
+
+        Returns:
+            Optional[V]: The cached value, or None if there is no entry
+        """
+        with self._lock:
+            if key not in self._entries:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return self._entries[key]
+
+    def put(self, key: K, value: V) -> None:
+        """
+        Stores the value under key, evicting the least recently used entry if
+        the cache is full.
+        """
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            if len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def discard(self, key: K) -> None:
+        """
+        Removes the entry for key, if there is one. This is not counted as an
+        eviction.
+        """
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        """
+        Removes every entry and resets the counters.
+        """
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self) -> CacheStats:
+        """
+        Returns:
+            CacheStats: A snapshot of the counters of this cache
+        """
+        with self._lock:
+            return CacheStats(self.hits, self.misses, self.evictions,
+                              len(self._entries), self.maxsize)
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -1,30 +1,171 @@
 """
 A generalized parser function that returns a tree
+
+Lexers and parsers are expensive to create, so they are kept in a per-thread
+pool of parser contexts and reused for every command line parsed on that
+thread, including the substituted command line and any subcommands.
 """
+import threading
+from contextlib import contextmanager
+from typing import Iterator, List
 
 from antlr4 import CommonTokenStream, InputStream  # type: ignore
+from antlr4.atn.PredictionMode import PredictionMode  # type: ignore
+from antlr4.error.ErrorStrategy import (BailErrorStrategy,  # type: ignore
+                                        DefaultErrorStrategy)
+from antlr4.error.Errors import ParseCancellationException  # type: ignore
 
+from parse.dfa_cache import load_dfa_cache_from_environment
 from parse.ParserGrammarLexer import ParserGrammarLexer
 from parse.ParserGrammarParser import ParserGrammarParser
 from parse.shell_error_listener import ShellErrorListener
 
 
-def create_parse_tree(cmdline: str) -> ParserGrammarParser.StartContext:
+def create_parser(cmdline: str) -> ParserGrammarParser:
     """
-    Creates a parse tree with the command line.
+    Creates a parser over the tokenized command line, without any error
+    listeners attached.
 
     Args:
-        cmdline (str): A commond line to parse
+        cmdline (str): A command line to parse
     """
     # Tokenize the input
     lexer = ParserGrammarLexer(InputStream(cmdline))
-    stream = CommonTokenStream(lexer)
-
-    # Parse the tokenized input
-    listener = ShellErrorListener()
-    parser = ParserGrammarParser(stream)
+    parser = ParserGrammarParser(CommonTokenStream(lexer))
 
     # Remove the default error listener
     parser.removeErrorListeners()
-    parser.addErrorListener(listener)
+    return parser
+
+
+def parse_sll(parser: ParserGrammarParser) -> ParserGrammarParser.StartContext:
+    """
+    Parses with the cheap SLL prediction mode, giving up on the first syntax
+    error instead of reporting it.
+
+    Raises:
+        ParseCancellationException: If SLL could not parse the input. This
+            does not mean that the input is invalid; full LL may still
+            succeed.
+    """
+    parser._interp.predictionMode = PredictionMode.SLL
+    parser._errHandler = BailErrorStrategy()
+    parser.removeErrorListeners()
+    return parser.start()
+
+
+def parse_ll(parser: ParserGrammarParser) -> ParserGrammarParser.StartContext:
+    """
+    Parses from the start of the input with the full LL prediction mode,
+    raising the first syntax error through the ShellErrorListener.
+
+    Raises:
+        UserParseError: If the input is not valid
+    """
+    parser.reset()
+    parser._interp.predictionMode = PredictionMode.LL
+    parser._errHandler = DefaultErrorStrategy()
+    parser.removeErrorListeners()
+    parser.addErrorListener(ShellErrorListener())
     return parser.start()
+
+
+class ParserContext:
+    """
+    A lexer, token stream and parser that can be reset and reused to parse any
+    number of command lines, one at a time.
+
+    Parse trees stay valid after the context is reused, since every token
+    refers to the input stream that it was lexed from. The prediction DFAs are
+    shared by every parser in the process, so they stay warm either way.
+
+    The DFA cache (see dfa_cache.py) is loaded before the first context is
+    created, if it is enabled.
+    """
+
+    def __init__(self) -> None:
+        load_dfa_cache_from_environment()
+        self.lexer = ParserGrammarLexer(InputStream(''))
+        self.tokens = CommonTokenStream(self.lexer)
+        self.parser = ParserGrammarParser(self.tokens)
+
+    def parse(self, cmdline: str) -> ParserGrammarParser.StartContext:
+        """
+        Parses the command line, first in SLL mode and then in full LL mode if
+        that fails.
+
+        Raises:
+            UserParseError: If the command line is not valid
+        """
+        self.lexer.inputStream = InputStream(cmdline)
+        self.tokens.setTokenSource(self.lexer)
+        self.parser.setTokenStream(self.tokens)
+        try:
+            return parse_sll(self.parser)
+        except ParseCancellationException:
+            return parse_ll(self.parser)
+
+    def clear(self) -> None:
+        """
+        Drops the tokens of the last command line, so that an idle context
+        does not keep them alive.
+        """
+        self.tokens.setTokenSource(self.lexer)
+
+
+class ParserContextPool(threading.local):
+    """
+    A pool of idle parser contexts, which is separate for every thread.
+
+    A context is only ever used by one parse at a time, so the pool is safe
+    to use re-entrantly: a parse that starts while another parse on the same
+    thread has a context out gets a different context.
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.idle: List[ParserContext] = []
+
+    @contextmanager
+    def acquire(self) -> Iterator[ParserContext]:
+        """
+        Takes an idle context out of the pool for the duration of the with
+        block, creating one if there are none.
+        """
+        context = self.idle.pop() if self.idle else ParserContext()
+        try:
+            yield context
+        finally:
+            context.clear()
+            self.idle.append(context)
+
+
+_CONTEXT_POOL = ParserContextPool()
+
+
+def get_parser_context_pool() -> ParserContextPool:
+    """
+    Returns:
+        ParserContextPool: The pool used by create_parse_tree. Its contexts
+                           are separate for every thread.
+    """
+    return _CONTEXT_POOL
+
+
+def create_parse_tree(cmdline: str) -> ParserGrammarParser.StartContext:
+    """
+    Creates a parse tree with the command line.
+
+    The command line is first parsed in SLL mode, which is much cheaper and
+    succeeds for almost every command line. Only if that fails is it parsed
+    again in full LL mode, which also produces the error messages. The lexer
+    and parser are reused from the parser context pool.
+
+    Args:
+        cmdline (str): A commond line to parse
+
+    Raises:
+        UserParseError: If the command line is not valid
+    """
+    with _CONTEXT_POOL.acquire() as context:
+        return context.parse(cmdline)
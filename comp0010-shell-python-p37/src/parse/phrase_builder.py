@@ -0,0 +1,76 @@
+"""
+Assembles the words of a phrase from its parts.
+
+A phrase is written as one word, but the output of a substitution in it is
+split into words: `echo a b`c gives the two words a and bc. Substituted words
+are never parsed again, so their quotes and operators are kept as they are.
+"""
+from typing import List, Sequence, Tuple
+
+# A word, and whether it is written like a flag, e.g. -n from `echo -n`
+PhraseWord = Tuple[str, bool]
+
+
+class PhraseBuilder:
+    """
+    Collects the parts of a phrase in order, and splits them into words.
+    Every part is only copied once, when its word is finished, so assembling
+    a phrase takes linear time however many parts and words it has.
+
+    A word counts as a flag if it starts with a - that came from a
+    substitution, as the flags written on the command line are already found
+    by the grammar.
+    """
+
+    def __init__(self) -> None:
+        self.words: List[PhraseWord] = []
+        self._parts: List[str] = []
+        self._in_word = False
+        self._is_flag = False
+
+    def add_text(self, text: str, quoted: bool = False) -> None:
+        """
+        Adds text to the current word. Quoted text always makes a word, even
+        if it is empty, like "".
+
+        Args:
+            text (str): The text, without quotes
+            quoted (bool): Whether the text was quoted
+        """
+        if text or quoted:
+            self._in_word = True
+        if text:
+            self._parts.append(text)
+
+    def add_words(self, words: Sequence[str]) -> None:
+        """
+        Adds the words of an unquoted substitution. The first word is joined
+        to the current word, and the last word is joined to whatever follows.
+
+        Args:
+            words (Sequence[str]): The output of the substitution, split on
+                                   whitespace
+        """
+        for index, word in enumerate(words):
+            if index > 0:
+                self._finish_word()
+            if not self._in_word:
+                self._is_flag = len(word) > 1 and word[0] == '-'
+            self.add_text(word)
+
+    def finish(self) -> List[PhraseWord]:
+        """
+        Finishes the last word.
+
+        Returns:
+            List[PhraseWord]: Every word of the phrase, in order
+        """
+        self._finish_word()
+        return self.words
+
+    def _finish_word(self) -> None:
+        if self._in_word:
+            self.words.append((''.join(self._parts), self._is_flag))
+        self._parts = []
+        self._in_word = False
+        self._is_flag = False
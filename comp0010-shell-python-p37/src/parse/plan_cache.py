@@ -0,0 +1,96 @@
+"""
+A cache of parsed command lines ("plans"), so that command lines which are
+evaluated over and over only go through ANTLR and the RunnerVisitor once.
+
+A plan is a builder template. Builders are mutated while they are built, so
+the cache only ever hands out clones of the template.
+"""
+import os
+from typing import Optional, Tuple
+
+from commands.builder import Builder
+
+from .lru_cache import CacheStats, LRUCache
+
+DEFAULT_PLAN_CACHE_SIZE = 512
+
+# Backticks run a subcommand and globs read the file system while parsing, so
+# the same line can produce a different plan each time it is parsed.
+UNCACHEABLE_CHARACTERS = frozenset('`*?[')
+
+
+class PlanCache:
+    """
+    A bounded LRU cache of builder templates, keyed by the command line and the
+    current working directory.
+
+    Args:
+        maxsize (int): The maximum number of plans to keep
+    """
+
+    def __init__(self, maxsize: int = DEFAULT_PLAN_CACHE_SIZE) -> None:
+        self.plans: LRUCache[Tuple[str, str], Builder] = LRUCache(maxsize)
+
+    @classmethod
+    def is_cacheable(cls, cmdline: str) -> bool:
+        """
+        Checks whether parsing cmdline always produces the same plan. Command
+        lines containing substitutions or globs are never cached.
+
+        Args:
+            cmdline (str): The command line to check
+        """
+        return UNCACHEABLE_CHARACTERS.isdisjoint(cmdline)
+
+    def get_plan(self, cmdline: str) -> Optional[Builder]:
+        """
+        Gets a fresh copy of the plan for cmdline.
+
+        Args:
+            cmdline (str): The command line to look up
+
+        Returns:
+            Optional[Builder]: A clone of the cached template, or None on a
+                               miss
+        """
+        template = self.plans.get((cmdline, os.getcwd()))
+        return template.clone() if template is not None else None
+
+    def store(self, cmdline: str, builder: Builder) -> None:
+        """
+        Stores a template of builder as the plan for cmdline. Builders that
+        cannot be cloned are not cached.
+
+        Args:
+            cmdline (str): The command line that produced builder
+            builder (Builder): The freshly parsed, unbuilt builder
+        """
+        try:
+            template = builder.clone()
+        except NotImplementedError:
+            return
+        self.plans.put((cmdline, os.getcwd()), template)
+
+    def stats(self) -> CacheStats:
+        """
+        Returns:
+            CacheStats: The hit, miss and eviction counters of the cache
+        """
+        return self.plans.stats()
+
+
+_PLAN_CACHE: Optional[PlanCache] = None
+
+
+def get_plan_cache() -> PlanCache:
+    """
+    Gets the process-wide plan cache used by parsers that use the command
+    registry, creating it on the first call.
+
+    Returns:
+        PlanCache: The shared plan cache
+    """
+    global _PLAN_CACHE  # pylint: disable=global-statement
+    if _PLAN_CACHE is None:
+        _PLAN_CACHE = PlanCache()
+    return _PLAN_CACHE
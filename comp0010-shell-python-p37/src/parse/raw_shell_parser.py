@@ -6,13 +6,13 @@ Classes:
     ShellParser: A class for parsing command line strings into a list of
     commands and their arguments.
 """
-from typing import List, Optional
+from typing import Iterable, Mapping, Optional, Type, Union
 
-from commands.auto_import import AutoImport
+from commands.base_command import BaseCommand
 from commands.builder import Builder
-from parse.runner_visitor import RunnerVisitor
+from commands.command_registry import get_command_registry
 
-from .parse_tree_factory import create_parse_tree
+from .fast_path_parser import FastPathParser
 
 
 class RawShellParser:
@@ -21,13 +21,22 @@ class RawShellParser:
     A class for parsing command line strings into a list of commands and their
     arguments.
 
+    If no commands are given, the process-wide command registry is used.
+    Simple command lines are parsed by the FastPathParser, and everything else
+    by ANTLR. ANTLR is slow to import, so it is only imported once a command
+    line needs it.
+
     (Note: We don't use default arguments because pylint complains)
     """
 
-    def __init__(self, commands: Optional[List[type]] = None):
+    def __init__(self,
+                 commands: Optional[Union[
+                     Iterable[Type[BaseCommand]],
+                     Mapping[str, Type[BaseCommand]]]] = None):
         if commands is None:
-            commands = AutoImport().get_command_objects()
+            commands = get_command_registry()
         self.all_commands = commands
+        self.fast_path = FastPathParser(commands)
 
     def parse(self, cmdline: str) -> Builder:
         """
@@ -40,5 +49,13 @@ class RawShellParser:
         Returns:
             Builder: List of tuples containing commands and their arguments
         """
+        builder = self.fast_path.parse(cmdline)
+        if builder is not None:
+            return builder
+
+        # pylint: disable=import-outside-toplevel
+        from .parse_tree_factory import create_parse_tree
+        from .runner_visitor import RunnerVisitor
+
         visitor = RunnerVisitor(self.all_commands)
         return visitor.visit(create_parse_tree(cmdline))
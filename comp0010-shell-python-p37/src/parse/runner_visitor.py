@@ -1,24 +1,23 @@
 """
 A visitor class for the command line parser grammar.
 """
-import glob
 from itertools import chain
-from typing import Any, List, Optional, Tuple, Type
+from typing import Any, Iterable, Iterator, List, Mapping, Optional, Sequence
 
 from antlr4 import TerminalNode  # type:ignore
 
-from commands.base_command import BaseCommand
 from commands.builder import Builder
-from commands.command_builder import CommandBuilder
-from commands.pipe_builder import PipeBuilder
+from commands.pipeline_builder import PipelineBuilder
 from commands.redirect_builder import RedirectBuilder
 from commands.runnable import Runnable
-from commands.seq_builder import SeqBuilder
-from commands.unsafe_builder import UnsafeBuilder
+from commands.sequence_builder import SequenceBuilder
 from errors.error_dsi import DeveloperSkillIssue
-from errors.parse_errors import (NoCommandError, UnknownCommandError,
-                                 UnknownFlagError, UnknownFlagValueError)
-from flag import FlagSpecification, WildcardFlagSpecification
+from errors.parse_errors import NoCommandError
+from errors.redirect_errors import RedirectError
+from flag import FlagSpecification
+from parse.command_assembler import CommandAssembler, Commands
+from parse.left_recursion import left_operands
+from parse.phrase_builder import PhraseBuilder, PhraseWord
 from parse.ParserGrammarParser import ParserGrammarParser
 from parse.ParserGrammarVisitor import ParserGrammarVisitor
 
@@ -28,7 +27,7 @@ from parse.ParserGrammarVisitor import ParserGrammarVisitor
 
 # Snake case violations are due to overriding methods from ANTLR4 generated
 # classes
-class RunnerVisitor(ParserGrammarVisitor):
+class RunnerVisitor(ParserGrammarVisitor, CommandAssembler):
     """
     A visitor class for the command line parser grammar. Callers must check if
     the 'eof_reached' attribute of the visitor has been returned; if it hasn't,
@@ -53,20 +52,27 @@ class RunnerVisitor(ParserGrammarVisitor):
 
     It was a design decision not to allow strings with \n, since the escape
     sequence is not implemented.
+
+    The output of substitutions is given by the SubstitutionVisitor, already
+    split into words, and is never parsed again: `echo "a|b"` gives the
+    argument a|b, rather than a pipe.
+
+    Args:
+        command_list (Commands): The commands available
+        substitutions (Optional[Mapping[SubcommandContext, Sequence[str]]]):
+            The words output by every substitution in the tree, found by the
+            SubstitutionVisitor. Without them, substitutions are not allowed.
     """
 
-    def __init__(self, command_list: List[Type[BaseCommand]]) -> None:
+    def __init__(self, command_list: Commands,
+                 substitutions: Optional[Mapping[
+                     ParserGrammarParser.SubcommandContext,
+                     Sequence[str]]] = None) -> None:
         self.flag_needs_value = False
         self.eof_reached = False
-        self.builder_stack: List[CommandBuilder] = []
-        self.command_list = command_list
-        self.command_dict = {}
-        for command in command_list:
-            self.command_dict[
-                command.COMMAND_SPECIFICATION.command_name
-            ] = command
-
-        super().__init__()
+        self.substitutions = substitutions
+        ParserGrammarVisitor.__init__(self)
+        CommandAssembler.__init__(self, command_list)
 
     def visitStart(self, ctx: ParserGrammarParser.StartContext) -> Runnable:
         # can't do visitChildren here, otherwise aggregateResult will be called
@@ -83,201 +89,85 @@ class RunnerVisitor(ParserGrammarVisitor):
         # Parser guarantees we'll get something visitable at this point
         return self.visit(ctx.getChild(0))
 
-    @classmethod
-    def handleWildcardFlagSpecification(
-            cls,
-            builder: CommandBuilder,
-            text: str,
-            backlog_flagspec: Optional[FlagSpecification]
-    ) -> None:
-        """
-        Handles instances of WildcardFlagSpecification
-
-        Args:
-            builder (CommandBuilder): The command builder involved
-            text (str): The flag name verbatim
-            backlog_flagspec (Optional[FlagSpecification]): Any backlog flags
-        """
-        if backlog_flagspec is not None:
-            flag = backlog_flagspec.build_flag_from_string(text)
-            builder.add_flag(flag)
-            return
-        builder.add_option(text)
-
-    @classmethod
-    def handleFlagSpecification(
-            cls,
-            arg: FlagSpecification,
-            builder: CommandBuilder,
-            backlog_flagspec: Optional[FlagSpecification]
-    ) -> Optional[FlagSpecification]:
-        """
-        Handles instances of FlagSpecification
-
-        Args:
-            arg (FlagSpecification): The Flag specification
-            builder (CommandBuilder): The command builder involved
-            backlog_flagspec (Optional[FlagSpecification]): Any backlog flag
-        """
-        if arg.value_type == bool:
-            builder.add_flag(arg.build_flag_with_value(True))
-            return backlog_flagspec
-        # Encountering another flag while there is an unresolved
-        # backlog flag means that the user has forgot to specify a
-        # value. Stop parsing.
-        if backlog_flagspec is not None:
-            raise UnknownFlagValueError(
-                f"Flag {backlog_flagspec.name} requires a value"
-            )
-        return arg
-
-    @classmethod
-    def handleFlagValue(cls, backlog_flagspec: FlagSpecification, arg: str,
-                        builder: CommandBuilder) -> None:
-        """
-        Handles flag values based on the backlog flag specificaiton. This must
-        exist.
-
-        Args:
-            builder (CommandBuilder): The command builder involved
-            arg (str): The value verbatim
-            backlog_flagspec (Optional[FlagSpecification]): Any backlog flag
-        """
-        flag = backlog_flagspec.build_flag_from_string(arg)
-        builder.add_flag(flag)
-
-    @classmethod
-    def handleGlob(cls, arg: str, builder: CommandBuilder) -> None:
-        """
-        Handles Globs, like *.py.
-
-        Args:
-            builder (CommandBuilder): The command builder involved
-            arg (str): The value verbatim
-        """
-        globs = glob.glob(arg)
-        if len(globs) > 0:
-            for globbed in globs:
-                builder.add_option(globbed)
-        else:
-            builder.add_option(arg)
-
-    def handleCommandArg(self, builder: CommandBuilder, arg: Any,
-                         backlog_flagspec: Optional[FlagSpecification]
-                         ) -> Tuple[CommandBuilder,
-                                    Optional[FlagSpecification]]:
-        """
-        Handles arguments when visiting commands.
-
-        Args:
-            builder (CommandBuilder): The command builder involved
-            arg (Any): Any object of any time. This function will filter and
-                       redirect the call to the relevant handlers.
-            backlog_flagspec (Optional[FlagSpecification]): Any backlog flag
-
-        Returns:
-            (Tuple[CommandBuilder, Optional[FlagSpecification]]):
-                A tuple of the next command builder and new value of backlog
-                flag
-        """
-        if isinstance(arg, tuple):
-            if isinstance(arg[0], WildcardFlagSpecification):
-                return (builder, self.handleWildcardFlagSpecification(
-                    builder,
-                    arg[1],
-                    backlog_flagspec))
-
-            # arg[0] must be a FlagSpecification
-            return (builder, self.handleFlagSpecification(
-                arg[0], builder, backlog_flagspec))
-
-        if isinstance(arg, RedirectBuilder):
-            # Update the builder to use the current builder
-            builder = arg
-            self.builder_stack[-1] = builder
-
-        if isinstance(arg, str):
-            if backlog_flagspec is not None:
-                return (builder, self.handleFlagValue(
-                    backlog_flagspec, arg, builder))
-
-            self.handleGlob(arg, builder)
-
-        return (builder, None)
-
     def visitCommand(self, ctx: ParserGrammarParser.CommandContext) -> Builder:
-        # Create a command builder for the command
-        literal_app_name = self.visit(ctx.name())
-        is_unsafe = literal_app_name[0] == "_"
-        app_name = literal_app_name[int(is_unsafe):]
-        if app_name not in self.command_dict:
-            raise UnknownCommandError(f"Unknown command {app_name}")
-        app = self.command_dict[app_name]
-        builder = CommandBuilder(app)
-
-        self.builder_stack.append(builder)
+        # Create a command builder for the command. A substituted name can
+        # have more words, which are the first arguments
+        name_words = self.visit(ctx.name())
+        if not name_words:
+            raise NoCommandError("the command name substituted to nothing")
+        builder, is_unsafe = self.createCommandBuilder(name_words[0][0])
         backlog_flagspec: Optional[FlagSpecification] = None
         # we need the laziness of map rather than list comprehension to
         # properly utilize the builder_stack; if we use list comprehension,
         # `builder`'s 2 RedirectBuilders will not affect each other, which is
         # intended behaviour.
-        for arg in map(self.visit, chain(ctx.redirect(), ctx.modifier())):
+        args = chain(map(self.visit, ctx.redirect()),
+                     self.phraseArgs(name_words[1:]),
+                     chain.from_iterable(map(self.visit, ctx.modifier())))
+        for arg in args:
             builder, backlog_flagspec = self.handleCommandArg(
                 builder, arg, backlog_flagspec)
 
-        if backlog_flagspec is not None:
-            raise UnknownFlagValueError(
-                f"Flag {backlog_flagspec.name} requires a value"
-            )
-        self.builder_stack.pop()
-        return builder if not is_unsafe else UnsafeBuilder(builder)
+        return self.finishCommandBuilder(builder, is_unsafe, backlog_flagspec)
 
     def visitPipe(self, ctx: ParserGrammarParser.PipeContext) -> Builder:
-        builders = list(
-            filter(
-                lambda x: issubclass(type(x), Builder),
-                (self.visit(child) for child in ctx.getChildren()),
-            )
-        )
-
-        return PipeBuilder(builders[0], builders[1])
+        # Pipes nest to the left, and are flattened into one pipeline
+        return PipelineBuilder(
+            [self.visit(operand) for operand in left_operands(ctx)])
 
     def visitSequence(
         self, ctx: ParserGrammarParser.SequenceContext
     ) -> Builder:
-        b = [self.visit(builder) for builder in ctx.getChildren()]
-        left, right = [x for x in b if not isinstance(x, str)]
-        # Sequences have a pair of builders of any type
-        return SeqBuilder(left, right)
+        # Sequences nest to the left, and are flattened into one sequence.
+        # Their operands are pipes or commands of any type
+        return SequenceBuilder(
+            [self.visit(operand) for operand in left_operands(ctx)])
 
     def visitModifier(
         self, ctx: ParserGrammarParser.ModifierContext
-    ) -> FlagSpecification:
-        # can't do visitChildren here, otherwise aggregateResult will be called
-        return self.visit(ctx.getChild(0))
-
-    def visitFlag(
-        self, ctx: ParserGrammarParser.FlagContext
-    ) -> Tuple[FlagSpecification, str]:
+    ) -> Iterable[Any]:
+        # Every modifier gives any number of command arguments, for
+        # handleCommandArg
+        child = ctx.getChild(0)
+        if isinstance(child, ParserGrammarParser.RedirectContext):
+            return [self.visit(child)]
+        return self.visit(child)
+
+    def visitFlag(self, ctx: ParserGrammarParser.FlagContext) -> Iterator[Any]:
         # Get just the WORD representing the flag
         # Associating the flag with its value is done in visitCommand
-        flag = self.visit(ctx.getChild(1))
-        flag_specifications = self.builder_stack[
-            -1
-        ].command_type.COMMAND_SPECIFICATION.flag_specifications
-        for flag_spec in flag_specifications:
-            if (
-                isinstance(flag_spec, WildcardFlagSpecification)
-                or flag_spec.name == flag
-            ):
-                return (flag_spec, '-' + flag)
-        raise UnknownFlagError(f"Unknown flag {flag}")
+        words = self.visit(ctx.phrase())
+        if not words:
+            # The rest of the flag was an empty substitution
+            yield '-'
+            return
+        yield self.findFlagSpecification(words[0][0])
+        yield from self.phraseArgs(words[1:])
+
+    def visitArg(self, ctx: ParserGrammarParser.ArgContext) -> Iterator[Any]:
+        return self.phraseArgs(self.visit(ctx.phrase()))
+
+    def visitName(
+        self, ctx: ParserGrammarParser.NameContext
+    ) -> List[PhraseWord]:
+        return self.visit(ctx.phrase())
+
+    def phraseArgs(self, words: Iterable[PhraseWord]) -> Iterator[Any]:
+        """
+        Turns the words of a phrase into command arguments. Substituted words
+        that look like flags are flags, as if they had been written out.
+        """
+        for word, is_flag in words:
+            yield self.findFlagSpecification(word[1:]) if is_flag else word
 
     def visitRedirect(
         self, ctx: ParserGrammarParser.RedirectContext
     ) -> RedirectBuilder:
         direction = ctx.getChild(0).getText()
-        file = ctx.phrase().getText()
+        words = self.visit(ctx.phrase())
+        if len(words) != 1:
+            raise RedirectError(f"ambiguous redirect {ctx.phrase().getText()}")
+        file = words[0][0]
         builder = RedirectBuilder(self.builder_stack[-1])
         if direction == "<":
             builder.set_in_file(file)
@@ -285,17 +175,58 @@ class RunnerVisitor(ParserGrammarVisitor):
             builder.set_out_file(file)
         return builder
 
+    def visitPhrase(
+        self, ctx: ParserGrammarParser.PhraseContext
+    ) -> List[PhraseWord]:
+        # Phrases nest once for every part, so they are flattened without
+        # recursion
+        phrase = PhraseBuilder()
+        stack = [ctx]
+        while stack:
+            node = stack.pop()
+            if isinstance(node, ParserGrammarParser.PhraseContext):
+                stack.extend(reversed(node.children))
+            elif isinstance(node, ParserGrammarParser.SubcommandContext):
+                phrase.add_words(self.substitutedWords(node))
+            elif isinstance(node, ParserGrammarParser.StringContext):
+                phrase.add_text(self.visit(node), quoted=True)
+            elif node.getSymbol().type != ParserGrammarParser.SPACE:
+                # The only spaces in a phrase are the ones in an empty ``
+                phrase.add_text(self.visit(node))
+        return phrase.finish()
+
     def visitSubcommand(
         self, ctx: ParserGrammarParser.SubcommandContext
     ) -> str:
-        raise DeveloperSkillIssue(
-            "The command line must first go through the substitution visitor")
+        # Substitutions in quotes are not split into words
+        return ' '.join(self.substitutedWords(ctx))
+
+    def substitutedWords(
+        self, ctx: ParserGrammarParser.SubcommandContext
+    ) -> Sequence[str]:
+        """
+        Gets the words output by a substitution.
+
+        Raises:
+            DeveloperSkillIssue: If the substitutions were not given
+        """
+        if ctx.commandLine() is None:
+            # this case occurs if we receive an empty ``
+            return ()
+        if self.substitutions is None:
+            raise DeveloperSkillIssue(
+                "The command line must first go through the substitution "
+                "visitor")
+        return self.substitutions[ctx]
 
     def visitLiteral(self, ctx: ParserGrammarParser.LiteralContext) -> str:
         # every literal is either a CHAR or one of "|;<>. Hence, we simply get
         # the concatenated text.
         return ("".join([child.getText() for child in ctx.children]))
 
+    def visitString(self, ctx: ParserGrammarParser.StringContext) -> str:
+        return self.visit(ctx.getChild(0))
+
     def visitDq_string(self, ctx: ParserGrammarParser.Dq_stringContext) -> str:
         # first and last child are guaranteed to be the quotes (otherwise the
         # parser should have failed). Everything else needs to become a string.
@@ -304,16 +235,6 @@ class RunnerVisitor(ParserGrammarVisitor):
     def visitSq_string(self, ctx: ParserGrammarParser.Sq_stringContext) -> str:
         return "".join([self.visit(child) for child in ctx.children[1:-1]])
 
-    def aggregateResult(self, aggregate: str, nextResult: str) -> str:
-        """
-        aggregateResult is an ANTLR-provided function that combines the results
-        of the ANTLR parser into one.
-
-        In the case of our visitor, it is used more or less solely for
-        visitPhrase.
-        """
-        return aggregate + nextResult
-
     def visitTerminal(self, node: TerminalNode) -> str:
         """
         visitTerminal is an ANTLR-provided function that runs whenever a
@@ -332,13 +253,3 @@ class RunnerVisitor(ParserGrammarVisitor):
                 .replace('\\"', '"')
                 .replace('\\\\', '\\'))
         return text if text != '`' else ''
-
-    def defaultResult(self) -> str:
-        """
-        defaultResult is an ANTLR-provided function that runs whenever there is
-        an unresolved terminal. In our visitor and parser combo, the only
-        temrinals we'll reach are SPACE, WORD and STRING.
-
-        Returns: str: The empty string
-        """
-        return ""
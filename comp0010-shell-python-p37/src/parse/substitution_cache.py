@@ -0,0 +1,107 @@
+"""
+An opt-in cache of the output of command substitutions, so that a session
+which substitutes the same subcommand over and over (e.g. `cat hosts.txt`)
+only runs it again once something it read has changed.
+
+An entry is keyed by the subcommand and the current working directory, and
+remembers the fingerprint (modification time and size) of every file and
+directory the subcommand read. It is thrown away as soon as one of them has a
+different fingerprint. Subcommands that can change the state of the shell,
+such as cd, exit or writing to a file, are never cached.
+"""
+import os
+from dataclasses import dataclass
+from threading import Lock
+from typing import Optional, Sequence, Tuple
+
+from commands.read_tracker import ReadTracker
+
+from .lru_cache import CacheStats, LRUCache
+
+DEFAULT_SUBSTITUTION_CACHE_SIZE = 256
+
+
+@dataclass
+class CachedSubstitution:
+    """
+    The words output by a subcommand, and what it read to produce them
+    """
+    output: Sequence[str]
+    reads: ReadTracker
+
+
+class SubstitutionCache:
+    """
+    A bounded LRU cache of the words output by subcommands.
+
+    Args:
+        maxsize (int): The maximum number of outputs to keep
+    """
+
+    def __init__(self, maxsize: int = DEFAULT_SUBSTITUTION_CACHE_SIZE) -> None:
+        self.outputs: LRUCache[Tuple[str, str], CachedSubstitution] = \
+            LRUCache(maxsize)
+        self.invalidations = 0
+        self._lock = Lock()
+
+    def get(self, subcommand: str) -> Optional[Sequence[str]]:
+        """
+        Gets the output of subcommand, if nothing it read has changed since.
+
+        Args:
+            subcommand (str): The text of the subcommand, without backquotes
+
+        Returns:
+            Optional[Sequence[str]]: The cached words, or None on a miss
+        """
+        key = (subcommand, os.getcwd())
+        entry = self.outputs.get(key)
+        if entry is None:
+            return None
+        if not entry.reads.is_unchanged():
+            self.outputs.discard(key)
+            with self._lock:
+                self.invalidations += 1
+            return None
+        return entry.output
+
+    def store(self, subcommand: str, output: Sequence[str],
+              reads: ReadTracker) -> None:
+        """
+        Stores the output of subcommand, unless what it read cannot be
+        checked for changes.
+
+        Args:
+            subcommand (str): The text of the subcommand, without backquotes
+            output (Sequence[str]): The words it output
+            reads (ReadTracker): The tracker that was active while the
+                                 subcommand was parsed and run
+        """
+        if reads.untracked:
+            return
+        self.outputs.put((subcommand, os.getcwd()),
+                         CachedSubstitution(tuple(output), reads))
+
+    def stats(self) -> CacheStats:
+        """
+        Returns:
+            CacheStats: The counters of the cache, where stale entries count
+                        as misses
+        """
+        stats = self.outputs.stats()
+        with self._lock:
+            invalidations = self.invalidations
+        return CacheStats(stats.hits - invalidations,
+                          stats.misses + invalidations,
+                          stats.evictions, stats.size, stats.maxsize,
+                          invalidations)
+
+    def format_stats(self) -> str:
+        """
+        Formats the counters of the cache as a line for humans to read
+        """
+        stats = self.stats()
+        return f"substitution cache: {stats.hits} hits, {stats.misses} " \
+               f"misses ({stats.hit_rate:.1%} hit rate), " \
+               f"{stats.invalidations} invalidated, {stats.evictions} " \
+               f"evicted, {stats.size}/{stats.maxsize} entries\n"
@@ -6,11 +6,14 @@ Classes:
     SubstitutionParser: A parser for parsing substitutions within command line
     strings.
 """
+from typing import Iterable, Mapping, Optional, Type, Union
+
+from commands.base_command import BaseCommand
 from commands.builder import Builder
-from parse.substitution_visitor import SubstitutionVisitor
 
-from .parse_tree_factory import create_parse_tree
+from .plan_cache import PlanCache, get_plan_cache
 from .raw_shell_parser import RawShellParser
+from .substitution_cache import SubstitutionCache
 
 
 class SubstitutionShellParser(RawShellParser):
@@ -18,17 +21,63 @@ class SubstitutionShellParser(RawShellParser):
     """
     A class for parsing command line strings into a list of commands and their
     arguments.
+
+    Parsed command lines are cached in a plan cache. Parsers using the command
+    registry share the process-wide plan cache by default; parsers given their
+    own commands only cache if they are also given a plan cache, since plans
+    depend on the commands that are available.
+
+    The output of substitutions is only cached if the parser is given a
+    substitution cache.
     """
+    def __init__(self,
+                 commands: Optional[Union[
+                     Iterable[Type[BaseCommand]],
+                     Mapping[str, Type[BaseCommand]]]] = None,
+                 plan_cache: Optional[PlanCache] = None,
+                 substitution_cache: Optional[SubstitutionCache] = None):
+        if commands is None and plan_cache is None:
+            plan_cache = get_plan_cache()
+        super().__init__(commands)
+        self.plan_cache = plan_cache
+        self.substitution_cache = substitution_cache
+
     def parse(self, cmdline: str) -> Builder:
         """
         Takes a Command Line string and returns a fully substituted string
 
         Args:
-            cmdline (str): The command line string to be parsed.
+            cmdline (str): The command line to be parsed.
 
         Returns:
             str: The substitution that is fully substituted
         """
-        visitor = SubstitutionVisitor()
-        return RawShellParser(self.all_commands).parse(
-            visitor.visit(create_parse_tree(cmdline)))
+        if self.plan_cache is None or \
+                not self.plan_cache.is_cacheable(cmdline):
+            return self._parse_uncached(cmdline)
+
+        plan = self.plan_cache.get_plan(cmdline)
+        if plan is not None:
+            return plan
+        builder = self._parse_uncached(cmdline)
+        self.plan_cache.store(cmdline, builder)
+        return builder
+
+    def _parse_uncached(self, cmdline: str) -> Builder:
+        # Simple command lines have nothing to substitute
+        builder = self.fast_path.parse(cmdline)
+        if builder is not None:
+            return builder
+
+        # ANTLR is only imported once a command line needs it
+        # pylint: disable=import-outside-toplevel
+        from .parse_tree_factory import create_parse_tree
+        from .runner_visitor import RunnerVisitor
+        from .substitution_visitor import SubstitutionVisitor
+
+        # The output of the substitutions is passed to the RunnerVisitor as
+        # words, so the command line is only parsed once
+        tree = create_parse_tree(cmdline)
+        substitutions = SubstitutionVisitor(
+            substitution_cache=self.substitution_cache).visit(tree)
+        return RunnerVisitor(self.all_commands, substitutions).visit(tree)
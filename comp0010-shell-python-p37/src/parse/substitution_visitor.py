@@ -8,17 +8,60 @@ visitor is necessary.
 Also, only Level 1 substitution is supported (i.e. backslash` will not be
 interpreted again). In other words, nested substitution is not supported.
 
+The visitor finds every substitution in the parse tree and runs them, and
+returns their output split into words, for the RunnerVisitor to use as
+arguments while it visits the same tree. The output is never parsed again.
+
+When a command line has several substitutions, and none of them can change
+the state of the shell (e.g. with cd, or by writing to a file), they run
+concurrently on a thread pool. Otherwise they run one after another, in
+source order. Either way, the error raised is the one from the first
+substitution that failed, as if they had run one after another, and once one
+fails, the ones after it that have not started are not run.
+
+Given a SubstitutionCache, substitutions whose output is cached, and whose
+reads have not changed since, are not run again.
+
 The caller must call SubstitutionVisitor before calling RunnerVisitor
 """
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
 from io import StringIO
+from typing import Dict, List, Optional, Sequence, Tuple
 
-from antlr4 import TerminalNode  # type:ignore
-from antlr4 import Token  # type: ignore
+from antlr4 import ParserRuleContext  # type: ignore
 
+from commands.builder import Builder
+from commands.read_tracker import ReadTracker
 from parse.ParserGrammarParser import ParserGrammarParser
 from parse.ParserGrammarVisitor import ParserGrammarVisitor
 
 from .raw_shell_parser import RawShellParser
+from .substitution_cache import SubstitutionCache
+
+DEFAULT_SUBSTITUTION_WORKERS = 4
+
+# The words output by every substitution of a parse tree
+Substitutions = Dict[ParserGrammarParser.SubcommandContext, Sequence[str]]
+
+
+def run_substitution(builder: Builder,
+                     reads: Optional[ReadTracker] = None) -> Sequence[str]:
+    """
+    Runs a parsed substitution. Like in bash, its output is split into words
+    on whitespace, so leading and trailing newlines are dropped.
+
+    Args:
+        builder (Builder): The parsed substitution
+        reads (Optional[ReadTracker]): Records what the substitution reads
+
+    Returns:
+        Sequence[str]: The words output by the substitution
+    """
+    out_stream = StringIO()
+    with reads or ReadTracker():
+        with builder.set_out_stream(out_stream).build() as runnable:
+            runnable.run()
+            return tuple(out_stream.getvalue().split())
 
 
 class SubstitutionVisitor(ParserGrammarVisitor):
@@ -27,37 +70,164 @@ class SubstitutionVisitor(ParserGrammarVisitor):
 
     Internally, this class uses the RunnerVisitor to run the command
     substitution
+
+    Args:
+        max_workers (int): How many substitutions can run at once. With one,
+                           substitutions always run one after another.
+        substitution_cache (Optional[SubstitutionCache]): Where to look up
+                                                          and store outputs
     """
-    def visitSubcommand(
-        self, ctx: ParserGrammarParser.SubcommandContext
-    ) -> str:
-        cmd_line = ctx.commandLine()
-        if not cmd_line:
-            # this case occurs if we receive an empty ``
-            return ""
-
-        out_stream = StringIO()
-        runnable = (RawShellParser().parse(cmd_line.getText())
-                    .set_out_stream(out_stream).build())
-        with runnable:
-            # in bash, all leading and trailing newlines are stripped in
-            # subcommands
-            runnable.run()
-            return ' '.join(d for d in out_stream
-                            .getvalue()
-                            .replace("\n", " ")
-                            .replace('"', '\\"')
-                            .replace("'", "\\'")
-                            .strip()
-                            .split(' ') if d != '')
-
-    def aggregateResult(self, aggregate: str, nextResult: str) -> str:
-        return aggregate + nextResult
-
-    def visitTerminal(self, node: TerminalNode) -> str:
-        if node.getSymbol().type == Token.EOF:
-            return ''
-        return node.getText()
-
-    def defaultResult(self) -> str:
-        return ""
+    def __init__(self,
+                 max_workers: int = DEFAULT_SUBSTITUTION_WORKERS,
+                 substitution_cache: Optional[SubstitutionCache] = None
+                 ) -> None:
+        super().__init__()
+        self.max_workers = max_workers
+        self.substitution_cache = substitution_cache
+        self.subcommands: List[str] = []
+
+    def visitStart(
+        self, ctx: ParserGrammarParser.StartContext
+    ) -> Substitutions:
+        contexts = self.findSubcommands(ctx)
+        self.subcommands = [context.commandLine().getText()
+                            for context in contexts]
+        return dict(zip(contexts, self.runSubcommands()))
+
+    @staticmethod
+    def findSubcommands(
+        ctx: ParserRuleContext
+    ) -> List[ParserGrammarParser.SubcommandContext]:
+        """
+        Finds the substitutions in a tree in source order, without
+        recursion, since long pipes, sequences and phrases nest deeply.
+        Empty substitutions (``) have nothing to run, and are left out.
+        """
+        found = []
+        stack = [ctx]
+        while stack:
+            node = stack.pop()
+            if isinstance(node, ParserGrammarParser.SubcommandContext):
+                if node.commandLine() is not None:
+                    found.append(node)
+            elif isinstance(node, ParserRuleContext) and node.children:
+                stack.extend(reversed(node.children))
+        return found
+
+    def runSubcommands(self) -> List[Sequence[str]]:
+        """
+        Runs every substitution found in the tree. Substitutions looked up in
+        the cache to run concurrently are not looked up again if they must
+        run one after another instead.
+
+        Returns:
+            List[Sequence[str]]: The words output by every substitution, in
+                                 source order
+        """
+        cache = self.substitution_cache
+        cached: List[Optional[Sequence[str]]] = []
+        if len(self.subcommands) > 1 and self.max_workers > 1:
+            cached = [cache.get(subcommand) if cache is not None else None
+                      for subcommand in self.subcommands]
+            concurrent_outputs = self.runConcurrently(cached)
+            if concurrent_outputs is not None:
+                return concurrent_outputs
+        # Every substitution is looked up and parsed just before it runs,
+        # since running the ones before it can change how it parses, e.g. its
+        # globs, and what it reads
+        outputs: List[Sequence[str]] = []
+        for index, subcommand in enumerate(self.subcommands):
+            if index < len(cached):
+                output = cached[index]
+            else:
+                output = cache.get(subcommand) if cache is not None else None
+            if output is None:
+                output, mutates_shell_state = self.runSubcommand(subcommand)
+                if mutates_shell_state:
+                    # What the later ones were looked up as may be stale
+                    del cached[index + 1:]
+            outputs.append(output)
+        return outputs
+
+    def runSubcommand(self, subcommand: str) -> Tuple[Sequence[str], bool]:
+        """
+        Runs a substitution that was not found in the cache, and caches its
+        output unless it can change the state of the shell.
+
+        Returns:
+            Tuple[Sequence[str], bool]: The words output by the substitution,
+                                        and whether it can have changed the
+                                        state of the shell
+        """
+        if self.substitution_cache is None:
+            builder = RawShellParser().parse(subcommand)
+            return run_substitution(builder), builder.mutates_shell_state()
+
+        reads = ReadTracker()
+        with reads:
+            builder = RawShellParser().parse(subcommand)
+        mutates_shell_state = builder.mutates_shell_state()
+        output = run_substitution(builder, reads)
+        if not mutates_shell_state:
+            self.substitution_cache.store(subcommand, output, reads)
+        return output, mutates_shell_state
+
+    def runConcurrently(
+        self, cached: List[Optional[Sequence[str]]]
+    ) -> Optional[List[Sequence[str]]]:
+        """
+        Runs the substitutions that were not found in the cache on a thread
+        pool, unless one of them can change the state of the shell.
+
+        Args:
+            cached (List[Optional[Sequence[str]]]): The cached words of every
+                                                    substitution, or None for
+                                                    each one that must run
+
+        Returns:
+            Optional[List[Sequence[str]]]: The words output by every
+                                           substitution, or None if they must
+                                           run one after another
+        """
+        cache = self.substitution_cache
+        outputs = list(cached)
+
+        # The substitutions that must run, with what they read
+        pending: List[Tuple[int, Builder, ReadTracker]] = []
+        parse_error: Optional[Exception] = None
+        for index, subcommand in enumerate(self.subcommands):
+            if outputs[index] is not None:
+                continue
+            reads = ReadTracker()
+            try:
+                with reads:
+                    pending.append(
+                        (index, RawShellParser().parse(subcommand), reads))
+            except Exception as error:  # pylint: disable=broad-except
+                # The substitutions before it still run first
+                parse_error = error
+                break
+        if any(builder.mutates_shell_state() for _, builder, _ in pending):
+            return None
+
+        with ThreadPoolExecutor(
+                min(self.max_workers, len(pending) or 1)) as pool:
+            futures: List[Future] = [
+                pool.submit(run_substitution, builder, reads)
+                for _, builder, reads in pending]
+            # Once one fails, the ones after it that have not started never
+            # run, since they cannot change which error is raised
+            for future in as_completed(futures):
+                if not future.cancelled() and future.exception() is not None:
+                    for later in futures[futures.index(future) + 1:]:
+                        later.cancel()
+        # result() raises the error of the first substitution that failed,
+        # before any that were cancelled
+        for (index, _, reads), future in zip(pending, futures):
+            output = future.result()
+            outputs[index] = output
+            if cache is not None:
+                cache.store(self.subcommands[index], output, reads)
+        if parse_error is not None:
+            raise parse_error
+        return [output or () for output in outputs]
@@ -3,11 +3,19 @@ A module implementing a bash style shell in python
 """
 
 import sys
-from io import StringIO
+from io import StringIO, TextIOBase
+from threading import Thread
+from typing import (Callable, Generator, Iterable, List, Optional, TextIO,
+                    Union)
 
 from errors.errors import BaseShellError
+from commands.channel import TextChannel
+from commands.process_stage import stage_processes
+from commands.runnable import Runnable
 from errors.shell_errors import ShellExitError
+from parse.substitution_cache import SubstitutionCache
 from parse.substitution_shell_parser import SubstitutionShellParser
+from output_sink import OutputSink
 
 # pylint: disable=too-few-public-methods
 # Python shell only needs an eval method
@@ -15,42 +23,164 @@ from parse.substitution_shell_parser import SubstitutionShellParser
 
 class PythonShell:
     """
-    A class representing a python shell
+    A class representing a python shell. One shell can evaluate any number of
+    command lines, reusing its parser.
+
+    Args:
+        in_stream (StringIO): The input stream of the command lines
+        out_stream (TextIO): Where the output of command lines is written
+        rewind_output (bool): Whether to seek the out stream back to the start
+                              after every command line, so that the caller
+                              can read the output. Sinks such as stdout must
+                              not be rewound.
+        substitution_cache (Optional[SubstitutionCache]): Caches the output of
+                                                          substitutions across
+                                                          command lines
+        stage_processes (bool): Whether to run the CPU bound stages of
+                                pipelines in their own processes
     """
 
-    def __init__(self, in_stream: StringIO, out_stream: StringIO):
+    def __init__(self, in_stream: StringIO, out_stream: TextIO,
+                 rewind_output: bool = True,
+                 substitution_cache: Optional[SubstitutionCache] = None,
+                 stage_processes: bool = False):
         self.in_stream: StringIO = in_stream
-        self.out_stream: StringIO = out_stream
+        self.out_stream: TextIO = out_stream
+        self.rewind_output = rewind_output
+        self.stage_processes = stage_processes
+        self.parser = SubstitutionShellParser(
+            substitution_cache=substitution_cache)
+
+    def eval(self, cmdline: str,
+             on_build: Optional[Callable[[Runnable], None]] = None) -> int:
+        """
+        Evaluates a command line, writing its output to the out stream as
+        soon as it is written.
+
+        Args:
+            cmdline: The command line to evaluate
+            on_build: Called with the runnable once it is built, before it is
+                      run, e.g. to cancel it if the shell is interrupted
+
+        Returns:
+            int: The exit code, which is 1 if an error was reported on
+                 stderr, and 0 otherwise
+        """
+        with OutputSink(self.out_stream) as sink:
+            exit_code = self._eval_to(cmdline, sink, on_build)
+        if self.rewind_output:
+            self.out_stream.seek(0)
+        return exit_code
 
-    def eval(self, cmdline: str):
+    def eval_iter(self, cmdline: str) -> Generator[str, None, int]:
         """
-        Evaluates a command line.
+        Evaluates a command line on another thread, yielding its output in
+        chunks as it is written, rather than writing it to the out stream.
+        Closing the generator early cancels the command line.
+
         Args:
             cmdline: The command line to evaluate
-            out: The output deque
+
+        Yields:
+            str: The next chunk of output
 
         Returns:
-            None
+            int: The exit code, as the value of the StopIteration, which is 1
+                 if an error was reported on stderr, and 0 otherwise
+
+        Raises:
+            ShellExitError: If the command line exits the shell
         """
+        channel = TextChannel()
+        built: List[Runnable] = []
+        outcome: List[Union[int, BaseException]] = [0]
+
+        def run() -> None:
+            try:
+                with OutputSink(channel.writer) as sink:
+                    outcome[0] = self._eval_to(cmdline, sink, built.append)
+            except BrokenPipeError:
+                # The generator was closed, so nothing reads the output
+                pass
+            # Errors are raised by the generator instead
+            except BaseException as error:  # pylint: disable=broad-except
+                outcome[0] = error
+            finally:
+                channel.writer.close()
 
-        parser = SubstitutionShellParser()
+        thread = Thread(target=run, name='eval-iter', daemon=True)
+        thread.start()
         try:
-            builder = parser.parse(cmdline)
-            out = StringIO()
-            runnable = (
-                builder.set_in_stream(self.in_stream)
-                .set_out_stream(out)
-                .build()
-            )
-            # The following ensures that the runnable streams are closed after
-            # it is run, so the contents of out need to be copied into the
-            # out_stream before it is closed.
+            while True:
+                chunk = channel.get()
+                if chunk is None:
+                    break
+                yield chunk
+        finally:
+            channel.reader.close()
+            for runnable in built:
+                runnable.cancel()
+            thread.join()
+        if isinstance(outcome[0], BaseException):
+            raise outcome[0]
+        return outcome[0]
+
+    def _eval_to(self, cmdline: str, out_stream: TextIOBase,
+                 on_build: Optional[Callable[[Runnable], None]] = None
+                 ) -> int:
+        """
+        Evaluates a command line, writing its output to out_stream, which is
+        closed once the command line has run.
+
+        Args:
+            cmdline: The command line to evaluate
+            out_stream: Where the command line writes its output
+            on_build: Called with the runnable once it is built, before it is
+                      run
+
+        Returns:
+            int: The exit code, which is 1 if an error was reported on
+                 stderr, and 0 otherwise
+        """
+        try:
+            builder = self.parser.parse(cmdline)
+            with stage_processes(self.stage_processes):
+                runnable = (
+                    builder.set_in_stream(self.in_stream)
+                    .set_out_stream(out_stream)
+                    .build()
+                )
+            if on_build is not None:
+                on_build(runnable)
             with runnable as r:
                 r.run()
-                out.seek(0)
-                self.out_stream.write(out.read())
         except ShellExitError as e:
             raise e
         except BaseShellError as e:
             sys.stderr.write(f"{e}\n")
-        self.out_stream.seek(0)
+            return 1
+        return 0
+
+    def run_script(self, lines: Iterable[str]) -> None:
+        """
+        Evaluates a script one command line at a time, writing the output of
+        each line as soon as it has run. Blank lines and lines starting with #
+        are skipped. Errors are reported like in the REPL, and exit stops the
+        script.
+
+        Args:
+            lines (Iterable[str]): The lines of the script, e.g. a file
+        """
+        for line in lines:
+            cmdline = line.rstrip("\r\n")
+            if not cmdline.strip() or cmdline.lstrip().startswith("#"):
+                continue
+            # Running a command line closes its input stream, so every line
+            # gets an empty one, like sh -c
+            self.in_stream = StringIO()
+            try:
+                self.eval(cmdline)
+            except ShellExitError:
+                return
+            finally:
+                self.out_stream.flush()
@@ -1,39 +1,329 @@
 """
 This module provides a command line interface to the PythonShell class through
 direct inputs or command line arguments.
+
+Usage:
+    sh [--startup-profile] [--cache-substitutions] [--stage-procs]
+       [-c COMMAND | -s | SCRIPT]
+    sh --serve SOCKET [--workers N]
+    sh --client SOCKET -c COMMAND
+
+-c evaluates one command line. -s evaluates every line read from stdin, and
+SCRIPT every line of a file, in one shell session, writing the output of each
+line as soon as it has run. Without any of them, the shell runs interactively.
+
+--serve runs a daemon that evaluates command lines sent to the Unix socket
+SOCKET by --client, which saves starting and warming up Python for every
+command line.
+
+--cache-substitutions reuses the output of a substitution for as long as the
+files it read are unchanged, and reports how often it could on stderr when the
+session ends.
+
+--stage-procs runs the stages of pipelines that are CPU bound, such as grep,
+sed and cut, in their own processes, so that a pipeline can use more than one
+core.
+
+Modules are imported as late as possible, so that sh -c only loads what its
+command line needs. --startup-profile reports the time taken by every import
+and every phase of startup on stderr.
 """
-import sys
+from __future__ import annotations
+
+import io
 import os
-from io import StringIO
-import readline
+import sys
 
-from python_shell import PythonShell
-from errors.shell_errors import ShellExitError
+from startup_profile import StartupProfile
 
+# The cache is imported lazily, so it is only imported for type checkers
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    from commands.runnable import Runnable
+    from parse.substitution_cache import SubstitutionCache
 
-if __name__ == "__main__":
-    args_num = len(sys.argv) - 1
-    if args_num > 0:
-        if args_num != 2:
+STARTUP_PROFILE_FLAG = '--startup-profile'
+CACHE_SUBSTITUTIONS_FLAG = '--cache-substitutions'
+STAGE_PROCS_FLAG = '--stage-procs'
+SERVE_FLAG = '--serve'
+WORKERS_FLAG = '--workers'
+CLIENT_FLAG = '--client'
+
+# The exit code of a shell stopped by SIGINT, i.e. ^C
+INTERRUPTED_EXIT_CODE = 130
+
+# Imports are deferred so that sh -c stays fast, and so that the startup
+# profile can time them
+# pylint: disable=import-outside-toplevel
+
+
+class Arguments:
+    # pylint: disable=too-few-public-methods
+    """
+    The parsed command line arguments of sh.
+
+    Args:
+        profile (bool): Whether to profile startup
+        command (str | None): The command line given with -c
+        script (str | None): The path of the script to run
+        read_stdin (bool): Whether to run the lines read from stdin
+        serve (str | None): The socket to serve command lines on
+        workers (int | None): How many workers the daemon should fork
+        client (str | None): The socket of the daemon to send the command
+                             line to
+        cache_substitutions (bool): Whether to cache the output of
+                                    substitutions
+        stage_processes (bool): Whether to run CPU bound pipeline stages in
+                                their own processes
+    """
+
+    # pylint: disable=too-many-arguments
+    def __init__(self, profile: bool = False, command: str | None = None,
+                 script: str | None = None, read_stdin: bool = False,
+                 serve: str | None = None, workers: int | None = None,
+                 client: str | None = None,
+                 cache_substitutions: bool = False,
+                 stage_processes: bool = False) -> None:
+        self.profile = profile
+        self.cache_substitutions = cache_substitutions
+        self.stage_processes = stage_processes
+        self.command = command
+        self.script = script
+        self.read_stdin = read_stdin
+        self.serve = serve
+        self.workers = workers
+        self.client = client
+
+    @property
+    def interactive(self) -> bool:
+        """
+        Whether the shell should read command lines from the user
+        """
+        return self.command is None and self.script is None and \
+            not self.read_stdin and self.serve is None
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, Arguments) and vars(self) == vars(other)
+
+
+def parse_arguments(args: list[str]) -> Arguments:
+    """
+    Parses the command line arguments by hand, since argparse is slow to
+    import.
+
+    Args:
+        args (list[str]): The arguments, without the program name
+
+    Returns:
+        Arguments: The parsed arguments
+
+    Raises:
+        ValueError: If the arguments are not valid
+    """
+    if args and args[0] == SERVE_FLAG:
+        return parse_serve_arguments(args[1:])
+    if args and args[0] == CLIENT_FLAG:
+        if len(args) != 4:
             raise ValueError("wrong number of command line arguments")
-        if sys.argv[1] != "-c":
-            raise ValueError(f"unexpected command line argument {sys.argv[1]}")
-        with StringIO() as in_stream, StringIO() as out_stream:
-            PythonShell(in_stream, out_stream).eval(sys.argv[2])
-            out_stream.seek(0)
-            print(out_stream.read(), end="")
+        if args[2] != "-c":
+            raise ValueError(f"unexpected command line argument {args[2]}")
+        return Arguments(client=args[1], command=args[3])
+
+    options = set()
+    while args and args[0] in (STARTUP_PROFILE_FLAG, CACHE_SUBSTITUTIONS_FLAG,
+                               STAGE_PROCS_FLAG):
+        if args[0] in options:
+            raise ValueError(f"repeated command line argument {args[0]}")
+        options.add(args[0])
+        args = args[1:]
+    arguments = Arguments(
+        STARTUP_PROFILE_FLAG in options,
+        cache_substitutions=CACHE_SUBSTITUTIONS_FLAG in options,
+        stage_processes=STAGE_PROCS_FLAG in options)
+    if not args:
+        return arguments
+    if args[0] == "-c":
+        if len(args) != 2:
+            raise ValueError("wrong number of command line arguments")
+        arguments.command = args[1]
+    elif len(args) != 1:
+        raise ValueError("wrong number of command line arguments")
+    elif args[0] == "-s":
+        arguments.read_stdin = True
+    elif args[0].startswith("-"):
+        raise ValueError(f"unexpected command line argument {args[0]}")
     else:
+        arguments.script = args[0]
+    return arguments
+
+
+def parse_serve_arguments(args: list[str]) -> Arguments:
+    """
+    Parses the arguments following --serve: SOCKET [--workers N]
+
+    Raises:
+        ValueError: If the arguments are not valid
+    """
+    if len(args) not in (1, 3):
+        raise ValueError("wrong number of command line arguments")
+    if len(args) == 1:
+        return Arguments(serve=args[0])
+    if args[1] != WORKERS_FLAG:
+        raise ValueError(f"unexpected command line argument {args[1]}")
+    if not args[2].isdigit() or int(args[2]) < 1:
+        raise ValueError(f"invalid number of workers {args[2]}")
+    return Arguments(serve=args[0], workers=int(args[2]))
+
+
+def run_command(cmdline: str, profile: StartupProfile,
+                cache: SubstitutionCache | None = None,
+                stage_processes: bool = False) -> None:
+    """
+    Evaluates a single command line, printing its output as it is written.
+    ^C cancels the command line, such as tail -f, and exits quietly.
+    """
+    with profile.phase('import shell'):
+        from python_shell import PythonShell
+        from stdin_source import attach_stdin
+
+    built: list[Runnable] = []
+    try:
+        # Commands with nothing else to read stream the shell's stdin, as in
+        # producer | sh -c 'grep x'
+        with attach_stdin(sys.stdin) as in_stream, profile.phase('eval'):
+            PythonShell(in_stream, sys.stdout, rewind_output=False,
+                        substitution_cache=cache,
+                        stage_processes=stage_processes).eval(
+                            cmdline, built.append)
+    except KeyboardInterrupt:
+        # Stages still running on other threads or in their own processes
+        # are stopped too
+        for runnable in built:
+            runnable.cancel()
+        sys.exit(INTERRUPTED_EXIT_CODE)
+
+
+def run_script(path: str | None, profile: StartupProfile,
+               cache: SubstitutionCache | None = None,
+               stage_processes: bool = False) -> None:
+    """
+    Evaluates every line of a script in one shell session.
+
+    Args:
+        path (str | None): The path of the script, or None to read stdin
+        profile (StartupProfile): The startup profile to time phases with
+        cache (SubstitutionCache | None): Caches the output of substitutions
+        stage_processes (bool): Whether to run CPU bound pipeline stages in
+                                their own processes
+    """
+    from io import StringIO
+
+    with profile.phase('import shell'):
+        from python_shell import PythonShell
+
+    shell = PythonShell(StringIO(), sys.stdout, rewind_output=False,
+                        substitution_cache=cache,
+                        stage_processes=stage_processes)
+    with profile.phase('run script'):
+        if path is None:
+            shell.run_script(sys.stdin)
+            return
+        try:
+            script = open(path, encoding='utf-8')
+        except OSError as error:
+            sys.exit(f"sh: {path}: {error.strerror}")
+        with script:
+            shell.run_script(script)
+
+
+def run_repl(profile: StartupProfile, report_profile: bool,
+             cache: SubstitutionCache | None = None,
+             stage_processes: bool = False) -> None:
+    """
+    Evaluates command lines read from the user until the shell exits.
+    """
+    from io import StringIO
+
+    with profile.phase('import shell'):
+        from errors.shell_errors import ShellExitError
+        from python_shell import PythonShell
+
+    with profile.phase('init readline'):
+        import readline
         readline.parse_and_bind("tab: complete")
-        while True:
-            try:
-                cmdline = input(os.getcwd() + "> ")
-                with StringIO() as in_stream, StringIO() as out_stream:
-                    PythonShell(in_stream, out_stream).eval(cmdline)
-                    out_stream.seek(0)
-                    print(out_stream.read(), end="")
-
-            except KeyboardInterrupt:
-                print("^C")
-                continue
-            except ShellExitError:
-                sys.exit(0)
+
+    if report_profile:
+        profile.uninstall()
+        sys.stderr.write(profile.format_report())
+
+    while True:
+        try:
+            cmdline = input(os.getcwd() + "> ")
+            with StringIO() as in_stream:
+                PythonShell(in_stream, sys.stdout, rewind_output=False,
+                            substitution_cache=cache,
+                            stage_processes=stage_processes).eval(cmdline)
+
+        except KeyboardInterrupt:
+            print("^C")
+            continue
+        except ShellExitError:
+            sys.exit(0)
+
+
+def main(args: list[str]) -> None:
+    """
+    Runs the shell with the command line arguments.
+
+    Args:
+        args (list[str]): The arguments, without the program name
+    """
+    profile = StartupProfile()
+    arguments = parse_arguments(args)
+    if isinstance(sys.stdout, io.TextIOWrapper):
+        # Bytes that are not valid UTF-8 are printed as they were read, by the
+        # shell or by the daemon for the client
+        sys.stdout.reconfigure(errors='surrogateescape')
+
+    if arguments.client is not None:
+        from shell_client import run_client
+        sys.exit(run_client(arguments.client, str(arguments.command)))
+    if arguments.serve is not None:
+        from shell_server import DEFAULT_WORKERS, serve
+        serve(arguments.serve, arguments.workers or DEFAULT_WORKERS)
+        return
+    if arguments.profile:
+        profile.install()
+
+    cache = None
+    if arguments.cache_substitutions:
+        from parse.substitution_cache import SubstitutionCache
+        cache = SubstitutionCache()
+
+    try:
+        if arguments.interactive:
+            run_repl(profile, arguments.profile, cache,
+                     arguments.stage_processes)
+        elif arguments.command is not None:
+            run_command(arguments.command, profile, cache,
+                        arguments.stage_processes)
+        else:
+            run_script(arguments.script, profile, cache,
+                       arguments.stage_processes)
+    except BrokenPipeError:
+        # Whatever read the output stopped reading, as with sh -c ... | head.
+        # Output still buffered for stdout can never be written, so stdout
+        # is pointed at /dev/null to stop Python failing to flush it on exit.
+        devnull = os.open(os.devnull, os.O_WRONLY)
+        os.dup2(devnull, sys.stdout.fileno())
+        sys.exit(1)
+    finally:
+        if arguments.profile and not arguments.interactive:
+            profile.uninstall()
+            sys.stderr.write(profile.format_report())
+        if cache is not None:
+            sys.stderr.write(cache.format_stats())
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
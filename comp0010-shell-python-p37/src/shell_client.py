@@ -0,0 +1,46 @@
+"""
+The client of the sh --serve daemon (see shell_server.py), for
+sh --client SOCKET -c COMMAND. The client only imports what it needs to talk
+to the daemon, so that it starts as quickly as Python can.
+"""
+import json
+import os
+import socket
+import sys
+
+# The exit code when the daemon cannot be reached, or hangs up early
+CONNECTION_FAILED = 2
+
+
+def run_client(path: str, cmdline: str) -> int:
+    """
+    Asks the daemon listening on path to evaluate cmdline in the current
+    directory, and writes its output to stdout and stderr as it arrives.
+
+    Args:
+        path (str): The Unix socket of the daemon
+        cmdline (str): The command line to evaluate
+
+    Returns:
+        int: The exit code of the command line
+    """
+    streams = {'stdout': sys.stdout, 'stderr': sys.stderr}
+    request = {'cmdline': cmdline, 'cwd': os.getcwd()}
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as connection:
+            connection.connect(path)
+            connection.sendall(json.dumps(request).encode() + b'\n')
+            with connection.makefile('rb') as reader:
+                for line in reader:
+                    frame = json.loads(line)
+                    if 'exit' in frame:
+                        return int(frame['exit'])
+                    stream = streams[frame['stream']]
+                    stream.write(frame['data'])
+                    stream.flush()
+    except OSError as error:
+        sys.stderr.write(f"sh: cannot reach the shell daemon at {path}: "
+                         f"{error.strerror}\n")
+        return CONNECTION_FAILED
+    sys.stderr.write("sh: the shell daemon hung up\n")
+    return CONNECTION_FAILED
@@ -0,0 +1,265 @@
+"""
+A pre-forked daemon that evaluates command lines sent over a Unix socket, for
+sh --serve. Starting Python for every sh -c is far slower than running the
+command line itself, so the daemon imports everything, loads every command
+and warms the parser once, then forks workers that inherit all of it.
+
+Every worker accepts connections from the shared listening socket, and
+evaluates one request per connection. A request is a single JSON line:
+
+    {"cmdline": "echo hello", "cwd": "/some/directory"}
+
+and the worker answers with JSON lines, ending with the exit code:
+
+    {"stream": "stdout", "data": "hello\\n"}
+    {"stream": "stderr", "data": "..."}
+    {"exit": 0}
+
+Requests are isolated: each runs in the working directory of its client, with
+its own output streams, and the worker returns to its own working directory
+afterwards, even if the command line used cd. A client that hangs up cancels
+its command line, so that one that never ends, such as tail -f, does not keep
+the worker busy forever.
+"""
+import json
+import os
+import select
+import signal
+import socket
+import threading
+from contextlib import redirect_stderr
+from io import StringIO, TextIOBase
+from types import TracebackType
+from typing import Any, BinaryIO, Dict, List, Optional, Set, TextIO, Type, \
+    cast
+
+from commands.command_registry import get_command_registry
+from commands.runnable import Runnable
+from errors.shell_errors import ShellExitError
+from parse.dfa_cache import WARM_UP_CORPUS, warm_up
+from python_shell import PythonShell
+
+DEFAULT_WORKERS = min(4, os.cpu_count() or 1)
+LISTEN_BACKLOG = 128
+
+
+class FrameStream(TextIOBase):
+    """
+    A write-only text stream that sends everything written to it to the
+    client as frames of one output stream.
+
+    Args:
+        writer (BinaryIO): The connection to the client
+        name (str): The name of the stream, stdout or stderr
+    """
+
+    def __init__(self, writer: BinaryIO, name: str) -> None:
+        self.writer = writer
+        self.name = name
+
+    def write(self, data: str) -> int:
+        """
+        Sends data to the client, unless it is empty
+        """
+        if data:
+            send_frame(self.writer, {'stream': self.name, 'data': data})
+        return len(data)
+
+    def writable(self) -> bool:
+        return True
+
+
+class HangUpWatch:
+    """
+    Cancels the command line of a request if its client hangs up before it
+    has run. The client sends nothing after its request, so the connection
+    only becomes readable once the client has closed it. Runnables built
+    after the client hung up are cancelled straight away.
+
+    Args:
+        connection (socket.socket): The connection to the client
+    """
+
+    def __init__(self, connection: socket.socket) -> None:
+        self.connection = connection
+        self.hung_up = False
+        self._built: List[Runnable] = []
+        self._wake_read, self._wake_write = os.pipe()
+        self._thread = threading.Thread(target=self._watch, daemon=True,
+                                        name='hang-up-watch')
+
+    def __enter__(self) -> 'HangUpWatch':
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type: Optional[Type[BaseException]],
+                 exc_value: Optional[BaseException],
+                 traceback: Optional[TracebackType]) -> None:
+        os.write(self._wake_write, b'\0')
+        self._thread.join()
+        os.close(self._wake_read)
+        os.close(self._wake_write)
+
+    def on_build(self, runnable: Runnable) -> None:
+        """
+        Cancels runnable if the client hangs up, for PythonShell.eval()
+        """
+        self._built.append(runnable)
+        if self.hung_up:
+            runnable.cancel()
+
+    def _watch(self) -> None:
+        poller = select.poll()
+        poller.register(self.connection, select.POLLIN)
+        poller.register(self._wake_read, select.POLLIN)
+        ready = [fd for fd, _ in poller.poll()]
+        if self._wake_read in ready:
+            return
+        self.hung_up = True
+        for runnable in list(self._built):
+            runnable.cancel()
+
+
+def send_frame(writer: BinaryIO, frame: Dict[str, Any]) -> None:
+    """
+    Sends a frame as one line of JSON, which never contains a newline
+    """
+    writer.write(json.dumps(frame).encode() + b'\n')
+    writer.flush()
+
+
+def warm_up_shell() -> None:
+    """
+    Does everything that the first command line would otherwise do, so that
+    the workers inherit it: imports every command and the modules that the
+    shell imports lazily, and warms the parser.
+    """
+    # pylint: disable=import-outside-toplevel,unused-import
+    import parse.runner_visitor  # noqa: F401
+    import parse.substitution_visitor  # noqa: F401
+
+    registry = get_command_registry()
+    for name in registry:
+        _ = registry[name]
+    warm_up(WARM_UP_CORPUS)
+
+
+def handle_request(connection: socket.socket) -> None:
+    """
+    Evaluates the request sent over connection, and sends back its output.
+
+    Args:
+        connection (socket.socket): A connection accepted from a client
+    """
+    with connection.makefile('rb') as reader, \
+            connection.makefile('wb') as writer:
+        request = json.loads(reader.readline())
+        stdout = cast(TextIO, FrameStream(writer, 'stdout'))
+        stderr = cast(TextIO, FrameStream(writer, 'stderr'))
+        worker_cwd = os.getcwd()
+        exit_code = 1
+        # A request must never take the worker down with it, so every error
+        # is reported to its client instead
+        # pylint: disable=broad-except
+        try:
+            os.chdir(request['cwd'])
+            with redirect_stderr(stderr), HangUpWatch(connection) as watch:
+                exit_code = PythonShell(
+                    StringIO(), stdout, rewind_output=False).eval(
+                        request['cmdline'], watch.on_build)
+        except ShellExitError:
+            exit_code = 0
+        except Exception as error:
+            stderr.write(f"sh: {error}\n")
+        finally:
+            os.chdir(worker_cwd)
+        send_frame(writer, {'exit': exit_code})
+
+
+def run_worker(listener: socket.socket) -> None:
+    """
+    Serves requests from listener until the worker is killed.
+    """
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    while True:
+        connection, _ = listener.accept()
+        with connection:
+            try:
+                handle_request(connection)
+            except (OSError, ValueError, KeyError):
+                # The client went away or sent a bad request
+                pass
+
+
+class _Stop(Exception):
+    """
+    Raised by the signal handler to stop the daemon
+    """
+
+
+def _stop(signum: int, frame: Any) -> None:
+    raise _Stop(signum)
+
+
+def fork_worker(listener: socket.socket) -> int:
+    """
+    Forks a worker serving requests from listener.
+
+    Returns:
+        int: The process ID of the worker
+    """
+    pid = os.fork()
+    if pid == 0:  # pragma: no cover
+        # Coverage is not collected in forked processes
+        try:
+            run_worker(listener)
+        finally:
+            os._exit(1)
+    return pid
+
+
+def serve(path: str, workers: int = DEFAULT_WORKERS) -> None:
+    """
+    Runs the daemon on the Unix socket at path until it receives SIGTERM or
+    SIGINT. Workers that die are replaced.
+
+    Args:
+        path (str): Where to create the socket. A stale socket is replaced.
+        workers (int): How many worker processes to fork, at least one
+    """
+    warm_up_shell()
+    if os.path.exists(path):
+        os.unlink(path)
+    listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    listener.bind(path)
+    listener.listen(LISTEN_BACKLOG)
+
+    signal.signal(signal.SIGTERM, _stop)
+    signal.signal(signal.SIGINT, _stop)
+    children: Set[int] = set()
+    try:
+        while True:
+            while len(children) < workers:
+                children.add(fork_worker(listener))
+            pid, _ = os.wait()
+            children.discard(pid)
+    except _Stop:
+        pass
+    finally:
+        try:
+            # A worker reaped just before the daemon was stopped may still be
+            # in children
+            for pid in children:
+                try:
+                    os.kill(pid, signal.SIGTERM)
+                except ProcessLookupError:
+                    pass
+            for pid in children:
+                try:
+                    os.waitpid(pid, 0)
+                except ChildProcessError:
+                    pass
+        finally:
+            listener.close()
+            os.unlink(path)
@@ -0,0 +1,201 @@
+"""
+Profiles the startup of the shell for sh --startup-profile: how long every
+module takes to import, and how long every phase of starting up takes.
+
+The profile is installed before anything else is imported, so this module
+only imports modules that the interpreter has already imported by the time
+that it runs the shell. In particular, it does not import typing.
+"""
+from __future__ import annotations
+
+import sys
+import time
+
+# typing is slow to import, so the types are only imported for type checkers
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    from importlib.machinery import ModuleSpec
+    from types import ModuleType
+    from typing import Sequence
+
+
+class ImportRecord:
+    """
+    The time taken to import a module, excluding (self_time) and including
+    (total_time) the modules it imported in turn.
+    """
+
+    def __init__(self, name: str, depth: int, self_time: float,
+                 total_time: float) -> None:
+        self.name = name
+        self.depth = depth
+        self.self_time = self_time
+        self.total_time = total_time
+
+
+class _TimingLoader:
+    """
+    Wraps the loader of a module to time its creation and execution, and
+    delegates everything else to the wrapped loader.
+    """
+
+    def __init__(self, loader: object, profile: StartupProfile,
+                 name: str, find_time: float) -> None:
+        self.loader = loader
+        self.profile = profile
+        self.name = name
+        self.setup_time = find_time
+
+    def create_module(self, spec: object) -> object:
+        """
+        Creates the module. Extension and built-in modules are loaded here.
+        """
+        started = time.perf_counter()
+        try:
+            create_module = getattr(self.loader, 'create_module', None)
+            return create_module(spec) if create_module else None
+        finally:
+            self.setup_time += time.perf_counter() - started
+
+    def exec_module(self, module: object) -> None:
+        """
+        Executes the module, timing it and every module it imports.
+        """
+        self.profile.start_import()
+        started = time.perf_counter()
+        try:
+            getattr(self.loader, 'exec_module')(module)
+        finally:
+            elapsed = time.perf_counter() - started + self.setup_time
+            self.profile.finish_import(self.name, elapsed)
+
+    def __getattr__(self, name: str) -> object:
+        return getattr(self.loader, name)
+
+
+class _TimingFinder:
+    """
+    A meta path finder that asks the other finders for the spec of a module,
+    and wraps its loader in a _TimingLoader.
+    """
+
+    def __init__(self, profile: StartupProfile) -> None:
+        self.profile = profile
+
+    def find_spec(self, fullname: str, path: Sequence[str] | None,
+                  target: ModuleType | None = None) -> ModuleSpec | None:
+        """
+        Finds the spec of a module with the rest of the meta path.
+        """
+        started = time.perf_counter()
+        for finder in sys.meta_path:
+            find_spec = getattr(finder, 'find_spec', None)
+            if finder is self or find_spec is None:
+                continue
+            spec = find_spec(fullname, path, target)
+            if spec is None:
+                continue
+            if hasattr(spec.loader, 'exec_module'):
+                spec.loader = _TimingLoader(
+                    spec.loader, self.profile, fullname,
+                    time.perf_counter() - started)
+            return spec
+        return None
+
+
+class _Phase:
+    """
+    Times the with block as a phase of the profile.
+    """
+
+    def __init__(self, profile: StartupProfile, name: str) -> None:
+        self.profile = profile
+        self.name = name
+        self.started = 0.0
+
+    def __enter__(self) -> None:
+        self.started = time.perf_counter()
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.profile.phases.append(
+            (self.name, time.perf_counter() - self.started))
+
+
+class StartupProfile:
+    """
+    Records the import time of every module imported while the profile is
+    installed, and the duration of the phases that startup is split into.
+    Phases are always recorded, since that is cheap; imports are only timed
+    once the profile is installed.
+    """
+
+    def __init__(self) -> None:
+        self.started = time.perf_counter()
+        self.imports: list[ImportRecord] = []
+        self.phases: list[tuple[str, float]] = []
+        # The total import time of the children of every import in progress
+        self.child_times: list[float] = []
+        self.finder = _TimingFinder(self)
+
+    def install(self) -> None:
+        """
+        Starts timing imports.
+        """
+        if self.finder not in sys.meta_path:
+            sys.meta_path.insert(0, self.finder)
+
+    def uninstall(self) -> None:
+        """
+        Stops timing imports.
+        """
+        if self.finder in sys.meta_path:
+            sys.meta_path.remove(self.finder)
+
+    def phase(self, name: str) -> _Phase:
+        """
+        Times a phase of startup, e.g.
+
+            with profile.phase('imports'):
+                ...
+
+        Args:
+            name (str): The name of the phase
+        """
+        return _Phase(self, name)
+
+    def start_import(self) -> None:
+        """
+        Marks the start of the execution of a module.
+        """
+        self.child_times.append(0.0)
+
+    def finish_import(self, name: str, total_time: float) -> None:
+        """
+        Records the import of a module, which started with start_import.
+        """
+        child_time = self.child_times.pop()
+        self.imports.append(ImportRecord(
+            name, len(self.child_times), total_time - child_time, total_time))
+        if self.child_times:
+            self.child_times[-1] += total_time
+
+    def format_report(self) -> str:
+        """
+        Formats the profile. Imports are listed in the order they finished,
+        indented by how deeply they were nested, like python -X importtime.
+
+        Returns:
+            str: The report, ending with a newline
+        """
+        elapsed = time.perf_counter() - self.started
+        lines = ['startup profile (ms)', '    self |    total | module']
+        lines.extend(
+            f'{record.self_time * 1000:8.2f} | '
+            f'{record.total_time * 1000:8.2f} | '
+            f'{"  " * record.depth}{record.name}'
+            for record in self.imports)
+        lines.append('')
+        lines.extend(f'{duration * 1000:8.2f} | phase {name}'
+                     for name, duration in self.phases)
+        lines.append(f'{elapsed * 1000:8.2f} | total since profile started')
+        return '\n'.join(lines) + '\n'
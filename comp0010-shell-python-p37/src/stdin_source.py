@@ -0,0 +1,73 @@
+"""
+The stream that a command line reads the shell's own stdin from, as in
+producer | sh -c 'grep x', which streams the input rather than collecting it
+first.
+
+Unlike a pipe or a redirection, the shell's stdin is attached to every
+command line whether or not anything is written to it, and it may be a
+terminal that is never closed. So, like in other shells, commands only read it
+when they have nothing else to read, such as cat with no files, and closing it
+leaves the shell's stdin open. Commands that read it read it as a stream, one
+chunk at a time, however it is redirected.
+"""
+import os
+from io import BufferedReader, StringIO, TextIOWrapper
+from typing import Optional, TextIO, cast
+
+from commands.byte_streams import ENCODING, ERRORS
+
+
+class StdinSource(TextIOWrapper):
+    """
+    Reads the shell's stdin as text. Closing the source leaves the file
+    descriptor open.
+
+    Args:
+        fd (int): The file descriptor of the shell's stdin
+    """
+
+    def __init__(self, fd: int) -> None:
+        super().__init__(open(fd, 'rb', closefd=False), encoding=ENCODING,
+                         errors=ERRORS)
+        self.fd = fd
+
+    def seekable(self) -> bool:
+        """
+        Whatever stdin is redirected from, it is read from where it is, as a
+        stream
+        """
+        return False
+
+    def at_eof(self) -> bool:
+        """
+        Waits until there is something to read, or stdin is closed. Like
+        is_stream_empty(), this is meant to be called before reading.
+
+        Returns:
+            bool: Whether nothing more will ever be read
+        """
+        return not cast(BufferedReader, self.buffer).peek(1)
+
+
+def attach_stdin(stdin: Optional[TextIO]) -> StringIO:
+    """
+    Gets the input stream to give a command line run by sh -c. The shell's
+    stdin is attached if something can write to it, such as a pipe or a
+    file, but not a terminal, so that commands never wait for the user.
+
+    Args:
+        stdin (Optional[TextIO]): The shell's stdin, such as sys.stdin
+
+    Returns:
+        StringIO: A StdinSource reading stdin, standing in for the StringIO
+                  commands are given, or an empty stream if stdin is not
+                  attached
+    """
+    try:
+        fd = stdin.fileno() if stdin is not None else -1
+    except (AttributeError, OSError, ValueError):
+        # Not a file, such as a StringIO standing in for stdin
+        fd = -1
+    if fd < 0 or os.isatty(fd):
+        return StringIO()
+    return cast(StringIO, StdinSource(fd))
@@ -8,6 +8,7 @@ from unittest import mock
 
 from commands.base_command import BaseCommand
 from commands.command_spec import HELP_FLAG, CommandSpecification
+from errors.command_errors import CommandError
 from errors.error_dsi import DeveloperSkillIssue
 from flag import FlagSpecification
 
@@ -27,6 +28,25 @@ class TestCommandFixture(BaseCommand):
         return 0
 
 
+class UpperFixture(TestCommandFixture):
+    # pylint: disable=too-few-public-methods
+    """
+    A command writing its input in upper case, until it is cancelled, which
+    does not implement iter_lines() itself
+    """
+
+    # pylint: disable=missing-function-docstring
+    def run(self) -> int:
+        text = self.input.read()
+        if not text:
+            raise CommandError('no input')
+        while not self.cancelled:
+            self.output.write(text.upper())
+            if not self.options:
+                break
+        return 0
+
+
 class TestBaseCommand(unittest.TestCase):
     """
     Tests the base command with the mock command fixture
@@ -114,6 +134,46 @@ class TestBaseCommand(unittest.TestCase):
         with self.assertRaises(DeveloperSkillIssue):
             TestCommandFixture(StringIO(), None, [], [])
 
+    def test_until_cancelled(self):
+        """
+        Items should stop being yielded once the command is cancelled
+        """
+        seen = []
+        for item in self.cmd.until_cancelled(range(10)):
+            seen.append(item)
+            if item == 3:
+                self.cmd.cancel()
+        self.assertEqual(seen, [0, 1, 2, 3])
+        self.assertTrue(self.cmd.cancelled)
+
+    def test_iter_lines(self):
+        """
+        Commands not implementing iter_lines() should yield the lines they
+        write, reading either their input or the lines they are given
+        """
+        command = UpperFixture(StringIO('a\nb\n'), StringIO(), [], [])
+        self.assertEqual(list(command.iter_lines()), ['A\n', 'B\n'])
+        command = UpperFixture(StringIO(), StringIO(), [], [])
+        self.assertEqual(list(command.iter_lines(['c\n'])), ['C\n'])
+
+    def test_iter_lines_error(self):
+        """
+        Errors raised by the command should be raised by the lines
+        """
+        command = UpperFixture(StringIO(), StringIO(), [], [])
+        with self.assertRaises(CommandError):
+            list(command.iter_lines())
+
+    def test_iter_lines_closed_early(self):
+        """
+        Closing the lines early should cancel the command
+        """
+        command = UpperFixture(StringIO('a\n'), StringIO(), [], ['forever'])
+        lines = command.iter_lines()
+        self.assertEqual(next(lines), 'A\n')
+        lines.close()  # type: ignore[attr-defined]
+        self.assertTrue(command.cancelled)
+
     def test_close(self):
         """
         Checks that if .close() is called, both input and output streams are
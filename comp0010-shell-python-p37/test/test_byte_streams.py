@@ -0,0 +1,100 @@
+"""
+Tests the binary views of the streams of commands that work on bytes
+"""
+import unittest
+from io import BytesIO, StringIO, TextIOWrapper
+
+from parameterized import parameterized
+
+from commands.byte_streams import (CODING_CHUNK_SIZE, byte_input,
+                                   byte_output, is_binary)
+
+
+class TestByteInput(unittest.TestCase):
+    """
+    Tests reading the input of a command as bytes
+    """
+
+    def test_binary_stream(self) -> None:
+        """
+        A binary stream should be read as it is
+        """
+        stream = BytesIO(b'a\n')
+        self.assertIs(byte_input(stream), stream)
+
+    @parameterized.expand([
+        ('ascii', 'a\nb\n'),
+        ('unicode', 'é' * CODING_CHUNK_SIZE + '\n'),
+        ('invalid', 'a\udcff\n'),
+    ])
+    def test_text_stream(self, _: str, text: str) -> None:
+        """
+        A text stream should be read as the UTF-8 encoding of its text, with
+        bytes that are not UTF-8 given back as they were
+        """
+        self.assertEqual(byte_input(StringIO(text)).read(),
+                         text.encode('utf-8', 'surrogateescape'))
+
+    def test_whole_lines(self) -> None:
+        """
+        Only the lines read should be taken from the text stream
+        """
+        stream = StringIO('a\nb\nc\n')
+        self.assertEqual(byte_input(stream, whole_lines=True).readline(),
+                         b'a\n')
+        self.assertEqual(stream.read(), 'b\nc\n')
+
+
+class TestByteOutput(unittest.TestCase):
+    """
+    Tests writing the output of a command as bytes
+    """
+
+    def test_binary_stream(self) -> None:
+        """
+        A binary stream should be written as it is
+        """
+        stream = BytesIO()
+        with byte_output(stream) as output:
+            self.assertIs(output, stream)
+
+    def test_text_file(self) -> None:
+        """
+        A UTF-8 text file should be written through its binary buffer, after
+        any text written before
+        """
+        buffer = BytesIO()
+        stream = TextIOWrapper(buffer, encoding='utf-8')
+        stream.write('a')
+        with byte_output(stream) as output:
+            self.assertIs(output, buffer)
+            output.write(b'\xc3\xa9')
+        self.assertEqual(buffer.getvalue(), 'aé'.encode())
+
+    @parameterized.expand([
+        ('whole', [b'a\xc3\xa9\n'], 'aé\n'),
+        ('split_character', [b'a\xc3', b'\xa9\n'], 'aé\n'),
+        ('invalid', [b'a\xff', b'\xc3'], 'a\udcff\udcc3'),
+    ])
+    def test_text_stream(self, _: str, chunks: list, expected: str) -> None:
+        """
+        Bytes written to a text stream should be decoded once the context
+        ends, even if characters are split between writes
+        """
+        stream = StringIO()
+        with byte_output(stream) as output:
+            for chunk in chunks:
+                output.write(chunk)
+                output.flush()
+        self.assertEqual(stream.getvalue(), expected)
+
+    def test_is_binary(self) -> None:
+        """
+        Only binary streams should be binary
+        """
+        self.assertTrue(is_binary(BytesIO()))
+        self.assertFalse(is_binary(StringIO()))
+
+
+if __name__ == '__main__':
+    unittest.main()
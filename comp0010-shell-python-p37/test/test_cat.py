@@ -33,9 +33,9 @@ class TestCAT(unittest.TestCase):
             FileNotFoundError: where the filename cannot be found
         """
         file_contents = {
-            'file1.txt': 'Content of file 1',
-            'file2.txt': 'Content of file 2',
-            'file3.txt': 'Content\nof\nfile\n3'
+            'file1.txt': b'Content of file 1',
+            'file2.txt': b'Content of file 2',
+            'file3.txt': b'Content\nof\nfile\n3'
         }
         if filename in file_contents:
             return mock_open(read_data=file_contents[filename]).return_value
@@ -51,6 +51,17 @@ class TestCAT(unittest.TestCase):
         cat.run()
         self.assertEqual(cat.output.getvalue(), self.in_stream.getvalue())
 
+    def test_cancelled(self) -> None:
+        """
+        A cancelled cat should stop copying
+        """
+        self.in_stream.write("somefile")
+        self.in_stream.seek(0)
+        cat = CAT(self.in_stream, self.out_stream, [], [])
+        cat.cancel()
+        cat.run()
+        self.assertEqual(cat.output.getvalue(), "")
+
     def test_no_options(self) -> None:
         """
         An erroneous test to ensure that command error is raised with no
@@ -0,0 +1,215 @@
+"""
+Tests the bounded channels between the stages of a pipeline
+"""
+import threading
+import unittest
+from io import StringIO
+from typing import List
+
+from parameterized import parameterized
+
+from commands.channel import CHUNK_SIZE, ByteChannel, TextChannel
+from commands.command_helpers import is_stream_empty
+
+
+class TestTextChannel(unittest.TestCase):
+    """
+    Tests the TextChannel class and its two ends
+    """
+
+    def setUp(self) -> None:
+        self.channel = TextChannel(capacity=8)
+
+    def write_all(self, *texts: str) -> None:
+        """
+        Writes every text on another thread, then closes the writer
+        """
+        def write() -> None:
+            self.channel.writer.writelines(texts)
+            self.channel.writer.close()
+        thread = threading.Thread(target=write)
+        thread.start()
+        self.addCleanup(thread.join)
+
+    @parameterized.expand([
+        ('lines', ['a\n', 'b\n'], ['a\n', 'b\n']),
+        ('split_lines', ['a', 'b\nc', '\n', 'd'], ['ab\n', 'c\n', 'd']),
+        ('long_lines', ['x' * 100 + '\n'] * 3, ['x' * 100 + '\n'] * 3),
+        ('empty', [], []),
+    ])
+    def test_iterate(self, _: str, texts: List[str],
+                     expected: List[str]) -> None:
+        """
+        Iterating over the reader should give every line written
+        """
+        self.write_all(*texts)
+        self.assertEqual(list(self.channel.reader), expected)
+
+    def test_read(self) -> None:
+        """
+        Reading should give up to the size asked for, or everything
+        """
+        self.write_all('abc\n', 'def', 'ghi')
+        reader = self.channel.reader
+        self.assertEqual(reader.read(2), 'ab')
+        self.assertEqual(reader.readline(), 'c\n')
+        self.assertEqual(reader.read(5), 'defgh')
+        self.assertEqual(reader.read(), 'i')
+        self.assertEqual(reader.read(), '')
+
+    def test_iterate_then_read(self) -> None:
+        """
+        Reading after stopping iterating should carry on after the last line
+        iterated over
+        """
+        self.write_all('a\nb\nc\n', 'd\ne')
+        reader = self.channel.reader
+        lines = iter(reader)
+        self.assertEqual([next(lines), next(lines)], ['a\n', 'b\n'])
+        self.assertEqual(reader.readline(), 'c\n')
+        self.assertEqual(next(lines), 'd\n')
+        self.assertEqual(reader.read(), 'e')
+
+    def test_writer_is_bounded(self) -> None:
+        """
+        Writing should wait while the channel is full
+        """
+        written = threading.Event()
+
+        def write() -> None:
+            for _ in range(2):
+                self.channel.put('x' * 8)
+            written.set()
+        thread = threading.Thread(target=write)
+        thread.start()
+        self.assertFalse(written.wait(0.1))
+        self.assertEqual(self.channel.get(), 'x' * 8)
+        self.assertTrue(written.wait(5))
+        thread.join()
+
+    def test_writer_collects_chunks(self) -> None:
+        """
+        Small writes should only be passed on once a chunk is collected
+        """
+        small = TextChannel(capacity=None)
+        small.writer.write('a\n')
+        small.close_writer()
+        self.assertEqual(small.reader.read(), '')
+
+        large = TextChannel(capacity=None)
+        large.writer.write('a\n')
+        large.writer.write('b' * CHUNK_SIZE)
+        self.assertEqual(large.get(), 'a\n' + 'b' * CHUNK_SIZE)
+
+    def test_closed_reader_breaks_pipe(self) -> None:
+        """
+        Writing to a channel whose reader is closed should fail rather than
+        wait, even if the writer was already waiting
+        """
+        self.channel.put('x' * 8)
+        thread = threading.Thread(target=self.channel.reader.close)
+        thread.start()
+        with self.assertRaises(BrokenPipeError):
+            self.channel.put('x' * 8)
+        thread.join()
+        with self.assertRaises(BrokenPipeError):
+            self.channel.writer.write('x' * CHUNK_SIZE)
+        self.channel.writer.write('x')
+        self.channel.writer.close()
+        with self.assertRaises(ValueError):
+            self.channel.reader.read()
+
+    def test_closed_writer(self) -> None:
+        """
+        Writing to a closed writer is an error
+        """
+        self.channel.writer.close()
+        with self.assertRaises(ValueError):
+            self.channel.writer.write('a')
+
+    @parameterized.expand([
+        ('empty', [], True),
+        ('not_empty', ['a'], False),
+    ])
+    def test_is_stream_empty(self, _: str, texts: List[str],
+                             empty: bool) -> None:
+        """
+        A channel should only be empty once its writer closed without
+        writing anything, and checking should not consume anything
+        """
+        self.write_all(*texts)
+        self.assertEqual(is_stream_empty(self.channel.reader), empty)
+        self.assertEqual(self.channel.reader.read(), ''.join(texts))
+
+    def test_is_stream_empty_other_streams(self) -> None:
+        """
+        Streams that are not channels should be checked as before
+        """
+        self.assertTrue(is_stream_empty(StringIO()))
+        self.assertFalse(is_stream_empty(StringIO('a')))
+
+
+class TestByteChannel(unittest.TestCase):
+    """
+    Tests the ByteChannel class and its two ends
+    """
+
+    def setUp(self) -> None:
+        self.channel = ByteChannel(capacity=8)
+
+    def write_all(self, *chunks: bytes) -> None:
+        """
+        Writes every chunk on another thread, then closes the writer
+        """
+        def write() -> None:
+            self.channel.writer.writelines(chunks)
+            self.channel.writer.close()
+        thread = threading.Thread(target=write)
+        thread.start()
+        self.addCleanup(thread.join)
+
+    def test_iterate(self) -> None:
+        """
+        Iterating should yield the lines written, as bytes
+        """
+        self.write_all(b'a', b'b\nc\xff', b'\n', b'd')
+        self.assertEqual(list(self.channel.reader),
+                         [b'ab\n', b'c\xff\n', b'd'])
+
+    def test_read1(self) -> None:
+        """
+        read1 should return what is ready, without waiting for more
+        """
+        self.channel.writer.write(b'abc')
+        self.channel.writer.flush()
+        self.assertEqual(self.channel.reader.read1(2), b'ab')
+        self.assertEqual(self.channel.reader.read1(), b'c')
+        self.channel.writer.close()
+        self.assertEqual(self.channel.reader.read1(), b'')
+
+    def test_write_reused_buffer(self) -> None:
+        """
+        Writing a view of a buffer should keep what it held at the time
+        """
+        buffer = bytearray(b'ab')
+        self.channel.writer.write(memoryview(buffer))
+        buffer[:] = b'xy'
+        self.channel.writer.close()
+        self.assertEqual(self.channel.reader.read(), b'ab')
+
+    @parameterized.expand([
+        ('empty', [], True),
+        ('not_empty', [b'a'], False),
+    ])
+    def test_is_stream_empty(self, _: str, chunks: List[bytes],
+                             empty: bool) -> None:
+        """
+        A byte channel should be checked for emptiness like a text channel
+        """
+        self.write_all(*chunks)
+        self.assertEqual(is_stream_empty(self.channel.reader), empty)
+        self.assertEqual(self.channel.reader.read(), b''.join(chunks))
+
+
+if __name__ == "__main__":
+    unittest.main()
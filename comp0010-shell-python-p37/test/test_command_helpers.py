@@ -1,6 +1,8 @@
 """
 Contains the unit tests for the command helper functions
 """
+import os
+import tempfile
 import unittest
 from io import StringIO
 from typing import Type
@@ -8,7 +10,12 @@ from unittest.mock import MagicMock, mock_open, patch
 
 from parameterized import parameterized
 
-from commands.command_helpers import exception_handled_open, is_stream_empty
+from commands.command_helpers import (MMAP_MIN_SIZE, FileSource,
+                                      exception_handled_open,
+                                      exception_handled_open_binary,
+                                      input_lines, is_stream_empty, peek)
+from commands.cutcommand import Cut
+from commands.grepcommand import Grep
 from errors.command_errors import CommandError, ShellFileNotFoundError
 
 
@@ -51,6 +58,16 @@ class TestCommandHelpers(unittest.TestCase):
             with exception_handled_open(mock_file, "r") as file:
                 self.assertEqual(file.read(), "helloworld")
 
+    def test_binary_open(self) -> None:
+        """
+        Opening a file as binary should open it to read bytes
+        """
+        mock_file = mock_open(read_data=b"\xffhello")
+        with patch('builtins.open', mock_file):
+            with exception_handled_open_binary("file", "r") as file:
+                self.assertEqual(file.read(), b"\xffhello")
+        mock_file.assert_called_once_with("file", "rb")
+
     @parameterized.expand([
         (FileNotFoundError, ShellFileNotFoundError),
         (PermissionError, CommandError),
@@ -68,6 +85,130 @@ class TestCommandHelpers(unittest.TestCase):
                 with exception_handled_open("invalidfile", "r") as _:
                     pass
 
+    @parameterized.expand([
+        ('empty', [], None),
+        ('lines', ['a\n', 'b\n'], ['a\n', 'b\n']),
+    ])
+    def test_peek(self, _: str, lines: list, expected: list) -> None:
+        """
+        Peeking should keep every line, or tell that there are none
+        """
+        peeked = peek(iter(lines))
+        self.assertEqual(None if peeked is None else list(peeked), expected)
+
+    def test_input_lines(self) -> None:
+        """
+        Commands should read the lines they are given, or the lines of their
+        input otherwise, as bytes if they work on bytes
+        """
+        grep = Grep(StringIO('a\n'), StringIO(), [], ['a'])
+        cut = Cut(StringIO('a\n'), StringIO(), [MagicMock()], [])
+        self.assertEqual(list(input_lines(grep, None)), ['a\n'])
+        self.assertEqual(list(input_lines(cut, None)), [b'a\n'])
+        self.assertEqual(list(input_lines(grep, ['b\n'])), ['b\n'])
+
+    @parameterized.expand([
+        ('stream', None),
+        ('lines', []),
+    ])
+    def test_input_lines_empty(self, _: str, lines: list) -> None:
+        """
+        Commands should fail when there are no lines, if they ask to
+        """
+        grep = Grep(StringIO(), StringIO(), [], ['a'])
+        with self.assertRaises(CommandError):
+            input_lines(grep, lines, CommandError())
+
+
+class TestFileSource(unittest.TestCase):
+    """
+    Tests reading files through memory maps, or buffers as a fallback
+    """
+
+    def setUp(self) -> None:
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def write(self, data: bytes) -> str:
+        """
+        Writes data to a file in the temporary directory
+        """
+        path = os.path.join(self.directory.name, 'file')
+        with open(path, 'wb') as file:
+            file.write(data)
+        return path
+
+    @parameterized.expand([
+        ('big', b'line\xff\n' * MMAP_MIN_SIZE, True),
+        ('big_unterminated', b'line\n' * MMAP_MIN_SIZE + b'end', True),
+        ('small', b'a\nb', False),
+        ('empty', b'', False),
+    ])
+    def test_lines(self, _: str, data: bytes, mapped: bool) -> None:
+        """
+        Lines should be read the same whether the file is mapped or not,
+        and only regular files big enough should be mapped
+        """
+        path = self.write(data)
+        with FileSource(path) as source, open(path, 'rb') as file:
+            self.assertEqual(source.mapped, mapped)
+            self.assertEqual(list(source.lines()), file.readlines())
+
+    @parameterized.expand([(1,), (100,), (1 << 20,)])
+    def test_lines_across_blocks(self, block_size: int) -> None:
+        """
+        Lines longer than a block, or split between blocks, should be read
+        whole
+        """
+        data = b'short\n' + b'x' * 3 * MMAP_MIN_SIZE + b'\nlast'
+        with patch('commands.command_helpers.LINE_BLOCK_SIZE', block_size), \
+                FileSource(self.write(data)) as source:
+            self.assertEqual(list(source.lines()),
+                             [b'short\n', b'x' * 3 * MMAP_MIN_SIZE + b'\n',
+                              b'last'])
+
+    def test_chunks(self) -> None:
+        """
+        A mapped file should be read as views of the mapping, without
+        copying it
+        """
+        data = bytes(range(256)) * MMAP_MIN_SIZE
+        with FileSource(self.write(data)) as source:
+            chunks = list(source.chunks(1000))
+            self.assertIsInstance(chunks[0], memoryview)
+            self.assertEqual(b''.join(chunks), data)
+
+    @parameterized.expand([
+        ('mapped', bytes(range(256)) * MMAP_MIN_SIZE),
+        ('buffered', bytes(range(256))),
+    ])
+    def test_chunks_from(self, _: str, data: bytes) -> None:
+        """
+        A regular file should be read from anywhere, wherever it was read up
+        to, and its size known
+        """
+        with FileSource(self.write(data)) as source:
+            self.assertEqual(source.size, len(data))
+            source.file.seek(0, os.SEEK_END)
+            self.assertEqual(b''.join(source.chunks(1000, 100)), data[100:])
+
+    def test_special_file(self) -> None:
+        """
+        Files that are not regular files should be read through a buffer
+        """
+        with FileSource(os.devnull) as source:
+            self.assertFalse(source.mapped)
+            self.assertIsNone(source.size)
+            self.assertEqual(list(source.chunks(10)), [])
+
+    def test_missing_file(self) -> None:
+        """
+        Missing files should raise the same error as any other file opened
+        by a command
+        """
+        with self.assertRaises(ShellFileNotFoundError):
+            FileSource(os.path.join(self.directory.name, 'missing'))
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,92 @@
+"""
+Tests the command registry and the generated command manifest
+"""
+import unittest
+from unittest.mock import MagicMock, patch
+
+from commands.base_command import BaseCommand
+from commands.command_manifest import COMMAND_MANIFEST
+from commands.command_registry import (CommandRegistry, build_manifest,
+                                       get_command_registry, render_manifest)
+from commands.echocommand import Echo
+from errors.error_dsi import DeveloperSkillIssue
+
+
+class TestCommandRegistry(unittest.TestCase):
+    """
+    Tests the command registry
+    """
+
+    def test_manifest_is_up_to_date(self) -> None:
+        """
+        The checked in manifest should match the commands in the commands
+        folder. If this fails, run tools/generate_manifest
+        """
+        self.assertEqual(build_manifest(), COMMAND_MANIFEST)
+
+    def test_rendered_manifest_is_valid_python(self) -> None:
+        """
+        The rendered manifest should evaluate back to the same manifest
+        """
+        # pylint: disable=exec-used
+        namespace: dict = {}
+        exec(render_manifest(COMMAND_MANIFEST), namespace)
+        self.assertEqual(namespace['COMMAND_MANIFEST'], COMMAND_MANIFEST)
+
+    def test_lookup(self) -> None:
+        """
+        Looking up a command by name should return its class
+        """
+        registry = CommandRegistry({'echo': ('echocommand', 'Echo')})
+        self.assertIs(registry['echo'], Echo)
+        self.assertIn('echo', registry)
+        self.assertNotIn('cat', registry)
+        self.assertEqual(list(registry), ['echo'])
+        self.assertEqual(len(registry), 1)
+
+    def test_unknown_command(self) -> None:
+        """
+        Looking up an unknown command should raise a KeyError
+        """
+        registry = CommandRegistry({})
+        with self.assertRaises(KeyError):
+            _ = registry['echo']
+
+    @patch('importlib.import_module')
+    def test_imports_lazily_and_once(self, mock_import: MagicMock) -> None:
+        """
+        The module of a command should only be imported on its first lookup
+        """
+        mock_import.return_value.Echo = Echo
+        registry = CommandRegistry({'echo': ('echocommand', 'Echo'),
+                                    'cat': ('catcommand', 'CAT')})
+        mock_import.assert_not_called()
+
+        self.assertIs(registry['echo'], Echo)
+        self.assertIs(registry['echo'], Echo)
+        mock_import.assert_called_once_with('commands.echocommand')
+
+    @patch('importlib.import_module')
+    def test_not_a_command(self, mock_import: MagicMock) -> None:
+        """
+        A manifest entry that does not point to a command is a developer error
+        """
+        mock_import.return_value.NotACommand = object
+        registry = CommandRegistry({'bad': ('badcommand', 'NotACommand')})
+        with self.assertRaises(DeveloperSkillIssue):
+            _ = registry['bad']
+
+    def test_registry_is_shared(self) -> None:
+        """
+        The registry should only be created once per process
+        """
+        registry = get_command_registry()
+        self.assertIs(registry, get_command_registry())
+        for name in registry:
+            self.assertTrue(issubclass(registry[name], BaseCommand))
+            self.assertEqual(
+                registry[name].COMMAND_SPECIFICATION.command_name, name)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -146,7 +146,8 @@ class TestCut(unittest.TestCase):
         """
         input_stream, output_stream = StringIO(), StringIO()
         cut = self.build_cut(input_stream, output_stream, range_str)
-        with patch('builtins.open', mock_open(read_data=file_content)):
+        with patch('builtins.open',
+                   mock_open(read_data=file_content.encode())):
             self.assertEqual(cut.run(), 0)
             self.assertEqual(output_stream.getvalue(), expected_output)
 
@@ -165,6 +166,23 @@ class TestCut(unittest.TestCase):
         self.assertEqual(cut.run(), 0)
         self.assertEqual(output_stream.getvalue(), 'oha\nsek')
 
+    @parameterized.expand([
+        ('whole', '1-2', 'é\nab'),
+        ('split', '1', '\udcc3\na'),
+    ])
+    def test_cut_bytes(self, _: str, range_str: str, expected_output: str):
+        """
+        -b should count bytes rather than characters, keeping half of a
+        character cut in two as it was
+        """
+        input_stream, output_stream = StringIO('é\nab'), StringIO()
+        cut = Cut(input_stream, output_stream, [
+            FlagSpecification('b', List[str], '')
+            .build_flag_from_string(range_str)
+        ], [])
+        self.assertEqual(cut.run(), 0)
+        self.assertEqual(output_stream.getvalue(), expected_output)
+
     @parameterized.expand({(0,), (2,)})
     def test_cut_sad_flags(self, no_flags: int):
         """
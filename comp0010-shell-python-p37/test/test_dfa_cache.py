@@ -0,0 +1,188 @@
+"""
+Tests the on-disk parser DFA cache
+"""
+import io
+import json
+import os
+import pickle
+import subprocess
+import sys
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from parameterized import parameterized
+
+import parse
+from parse import dfa_cache
+from parse.dfa_cache import (CACHE_ENV_VAR, WARM_UP_CORPUS, cache_key,
+                             load_dfa_cache, save_dfa_cache, warm_up)
+from parse.parse_tree_factory import create_parse_tree
+from parse.ParserGrammarParser import ParserGrammarParser
+
+SRC_DIR = os.path.dirname(os.path.dirname(os.path.abspath(parse.__file__)))
+
+# Loads the cache from the environment, then replays the warm-up corpus and
+# reports how many DFA states that added
+CHILD_SCRIPT = '''
+import json
+import sys
+from parse import dfa_cache
+from parse.parse_tree_factory import create_parse_tree
+
+loaded = dfa_cache.load_dfa_cache_from_environment()
+def count_states():
+    return sum(len(dfa._states) for recognizer in dfa_cache.RECOGNIZERS
+               for dfa in recognizer.decisionsToDFA)
+before = count_states()
+dfa_cache.warm_up(dfa_cache.WARM_UP_CORPUS)
+new_states = count_states() - before
+trees = [create_parse_tree(line) for line in sys.argv[1:]]
+json.dump({'loaded': loaded, 'new_states': new_states,
+           'trees': [tree.toStringTree(recog=tree.parser) for tree in trees]},
+          sys.stdout)
+'''
+
+EXPLOITED = []
+
+
+def exploit() -> None:
+    """
+    Stands in for arbitrary code in a malicious cache
+    """
+    EXPLOITED.append(True)
+
+
+class Exploit:
+    # pylint: disable=too-few-public-methods
+    """
+    Calls exploit when it is unpickled
+    """
+
+    def __reduce__(self) -> tuple:
+        return (exploit, ())
+
+
+LINES = [
+    'echo hello world',
+    "grep 'A..' dir1/file1.txt | sort -r | uniq -i",
+    'echo "a `echo b`" \'c d\' e"f"g > out.txt; cat < out.txt',
+    'cut -b 2-3 file.txt | head -n 1',
+]
+
+
+class TestDFACache(unittest.TestCase):
+    """
+    Tests writing, loading and rejecting DFA caches
+    """
+
+    def setUp(self) -> None:
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'parser.dfacache')
+
+    def tearDown(self) -> None:
+        self.directory.cleanup()
+
+    def run_child(self, hash_seed: str) -> dict:
+        """
+        Runs CHILD_SCRIPT in a new interpreter that uses the cache
+        """
+        env = dict(os.environ, PYTHONPATH=SRC_DIR, PYTHONHASHSEED=hash_seed)
+        env[CACHE_ENV_VAR] = self.path
+        output = subprocess.run(
+            [sys.executable, '-c', CHILD_SCRIPT, *LINES], env=env,
+            check=True, stdout=subprocess.PIPE).stdout
+        return json.loads(output)
+
+    def test_warm_start_in_new_process(self) -> None:
+        """
+        A new process should load the cache, get the same trees, and not need
+        any new DFA states for the warm-up corpus, whatever its hash seed
+        """
+        warm_up(WARM_UP_CORPUS)
+        save_dfa_cache(self.path)
+        expected = []
+        for line in LINES:
+            tree = create_parse_tree(line)
+            expected.append(tree.toStringTree(recog=tree.parser))
+
+        for hash_seed in ('1', '2'):
+            result = self.run_child(hash_seed)
+            self.assertTrue(result['loaded'])
+            self.assertEqual(result['new_states'], 0)
+            self.assertEqual(result['trees'], expected)
+
+    def test_stale_cache_is_ignored(self) -> None:
+        """
+        A cache for another grammar or runtime should not be loaded
+        """
+        with patch('parse.dfa_cache.cache_key', return_value='other'):
+            save_dfa_cache(self.path)
+        atn = ParserGrammarParser.atn
+        self.assertFalse(load_dfa_cache(self.path))
+        self.assertIs(ParserGrammarParser.atn, atn)
+
+    def test_missing_and_corrupt_caches_are_ignored(self) -> None:
+        """
+        Caches that cannot be read should never stop the shell
+        """
+        self.assertFalse(load_dfa_cache(self.path))
+        with open(self.path, 'wb') as cache_file:
+            pickle.dump(cache_key(), cache_file)
+            cache_file.write(b'not a pickle')
+        self.assertFalse(load_dfa_cache(self.path))
+
+    def test_only_antlr_classes_are_loaded(self) -> None:
+        """
+        The cache should not be able to run arbitrary code
+        """
+        with open(self.path, 'wb') as cache_file:
+            pickle.dump(cache_key(), cache_file)
+            pickle.dump(Exploit(), cache_file)
+        self.assertFalse(load_dfa_cache(self.path))
+        self.assertEqual(EXPLOITED, [])
+
+    @parameterized.expand([
+        ('dotted_name', 'antlr4.Lexer', 'sys.modules'),
+        ('other_antlr_name', 'antlr4._pygrun', 'os'),
+        ('other_module', 'os', 'system'),
+    ])
+    def test_only_cache_classes_are_found(self, _: str, module: str,
+                                          name: str) -> None:
+        """
+        Only the classes a cache is made of should be found, never dotted
+        names, which could reach any module the ANTLR modules import
+        """
+        data = b''.join([
+            pickle.PROTO, b'\x04',
+            pickle.SHORT_BINUNICODE, bytes([len(module)]), module.encode(),
+            pickle.SHORT_BINUNICODE, bytes([len(name)]), name.encode(),
+            pickle.STACK_GLOBAL, pickle.STOP,
+        ])
+        with self.assertRaises(pickle.UnpicklingError):
+            dfa_cache._DFAUnpickler(io.BytesIO(data)).load()
+
+    def test_environment_is_only_checked_once(self) -> None:
+        """
+        The cache should only be loaded by the first parser context, and only
+        if the environment variable is set
+        """
+        with patch.object(dfa_cache, '_ENVIRONMENT_CHECKED', False), \
+                patch('parse.dfa_cache.load_dfa_cache') as mock_load:
+            mock_load.return_value = True
+            self.assertFalse(
+                dfa_cache.load_dfa_cache_from_environment({}))
+            self.assertFalse(dfa_cache.load_dfa_cache_from_environment(
+                {CACHE_ENV_VAR: self.path}))
+            mock_load.assert_not_called()
+
+        with patch.object(dfa_cache, '_ENVIRONMENT_CHECKED', False), \
+                patch('parse.dfa_cache.load_dfa_cache') as mock_load:
+            mock_load.return_value = True
+            self.assertTrue(dfa_cache.load_dfa_cache_from_environment(
+                {CACHE_ENV_VAR: self.path}))
+            mock_load.assert_called_once_with(self.path)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,182 @@
+"""
+Tests the fast path parser against the ANTLR parser
+"""
+import unittest
+from typing import Any, Callable, cast
+from unittest.mock import patch
+
+from parameterized import parameterized
+
+from commands.builder import Builder
+from commands.command_builder import CommandBuilder
+from commands.command_registry import get_command_registry
+from commands.pipeline_builder import PipelineBuilder
+from commands.sequence_builder import SequenceBuilder
+from commands.unsafe_builder import UnsafeBuilder
+from errors.errors import BaseShellError
+from parse.fast_path_parser import FastPathParser
+from parse.parse_tree_factory import create_parse_tree
+from parse.raw_shell_parser import RawShellParser
+from parse.runner_visitor import RunnerVisitor
+
+
+def describe(builder: Builder) -> Any:
+    """
+    Describes a builder tree as nested tuples, so that trees can be compared
+    """
+    if isinstance(builder, CommandBuilder):
+        return (builder.command_type, builder.flags, builder.options)
+    if isinstance(builder, UnsafeBuilder):
+        return ('unsafe', describe(builder.wrapped_builder))
+    if isinstance(builder, (PipelineBuilder, SequenceBuilder)):
+        return (type(builder).__name__,
+                *(describe(child) for child in builder.builders))
+    raise AssertionError(f'unexpected builder {builder!r}')
+
+
+def parse_with_antlr(cmdline: str) -> Builder:
+    """
+    Parses a command line without the fast path
+    """
+    visitor = RunnerVisitor(get_command_registry())
+    return visitor.visit(create_parse_tree(cmdline))
+
+
+class TestFastPathParser(unittest.TestCase):
+    """
+    The fast path parser must build exactly what the ANTLR parser builds, and
+    leave everything else to ANTLR
+    """
+
+    def setUp(self) -> None:
+        self.parser = FastPathParser(get_command_registry())
+
+    def assert_same_outcome(self, parse: Callable[[], Any],
+                            parse_antlr: Callable[[], Any]) -> None:
+        """
+        Asserts that both parses build the same builder, or raise the same
+        error
+        """
+        try:
+            expected = describe(parse_antlr())
+        except BaseShellError as error:
+            with self.assertRaises(type(error)) as fast_error:
+                parse()
+            self.assertEqual(fast_error.exception.message, error.message)
+            return
+        self.assertEqual(describe(parse()), expected)
+
+    @parameterized.expand([
+        ('echo',),
+        ('echo hello world',),
+        ('echo  hello   world  ',),
+        ('grep foo dir1/file1.txt | sort | uniq',),
+        ('grep foo file.txt | sort -r | uniq -i | head -n 3',),
+        ('cat a; cat b',),
+        ('cat a | sort; cat b',),
+        ('cat a | sort ; cat b | uniq',),
+        ('cat a;cat b | sort',),
+        ('echo a; echo b; echo c; echo d',),
+        ('cat a | sort | uniq; echo b; echo c',),
+        ('_cat missing | _sort',),
+        ('echo - -- -a --b -c-d a-b a- -',),
+        ('cut -b 1-3,5- file.txt',),
+        ('head -n 5 file.txt',),
+        ('find . -name *.py',),
+        ('wc -l -w -m file.txt',),
+        ('echo src/* test/*.py',),
+        ('ls -',),
+        ('- a',),
+        ('echo a|b',),
+    ])
+    def test_same_builders_as_antlr(self, cmdline: str) -> None:
+        """
+        Simple command lines should build the same builders as ANTLR
+        """
+        self.assertIsNotNone(self.parser.split(cmdline))
+        self.assert_same_outcome(lambda: self.parser.parse(cmdline),
+                                 lambda: parse_with_antlr(cmdline))
+
+    @parameterized.expand([
+        ('missing a',),
+        ('echo a; missing b',),
+        ('_missing',),
+        ('head -z file.txt',),
+        ('head -n',),
+        ('head -n -n 4',),
+        ('head -n five',),
+        ('cat a | head -n 2 -q; missing',),
+    ])
+    def test_same_errors_as_antlr(self, cmdline: str) -> None:
+        """
+        Simple command lines with unknown commands or flags should raise the
+        same errors as ANTLR
+        """
+        self.assertIsNotNone(self.parser.split(cmdline))
+        with self.assertRaises(BaseShellError):
+            parse_with_antlr(cmdline)
+        self.assert_same_outcome(lambda: self.parser.parse(cmdline),
+                                 lambda: parse_with_antlr(cmdline))
+
+    @parameterized.expand([
+        ('echo "a b"',),
+        ("echo 'a b'",),
+        ('echo `echo a`',),
+        ('echo a > out.txt',),
+        ('cat < in.txt',),
+        ('echo a\\ b',),
+        ('echo\ta',),
+        ('echo a\nb',),
+    ])
+    def test_falls_back_to_antlr(self, cmdline: str) -> None:
+        """
+        Command lines outside the simple subset should be left to ANTLR
+        """
+        self.assertIsNone(self.parser.split(cmdline))
+        self.assertIsNone(self.parser.parse(cmdline))
+
+    @parameterized.expand([
+        ('',),
+        ('   ',),
+        (' echo a',),
+        ('echo a |',),
+        ('| echo a',),
+        ('echo a;',),
+        ('echo a ;; echo b',),
+        ('echo a || echo b',),
+        ('echo a; echo b; echo c | cat',),
+    ])
+    def test_syntax_errors_fall_back_to_antlr(self, cmdline: str) -> None:
+        """
+        Simple looking command lines that the grammar rejects should be left
+        to ANTLR, so that it can report the error
+        """
+        self.assertIsNone(self.parser.split(cmdline))
+        with self.assertRaises(BaseShellError):
+            parse_with_antlr(cmdline)
+
+    def test_flattening(self) -> None:
+        """
+        Pipes and sequences should be flattened into N-ary builders
+        """
+        builder = self.parser.parse('echo a | cat | sort; echo b; echo c')
+        self.assertIsInstance(builder, SequenceBuilder)
+        pipe, *commands = cast(SequenceBuilder, builder).builders
+        self.assertIsInstance(pipe, PipelineBuilder)
+        pipe = cast(PipelineBuilder, pipe)
+        self.assertEqual(len(pipe.builders), 3)
+        self.assertEqual(len(commands), 2)
+        for command in [*pipe.builders, *commands]:
+            self.assertIsInstance(command, CommandBuilder)
+
+    def test_raw_parser_skips_antlr(self) -> None:
+        """
+        The shell parsers should not call ANTLR for simple command lines
+        """
+        with patch('parse.parse_tree_factory.create_parse_tree') as mock_tree:
+            RawShellParser().parse('grep foo file.txt | sort | uniq')
+            mock_tree.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,117 @@
+"""
+Tests following a file as it grows
+"""
+import os
+import tempfile
+import threading
+import unittest
+from typing import Iterator, List
+
+from commands.file_follower import FileFollower
+
+
+class TestFileFollower(unittest.TestCase):
+    """
+    Tests the FileFollower class
+    """
+
+    def setUp(self) -> None:
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.path = os.path.join(self.directory.name, 'app.log')
+        self.append(b'old\n')
+        self.fd = os.open(self.path, os.O_RDONLY)
+        self.addCleanup(os.close, self.fd)
+        self.follower = FileFollower(self.path, self.fd, 4,
+                                     min_interval=0.001, max_interval=0.01)
+        self.addCleanup(self.follower.close)
+        self.chunks: Iterator[bytes] = self.follower.chunks()
+
+    def append(self, data: bytes, mode: str = 'ab') -> None:
+        """
+        Writes data to the end of the followed path
+        """
+        with open(self.path, mode) as file:
+            file.write(data)
+
+    def read(self, size: int) -> bytes:
+        """
+        Reads size bytes from the follower
+        """
+        data = b''
+        while len(data) < size:
+            data += next(self.chunks)
+        return data
+
+    def test_appended(self) -> None:
+        """
+        Only what is appended after the offset should be read
+        """
+        self.append(b'a\n')
+        self.assertEqual(self.read(2), b'a\n')
+        self.append(b'b\n')
+        self.assertEqual(self.read(2), b'b\n')
+
+    def test_truncated(self) -> None:
+        """
+        A file truncated to less than was read should be read from its start
+        """
+        self.append(b'x', mode='wb')
+        self.assertEqual(self.read(1), b'x')
+
+    def test_rotated(self) -> None:
+        """
+        Once the path names a new file, the new file should be followed from
+        its start, after the end of the old one
+        """
+        self.append(b'a\n')
+        os.rename(self.path, self.path + '.1')
+        self.assertEqual(self.read(2), b'a\n')
+        self.append(b'b\n')
+        self.assertEqual(self.read(2), b'b\n')
+
+    def test_removed(self) -> None:
+        """
+        While the path names no file, the old file should still be followed
+        """
+        os.rename(self.path, self.path + '.1')
+        with open(self.path + '.1', 'ab') as file:
+            file.write(b'a\n')
+        self.assertEqual(self.read(2), b'a\n')
+
+    def test_stop(self) -> None:
+        """
+        Stopping the follower from another thread should end it promptly,
+        however long it sleeps between polls
+        """
+        follower = FileFollower(self.path, self.fd, 4, min_interval=3600,
+                                max_interval=3600)
+        self.addCleanup(follower.close)
+        read: List[bytes] = []
+        thread = threading.Thread(target=lambda: read.extend(
+            follower.chunks()))
+        thread.start()
+        follower.stop()
+        thread.join(timeout=10)
+        self.assertFalse(thread.is_alive())
+        self.assertEqual(read, [])
+
+    def test_backoff(self) -> None:
+        """
+        Polls of an idle file should be spaced further and further apart, up
+        to the longest interval
+        """
+        follower = FileFollower(self.path, self.fd, 4, min_interval=0.01,
+                                max_interval=0.04)
+        self.addCleanup(follower.close)
+        timer = threading.Timer(0.3, follower.stop)
+        timer.start()
+        self.assertEqual(list(follower.chunks()), [])
+        timer.join()
+        # 0.01 + 0.02 + 0.04 * n within 0.3 seconds
+        self.assertLessEqual(follower.polls, 12)
+        self.assertGreaterEqual(follower.polls, 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
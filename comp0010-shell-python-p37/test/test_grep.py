@@ -6,9 +6,11 @@ from io import StringIO
 from typing import List
 from unittest.mock import mock_open, patch
 
+from parameterized import parameterized
+
 from commands.grepcommand import Grep
 from errors.command_errors import CommandError, ShellFileNotFoundError
-from flag import FlagValue
+from flag import Flag, FlagValue
 
 
 class TestGrep(unittest.TestCase):
@@ -69,6 +71,43 @@ class TestGrep(unittest.TestCase):
         options = [self.pattern] + self.files
         self._open_helper([], options, "file1.txt:line1\nfile2.txt:line1\n")
 
+    @parameterized.expand([
+        ('one', 1, "file1.txt:a1\nfile2.txt:a1\n"),
+        ('two', 2, "file1.txt:a1\nfile1.txt:a2\nfile2.txt:a1\n"
+                   "file2.txt:a2\n"),
+        ('zero', 0, ""),
+        ('more_than_matches', 10, "file1.txt:a1\nfile1.txt:a2\n"
+                                  "file1.txt:a3\nfile2.txt:a1\n"
+                                  "file2.txt:a2\nfile2.txt:a3\n"),
+    ])
+    def test_grep_max_count(self, _: str, max_count: int,
+                            expected_output: str) -> None:
+        """
+        -m should stop reading every file after that many matching lines
+        """
+        self.mock_file = mock_open(read_data="a1\nb\na2\na3\n")
+        self._open_helper([Flag("m", max_count, "Test")],
+                          ["a"] + self.files, expected_output)
+
+    def test_grep_max_count_stops_reading(self) -> None:
+        """
+        -m should not read stdin past the last matching line it needs
+        """
+        self.in_stream.write("a1\nb\na2\na3\n")
+        self.in_stream.seek(0)
+        Grep(self.in_stream, self.out_stream, [Flag("m", 2, "Test")],
+             ["a"]).run()
+        self.assertEqual(self.out_stream.getvalue(), "a1\na2\n")
+        self.assertEqual(self.in_stream.read(), "a3\n")
+
+    def test_grep_invalid_max_count(self) -> None:
+        """
+        -m cannot be negative
+        """
+        with self.assertRaises(CommandError):
+            Grep(self.in_stream, self.out_stream, [Flag("m", -1, "Test")],
+                 [self.pattern])
+
     def test_grep_file_not_found(self) -> None:
         """
         Tests the grep command with a non-existent file
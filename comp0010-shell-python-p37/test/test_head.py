@@ -1,13 +1,16 @@
 """
 A module that contains unit tests for the echo command.
 """
+import os
+import tempfile
 import unittest
-from io import StringIO
+from io import BytesIO, StringIO
 from unittest.mock import mock_open, patch
-from typing import List, Optional, Type
+from typing import List, Optional, Type, cast
 
 from parameterized import parameterized
 
+from commands.command_helpers import MMAP_MIN_SIZE
 from commands.headcommand import Head
 from errors.command_errors import CommandError, ShellFileNotFoundError
 from errors.error_dsi import DeveloperSkillIssue
@@ -25,7 +28,7 @@ class TestHead(unittest.TestCase):
         self.in_stream = StringIO()
         self.out_stream = StringIO()
         self.mock_file = mock_open(
-            read_data="line1\nline2\nline3\nline4\nline5\nline6\nline7\nline8\nline9\nline10\n"  # noqa
+            read_data=b"line1\nline2\nline3\nline4\nline5\nline6\nline7\nline8\nline9\nline10\n"  # noqa
         )
 
     def tearDown(self) -> None:
@@ -93,6 +96,98 @@ class TestHead(unittest.TestCase):
                 head.run()
                 self.assertEqual(head.output.getvalue(), expected_output)
 
+    def test_head_stops_reading(self) -> None:
+        """
+        Head should not read stdin past the lines it needs
+        """
+        self.in_stream.write("line1\nline2\nline3\n")
+        self.in_stream.seek(0)
+        Head(self.in_stream, self.out_stream, [Flag("n", 2, "For testing")],
+             []).run()
+        self.assertEqual(self.out_stream.getvalue(), "line1\nline2\n")
+        self.assertEqual(self.in_stream.read(), "line3\n")
+
+    @parameterized.expand(
+        [
+            ("small", 3, 20),
+            ("small_from_end", -5, 20),
+            ("small_all", 100, 20),
+            ("small_none", -100, 20),
+            ("mapped", 70_000, MMAP_MIN_SIZE * 3),
+            ("mapped_from_end", -70_000, MMAP_MIN_SIZE * 3),
+        ]
+    )
+    def test_head_bytes_from_file(self, _: str, num_bytes: int,
+                                  size: int) -> None:
+        """
+        head -c should print the first bytes of a file, or all but the last
+        if counting from the end
+        """
+        data = bytes(range(256)) * (size // 256) + b"\n" * (size % 256)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "file")
+            with open(path, "wb") as file:
+                file.write(data)
+            out_stream = cast(StringIO, BytesIO())
+            Head(self.in_stream, out_stream,
+                 [Flag("c", num_bytes, "For testing")], [path]).run()
+        self.assertEqual(out_stream.getvalue(), data[:num_bytes])
+
+    @parameterized.expand(
+        [
+            ("first", 4, "hél"),
+            ("from_end", -4, "héllo\nwo"),
+            ("none", 0, ""),
+        ]
+    )
+    def test_head_bytes_from_stdin(self, _: str, num_bytes: int,
+                                   expected: str) -> None:
+        """
+        head -c should count the bytes of stdin, not its characters
+        """
+        self.in_stream.write("héllo\nworld\n")
+        self.in_stream.seek(0)
+        Head(self.in_stream, self.out_stream,
+             [Flag("c", num_bytes, "For testing")], []).run()
+        self.assertEqual(self.out_stream.getvalue(), expected)
+
+    def test_head_bytes_stops_reading(self) -> None:
+        """
+        head -c should not read stdin past the bytes it needs
+        """
+        in_stream = cast(StringIO, BytesIO(b"line1\nline2\n"))
+        Head(in_stream, self.out_stream, [Flag("c", 3, "For testing")],
+             []).run()
+        self.assertEqual(self.out_stream.getvalue(), "lin")
+        self.assertEqual(in_stream.read(), b"e1\nline2\n")
+
+    @parameterized.expand(
+        [
+            ("bytes_last", [Flag("n", 1, "For testing"),
+                            Flag("c", 2, "For testing")], "li"),
+            ("lines_last", [Flag("c", 2, "For testing"),
+                            Flag("n", 1, "For testing")], "line1\n"),
+        ]
+    )
+    def test_head_last_count_wins(self, _: str, flags: List[Flag],
+                                  expected: str) -> None:
+        """
+        Whichever of -n and -c comes last should be used
+        """
+        self.in_stream.write("line1\nline2\n")
+        self.in_stream.seek(0)
+        Head(self.in_stream, self.out_stream, flags, []).run()
+        self.assertEqual(self.out_stream.getvalue(), expected)
+
+    def test_head_bytes_given_lines(self) -> None:
+        """
+        head -c should count the bytes of the lines it is given
+        """
+        head = Head(self.in_stream, self.out_stream,
+                    [Flag("c", -3, "For testing")], [])
+        self.assertEqual(b"".join(head.iter_lines([b"ab\n", b"cd\n"])),
+                         b"ab\n")
+
     @parameterized.expand(
         [
             (
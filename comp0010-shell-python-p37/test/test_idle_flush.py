@@ -0,0 +1,78 @@
+"""
+Tests flushing what a stage wrote whenever it waits for input
+"""
+import threading
+import unittest
+from io import StringIO
+from typing import List
+from unittest.mock import MagicMock
+
+from commands.channel import TextChannel
+from commands.idle_flush import (flush_idle_outputs, flushed_when_idle,
+                                 forget_idle_outputs)
+
+
+class TestIdleFlush(unittest.TestCase):
+    """
+    Tests registering the streams to flush on the current thread
+    """
+
+    def test_last_registered_first(self) -> None:
+        """
+        Streams wrapping others should be flushed into them first, and only
+        while they are registered
+        """
+        flushed: List[str] = []
+        outer, inner = MagicMock(closed=False), MagicMock(closed=False)
+        outer.flush.side_effect = lambda: flushed.append('outer')
+        inner.flush.side_effect = lambda: flushed.append('inner')
+        with flushed_when_idle(outer), flushed_when_idle(inner):
+            flush_idle_outputs()
+        flush_idle_outputs()
+        self.assertEqual(flushed, ['inner', 'outer'])
+
+    def test_closed_streams_are_skipped(self) -> None:
+        """
+        A stream closed while registered should not be flushed
+        """
+        stream = StringIO()
+        with flushed_when_idle(stream):
+            stream.close()
+            flush_idle_outputs()
+
+    def test_other_threads_are_not_flushed(self) -> None:
+        """
+        Only the streams registered on the current thread should be flushed,
+        and none once they are forgotten
+        """
+        stream = MagicMock(closed=False)
+        with flushed_when_idle(stream):
+            thread = threading.Thread(target=flush_idle_outputs)
+            thread.start()
+            thread.join()
+            self.assertFalse(stream.flush.called)
+            forget_idle_outputs()
+            flush_idle_outputs()
+            self.assertFalse(stream.flush.called)
+
+    def test_channel_flushes_before_waiting(self) -> None:
+        """
+        Reading a channel should pass on what the reading stage wrote only
+        once nothing is ready to read
+        """
+        channel = TextChannel()
+        channel.writer.write('a\n')
+        channel.writer.flush()
+        output = MagicMock(closed=False)
+        with flushed_when_idle(output):
+            self.assertEqual(channel.reader.readline(), 'a\n')
+            self.assertFalse(output.flush.called)
+            timer = threading.Timer(0.1, channel.writer.close)
+            timer.start()
+            self.assertEqual(channel.reader.readline(), '')
+            timer.join()
+        self.assertTrue(output.flush.called)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,168 @@
+"""
+Tests chaining commands lazily on one thread
+"""
+import threading
+import unittest
+from io import BytesIO, StringIO
+from typing import List
+
+from parameterized import parameterized
+
+from commands.base_command import BaseCommand
+from commands.catcommand import CAT
+from commands.cutcommand import Cut
+from commands.echocommand import Echo
+from commands.grepcommand import Grep
+from commands.headcommand import Head
+from commands.line_chain import LineChain
+from commands.sedcommand import Sed
+from commands.sortcommand import Sort
+from commands.uniqcommand import Uniq
+from errors.command_errors import CommandError
+from errors.error_dsi import DeveloperSkillIssue
+from flag import Flag
+
+
+class Counted(StringIO):
+    """
+    An input stream that counts how many lines are read from it
+    """
+
+    def __init__(self, text: str) -> None:
+        super().__init__(text)
+        self.lines_read = 0
+
+    def readline(self, size: int = -1) -> str:  # type: ignore[override]
+        self.lines_read += 1
+        return super().readline(size)
+
+    def __next__(self) -> str:  # type: ignore[override]
+        line = self.readline()
+        if not line:
+            raise StopIteration
+        return line
+
+
+class TestLineChain(unittest.TestCase):
+    """
+    Tests the LineChain runnable
+    """
+
+    def chain(self, commands: List[BaseCommand]) -> str:
+        """
+        Runs commands as a chain, returning what the last one writes
+        """
+        out_stream = StringIO()
+        with LineChain(commands, out_stream) as chain:
+            self.assertEqual(chain.run(), 0)
+            return out_stream.getvalue()
+
+    def test_text_and_bytes(self) -> None:
+        """
+        Lines should be encoded and decoded between commands working on text
+        and those working on bytes
+        """
+        output = self.chain([
+            Grep(StringIO('héllo\nworld\nhé\n'), StringIO(), [], ['h']),
+            Cut(StringIO(), StringIO(), [Flag('b', ['1-3'], 'For testing')],
+                []),
+            Sed(StringIO(), StringIO(), [], ['s/h/j/']),
+        ])
+        self.assertEqual(output, 'jé\njé')
+
+    def test_lines_are_split(self) -> None:
+        """
+        Commands should be given whole lines, even when the command before
+        yields several lines at once
+        """
+        output = self.chain([
+            Sed(StringIO('a b c\n'), StringIO(), [], ['s/ /\\n/g']),
+            Grep(StringIO(), StringIO(), [], ['[ac]']),
+        ])
+        self.assertEqual(output, 'a\nc\n')
+
+    def test_lazy(self) -> None:
+        """
+        The first command should only read as many lines as the last one
+        needs
+        """
+        in_stream = Counted(''.join(f'{i}\n' for i in range(10_000)))
+        output = self.chain([
+            Grep(in_stream, StringIO(), [], ['0']),
+            Uniq(StringIO(), StringIO(), [], []),
+            Head(StringIO(), StringIO(), [Flag('n', 2, 'For testing')],
+                 []),
+        ])
+        self.assertEqual(output, '0\n10\n')
+        self.assertLess(in_stream.lines_read, 20)
+
+    def test_one_thread(self) -> None:
+        """
+        Commands implementing iter_lines() should not start any thread
+        """
+        threads = threading.active_count()
+        output = self.chain([
+            CAT(StringIO('b\na\n'), StringIO(), [], []),
+            Grep(StringIO(), StringIO(), [], ['a']),
+        ])
+        self.assertEqual(output, 'a\n')
+        self.assertEqual(threading.active_count(), threads)
+
+    @parameterized.expand([
+        ('first', [Echo(StringIO(), StringIO(), [], ['a', 'b']),
+                   Grep(StringIO(), StringIO(), [], ['a'])], 'a b\n'),
+        ('middle', [Echo(StringIO(), StringIO(), [], ['b\na']),
+                    Sort(StringIO(), StringIO(), [], []),
+                    Head(StringIO(), StringIO(),
+                         [Flag('n', 1, 'For testing')], [])],
+         'a\n'),
+    ])
+    def test_adapter(self, _: str, commands: List[BaseCommand],
+                     expected: str) -> None:
+        """
+        Commands that do not implement iter_lines() should still work in a
+        chain
+        """
+        self.assertEqual(self.chain(commands), expected)
+
+    def test_empty_input(self) -> None:
+        """
+        A command given no lines by the command before should fail like it
+        does when its input is empty
+        """
+        with self.assertRaises(CommandError):
+            self.chain([
+                Grep(StringIO('a\n'), StringIO(), [], ['b']),
+                Sed(StringIO(), StringIO(), [], ['s/a/b/']),
+            ])
+
+    def test_binary_output(self) -> None:
+        """
+        Lines of text should be encoded for a binary output
+        """
+        out_stream = BytesIO()
+        chain = LineChain(
+            [Grep(StringIO('é\n'), StringIO(), [], ['é'])], out_stream)
+        chain.run()
+        self.assertEqual(out_stream.getvalue(), 'é\n'.encode())
+
+    def test_cancel(self) -> None:
+        """
+        Cancelling the chain should cancel every command
+        """
+        commands = [Grep(StringIO(), StringIO(), [], ['a']),
+                    Head(StringIO(), StringIO(), [], [])]
+        chain = LineChain(commands, StringIO())
+        chain.cancel()
+        self.assertTrue(all(command.cancelled for command in commands))
+
+    def test_no_stages(self) -> None:
+        """
+        A chain needs at least one command
+        """
+        with self.assertRaises(DeveloperSkillIssue):
+            LineChain([], StringIO())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,72 @@
+"""
+Tests the LRU cache
+"""
+import unittest
+
+from errors.error_dsi import DeveloperSkillIssue
+from parse.lru_cache import LRUCache
+
+
+class TestLRUCache(unittest.TestCase):
+    """
+    Tests the LRU cache and its counters
+    """
+
+    def setUp(self) -> None:
+        self.cache: LRUCache[str, int] = LRUCache(2)
+
+    def test_hit_and_miss(self) -> None:
+        """
+        Stored values should be returned, and lookups counted
+        """
+        self.assertIsNone(self.cache.get('a'))
+        self.cache.put('a', 1)
+        self.assertEqual(self.cache.get('a'), 1)
+        stats = self.cache.stats()
+        self.assertEqual((stats.hits, stats.misses, stats.evictions),
+                         (1, 1, 0))
+        self.assertEqual(stats.hit_rate, 0.5)
+
+    def test_evicts_least_recently_used(self) -> None:
+        """
+        The least recently used entry should be evicted when the cache is full
+        """
+        self.cache.put('a', 1)
+        self.cache.put('b', 2)
+        self.cache.get('a')
+        self.cache.put('c', 3)
+        self.assertIsNone(self.cache.get('b'))
+        self.assertEqual(self.cache.get('a'), 1)
+        self.assertEqual(self.cache.get('c'), 3)
+        self.assertEqual(self.cache.stats().evictions, 1)
+        self.assertEqual(len(self.cache), 2)
+
+    def test_discard_and_clear(self) -> None:
+        """
+        Discarding removes a single entry, clearing removes everything
+        """
+        self.cache.put('a', 1)
+        self.cache.put('b', 2)
+        self.cache.discard('a')
+        self.cache.discard('not there')
+        self.assertIsNone(self.cache.get('a'))
+        self.cache.clear()
+        self.assertEqual(len(self.cache), 0)
+        self.assertEqual(self.cache.stats().misses, 0)
+
+    def test_empty_hit_rate(self) -> None:
+        """
+        A cache that was never used has a hit rate of 0
+        """
+        self.assertEqual(self.cache.stats().hit_rate, 0.0)
+
+    def test_invalid_size(self) -> None:
+        """
+        A cache must be able to hold at least one entry
+        """
+        with self.assertRaises(DeveloperSkillIssue):
+            LRUCache(0)
+
+
+if __name__ == "__main__":
+    unittest.main()
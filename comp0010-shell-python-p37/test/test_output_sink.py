@@ -0,0 +1,87 @@
+"""
+Tests the stream that command lines write their output to
+"""
+import threading
+import unittest
+from io import BytesIO, StringIO, TextIOWrapper
+from unittest.mock import MagicMock
+
+from commands.byte_streams import byte_output
+from output_sink import OutputSink
+
+
+class TestOutputSink(unittest.TestCase):
+    """
+    Tests the OutputSink class
+    """
+
+    def test_write(self) -> None:
+        """
+        Everything written should be passed on straight away
+        """
+        target = StringIO()
+        sink = OutputSink(target)
+        sink.write('a')
+        self.assertEqual(target.getvalue(), 'a')
+
+    def test_close_leaves_target_open(self) -> None:
+        """
+        Closing the sink should flush the target, but not close it
+        """
+        target = MagicMock()
+        with OutputSink(target):
+            pass
+        target.flush.assert_called()
+        target.close.assert_not_called()
+
+    def test_write_after_close(self) -> None:
+        """
+        Writing to a closed sink should fail like any closed stream
+        """
+        sink = OutputSink(StringIO())
+        sink.close()
+        with self.assertRaises(ValueError):
+            sink.write('a')
+
+    def test_periodic_flush(self) -> None:
+        """
+        The target should be flushed once the flush interval has passed
+        """
+        target = MagicMock()
+        sink = OutputSink(target, flush_interval=3600)
+        sink.write('a')
+        target.flush.assert_not_called()
+        sink.flush_interval = 0
+        sink.write('a')
+        target.flush.assert_called_once()
+
+    def test_waiting_output_is_flushed(self) -> None:
+        """
+        Output written too soon after a flush should still be flushed once
+        the flush interval has passed, even if nothing else is written
+        """
+        target = MagicMock()
+        flushed = threading.Event()
+        target.flush.side_effect = flushed.set
+        sink = OutputSink(target, flush_interval=0.05)
+        sink.write('a')
+        target.flush.assert_not_called()
+        self.assertTrue(flushed.wait(10))
+        sink.close()
+
+    def test_bytes_skip_decoding(self) -> None:
+        """
+        Commands that work on bytes should write to the binary buffer under a
+        UTF-8 target, after any text written before
+        """
+        buffer = BytesIO()
+        sink = OutputSink(TextIOWrapper(buffer, encoding='utf-8'))
+        sink.write('a')
+        with byte_output(sink) as output:
+            self.assertIs(output, buffer)
+            output.write(b'\xff')
+        self.assertEqual(buffer.getvalue(), b'a\xff')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,129 @@
+"""
+Tests the two-stage (SLL, then LL) parse tree factory
+"""
+import threading
+import unittest
+from unittest.mock import patch
+
+from parameterized import parameterized
+
+from errors.parse_errors import UserParseError
+from parse.parse_tree_factory import (ParserContextPool, create_parse_tree,
+                                      create_parser, get_parser_context_pool,
+                                      parse_ll)
+
+
+class TestParseTreeFactory(unittest.TestCase):
+    """
+    The factory should produce the same trees and errors as a plain LL parse
+    """
+
+    @parameterized.expand([
+        ('echo hello world',),
+        ("grep 'A..' dir1/file1.txt | sort -r | uniq",),
+        ('cut -b 2-,3- dir1/file1.txt',),
+        ('echo a"b"c',),
+        ('echo "a `echo b`" > out.txt; cat < out.txt',),
+    ])
+    def test_same_tree_as_ll(self, cmdline: str) -> None:
+        """
+        Whichever stage succeeds, the tree should be the one LL produces
+        """
+        ll_parser = create_parser(cmdline)
+        expected = parse_ll(ll_parser).toStringTree(recog=ll_parser)
+        tree = create_parse_tree(cmdline)
+        self.assertEqual(tree.toStringTree(recog=tree.parser), expected)
+
+    @parameterized.expand([
+        ('"',),
+        ('echo a |',),
+        ('a;;b',),
+    ])
+    def test_same_error_as_ll(self, cmdline: str) -> None:
+        """
+        Syntax errors should be reported with the LL error message
+        """
+        with self.assertRaises(UserParseError) as ll_error:
+            parse_ll(create_parser(cmdline))
+        with self.assertRaises(UserParseError) as error:
+            create_parse_tree(cmdline)
+        self.assertEqual(error.exception.message, ll_error.exception.message)
+
+    def test_sll_success_skips_ll(self) -> None:
+        """
+        Lines that SLL can parse should not be parsed a second time
+        """
+        with patch('parse.parse_tree_factory.parse_ll') as mock_parse_ll:
+            create_parse_tree('echo hello | cat')
+            mock_parse_ll.assert_not_called()
+
+
+class TestParserContextPool(unittest.TestCase):
+    """
+    Parser contexts should be reused, without sharing them between parses
+    that are in progress at the same time
+    """
+
+    def test_contexts_are_reused(self) -> None:
+        """
+        Parsing one line after another should reuse the same context
+        """
+        pool = ParserContextPool()
+        with pool.acquire() as first:
+            first.parse('echo a')
+        with pool.acquire() as second:
+            second.parse('echo b')
+        self.assertIs(first, second)
+        self.assertEqual(pool.idle, [first])
+
+    def test_nested_parses_get_separate_contexts(self) -> None:
+        """
+        A parse inside another parse should not take the outer context
+        """
+        pool = ParserContextPool()
+        with pool.acquire() as outer:
+            with pool.acquire() as inner:
+                self.assertIsNot(outer, inner)
+        self.assertEqual(len(pool.idle), 2)
+
+    def test_trees_outlive_reuse(self) -> None:
+        """
+        Trees should not change when their context parses another line
+        """
+        tree = create_parse_tree('echo "a `echo b`" c')
+        create_parse_tree('cat d | sort')
+        self.assertEqual(tree.getText(), 'echo "a `echo b`" c<EOF>')
+
+    def test_context_recovers_from_errors(self) -> None:
+        """
+        A context that was left by a syntax error should parse the next line
+        """
+        pool = ParserContextPool()
+        with self.assertRaises(UserParseError):
+            with pool.acquire() as context:
+                context.parse('echo a |')
+        with pool.acquire() as context:
+            tree = context.parse('echo a')
+        self.assertEqual(tree.getText(), 'echo a<EOF>')
+
+    def test_threads_have_separate_contexts(self) -> None:
+        """
+        Threads should never share a context
+        """
+        pool = get_parser_context_pool()
+        create_parse_tree('echo a')
+        contexts = []
+
+        def parse_in_thread() -> None:
+            create_parse_tree('echo b')
+            contexts.extend(pool.idle)
+
+        thread = threading.Thread(target=parse_in_thread)
+        thread.start()
+        thread.join()
+        self.assertEqual(len(contexts), 1)
+        self.assertNotIn(contexts[0], pool.idle)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,71 @@
+"""
+Tests assembling the words of a phrase
+"""
+import unittest
+from typing import List, Sequence, Tuple, Union, cast
+
+from parameterized import parameterized
+
+from parse.phrase_builder import PhraseBuilder, PhraseWord
+
+# Text added with add_text as (text, quoted), or words added with add_words
+Part = Union[Tuple[str, bool], Sequence[str]]
+
+
+class TestPhraseBuilder(unittest.TestCase):
+    """
+    Tests the PhraseBuilder class
+    """
+
+    @staticmethod
+    def build(parts: List[Part]) -> List[PhraseWord]:
+        """
+        Adds every part in order, and finishes the phrase
+        """
+        builder = PhraseBuilder()
+        for part in parts:
+            if isinstance(part, tuple) and isinstance(part[1], bool):
+                builder.add_text(part[0], part[1])
+            else:
+                builder.add_words(cast(Sequence[str], part))
+        return builder.finish()
+
+    @parameterized.expand([
+        ('text', [('a', False), ('b', True)], [('ab', False)]),
+        ('empty', [], []),
+        ('empty_text', [('', False)], []),
+        ('empty_quotes', [('', True)], [('', False)]),
+        ('words', [['a', 'b', 'c']], [('a', False), ('b', False),
+                                      ('c', False)]),
+        ('joined', [('x', False), ['a', 'b'], ('y', False)],
+         [('xa', False), ('by', False)]),
+        ('no_words', [('x', False), [], ('y', False)], [('xy', False)]),
+        ('only_no_words', [[]], []),
+        ('flags', [['-n', 'a', '-', '-v']],
+         [('-n', True), ('a', False), ('-', False), ('-v', True)]),
+        ('flag_after_text', [('a', False), ['-b']], [('a-b', False)]),
+        ('flag_joined', [['-n'], ('x', False)], [('-nx', True)]),
+        ('quoted_dash', [('-n', True)], [('-n', False)]),
+    ])
+    def test_build(self, _: str, parts: List[Part],
+                   expected: List[PhraseWord]) -> None:
+        """
+        Substituted words should be split, and joined to the text around
+        them
+        """
+        self.assertEqual(self.build(parts), expected)
+
+    def test_many_parts(self) -> None:
+        """
+        A phrase of many parts and words should be assembled in one pass
+        """
+        words = [str(i) for i in range(100_000)]
+        parts: List[Part] = [('x', False), words, ('y', True)]
+        result = self.build(parts)
+        self.assertEqual(len(result), len(words))
+        self.assertEqual(result[0], ('x0', False))
+        self.assertEqual(result[-1], ('99999y', False))
+
+
+if __name__ == "__main__":
+    unittest.main()
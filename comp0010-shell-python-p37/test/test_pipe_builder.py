@@ -7,6 +7,10 @@ from typing import Optional
 from unittest import mock
 
 from commands.builder import Builder
+from commands.command_builder import CommandBuilder
+from commands.echocommand import Echo
+from commands.grepcommand import Grep
+from commands.line_chain import LineChain
 from commands.pipe import Pipe
 from commands.pipe_builder import PipeBuilder
 from errors.error_dsi import DeveloperSkillIssue
@@ -69,6 +73,30 @@ class TestPipeBuilder(unittest.TestCase):
         pipe = self._pipe_builder_helper(self.in_stream, self.out_stream)
         self.assertIsInstance(pipe, Pipe)
 
+    def test_pipes_get_their_own_mid_stream(self):
+        """
+        Every pipe built from the same builder should have its own stream in
+        the middle
+        """
+        pipe_builder = PipeBuilder(self.left, self.right)
+        first, second = pipe_builder.build(), pipe_builder.build()
+        self.assertIsNot(first.mid_stream, second.mid_stream)
+
+    def test_pipe_chains_lines(self):
+        """
+        Commands that pass lines on lazily should be chained on one thread,
+        without a stream in the middle
+        """
+        self.left = PipeBuilder(
+            CommandBuilder(Echo).add_option('a').add_option('b'),
+            CommandBuilder(Grep).add_option('a'))
+        self.right = CommandBuilder(Grep).add_option('b')
+        pipe = self._pipe_builder_helper(self.in_stream, self.out_stream)
+        self.assertIsInstance(pipe, LineChain)
+        self.assertEqual(len(pipe.stages), 3)
+        pipe.run()
+        self.assertEqual(self.out_stream.getvalue(), 'a b\n')
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,377 @@
+"""
+Tests the N-ary pipeline and its builder
+"""
+import os
+import tempfile
+import threading
+import time
+import unittest
+from io import StringIO, TextIOBase
+from typing import List, cast
+from unittest import mock
+
+from parameterized import parameterized
+
+from commands.base_command import BaseCommand
+from commands.builder import Builder
+from commands.channel import (DEFAULT_CHANNEL_CAPACITY, ByteChannel,
+                              TextChannel)
+from commands.line_chain import LineChain
+from commands.pipeline import Pipeline
+from commands.pipeline_builder import MAX_CHAIN_LENGTH, PipelineBuilder
+from commands.process_stage import stage_processes
+from commands.runnable import Runnable
+from errors.error_dsi import DeveloperSkillIssue
+from parse.raw_shell_parser import RawShellParser
+from parse.substitution_shell_parser import SubstitutionShellParser
+from python_shell import PythonShell
+
+LONG_PIPELINE = 1000
+
+
+class Endless(Runnable):
+    """
+    A stage that runs until it is cancelled, writing lines if asked to
+    """
+
+    def __init__(self, out_stream: TextIOBase, write: bool) -> None:
+        self.out_stream = out_stream
+        self.write = write
+
+    def run(self) -> int:
+        while not self.cancelled:
+            if self.write:
+                self.out_stream.write('x\n')
+            else:
+                time.sleep(0.001)
+        return 0
+
+    def close(self) -> None:
+        self.out_stream.close()
+
+
+class TestPipeline(unittest.TestCase):
+    """
+    Tests the pipeline runnable
+    """
+
+    def setUp(self) -> None:
+        self.channels = [TextChannel(capacity=16), TextChannel(capacity=16)]
+        self.stages = [mock.create_autospec(BaseCommand) for _ in range(3)]
+        self.pipeline = Pipeline(self.stages, self.channels)
+
+    def connect(self, serial: bool = False) -> List[str]:
+        """
+        Makes every stage copy what the stage before it wrote, adding its own
+        line, and returns the order in which the stages finished
+        """
+        order: List[str] = []
+        self.pipeline.concurrent = not serial
+        for index, stage in enumerate(self.stages):
+            def run(index: int = index) -> int:
+                text = self.channels[index - 1].reader.read() \
+                    if index > 0 else ''
+                if index < len(self.channels):
+                    self.channels[index].writer.write(
+                        f'{text}stage {index}\n' * 10)
+                order.append(f'stage {index}')
+                return 0
+            stage.run.side_effect = run
+        return order
+
+    @parameterized.expand([('concurrent', False), ('serial', True)])
+    def test_pipeline_runs_stages(self, _: str, serial: bool) -> None:
+        """
+        Every stage should run once, reading everything the stage before it
+        wrote, even if that is more than the channel holds
+        """
+        order = self.connect(serial)
+        self.assertEqual(self.pipeline.run(), 0)
+        self.assertEqual(order, ['stage 0', 'stage 1', 'stage 2'])
+        for stage in self.stages:
+            stage.run.assert_called_once_with()
+
+    def test_pipeline_stages_run_concurrently(self) -> None:
+        """
+        A stage should read what the stage before it writes while it is still
+        running
+        """
+        lines = [f'{index}\n' for index in range(1000)]
+        seen: List[str] = []
+        self.stages[0].run.side_effect = \
+            lambda: self.channels[0].writer.writelines(lines)
+        self.stages[1].run.side_effect = \
+            lambda: seen.extend(self.channels[0].reader)
+        self.assertEqual(self.pipeline.run(), 0)
+        self.assertEqual(seen, lines)
+
+    def test_pipeline_raises_first_error(self) -> None:
+        """
+        The error of the first stage that failed should be raised, once the
+        stages after it have read to the end of their input
+        """
+        self.stages[0].run.side_effect = DeveloperSkillIssue('first')
+        self.stages[1].run.side_effect = \
+            lambda: self.channels[0].reader.read()
+        self.stages[2].run.side_effect = DeveloperSkillIssue('last')
+        with self.assertRaises(DeveloperSkillIssue) as context:
+            self.pipeline.run()
+        self.assertEqual(context.exception.message, 'first')
+        self.stages[2].run.assert_called_once_with()
+
+    def test_serial_pipeline_stops_at_error(self) -> None:
+        """
+        Stages after one that raises should not run, when the stages run one
+        after another
+        """
+        self.pipeline.concurrent = False
+        self.stages[1].run.side_effect = DeveloperSkillIssue('failed')
+        with self.assertRaises(DeveloperSkillIssue):
+            self.pipeline.run()
+        self.stages[2].run.assert_not_called()
+
+    def test_stage_that_stops_reading(self) -> None:
+        """
+        A stage writing more than the channel holds should not wait forever
+        for a stage that never reads it
+        """
+        self.stages[0].run.side_effect = \
+            lambda: self.channels[0].writer.write('x' * 1000)
+        self.assertEqual(self.pipeline.run(), 0)
+
+    @parameterized.expand([('writing', True), ('not_writing', False)])
+    def test_finished_stage_stops_previous(self, _: str,
+                                           write: bool) -> None:
+        """
+        Once a stage finishes, the stages before it should stop, whether or
+        not they are writing, like with SIGPIPE
+        """
+        self.stages[0] = Endless(self.channels[0].writer, write)
+        self.stages[1] = Endless(self.channels[1].writer, write)
+        self.stages[2].run.return_value = 0
+        self.assertEqual(self.pipeline.run(), 0)
+        self.assertTrue(self.stages[0].cancelled)
+
+    def test_last_stage_broken_pipe(self) -> None:
+        """
+        A broken pipe in the last stage does not come from the pipeline, so
+        it should be raised
+        """
+        self.stages[2].run.side_effect = BrokenPipeError
+        with self.assertRaises(BrokenPipeError):
+            self.pipeline.run()
+
+    def test_pipeline_cancel(self) -> None:
+        """
+        Cancelling the pipeline should cancel every stage
+        """
+        self.pipeline.cancel()
+        for stage in self.stages:
+            stage.cancel.assert_called_once_with()
+
+    def test_pipeline_close(self) -> None:
+        """
+        Closing the pipeline should close every stage
+        """
+        self.pipeline.close()
+        for stage in self.stages:
+            stage.close.assert_called_once_with()
+
+
+class TestPipelineBuilder(unittest.TestCase):
+    """
+    Tests the pipeline builder
+    """
+
+    def setUp(self) -> None:
+        self.builders = [mock.create_autospec(Builder) for _ in range(3)]
+        for builder in self.builders:
+            builder.set_in_stream.return_value = builder
+            builder.set_out_stream.return_value = builder
+            builder.mutates_shell_state.return_value = False
+            builder.handles_bytes.return_value = False
+
+    def test_pipeline_builder_streams(self) -> None:
+        """
+        Every stage should write to the stream the next stage reads
+        """
+        in_stream, out_stream = StringIO(), StringIO()
+        pipeline = (PipelineBuilder(self.builders).set_in_stream(in_stream)
+                    .set_out_stream(out_stream).build())
+        self.assertIsInstance(pipeline, Pipeline)
+
+        reads = [builder.set_in_stream.call_args[0][0]
+                 for builder in self.builders]
+        writes = [builder.set_out_stream.call_args[0][0]
+                  for builder in self.builders]
+        self.assertIs(reads[0], in_stream)
+        self.assertIs(writes[-1], out_stream)
+        self.assertEqual(reads[1:],
+                         [channel.reader for channel in pipeline.channels])
+        self.assertEqual(writes[:-1],
+                         [channel.writer for channel in pipeline.channels])
+        self.assertTrue(pipeline.concurrent)
+
+    @parameterized.expand([
+        ('cd', 'cd src | echo a', False),
+        ('exit', 'echo a | exit', False),
+        ('output_redirect', 'echo a | cat > out.txt', True),
+        ('plain', 'echo a | cat | cat', True),
+    ])
+    def test_pipeline_builder_concurrency(
+        self, _: str, cmdline: str, concurrent: bool
+    ) -> None:
+        """
+        Stages should only run one after another if one changes the shell
+        """
+        builder = cast(PipelineBuilder, RawShellParser().parse(cmdline))
+        self.assertEqual(builder.changes_shell(), not concurrent)
+
+    @parameterized.expand([
+        ('bytes', 'cat a | head | cut -b 1 | wc -l',
+         [ByteChannel, ByteChannel, ByteChannel]),
+        ('text', 'cat a | grep a | sort', [TextChannel, TextChannel]),
+        ('redirected', 'cat < /dev/null | head > /dev/null', [ByteChannel]),
+    ])
+    def test_pipeline_builder_channels(self, _: str, cmdline: str,
+                                       expected: list) -> None:
+        """
+        Stages should pass bytes on only when the stages on both sides work
+        on bytes
+        """
+        with RawShellParser().parse(cmdline).build() as pipeline:
+            channels = cast(Pipeline, pipeline).channels
+            self.assertEqual([type(channel) for channel in channels],
+                             expected)
+
+    @parameterized.expand([
+        ('lazy', 'cat a | grep a | sed s/a/b/ | uniq | cut -b 1 | head',
+         True),
+        ('first_stage', 'echo a | grep a', True),
+        ('not_lazy', 'cat a | grep a | sort', False),
+        ('redirected', 'cat a | grep a > /dev/null', False),
+        ('serial', 'cd . | grep a', False),
+        ('too_long', ' | '.join(['echo a'] + ['cat'] * MAX_CHAIN_LENGTH),
+         False),
+    ])
+    def test_pipeline_builder_chains(self, _: str, cmdline: str,
+                                     chained: bool) -> None:
+        """
+        Stages after the first that all pass lines on lazily should be
+        chained on one thread
+        """
+        with RawShellParser().parse(cmdline).build() as pipeline:
+            self.assertIsInstance(pipeline,
+                                  LineChain if chained else Pipeline)
+
+    def test_pipeline_builder_chains_processes(self) -> None:
+        """
+        Stages that are to run in processes should not be chained
+        """
+        with stage_processes():
+            pipeline = RawShellParser().parse('cat a | grep a').build()
+        with pipeline:
+            self.assertIsInstance(pipeline, Pipeline)
+
+    def test_pipeline_builder_flattens(self) -> None:
+        """
+        Nested pipeline builders should be flattened into one pipeline
+        """
+        nested = PipelineBuilder(self.builders[:2])
+        for _ in range(LONG_PIPELINE):
+            nested = PipelineBuilder([nested, self.builders[2]])
+        self.assertEqual(nested.builders,
+                         self.builders[:2] + [self.builders[2]] *
+                         LONG_PIPELINE)
+
+    def test_pipeline_builder_too_short(self) -> None:
+        """
+        A pipeline needs at least two stages
+        """
+        with self.assertRaises(DeveloperSkillIssue):
+            PipelineBuilder(self.builders[:1])
+
+    def test_pipeline_builder_clone(self) -> None:
+        """
+        Cloning should clone every stage
+        """
+        clone = PipelineBuilder(self.builders).clone()
+        self.assertEqual(clone.builders,
+                         [builder.clone.return_value
+                          for builder in self.builders])
+
+
+class TestLongPipelines(unittest.TestCase):
+    """
+    Tests running pipelines too long to run recursively
+    """
+
+    def run_shell(self, cmdline: str) -> str:
+        """
+        Runs a command line, and returns its output
+        """
+        out_stream = StringIO()
+        PythonShell(StringIO(), out_stream).eval(cmdline)
+        return out_stream.getvalue()
+
+    def test_long_simple_pipeline(self) -> None:
+        """
+        A simple pipeline should be parsed by the fast path, and run
+        """
+        cmdline = ' | '.join(['echo hello'] + ['cat'] * LONG_PIPELINE)
+        builder = RawShellParser().parse(cmdline)
+        self.assertIsInstance(builder, PipelineBuilder)
+        self.assertEqual(self.run_shell(cmdline), 'hello\n')
+
+    def test_pipeline_larger_than_channels(self) -> None:
+        """
+        Much more text than a channel holds should stream through every stage
+        """
+        lines = DEFAULT_CHANNEL_CAPACITY // 4
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'big.txt')
+            with open(path, 'w', encoding='utf-8') as file:
+                file.writelines(f'{index % 10}\n' for index in range(lines))
+            self.assertEqual(
+                self.run_shell(f'cat {path} | grep 3 | cat | wc -l'),
+                str(sum(index % 10 == 3 for index in range(lines))))
+
+    def test_head_stops_pipeline(self) -> None:
+        """
+        head should stop the stages before it once it has enough lines, so
+        that they do not read the rest of a file that never ends
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'fifo')
+            os.mkfifo(path)
+            writer = threading.Thread(target=self.write_forever, args=(path,))
+            writer.start()
+            self.assertEqual(
+                self.run_shell(f'cat {path} | grep -m 3 x | head -n 2'),
+                'x\nx\n')
+            writer.join()
+
+    @staticmethod
+    def write_forever(path: str) -> None:
+        """
+        Writes lines to the fifo at path until its reader closes it
+        """
+        try:
+            with open(path, 'w', encoding='utf-8') as fifo:
+                while True:
+                    fifo.write('x\n' * 1024)
+        except BrokenPipeError:
+            pass
+
+    def test_long_quoted_pipeline(self) -> None:
+        """
+        A pipeline that needs ANTLR should be flattened by the visitors
+        """
+        cmdline = ' | '.join(["echo 'hello'"] + ['cat'] * LONG_PIPELINE)
+        builder = SubstitutionShellParser().parse(cmdline)
+        self.assertIsInstance(builder, PipelineBuilder)
+        self.assertEqual(self.run_shell(cmdline), 'hello\n')
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,128 @@
+"""
+Tests the plan cache, and the way the substitution parser uses it
+"""
+import os
+import tempfile
+import unittest
+from typing import cast
+
+from parameterized import parameterized
+
+from commands.catcommand import CAT
+from commands.command_builder import CommandBuilder
+from commands.echocommand import Echo
+from commands.headcommand import Head
+from commands.pipeline_builder import PipelineBuilder
+from commands.redirect_builder import RedirectBuilder
+from commands.sequence_builder import SequenceBuilder
+from commands.unsafe_builder import UnsafeBuilder
+from parse.plan_cache import PlanCache, get_plan_cache
+from parse.substitution_shell_parser import SubstitutionShellParser
+
+
+class TestPlanCache(unittest.TestCase):
+    """
+    Tests the plan cache
+    """
+
+    def setUp(self) -> None:
+        self.cache = PlanCache(maxsize=2)
+        self.parser = SubstitutionShellParser([Echo, CAT, Head],
+                                              plan_cache=self.cache)
+
+    @parameterized.expand([
+        ('echo hello', True),
+        ('head -n 5 file.txt | cat ; echo "quoted"', True),
+        ('echo `echo hello`', False),
+        ('echo *.txt', False),
+        ('echo file?.txt', False),
+        ('echo [ab].txt', False),
+    ])
+    def test_is_cacheable(self, cmdline: str, cacheable: bool) -> None:
+        """
+        Substitutions and globs should never be cached
+        """
+        self.assertEqual(PlanCache.is_cacheable(cmdline), cacheable)
+
+    def test_hit_returns_fresh_copy(self) -> None:
+        """
+        A cached plan should equal the parsed plan, but never be the same
+        object as a plan that was handed out before
+        """
+        first = cast(CommandBuilder, self.parser.parse('head -n 5 a.txt'))
+        second = cast(CommandBuilder, self.parser.parse('head -n 5 a.txt'))
+        self.assertIsNot(first, second)
+        self.assertIs(second.command_type, Head)
+        self.assertEqual(second.flags, first.flags)
+        self.assertEqual(second.options, ['a.txt'])
+
+        # mutating a handed out plan must not change the template
+        second.add_option('b.txt')
+        third = cast(CommandBuilder, self.parser.parse('head -n 5 a.txt'))
+        self.assertEqual(third.options, ['a.txt'])
+
+        stats = self.cache.stats()
+        self.assertEqual((stats.hits, stats.misses), (2, 1))
+
+    def test_clones_composite_builders(self) -> None:
+        """
+        Pipes, sequences, redirects and unsafe builders should all be cloned
+        """
+        cmdline = 'echo a | cat ; _cat < in.txt > out.txt'
+        self.parser.parse(cmdline)
+        plan = self.parser.parse(cmdline)
+        self.assertIsInstance(plan, SequenceBuilder)
+        pipe, unsafe = cast(SequenceBuilder, plan).builders
+        self.assertIsInstance(pipe, PipelineBuilder)
+        self.assertIsInstance(unsafe, UnsafeBuilder)
+        redirect = cast(RedirectBuilder,
+                        cast(UnsafeBuilder, unsafe).wrapped_builder)
+        while isinstance(redirect.child_buildable, RedirectBuilder):
+            redirect = redirect.child_buildable
+        self.assertIsInstance(redirect, RedirectBuilder)
+        self.assertIs(redirect.child_buildable.command_type, CAT)
+        self.assertEqual(self.cache.stats().hits, 1)
+
+    def test_uncacheable_lines_bypass_cache(self) -> None:
+        """
+        Command lines with substitutions should be parsed every time
+        """
+        self.parser.parse('echo `echo hi`')
+        self.parser.parse('echo `echo hi`')
+        stats = self.cache.stats()
+        self.assertEqual((stats.hits, stats.misses, stats.size), (0, 0, 0))
+
+    def test_keyed_by_cwd(self) -> None:
+        """
+        The same command line in a different directory is a different plan
+        """
+        cwd = os.getcwd()
+        self.parser.parse('echo hi')
+        with tempfile.TemporaryDirectory() as directory:
+            try:
+                os.chdir(directory)
+                self.parser.parse('echo hi')
+            finally:
+                os.chdir(cwd)
+        self.assertEqual(self.cache.stats().misses, 2)
+
+    def test_eviction(self) -> None:
+        """
+        The cache should be bounded, and count its evictions
+        """
+        for cmdline in ['echo a', 'echo b', 'echo c']:
+            self.parser.parse(cmdline)
+        stats = self.cache.stats()
+        self.assertEqual((stats.size, stats.evictions), (2, 1))
+
+    def test_custom_commands_are_not_cached_by_default(self) -> None:
+        """
+        Plans depend on the available commands, so parsers with their own
+        commands should not share the process-wide cache
+        """
+        self.assertIsNone(SubstitutionShellParser([Echo]).plan_cache)
+        self.assertIs(SubstitutionShellParser().plan_cache, get_plan_cache())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,292 @@
+"""
+Tests running pipeline stages in their own processes
+"""
+import os
+import threading
+import unittest
+from io import StringIO
+from typing import cast
+from unittest.mock import patch
+
+from parameterized import parameterized
+
+from commands import process_stage
+from commands.channel import TextChannel
+from commands.command_helpers import is_stream_empty
+from commands.grepcommand import Grep
+from commands.pipeline import Pipeline
+from commands.process_stage import (PipeReader, ProcessStage,
+                                    stage_processes, stage_processes_enabled)
+from commands.sortcommand import Sort
+from errors.command_errors import (CommandError, ShellFileNotFoundError,
+                                   StageProcessError)
+from parse.raw_shell_parser import RawShellParser
+from python_shell import PythonShell
+
+
+class UnloadableError(Exception):
+    """
+    An error that can be pickled, but not unpickled, as its arguments are
+    not the ones it is pickled with
+    """
+
+    def __init__(self, reason: str, code: int) -> None:
+        super().__init__(f'{reason} ({code})')
+
+
+def unpicklable_error() -> Exception:
+    """
+    Creates an error that cannot be pickled at all
+    """
+    error = ValueError('locked')
+    setattr(error, 'lock', threading.Lock())
+    return error
+
+
+LINES = ''.join(f'{index} {"even" if index % 2 == 0 else "odd"}\n'
+                for index in range(10_000))
+
+
+class TestProcessStage(unittest.TestCase):
+    """
+    Tests the ProcessStage runnable
+    """
+
+    def grep(self, in_stream, out_stream, options) -> ProcessStage:
+        """
+        Creates a stage running grep in a process
+        """
+        return ProcessStage(Grep(in_stream, out_stream, [], options))
+
+    def test_same_output(self) -> None:
+        """
+        A command should write the same in a process as on a thread
+        """
+        expected, out_stream = StringIO(), StringIO()
+        Grep(StringIO(LINES), expected, [], ['odd']).run()
+        with self.grep(StringIO(LINES), out_stream, ['odd']) as stage:
+            self.assertEqual(stage.run(), 0)
+            self.assertEqual(out_stream.getvalue(), expected.getvalue())
+
+    def test_stdin_is_empty(self) -> None:
+        """
+        A command should be able to tell that its input is empty, so that
+        sort reports it has nothing to sort, like it does on a thread
+        """
+        with ProcessStage(Sort(StringIO(), StringIO(), [], [])) as stage, \
+                self.assertRaises(CommandError):
+            stage.run()
+
+    def test_unicode_split_across_chunks(self) -> None:
+        """
+        Characters split between two reads of the pipe should be decoded
+        whole
+        """
+        text = 'é' * 100_000 + '\n'
+        out_stream = StringIO()
+        with self.grep(StringIO(text), out_stream, ['é']) as stage:
+            stage.run()
+            self.assertEqual(out_stream.getvalue(), text)
+
+    @parameterized.expand([
+        ('grep', Grep, ['x', 'missing.txt']),
+        ('sort', Sort, ['missing.txt']),
+    ])
+    def test_error(self, _: str, command_type: type, options: list) -> None:
+        """
+        Errors raised by the command should be raised by the stage
+        """
+        command = command_type(StringIO('x\n'), StringIO(), [], options)
+        with ProcessStage(command) as stage, \
+                self.assertRaises(ShellFileNotFoundError):
+            stage.run()
+
+    @parameterized.expand([
+        ('cannot_load', UnloadableError('boom', 3),
+         'UnloadableError: boom (3)'),
+        ('cannot_dump', unpicklable_error(), 'ValueError: locked'),
+    ])
+    def test_error_not_rebuilt(self, _: str, error: Exception,
+                               description: str) -> None:
+        """
+        Errors that cannot be sent back as they were should still be raised
+        with their type and message
+        """
+        with patch.object(Grep, 'run', side_effect=error), \
+                self.grep(StringIO('x\n'), StringIO(), ['x']) as stage, \
+                self.assertRaises(StageProcessError) as context:
+            stage.run()
+        self.assertIn(description, str(context.exception))
+
+    def test_wait_by_polling(self) -> None:
+        """
+        Where a process cannot be waited for without reaping it, it should be
+        polled instead
+        """
+        with patch.object(process_stage, 'WAIT_WITHOUT_REAPING', False), \
+                patch.object(process_stage.os, 'waitid',
+                             side_effect=AssertionError):
+            self.test_same_output()
+            self.test_cancel()
+
+    def test_cancel(self) -> None:
+        """
+        Cancelling should stop a process waiting for input that never ends
+        """
+        channel = TextChannel()
+        stage = self.grep(channel.reader, StringIO(), ['x'])
+        timer = threading.Timer(0.1, stage.cancel)
+        timer.start()
+        with stage:
+            self.assertEqual(stage.run(), 0)
+        timer.join()
+        self.assertTrue(stage.cancelled)
+        channel.writer.close()
+
+    def test_closed_output(self) -> None:
+        """
+        A stage whose output is no longer read should end with a broken pipe,
+        like a stage run on a thread
+        """
+        channel = TextChannel()
+        channel.reader.close()
+        with self.grep(StringIO(LINES), channel.writer, ['']) as stage, \
+                self.assertRaises(BrokenPipeError):
+            stage.run()
+
+    def test_close_without_run(self) -> None:
+        """
+        Closing a stage that was started but never run should stop its
+        process
+        """
+        stage = self.grep(StringIO(LINES), StringIO(), ['x'])
+        stage.start()
+        stage.close()
+        self.assertIsNone(stage._pid)  # pylint: disable=protected-access
+
+    @parameterized.expand([
+        ('listed', process_stage.FD_DIRECTORIES),
+        ('not_listed', ('/nonexistent',)),
+    ])
+    def test_close_other_fds(self, _: str, directories: tuple) -> None:
+        """
+        A stage process should close every descriptor it does not use,
+        whether or not its open descriptors can be listed
+        """
+        keep, other = os.pipe()
+        with patch.object(process_stage, 'FD_DIRECTORIES', directories):
+            pid = os.fork()
+            if pid == 0:  # pragma: no cover
+                code = 1
+                try:
+                    # pylint: disable=protected-access
+                    process_stage._close_other_fds([keep])
+                    os.fstat(keep)
+                    try:
+                        os.fstat(other)
+                    except OSError:
+                        code = 0
+                finally:
+                    os._exit(code)  # pylint: disable=protected-access
+        os.close(keep)
+        os.close(other)
+        status = os.waitpid(pid, 0)[1]
+        self.assertEqual(os.WEXITSTATUS(status), 0)
+
+
+class TestPipeReader(unittest.TestCase):
+    """
+    Tests the input of a stage running in a process
+    """
+
+    @parameterized.expand([
+        ('empty', b'', True),
+        ('not_empty', b'a\n', False),
+    ])
+    def test_is_stream_empty(self, _: str, data: bytes,
+                             expected: bool) -> None:
+        """
+        The input should only be empty once the pipe is closed with nothing
+        written to it
+        """
+        read_fd, write_fd = os.pipe()
+        os.write(write_fd, data)
+        os.close(write_fd)
+        with PipeReader(open(read_fd, 'rb'), encoding='utf-8') as reader:
+            self.assertEqual(is_stream_empty(reader), expected)
+            self.assertEqual(reader.read(), data.decode())
+
+
+class TestStageProcesses(unittest.TestCase):
+    """
+    Tests choosing which stages of a pipeline run in processes
+    """
+
+    def build(self, cmdline: str) -> Pipeline:
+        """
+        Builds the pipeline of a command line
+        """
+        pipeline = RawShellParser().parse(cmdline).build()
+        self.assertIsInstance(pipeline, Pipeline)
+        return cast(Pipeline, pipeline)
+
+    def test_context(self) -> None:
+        """
+        Stages should only run in processes within the context
+        """
+        self.assertFalse(stage_processes_enabled())
+        with stage_processes():
+            self.assertTrue(stage_processes_enabled())
+            with stage_processes(False):
+                self.assertFalse(stage_processes_enabled())
+            self.assertTrue(stage_processes_enabled())
+        self.assertFalse(stage_processes_enabled())
+
+    @parameterized.expand([
+        ('cpu_bound', 'cat a | grep a | sed s/a/b/ | sort',
+         [False, True, True, True]),
+        ('redirected', 'echo a | grep a > /dev/null', [False, False]),
+        ('serial', 'cd . | grep a', [False, False]),
+    ])
+    def test_cpu_bound_stages(self, _: str, cmdline: str,
+                              expected: list) -> None:
+        """
+        Only commands that are CPU bound should run in processes, and only
+        in pipelines whose stages run at the same time
+        """
+        with stage_processes():
+            pipeline = self.build(cmdline)
+        with pipeline:
+            self.assertEqual(
+                [isinstance(stage, ProcessStage)
+                 for stage in pipeline.stages], expected)
+
+    def test_disabled(self) -> None:
+        """
+        Without the context, every stage should run on a thread
+        """
+        with self.build('echo a | grep a | sort') as pipeline:
+            self.assertFalse(any(isinstance(stage, ProcessStage)
+                                 for stage in pipeline.stages))
+
+    @parameterized.expand([
+        ('filters', 'echo b a c | sed "s/ /\\n/g" | grep "[ab]" | sort -r'),
+        ('counts', 'echo a b | sed "s/ /\\n/" | uniq | wc -l'),
+        ('head', 'echo a b | sed "s/ /\\n/" | grep -m 1 . | head -n 1'),
+    ])
+    def test_same_output(self, _: str, cmdline: str) -> None:
+        """
+        A pipeline should write the same whichever way its stages run
+        """
+        outputs = []
+        for enabled in (False, True):
+            out_stream = StringIO()
+            PythonShell(StringIO(), out_stream,
+                        stage_processes=enabled).eval(cmdline)
+            outputs.append(out_stream.getvalue())
+        self.assertNotEqual(outputs[0], '')
+        self.assertEqual(outputs[1], outputs[0])
+
+
+if __name__ == '__main__':
+    unittest.main()
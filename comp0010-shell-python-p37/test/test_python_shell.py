@@ -47,7 +47,6 @@ class MockBuilder(ContextManager, Builder):
         Stubbed run function that just writes output. This is passed as a mock
         """
         self.out_stream.write(self.output)
-        self.out_stream.seek(0)
         return 0
 
     def __enter__(self) -> Self:
@@ -119,5 +118,54 @@ class TestPythonShell(unittest.TestCase):
             PythonShell(StringIO(), self.out).eval("exit")
 
 
+class TestEvalIter(unittest.TestCase):
+    """
+    Tests yielding the output of a command line as it is written
+    """
+
+    def test_output(self):
+        """
+        The chunks should make up the output, and the exit code should be
+        returned once they run out
+        """
+        chunks = PythonShell(StringIO(), StringIO()).eval_iter(
+            "echo a; echo b")
+        output = []
+        with self.assertRaises(StopIteration) as stop:
+            while True:
+                output.append(next(chunks))
+        self.assertEqual("".join(output), "a\nb\n")
+        self.assertEqual(stop.exception.value, 0)
+
+    def test_error(self):
+        """
+        Errors should be reported like eval, with a failing exit code
+        """
+        with patch("sys.stderr", object=MagicMock()) as mock_errorout:
+            chunks = PythonShell(StringIO(), StringIO()).eval_iter(
+                "cat missing.txt")
+            with self.assertRaises(StopIteration) as stop:
+                next(chunks)
+        self.assertEqual(stop.exception.value, 1)
+        mock_errorout.write.assert_called_once()
+
+    def test_exit(self):
+        """
+        Exiting the shell should be raised by the generator
+        """
+        with self.assertRaises(ShellExitError):
+            list(PythonShell(StringIO(), StringIO()).eval_iter("exit"))
+
+    def test_close_cancels(self):
+        """
+        Closing the generator early should stop a command line that would
+        never end
+        """
+        chunks = PythonShell(StringIO(), StringIO()).eval_iter(
+            "cat /dev/zero")
+        self.assertTrue(next(chunks))
+        chunks.close()
+
+
 if __name__ == "__main__":
     unittest.main()
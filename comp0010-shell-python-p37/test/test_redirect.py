@@ -1,6 +1,8 @@
 """
 Tests the Redirect runnable
 """
+import os
+import tempfile
 import unittest
 from io import StringIO
 from unittest.mock import MagicMock
@@ -16,79 +18,86 @@ class TestRedirect(unittest.TestCase):
     A test class for the Redirect runnable.
 
     The Redirect runnable should have the following specificaitons:
-    1. All inputs to in_stream should go into the wrapped object
-    2. All outputs from the wrapped object should go into out_stream
+    1. The wrapped object reads the in_stream of the redirect directly
+    2. The wrapped object writes to the out_stream of the redirect directly
+    3. Whatever was written is flushed once the wrapped object has run
 
-    Redirect expects the builder to expose the wrapped streams, so we don't
-    have to dig too deep into the runnable to figure out if their in_stream /
-    out_stream has been called.
+    The redirect builder builds the wrapped object with the streams of the
+    redirect, so here the wrapped object is given them by hand.
     """
     def setUp(self) -> None:
         self.in_stream = StringIO()
         self.out_stream = StringIO()
-        self.wrapped_in_stream = StringIO()
-        self.wrapped_out_stream = StringIO()
 
         self.runnable = MagicMock()
         self.redirect = Redirect(
             self.in_stream,
             self.out_stream,
-            self.wrapped_in_stream,
-            self.wrapped_out_stream,
             self.runnable
         )
 
     def test_happy_spec_input(self):
         """
-        Tests that all input goes into the command
+        Tests that the command reads the input without it being copied
         """
         self.in_stream.write('for testing')
         self.in_stream.seek(0)
+        self.runnable.run = MagicMock(wraps=self.in_stream.read)
         with self.redirect:
-            self.redirect.run()
+            self.assertEqual(self.redirect.run(), 'for testing')
             self.runnable.run.assert_called_once()
-            self.assertEqual(self.wrapped_in_stream.getvalue(), 'for testing')
 
     def test_happy_spec_output(self):
         """
         Tests that all output goes from the command to our out_stream
         """
         self.runnable.run = MagicMock(
-            wraps=lambda: self.wrapped_out_stream.write('hi'))
+            wraps=lambda: self.out_stream.write('hi'))
 
         with self.redirect:
             self.redirect.run()
             self.runnable.run.assert_called_once()
             self.assertEqual(self.out_stream.getvalue(), 'hi')
 
-    @parameterized.expand({
-        (True, 0, 100, False),
-        (False, 0, 100, True),
-        (True, 0, 0, True)
-    })
-    def test_stream_is_empty(self,
-                             seekable: bool,
-                             curr_pos: int,
-                             final_pos: int,
-                             expected_ret_val: bool):
+    def test_output_flushed(self):
         """
-        Checks if the function stream_is_empty returns the right values
+        A file written by the command should be readable as soon as the
+        command has run, before the redirect is closed
         """
-        stream = MagicMock()
-
-        def mock_tell():
-            count = stream.tell.call_count
-            if count == 1:
-                return curr_pos
-
-            if count == 2:
-                return final_pos
-            raise RuntimeError('unexpected call')
-
-        stream.seekable = MagicMock(return_value=seekable)
-        stream.tell = MagicMock(side_effect=mock_tell)
-        self.assertEqual(
-            self.redirect.stream_is_empty(stream), expected_ret_val)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'out.txt')
+            out_file = open(path, 'w', encoding='utf-8')
+            self.runnable.run = MagicMock(
+                wraps=lambda: out_file.write('hi') and 0)
+            with Redirect(self.in_stream, out_file, self.runnable) as redirect:
+                redirect.run()
+                with open(path, encoding='utf-8') as written:
+                    self.assertEqual(written.read(), 'hi')
+            self.assertTrue(out_file.closed)
+
+    def test_close(self):
+        """
+        Closing the redirect should close the wrapped runnable and the streams
+        """
+        self.redirect.close()
+        self.runnable.close.assert_called_once_with()
+        self.assertTrue(self.in_stream.closed)
+        self.assertTrue(self.out_stream.closed)
+
+    @parameterized.expand([
+        ('to_stream', True),
+        ('to_file', False),
+    ])
+    def test_cancel(self, _: str, cancellable: bool):
+        """
+        Cancelling should reach the wrapped runnable, unless its output goes
+        to a file
+        """
+        redirect = Redirect(self.in_stream, self.out_stream, self.runnable,
+                            cancellable)
+        redirect.cancel()
+        self.assertEqual(redirect.cancelled, cancellable)
+        self.assertEqual(self.runnable.cancel.called, cancellable)
 
     def test_closed(self):
         """
@@ -41,7 +41,8 @@ class TestRedirectBuilder(unittest.TestCase):
     """
     def make_redirect_builder_with(self,
                                    in_stream: Optional[StringIO],
-                                   out_stream: Optional[StringIO]
+                                   out_stream: Optional[StringIO],
+                                   handles_bytes: bool = False
                                    ) -> Tuple[RedirectBuilder, MagicMock]:
         """
         Creates a redirect builder with the given input and output streams.
@@ -49,6 +50,7 @@ class TestRedirectBuilder(unittest.TestCase):
         Args:
             in_stream (Optional[StringIO]): The input stream to build with
             out_stream (Optional[StringIO]): The output stream to build with
+            handles_bytes (bool): Whether the mocked command works on bytes
 
         Returns:
             (Tuple[RedirectBuilder, MockedCommandBuilder])
@@ -60,6 +62,7 @@ class TestRedirectBuilder(unittest.TestCase):
         mock_command_builder.set_out_stream = MagicMock(
             wraps=lambda x: CommandBuilder.set_out_stream(mock_command_builder,
                                                           x))
+        mock_command_builder.handles_bytes.return_value = handles_bytes
         redirect_builder = RedirectBuilder(mock_command_builder)
         if in_stream is not None:
             redirect_builder.set_in_stream(in_stream)
@@ -101,7 +104,7 @@ class TestRedirectBuilder(unittest.TestCase):
         with patch('builtins.open', open_fn):
             redirect = redirect_builder.build()
             self.assertIsInstance(redirect, Redirect)
-            open_fn.assert_called_once_with('test_file')
+            open_fn.assert_called_once_with('test_file', 'r')
             self.assertNotEqual(redirect.in_stream, in_stream)
             self.assertEqual(redirect.out_stream, out_stream)
 
@@ -141,11 +144,27 @@ class TestRedirectBuilder(unittest.TestCase):
         with patch('builtins.open', open_fn):
             redirect = redirect_builder.build()
             self.assertIsInstance(redirect, Redirect)
-            open_fn.assert_any_call('in_file')
+            open_fn.assert_any_call('in_file', 'r')
             open_fn.assert_any_call('out_file', 'w')
             self.assertNotEqual(redirect.in_stream, in_stream)
             self.assertNotEqual(redirect.out_stream, out_stream)
 
+    def test_redirect_builder_opens_binary_files(self):
+        """
+        A command that works on bytes should be given the files to read and
+        write as bytes
+        """
+        redirect_builder, _ = self.make_redirect_builder_with(
+            StringIO(), StringIO(), handles_bytes=True)
+        redirect_builder.set_in_file("in_file").set_out_file("out_file")
+        open_fn = mock_open()
+
+        with patch('builtins.open', open_fn):
+            redirect_builder.build()
+            open_fn.assert_any_call('in_file', 'rb')
+            open_fn.assert_any_call('out_file', 'wb')
+            self.assertTrue(redirect_builder.handles_bytes())
+
     def test_happy_redirect_builder_propagates_setters_downards(self):
         """
         The other functions of RedirectBuilder, such as add_flag and add_option
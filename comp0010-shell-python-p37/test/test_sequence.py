@@ -0,0 +1,161 @@
+"""
+Tests the N-ary sequence and its builder
+"""
+import unittest
+from functools import partial
+from io import StringIO
+from typing import List, cast
+from unittest import mock
+
+from commands.base_command import BaseCommand
+from commands.builder import Builder
+from commands.sequence import Sequence
+from commands.sequence_builder import SequenceBuilder
+from errors.error_dsi import DeveloperSkillIssue
+from parse.raw_shell_parser import RawShellParser
+from parse.substitution_shell_parser import SubstitutionShellParser
+from python_shell import PythonShell
+
+LONG_SEQUENCE = 10000
+
+
+class TestSequence(unittest.TestCase):
+    """
+    Tests the sequence runnable
+    """
+
+    def setUp(self) -> None:
+        self.runnables = [mock.create_autospec(BaseCommand)
+                          for _ in range(3)]
+        self.sequence = Sequence(self.runnables)
+
+    def test_sequence_runs_in_order(self) -> None:
+        """
+        Every command should run once, in order
+        """
+        order: List[int] = []
+
+        def record(index: int) -> int:
+            order.append(index)
+            return 0
+
+        for index, runnable in enumerate(self.runnables):
+            runnable.run.side_effect = partial(record, index)
+        self.assertEqual(self.sequence.run(), 0)
+        self.assertEqual(order, [0, 1, 2])
+
+    def test_sequence_stops_at_error(self) -> None:
+        """
+        Commands after one that raises should not run
+        """
+        self.runnables[1].run.side_effect = DeveloperSkillIssue('failed')
+        with self.assertRaises(DeveloperSkillIssue):
+            self.sequence.run()
+        self.runnables[2].run.assert_not_called()
+
+    def test_sequence_close(self) -> None:
+        """
+        Closing the sequence should close every command
+        """
+        self.sequence.close()
+        for runnable in self.runnables:
+            runnable.close.assert_called_once_with()
+
+
+class TestSequenceBuilder(unittest.TestCase):
+    """
+    Tests the sequence builder
+    """
+
+    def setUp(self) -> None:
+        self.builders = [mock.create_autospec(Builder) for _ in range(3)]
+        for builder in self.builders:
+            builder.set_in_stream.return_value = builder
+            builder.set_out_stream.return_value = builder
+
+    def test_sequence_builder_streams(self) -> None:
+        """
+        Only the first command should read the input stream, and every
+        command should write to the output stream
+        """
+        in_stream, out_stream = StringIO(), StringIO()
+        sequence = (SequenceBuilder(self.builders).set_in_stream(in_stream)
+                    .set_out_stream(out_stream).build())
+        self.assertIsInstance(sequence, Sequence)
+
+        reads = [builder.set_in_stream.call_args[0][0]
+                 for builder in self.builders]
+        self.assertIs(reads[0], in_stream)
+        self.assertNotIn(in_stream, reads[1:])
+        for builder in self.builders:
+            builder.set_out_stream.assert_called_once_with(out_stream)
+
+    def test_sequence_builder_flattens(self) -> None:
+        """
+        Nested sequence builders should be flattened into one sequence, but
+        other builders should be kept
+        """
+        inner = SequenceBuilder(self.builders[:2])
+        outer = SequenceBuilder([inner, self.builders[2]])
+        self.assertEqual(outer.builders, self.builders)
+
+    def test_sequence_builder_too_short(self) -> None:
+        """
+        A sequence needs at least two commands
+        """
+        with self.assertRaises(DeveloperSkillIssue):
+            SequenceBuilder([])
+
+    def test_sequence_builder_clone(self) -> None:
+        """
+        Cloning should clone every command
+        """
+        clone = SequenceBuilder(self.builders).clone()
+        self.assertEqual(clone.builders,
+                         [builder.clone.return_value
+                          for builder in self.builders])
+
+
+class TestLongSequences(unittest.TestCase):
+    """
+    Tests running sequences too long to run recursively, like generated
+    scripts
+    """
+
+    def run_shell(self, cmdline: str) -> str:
+        """
+        Runs a command line, and returns its output
+        """
+        out_stream = StringIO()
+        PythonShell(StringIO(), out_stream).eval(cmdline)
+        return out_stream.getvalue()
+
+    def test_long_simple_sequence(self) -> None:
+        """
+        A simple sequence should be parsed by the fast path, and run
+        """
+        cmdline = '; '.join(f'echo {i}' for i in range(LONG_SEQUENCE))
+        builder = RawShellParser().parse(cmdline)
+        self.assertIsInstance(builder, SequenceBuilder)
+        builder = cast(SequenceBuilder, builder)
+        self.assertEqual(len(builder.builders), LONG_SEQUENCE)
+        self.assertEqual(self.run_shell(cmdline),
+                         ''.join(f'{i}\n' for i in range(LONG_SEQUENCE)))
+
+    def test_long_quoted_sequence(self) -> None:
+        """
+        A sequence that needs ANTLR should be flattened by the visitors
+        """
+        cmdline = "echo 'a' | cat; " + '; '.join(
+            f'echo "{i}"' for i in range(LONG_SEQUENCE - 1))
+        builder = SubstitutionShellParser().parse(cmdline)
+        self.assertIsInstance(builder, SequenceBuilder)
+        builder = cast(SequenceBuilder, builder)
+        self.assertEqual(len(builder.builders), LONG_SEQUENCE)
+        self.assertEqual(
+            self.run_shell(cmdline),
+            'a\n' + ''.join(f'{i}\n' for i in range(LONG_SEQUENCE - 1)))
+
+
+if __name__ == "__main__":
+    unittest.main()
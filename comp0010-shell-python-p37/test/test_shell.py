@@ -0,0 +1,264 @@
+"""
+Tests the sh entry point
+"""
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import unittest
+from io import StringIO
+from typing import IO, List, cast
+from unittest.mock import patch
+
+from parameterized import parameterized
+
+import shell
+from shell import (CACHE_SUBSTITUTIONS_FLAG, INTERRUPTED_EXIT_CODE,
+                   STAGE_PROCS_FLAG, STARTUP_PROFILE_FLAG, Arguments, main,
+                   parse_arguments)
+
+SRC_DIR = os.path.dirname(os.path.abspath(shell.__file__))
+
+# Reports which modules running a simple command line imported
+CHILD_SCRIPT = '''
+import sys
+import shell
+shell.main(['-c', 'echo hello'])
+print(sorted(name for name in sys.modules
+             if name.split('.')[0] in ('antlr4', 'readline', 'argparse')))
+'''
+
+SCRIPT = '''#!/bin/sh
+echo one
+
+# a comment
+echo two | cat
+cat missing
+exit
+echo never
+'''
+
+
+class TestShellArguments(unittest.TestCase):
+    """
+    Tests parsing the arguments of the sh entry point
+    """
+
+    @parameterized.expand([
+        ([], Arguments()),
+        (['-c', 'echo a'], Arguments(command='echo a')),
+        (['-s'], Arguments(read_stdin=True)),
+        (['script.sh'], Arguments(script='script.sh')),
+        ([STARTUP_PROFILE_FLAG], Arguments(profile=True)),
+        ([STARTUP_PROFILE_FLAG, '-c', 'echo a'],
+         Arguments(profile=True, command='echo a')),
+        ([STARTUP_PROFILE_FLAG, 'script.sh'],
+         Arguments(profile=True, script='script.sh')),
+        ([CACHE_SUBSTITUTIONS_FLAG, '-s'],
+         Arguments(read_stdin=True, cache_substitutions=True)),
+        ([CACHE_SUBSTITUTIONS_FLAG, STARTUP_PROFILE_FLAG],
+         Arguments(profile=True, cache_substitutions=True)),
+        ([STAGE_PROCS_FLAG, '-c', 'echo a'],
+         Arguments(command='echo a', stage_processes=True)),
+        ([STAGE_PROCS_FLAG, CACHE_SUBSTITUTIONS_FLAG, 'script.sh'],
+         Arguments(script='script.sh', cache_substitutions=True,
+                   stage_processes=True)),
+        (['--serve', 'shell.sock'], Arguments(serve='shell.sock')),
+        (['--serve', 'shell.sock', '--workers', '8'],
+         Arguments(serve='shell.sock', workers=8)),
+        (['--client', 'shell.sock', '-c', 'echo a'],
+         Arguments(client='shell.sock', command='echo a')),
+    ])
+    def test_valid_arguments(self, args: list, expected: Arguments) -> None:
+        """
+        Valid arguments should be parsed
+        """
+        self.assertEqual(parse_arguments(args), expected)
+
+    @parameterized.expand([
+        (['-c'],),
+        (['-c', 'echo a', 'b'],),
+        (['-x', 'echo a'],),
+        (['-x'],),
+        (['-s', 'script.sh'],),
+        (['script.sh', 'other.sh'],),
+        (['-c', 'echo a', STARTUP_PROFILE_FLAG],),
+        ([STARTUP_PROFILE_FLAG, STARTUP_PROFILE_FLAG],),
+        ([CACHE_SUBSTITUTIONS_FLAG, '-s', CACHE_SUBSTITUTIONS_FLAG],),
+        ([STAGE_PROCS_FLAG, STAGE_PROCS_FLAG],),
+        (['--serve'],),
+        (['--serve', 'shell.sock', '--workers'],),
+        (['--serve', 'shell.sock', '--other', '8'],),
+        (['--serve', 'shell.sock', '--workers', '0'],),
+        (['--client', 'shell.sock'],),
+        (['--client', 'shell.sock', '-s', 'echo a'],),
+    ])
+    def test_invalid_arguments(self, args: list) -> None:
+        """
+        Invalid arguments should be rejected like before
+        """
+        with self.assertRaises(ValueError):
+            parse_arguments(args)
+
+    def test_interactive(self) -> None:
+        """
+        The shell should only be interactive without -c, -s or a script
+        """
+        self.assertTrue(Arguments(profile=True).interactive)
+        self.assertFalse(Arguments(command='echo').interactive)
+        self.assertFalse(Arguments(read_stdin=True).interactive)
+        self.assertFalse(Arguments(script='script.sh').interactive)
+        self.assertFalse(Arguments(serve='shell.sock').interactive)
+
+
+class TestShellModes(unittest.TestCase):
+    """
+    Tests running the entry point in its non-interactive modes
+    """
+
+    def setUp(self) -> None:
+        self.directory = tempfile.TemporaryDirectory()
+        self.stderr = ''
+        self.path = os.path.join(self.directory.name, 'script.sh')
+        with open(self.path, 'w', encoding='utf-8') as script:
+            script.write(SCRIPT)
+
+    def tearDown(self) -> None:
+        self.directory.cleanup()
+
+    def run_main(self, args: list, stdin: str = '') -> str:
+        """
+        Runs the entry point, and returns what it wrote to stdout
+        """
+        with patch('sys.stdout', new_callable=StringIO) as stdout, \
+                patch('sys.stdin', StringIO(stdin)), \
+                patch('sys.stderr', new_callable=StringIO) as stderr:
+            main(args)
+            self.stderr = stderr.getvalue()
+            return stdout.getvalue()
+
+    def test_script(self) -> None:
+        """
+        Every line of a script should run in order until exit, skipping
+        blank lines and comments, and carrying on after errors
+        """
+        self.assertEqual(self.run_main([self.path]), 'one\ntwo\n')
+
+    def test_stdin(self) -> None:
+        """
+        sh -s should run the lines read from stdin
+        """
+        self.assertEqual(self.run_main(['-s'], SCRIPT), 'one\ntwo\n')
+
+    def test_cached_substitutions(self) -> None:
+        """
+        Substitutions should be cached across the lines of a session, and
+        the hit rate reported when it ends
+        """
+        hosts = os.path.join(self.directory.name, 'hosts.txt')
+        with open(hosts, 'w', encoding='utf-8') as hosts_file:
+            hosts_file.write('a\nb\n')
+        script = f'echo `cat {hosts}`\n' * 3
+        self.assertEqual(
+            self.run_main([CACHE_SUBSTITUTIONS_FLAG, '-s'], script),
+            'a b\n' * 3)
+        self.assertIn('substitution cache: 2 hits, 1 misses', self.stderr)
+
+    def test_stage_processes(self) -> None:
+        """
+        Pipelines should give the same output with their stages run in
+        processes
+        """
+        script = 'echo one two | grep one | sed s/two/2/ | cut -b 5\n' \
+            'echo b a | sed "s/ /\\n/" | sort | uniq\n'
+        expected = self.run_main(['-s'], script)
+        self.assertEqual(expected, '2a\nb\n')
+        self.assertEqual(self.run_main([STAGE_PROCS_FLAG, '-s'], script),
+                         expected)
+
+    def test_missing_script(self) -> None:
+        """
+        A script that cannot be opened should exit with an error
+        """
+        with self.assertRaises(SystemExit) as context:
+            self.run_main([os.path.join(self.directory.name, 'missing')])
+        self.assertIn('No such file or directory', str(context.exception))
+
+    def test_simple_command_is_lazy(self) -> None:
+        """
+        A simple sh -c should not import ANTLR, readline or argparse
+        """
+        env = dict(os.environ, PYTHONPATH=SRC_DIR)
+        output = subprocess.run(
+            [sys.executable, '-c', CHILD_SCRIPT], env=env, check=True,
+            stdout=subprocess.PIPE, universal_newlines=True).stdout
+        self.assertEqual(output, 'hello\n[]\n')
+
+    def test_output_is_streamed(self) -> None:
+        """
+        Output should reach stdout while the command line is still running,
+        and the shell should exit quietly once nothing reads it any more
+        """
+        env = dict(os.environ, PYTHONPATH=SRC_DIR)
+        with subprocess.Popen(
+                [sys.executable, os.path.join(SRC_DIR, 'shell.py'), '-c',
+                 'cat /dev/zero'], env=env, stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE) as process:
+            stdout = cast(IO[bytes], process.stdout)
+            self.assertEqual(stdout.read(16), b'\0' * 16)
+            stdout.close()
+            stderr = cast(IO[bytes], process.stderr).read()
+            self.assertEqual(process.wait(timeout=30), 1)
+        self.assertEqual(stderr, b'')
+
+    def test_stdin_is_streamed(self) -> None:
+        """
+        sh -c should stream its own stdin to commands with nothing else to
+        read, passing on each line before the next is written
+        """
+        env = dict(os.environ, PYTHONPATH=SRC_DIR)
+        with subprocess.Popen(
+                [sys.executable, os.path.join(SRC_DIR, 'shell.py'), '-c',
+                 'grep x'], env=env, stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE) as process:
+            stdin = cast(IO[bytes], process.stdin)
+            stdout = cast(IO[bytes], process.stdout)
+            stdin.write(b'a\nxb\n')
+            stdin.flush()
+            self.assertEqual(stdout.readline(), b'xb\n')
+            stdin.write(b'xc\n')
+            stdin.close()
+            self.assertEqual(stdout.read(), b'xc\n')
+            self.assertEqual(process.wait(timeout=30), 0)
+
+    @parameterized.expand([
+        ('tail', 'tail -f {}', []),
+        ('pipeline', 'tail -f {} | grep a | cat', []),
+        ('stage_processes', 'tail -f {} | grep a | cat', [STAGE_PROCS_FLAG]),
+    ])
+    def test_interrupt_exits_quietly(
+        self, _: str, cmdline: str, flags: List[str]
+    ) -> None:
+        """
+        ^C should stop a command line that would never end, and exit quietly
+        with the exit code of SIGINT
+        """
+        path = os.path.join(self.directory.name, 'log.txt')
+        with open(path, 'w', encoding='utf-8') as file:
+            file.write('a\n')
+        env = dict(os.environ, PYTHONPATH=SRC_DIR)
+        with subprocess.Popen(
+                [sys.executable, os.path.join(SRC_DIR, 'shell.py'), *flags,
+                 '-c', cmdline.format(path)], env=env,
+                stdout=subprocess.PIPE, stderr=subprocess.PIPE) as process:
+            stdout = cast(IO[bytes], process.stdout)
+            self.assertEqual(stdout.readline(), b'a\n')
+            process.send_signal(signal.SIGINT)
+            stderr = cast(IO[bytes], process.stderr).read()
+            self.assertEqual(process.wait(timeout=30), INTERRUPTED_EXIT_CODE)
+        self.assertEqual(stderr, b'')
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,260 @@
+"""
+Tests the sh --serve daemon and its client
+"""
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from io import StringIO
+from typing import List, Tuple
+from unittest.mock import patch
+
+import shell_server
+from shell_client import CONNECTION_FAILED, run_client
+from shell_server import handle_request
+
+SHELL = os.path.join(os.path.dirname(os.path.abspath(shell_server.__file__)),
+                     'shell.py')
+
+
+def request_frames(request: bytes) -> List[dict]:
+    """
+    Sends a raw request to handle_request over a socket pair, and returns the
+    frames it answers with
+    """
+    client, server = socket.socketpair()
+    with client, server:
+        client.sendall(request)
+        handle_request(server)
+        server.shutdown(socket.SHUT_WR)
+        with client.makefile('rb') as reader:
+            return [json.loads(line) for line in reader]
+
+
+class TestHandleRequest(unittest.TestCase):
+    """
+    Tests evaluating a request in a worker
+    """
+
+    def setUp(self) -> None:
+        self.directory = tempfile.TemporaryDirectory()
+        self.cwd = os.getcwd()
+
+    def tearDown(self) -> None:
+        os.chdir(self.cwd)
+        self.directory.cleanup()
+
+    def send(self, cmdline: str) -> List[dict]:
+        """
+        Sends a request to run cmdline in the temporary directory
+        """
+        request = {'cmdline': cmdline, 'cwd': self.directory.name}
+        return request_frames(json.dumps(request).encode() + b'\n')
+
+    def test_output_and_exit_code(self) -> None:
+        """
+        Output should be sent as stdout frames, followed by the exit code
+        """
+        self.assertEqual(self.send('echo hello'), [
+            {'stream': 'stdout', 'data': 'hello\n'},
+            {'exit': 0},
+        ])
+
+    def test_error(self) -> None:
+        """
+        Errors should be sent as stderr frames, with a failing exit code
+        """
+        frames = self.send('cat missing')
+        self.assertEqual(frames[0]['stream'], 'stderr')
+        self.assertIn('missing', frames[0]['data'])
+        self.assertEqual(frames[-1], {'exit': 1})
+
+    def test_exit(self) -> None:
+        """
+        exit should only end the request
+        """
+        self.assertEqual(self.send('exit'), [{'exit': 0}])
+
+    def test_working_directory_is_isolated(self) -> None:
+        """
+        Requests should run in their own working directory, and cd should not
+        leak into the worker
+        """
+        os.mkdir(os.path.join(self.directory.name, 'inner'))
+        frames = self.send('pwd; cd inner; pwd')
+        # Output is sent as it is written, which may take several frames
+        output = ''.join(frame.get('data', '') for frame in frames)
+        self.assertEqual(output, '{0}\n{0}/inner\n'.format(
+            os.path.realpath(self.directory.name)))
+        self.assertEqual(os.getcwd(), self.cwd)
+
+    def test_missing_working_directory(self) -> None:
+        """
+        A request for a directory that does not exist should fail cleanly
+        """
+        request = {'cmdline': 'pwd', 'cwd': os.path.join(
+            self.directory.name, 'missing')}
+        frames = request_frames(json.dumps(request).encode() + b'\n')
+        self.assertEqual(frames[0]['stream'], 'stderr')
+        self.assertEqual(frames[-1], {'exit': 1})
+        self.assertEqual(os.getcwd(), self.cwd)
+
+
+class TestServe(unittest.TestCase):
+    """
+    Tests the daemon's main loop in this process
+    """
+
+    def test_stop_after_worker_reaped(self) -> None:
+        """
+        A worker reaped just before the daemon is stopped should not stop the
+        daemon from removing its socket
+        """
+        reaped = subprocess.Popen([sys.executable, '-c', ''])
+        reaped.wait()
+        handlers = [signal.getsignal(signal.SIGTERM),
+                    signal.getsignal(signal.SIGINT)]
+        self.addCleanup(signal.signal, signal.SIGTERM, handlers[0])
+        self.addCleanup(signal.signal, signal.SIGINT, handlers[1])
+        with tempfile.TemporaryDirectory() as directory, \
+                patch('shell_server.warm_up_shell'), \
+                patch('shell_server.fork_worker', return_value=reaped.pid), \
+                patch('os.wait', side_effect=shell_server._Stop):
+            path = os.path.join(directory, 'shell.sock')
+            shell_server.serve(path, workers=1)
+            self.assertFalse(os.path.exists(path))
+
+
+class TestShellServer(unittest.TestCase):
+    """
+    Tests a running daemon through the client
+    """
+
+    directory: 'tempfile.TemporaryDirectory[str]'
+    path: str
+    server: 'subprocess.Popen[bytes]'
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.directory = tempfile.TemporaryDirectory()
+        cls.path = os.path.join(cls.directory.name, 'shell.sock')
+        cls.server = subprocess.Popen(
+            [sys.executable, SHELL, '--serve', cls.path, '--workers', '2'])
+        deadline = time.monotonic() + 30
+        while not os.path.exists(cls.path):
+            if time.monotonic() > deadline or cls.server.poll() is not None:
+                raise RuntimeError('the daemon did not start')
+            time.sleep(0.05)
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        cls.server.send_signal(signal.SIGTERM)
+        cls.server.wait(30)
+        cls.directory.cleanup()
+
+    def run_client(self, cmdline: str) -> Tuple[int, str, str]:
+        """
+        Runs cmdline through the daemon
+
+        Returns:
+            Tuple[int, str, str]: The exit code, stdout and stderr
+        """
+        with patch('sys.stdout', new_callable=StringIO) as stdout, \
+                patch('sys.stderr', new_callable=StringIO) as stderr:
+            exit_code = run_client(self.path, cmdline)
+            return exit_code, stdout.getvalue(), stderr.getvalue()
+
+    def test_client(self) -> None:
+        """
+        The client should print the output and return the exit code
+        """
+        self.assertEqual(self.run_client('echo hello | cat'),
+                         (0, 'hello\n', ''))
+        exit_code, stdout, stderr = self.run_client('cat missing')
+        self.assertEqual((exit_code, stdout), (1, ''))
+        self.assertIn('missing', stderr)
+
+    def test_concurrent_requests(self) -> None:
+        """
+        Requests from many clients at once should all be answered
+        """
+        with ThreadPoolExecutor(8) as pool:
+            outputs = list(pool.map(lambda i: self.run_client(f'echo {i}'),
+                                    range(32)))
+        self.assertEqual(outputs, [(0, f'{i}\n', '') for i in range(32)])
+
+    def test_bad_request(self) -> None:
+        """
+        A bad request should not take the worker down
+        """
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as connection:
+            connection.connect(self.path)
+            connection.sendall(b'not json\n')
+            self.assertEqual(connection.recv(1), b'')
+        self.assertEqual(self.run_client('echo ok'), (0, 'ok\n', ''))
+
+    def test_command_line_client(self) -> None:
+        """
+        sh --client should exit with the exit code of the command line
+        """
+        result = subprocess.run(
+            [sys.executable, SHELL, '--client', self.path, '-c', 'echo hi'],
+            stdout=subprocess.PIPE, check=False)
+        self.assertEqual((result.returncode, result.stdout), (0, b'hi\n'))
+
+    def test_command_line_client_invalid_utf8(self) -> None:
+        """
+        sh --client should print bytes that are not valid UTF-8 as they were
+        read, like sh -c, even where stdout would reject them
+        """
+        path = os.path.join(self.directory.name, 'latin1.txt')
+        with open(path, 'wb') as file:
+            file.write(b'caf\xe9\n')
+        result = subprocess.run(
+            [sys.executable, SHELL, '--client', self.path, '-c',
+             f'cat {path}'],
+            stdout=subprocess.PIPE, check=False,
+            env={**os.environ, 'PYTHONIOENCODING': 'utf-8'})
+        self.assertEqual((result.returncode, result.stdout), (0, b'caf\xe9\n'))
+
+    def test_hang_up_cancels(self) -> None:
+        """
+        A client hanging up should cancel a command line that would never
+        end, freeing its worker for the next request
+        """
+        path = os.path.join(self.directory.name, 'log.txt')
+        with open(path, 'w', encoding='utf-8') as file:
+            file.write('a\n')
+        request = {'cmdline': f'tail -f {path}', 'cwd': self.directory.name}
+        # Every worker is kept busy, so the next request needs one to be freed
+        for _ in range(2):
+            with socket.socket(socket.AF_UNIX,
+                               socket.SOCK_STREAM) as connection:
+                connection.connect(self.path)
+                connection.sendall(json.dumps(request).encode() + b'\n')
+                with connection.makefile('rb') as reader:
+                    self.assertEqual(json.loads(reader.readline()),
+                                     {'stream': 'stdout', 'data': 'a\n'})
+        result = subprocess.run(
+            [sys.executable, SHELL, '--client', self.path, '-c', 'echo ok'],
+            stdout=subprocess.PIPE, check=False, timeout=30)
+        self.assertEqual((result.returncode, result.stdout), (0, b'ok\n'))
+
+    def test_no_daemon(self) -> None:
+        """
+        The client should fail cleanly if there is no daemon
+        """
+        with patch('sys.stderr', new_callable=StringIO) as stderr:
+            exit_code = run_client(self.path + '.missing', 'echo')
+        self.assertEqual(exit_code, CONNECTION_FAILED)
+        self.assertIn('cannot reach', stderr.getvalue())
+
+
+if __name__ == "__main__":
+    unittest.main()
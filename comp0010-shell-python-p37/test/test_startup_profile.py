@@ -0,0 +1,100 @@
+"""
+Tests the startup profile
+"""
+import os
+import sys
+import tempfile
+import unittest
+
+from startup_profile import StartupProfile
+
+
+class TestStartupProfile(unittest.TestCase):
+    """
+    Tests timing imports and phases
+    """
+
+    def setUp(self) -> None:
+        self.directory = tempfile.TemporaryDirectory()
+        sys.path.insert(0, self.directory.name)
+        self.profile = StartupProfile()
+
+    def tearDown(self) -> None:
+        self.profile.uninstall()
+        sys.path.remove(self.directory.name)
+        for name in ('profiled_outer', 'profiled_inner'):
+            sys.modules.pop(name, None)
+        self.directory.cleanup()
+
+    def write_module(self, name: str, source: str) -> None:
+        """
+        Writes a module to the temporary directory
+        """
+        with open(os.path.join(self.directory.name, name + '.py'), 'w',
+                  encoding='utf-8') as module_file:
+            module_file.write(source)
+
+    def test_nested_imports(self) -> None:
+        """
+        Imports should be recorded innermost first, with the time of inner
+        imports excluded from the self time of outer ones
+        """
+        self.write_module('profiled_inner', 'VALUE = 1\n')
+        self.write_module('profiled_outer',
+                          'import profiled_inner\nVALUE = 2\n')
+        self.profile.install()
+        # pylint: disable=import-outside-toplevel,import-error
+        import profiled_outer  # type: ignore
+        self.assertEqual(profiled_outer.VALUE, 2)
+
+        names = [record.name for record in self.profile.imports]
+        self.assertEqual(names, ['profiled_inner', 'profiled_outer'])
+        inner, outer = self.profile.imports
+        self.assertEqual((inner.depth, outer.depth), (1, 0))
+        self.assertLessEqual(outer.self_time, outer.total_time)
+        self.assertGreaterEqual(outer.total_time, inner.total_time)
+        self.assertEqual(self.profile.child_times, [])
+
+    def test_uninstalled_profile_does_not_time_imports(self) -> None:
+        """
+        Imports should only be timed while the profile is installed
+        """
+        self.write_module('profiled_inner', 'VALUE = 1\n')
+        self.profile.install()
+        self.profile.uninstall()
+        # pylint: disable=import-outside-toplevel,import-error
+        import profiled_inner  # type: ignore
+        self.assertEqual(profiled_inner.VALUE, 1)
+        self.assertEqual(self.profile.imports, [])
+
+    def test_failed_import_is_recorded(self) -> None:
+        """
+        A module that fails to import should not leave the profile unbalanced
+        """
+        self.write_module('profiled_inner', 'raise ValueError\n')
+        self.profile.install()
+        with self.assertRaises(ValueError):
+            # pylint: disable=import-outside-toplevel,import-error
+            import profiled_inner  # type: ignore # noqa: F401
+        self.assertEqual(self.profile.child_times, [])
+        self.assertEqual([record.name for record in self.profile.imports],
+                         ['profiled_inner'])
+
+    def test_report(self) -> None:
+        """
+        The report should list every import and phase
+        """
+        self.write_module('profiled_inner', 'VALUE = 1\n')
+        self.profile.install()
+        with self.profile.phase('import'):
+            # pylint: disable=import-outside-toplevel,import-error
+            import profiled_inner  # type: ignore # noqa: F401
+        report = self.profile.format_report()
+        self.assertTrue(report.endswith('\n'))
+        self.assertRegex(report, r'\d+\.\d{2} \| +\d+\.\d{2} \| '
+                                 r'profiled_inner\n')
+        self.assertRegex(report, r'\d+\.\d{2} \| phase import\n')
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,156 @@
+"""
+Tests the stream that command lines read the shell's stdin from
+"""
+import os
+import pty
+import unittest
+from io import StringIO
+from typing import cast
+from unittest.mock import patch
+
+from parameterized import parameterized
+
+from commands.base_command import BaseCommand
+from commands.catcommand import CAT
+from commands.grepcommand import Grep
+from commands.process_stage import ProcessStage
+from parse.raw_shell_parser import RawShellParser
+from python_shell import PythonShell
+from stdin_source import StdinSource, attach_stdin
+
+
+class TestStdinSource(unittest.TestCase):
+    """
+    Tests the StdinSource class and attach_stdin()
+    """
+
+    def setUp(self) -> None:
+        self.read_fd, self.write_fd = os.pipe()
+
+    def tearDown(self) -> None:
+        for fd in (self.read_fd, self.write_fd):
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+
+    def write(self, data: bytes) -> None:
+        """
+        Writes data to the pipe, then closes it
+        """
+        os.write(self.write_fd, data)
+        os.close(self.write_fd)
+
+    def test_not_a_file(self) -> None:
+        """
+        A stream that is not a file should not be attached
+        """
+        self.assertIsInstance(attach_stdin(StringIO('a\n')), StringIO)
+        self.assertIsInstance(attach_stdin(None), StringIO)
+
+    def test_terminal(self) -> None:
+        """
+        A terminal should not be attached, so commands never wait for the
+        user
+        """
+        leader, follower = pty.openpty()
+        try:
+            with open(follower, 'r', closefd=False) as stdin:
+                self.assertIsInstance(attach_stdin(stdin), StringIO)
+        finally:
+            os.close(leader)
+            os.close(follower)
+
+    def test_pipe(self) -> None:
+        """
+        A pipe should be attached and read as a stream
+        """
+        with open(self.read_fd, 'r', closefd=False) as stdin:
+            source = cast(StdinSource, attach_stdin(stdin))
+        self.assertIsInstance(source, StdinSource)
+        self.assertFalse(source.seekable())
+        self.write(b'a\nb\n')
+        self.assertFalse(source.at_eof())
+        self.assertEqual(source.readline(), 'a\n')
+        self.assertEqual(source.read(), 'b\n')
+        self.assertTrue(source.at_eof())
+        source.close()
+
+    def test_close_leaves_fd_open(self) -> None:
+        """
+        Closing the source should leave the shell's stdin open
+        """
+        StdinSource(self.read_fd).close()
+        os.fstat(self.read_fd)
+
+    def test_grep_streams(self) -> None:
+        """
+        A command with nothing else to read should read the shell's stdin
+        """
+        self.write(b'a\nxb\nc\n')
+        with StdinSource(self.read_fd) as source:
+            output = StringIO()
+            Grep(cast(StringIO, source), output, [], ['x']).run()
+        self.assertEqual(output.getvalue(), 'xb\n')
+
+    def test_cat_reads_files(self) -> None:
+        """
+        cat given files should read them, rather than wait for the shell's
+        stdin, which nothing may ever write to
+        """
+        path = os.path.join(os.path.dirname(__file__), 'test_stdin_source.py')
+        with StdinSource(self.read_fd) as source:
+            output = StringIO()
+            CAT(cast(StringIO, source), output, [], [path]).run()
+        with open(path, encoding='utf-8') as file:
+            self.assertEqual(output.getvalue(), file.read())
+
+    @parameterized.expand([
+        ('cat',), ('sort',), ('uniq',), ('head',), ('tail',), ('grep a',),
+        ('sed s/a/b/',), ('cut -b 1',),
+    ])
+    def test_empty_stdin_is_empty_input(self, cmdline: str) -> None:
+        """
+        Commands reading the shell's stdin should read no lines once it
+        ends, rather than report that they have no input, like in other
+        shells
+        """
+        self.write(b'')
+        with StdinSource(self.read_fd) as source, \
+                patch('sys.stderr', new_callable=StringIO) as stderr:
+            output = StringIO()
+            exit_code = PythonShell(cast(StringIO, source), output,
+                                    rewind_output=False).eval(cmdline)
+        self.assertEqual((exit_code, output.getvalue(), stderr.getvalue()),
+                         (0, '', ''))
+
+    @parameterized.expand([('grep a',), ('sed s/a/b/',), ('cut -b 1',)])
+    def test_empty_stdin_in_a_process(self, cmdline: str) -> None:
+        """
+        Commands run in their own processes should read the shell's stdin
+        through their pipe the same way
+        """
+        self.write(b'')
+        with StdinSource(self.read_fd) as source:
+            output = StringIO()
+            command = RawShellParser().parse(cmdline) \
+                .set_in_stream(cast(StringIO, source)) \
+                .set_out_stream(output).build()
+            with ProcessStage(cast(BaseCommand, command)) as stage:
+                self.assertEqual(stage.run(), 0)
+                self.assertEqual(output.getvalue(), '')
+
+    def test_empty_stdin_is_counted(self) -> None:
+        """
+        wc should count the lines of the shell's stdin even if there are none
+        """
+        self.write(b'')
+        with StdinSource(self.read_fd) as source:
+            output = StringIO()
+            PythonShell(cast(StringIO, source), output,
+                        rewind_output=False).eval('wc -l')
+        self.assertEqual(output.getvalue().split(), ['0'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,234 @@
+"""
+Tests caching the output of substitutions until what they read changes
+"""
+import os
+import tempfile
+import unittest
+from typing import List, Sequence
+
+from parameterized import parameterized
+
+from commands.read_tracker import ReadTracker, record_read
+from errors.shell_errors import BaseShellError
+from parse.parse_tree_factory import create_parse_tree
+from parse.substitution_cache import SubstitutionCache
+from parse.substitution_visitor import SubstitutionVisitor
+
+
+class TestReadTracker(unittest.TestCase):
+    """
+    Tests recording what is read
+    """
+
+    def test_only_active_tracker_records(self) -> None:
+        """
+        Reads should be recorded by the innermost active tracker only
+        """
+        outer, inner = ReadTracker(), ReadTracker()
+        record_read('ignored')
+        with outer:
+            record_read('outer')
+            with inner:
+                record_read('inner')
+            record_read('outer_again')
+        self.assertEqual(set(outer.reads), {os.path.abspath('outer'),
+                                            os.path.abspath('outer_again')})
+        self.assertEqual(set(inner.reads), {os.path.abspath('inner')})
+
+
+class TestSubstitutionCache(unittest.TestCase):
+    """
+    Tests the substitution cache through the SubstitutionVisitor
+    """
+
+    def setUp(self) -> None:
+        self.directory = tempfile.TemporaryDirectory()
+        self.cwd = os.getcwd()
+        os.chdir(self.directory.name)
+        os.mkdir('inner')
+        self.write('hosts.txt', 'a\nb\n')
+        self.write(os.path.join('inner', 'hosts.txt'), 'c\n')
+        self.cache = SubstitutionCache(maxsize=4)
+
+    def tearDown(self) -> None:
+        os.chdir(self.cwd)
+        self.directory.cleanup()
+
+    @staticmethod
+    def write(path: str, content: str) -> None:
+        """
+        Writes content to the file at path
+        """
+        with open(path, 'w', encoding='utf-8') as file:
+            file.write(content)
+
+    def substitute(self, cmdline: str,
+                   max_workers: int = 1) -> List[Sequence[str]]:
+        """
+        Runs every substitution in cmdline, using the cache, and returns the
+        words they output
+        """
+        return list(SubstitutionVisitor(max_workers, self.cache).visit(
+            create_parse_tree(cmdline)).values())
+
+    def assertCounts(self, hits: int, misses: int) -> None:
+        """
+        Checks the hit and miss counters of the cache
+        """
+        stats = self.cache.stats()
+        self.assertEqual((stats.hits, stats.misses), (hits, misses))
+
+    @parameterized.expand([
+        ('cat', 'echo `cat hosts.txt`', ('a', 'b')),
+        ('input_redirect', 'echo `cat < hosts.txt`', ('a', 'b')),
+        ('sort', 'echo `sort -r hosts.txt`', ('b', 'a')),
+        ('glob', 'echo `cat *.txt`', ('a', 'b')),
+        ('find', 'echo `find -name hosts.txt`',
+         ('./hosts.txt', './inner/hosts.txt')),
+    ])
+    def test_repeated_substitution_is_cached(
+        self, _: str, cmdline: str, expected: Sequence[str]
+    ) -> None:
+        """
+        A substitution should only run again once something it read changed
+        """
+        self.assertEqual(self.substitute(cmdline), [expected])
+        self.assertEqual(self.substitute(cmdline), [expected])
+        self.assertCounts(1, 1)
+
+    def test_changed_file_invalidates(self) -> None:
+        """
+        Changing the size or modification time of a file read should
+        invalidate the output
+        """
+        self.assertEqual(self.substitute('echo `cat hosts.txt`'),
+                         [('a', 'b')])
+        self.write('hosts.txt', 'a\nb\nc\n')
+        self.assertEqual(self.substitute('echo `cat hosts.txt`'),
+                         [('a', 'b', 'c')])
+        self.write('hosts.txt', 'x\ny\nz\n')
+        os.utime('hosts.txt', ns=(0, 0))
+        self.assertEqual(self.substitute('echo `cat hosts.txt`'),
+                         [('x', 'y', 'z')])
+        self.assertCounts(0, 3)
+        self.assertEqual(self.cache.stats().invalidations, 2)
+
+    def test_pipeline_reads_invalidate(self) -> None:
+        """
+        Files read by the stages of a pipeline, which run on other threads,
+        should be tracked too
+        """
+        cmdline = 'echo `cat hosts.txt | sort -r | cat`'
+        self.assertEqual(self.substitute(cmdline), [('b', 'a')])
+        self.write('hosts.txt', 'a\nc\n')
+        self.assertEqual(self.substitute(cmdline), [('c', 'a')])
+        self.assertEqual(self.cache.stats().invalidations, 1)
+
+    @parameterized.expand([
+        ('ls', 'echo `ls inner`'),
+        ('find', 'echo `find inner`'),
+        ('glob', 'echo `echo inner/*`'),
+    ])
+    def test_changed_directory_invalidates(
+        self, _: str, cmdline: str
+    ) -> None:
+        """
+        Adding a file to a directory listed should invalidate the output
+        """
+        before = self.substitute(cmdline)
+        self.write(os.path.join('inner', 'new.txt'), '')
+        self.assertNotEqual(self.substitute(cmdline), before)
+        self.assertIn('new.txt', ' '.join(self.substitute(cmdline)[0]))
+        self.assertCounts(1, 2)
+
+    def test_untracked_reads_are_not_cached(self) -> None:
+        """
+        A glob searching several directories cannot be fingerprinted
+        """
+        for _ in range(2):
+            self.assertEqual(self.substitute('echo `cat */hosts.txt`'),
+                             [('c',)])
+        self.assertCounts(0, 2)
+
+    def test_working_directory_is_part_of_the_key(self) -> None:
+        """
+        The same subcommand should be cached per working directory
+        """
+        self.assertEqual(self.substitute('echo `cat hosts.txt`'),
+                         [('a', 'b')])
+        os.chdir('inner')
+        self.assertEqual(self.substitute('echo `cat hosts.txt`'), [('c',)])
+        self.assertCounts(0, 2)
+
+    @parameterized.expand([
+        ('cd', 'echo `cd inner` `pwd`'),
+        ('output_redirect', 'echo `echo a > out.txt` `cat hosts.txt`'),
+    ])
+    def test_state_changing_substitutions_are_not_cached(
+        self, _: str, cmdline: str
+    ) -> None:
+        """
+        Substitutions that change the shell should never be cached, unlike
+        the ones next to them
+        """
+        for _run in range(2):
+            os.chdir(self.directory.name)
+            self.substitute(cmdline)
+        stats = self.cache.stats()
+        self.assertEqual((stats.hits, stats.misses, stats.size), (1, 3, 1))
+
+    def test_errors_are_not_cached(self) -> None:
+        """
+        A substitution that failed should run again
+        """
+        for _ in range(2):
+            with self.assertRaises(BaseShellError):
+                self.substitute('echo `cat missing.txt`')
+        self.assertCounts(0, 2)
+        self.assertEqual(self.cache.stats().size, 0)
+
+    def test_concurrent_substitutions_are_cached(self) -> None:
+        """
+        Substitutions run concurrently should be looked up and stored too
+        """
+        cmdline = 'echo `cat hosts.txt` `cat inner/hosts.txt` `echo d`'
+        expected = [('a', 'b'), ('c',), ('d',)]
+        self.assertEqual(self.substitute(cmdline, 4), expected)
+        self.assertEqual(self.substitute(cmdline, 4), expected)
+        self.assertCounts(3, 3)
+
+    def test_fallback_looks_up_once(self) -> None:
+        """
+        Substitutions that cannot run concurrently should not be looked up
+        again, unless one before them changed the shell
+        """
+        cmdline = 'echo `cat hosts.txt` `cd inner` `cat hosts.txt`'
+        for _run in range(2):
+            os.chdir(self.directory.name)
+            self.assertEqual(self.substitute(cmdline, 4),
+                             [('a', 'b'), (), ('c',)])
+        self.assertCounts(3, 5)
+
+    def test_size_is_bounded(self) -> None:
+        """
+        The least recently used outputs should be evicted
+        """
+        for index in range(6):
+            self.substitute(f'echo `echo {index}`')
+        stats = self.cache.stats()
+        self.assertEqual((stats.size, stats.evictions), (4, 2))
+
+    def test_format_stats(self) -> None:
+        """
+        The report should include the hit rate
+        """
+        for _ in range(4):
+            self.substitute('echo `echo a`')
+        self.assertEqual(
+            self.cache.format_stats(),
+            'substitution cache: 3 hits, 1 misses (75.0% hit rate), '
+            '0 invalidated, 0 evicted, 1/4 entries\n')
+
+
+if __name__ == "__main__":
+    unittest.main()
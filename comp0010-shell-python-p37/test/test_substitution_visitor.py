@@ -0,0 +1,188 @@
+"""
+Tests running command substitutions, one after another or concurrently
+"""
+import os
+import tempfile
+import threading
+import time
+import unittest
+from typing import List, Sequence
+from unittest.mock import patch
+
+from parameterized import parameterized
+
+from commands.builder import Builder
+from errors.shell_errors import BaseShellError
+from parse import substitution_visitor
+from parse.parse_tree_factory import create_parse_tree
+from parse.raw_shell_parser import RawShellParser
+from parse.substitution_visitor import SubstitutionVisitor
+
+run_substitution = substitution_visitor.run_substitution
+
+
+class TestSubstitutionVisitor(unittest.TestCase):
+    """
+    Tests splicing the output of substitutions into the command line
+    """
+
+    def setUp(self) -> None:
+        self.directory = tempfile.TemporaryDirectory()
+        self.cwd = os.getcwd()
+        os.chdir(self.directory.name)
+        os.mkdir('inner')
+        with open(os.path.join('inner', 'file.txt'), 'w',
+                  encoding='utf-8') as file:
+            file.write('inside\n')
+
+    def tearDown(self) -> None:
+        os.chdir(self.cwd)
+        self.directory.cleanup()
+
+    def substitute(self, cmdline: str,
+                   max_workers: int = 4) -> List[Sequence[str]]:
+        """
+        Runs every substitution in cmdline, and returns the words they
+        output, in source order
+        """
+        substitutions = SubstitutionVisitor(max_workers).visit(
+            create_parse_tree(cmdline))
+        return list(substitutions.values())
+
+    @parameterized.expand([
+        ('no_substitution', 'echo a', []),
+        ('empty', 'echo ``', []),
+        ('one', 'echo `echo a`', [('a',)]),
+        ('in_order', 'echo `echo a` `echo b` `echo c`',
+         [('a',), ('b',), ('c',)]),
+        ('inside_words', 'echo x`echo a`y"`echo b`"', [('a',), ('b',)]),
+        ('in_a_pipeline', 'echo `echo a` | cat `echo b`; echo `echo c`',
+         [('a',), ('b',), ('c',)]),
+        ('newlines', 'echo `echo a; echo b` `echo c`',
+         [('a', 'b'), ('c',)]),
+        ('operators', 'echo `echo "a|b;c<d>e"`', [('a|b;c<d>e',)]),
+        ('quotes', 'echo `echo "\'a\'" \'"b"\'`', [("'a'", '"b"')]),
+    ])
+    def test_words(self, _: str, cmdline: str,
+                   expected: List[Sequence[str]]) -> None:
+        """
+        Outputs should be split into words, in source order, whether or not
+        the substitutions ran concurrently
+        """
+        self.assertEqual(self.substitute(cmdline), expected)
+        self.assertEqual(self.substitute(cmdline, max_workers=1), expected)
+
+    def test_long_pipeline(self) -> None:
+        """
+        Substitutions should be found in command lines too deep to visit
+        recursively
+        """
+        cmdline = ' | '.join(['echo `echo a`'] + ['cat'] * 1000)
+        self.assertEqual(self.substitute(cmdline), [('a',)])
+
+    def test_substitutions_run_concurrently(self) -> None:
+        """
+        Substitutions that cannot change the shell should run at the same
+        time; otherwise neither would ever get past the barrier
+        """
+        barrier = threading.Barrier(2, timeout=5)
+
+        def wait_for_others(builder: Builder, *args) -> Sequence[str]:
+            barrier.wait()
+            return run_substitution(builder, *args)
+
+        with patch.object(substitution_visitor, 'run_substitution',
+                          wait_for_others):
+            self.assertEqual(self.substitute('echo `echo a` `echo b`'),
+                             [('a',), ('b',)])
+
+    @parameterized.expand([
+        ('cd', 'echo `cd inner` `cat file.txt`', [(), ('inside',)]),
+        ('cd_in_a_sequence', 'echo `echo a; cd inner` `cat file.txt`',
+         [('a',), ('inside',)]),
+        ('cd_in_a_pipeline', 'echo `cd inner | echo a` `cat file.txt`',
+         [('a',), ('inside',)]),
+    ])
+    def test_mutating_substitutions_run_in_order(
+        self, _: str, cmdline: str, expected: List[Sequence[str]]
+    ) -> None:
+        """
+        Substitutions should run one after another if one can change the shell
+        """
+        self.assertEqual(self.substitute(cmdline), expected)
+        self.assertEqual(os.path.basename(os.getcwd()), 'inner')
+
+    def test_writing_substitutions_run_in_order(self) -> None:
+        """
+        Substitutions should run one after another if one writes to a file
+        """
+        self.assertEqual(
+            self.substitute('echo `echo a > out.txt` `cat out.txt`'),
+            [(), ('a',)])
+
+    @parameterized.expand([
+        ('first_fails', 'echo `cat missing1` `cat missing2`', 'missing1'),
+        ('second_fails', 'echo `echo a` `cat missing2`', 'missing2'),
+        ('parse_error_after_failure', 'echo `cat missing1` `unknown`',
+         'missing1'),
+        ('failure_after_parse_error', 'echo `unknown` `cat missing2`',
+         'unknown'),
+    ])
+    def test_first_error_is_raised(
+        self, _: str, cmdline: str, message: str
+    ) -> None:
+        """
+        The error raised should be the one from the first substitution that
+        failed, as if they had run one after another
+        """
+        for max_workers in (1, 4):
+            with self.assertRaises(BaseShellError) as context:
+                self.substitute(cmdline, max_workers)
+            self.assertIn(message, str(context.exception))
+
+    def test_failure_cancels_later_substitutions(self) -> None:
+        """
+        Once a substitution fails, the ones after it that have not started
+        should not run, while the ones before it still finish. The one after
+        it may start before it is cancelled.
+        """
+        started: List[str] = []
+
+        def run_slowly(builder: Builder, *args) -> Sequence[str]:
+            words = run_substitution(builder, *args)
+            started.append(words[0])
+            if words[0] in ('a', 'c'):
+                time.sleep(0.5)
+            return words
+
+        with patch.object(substitution_visitor, 'run_substitution',
+                          run_slowly), \
+                self.assertRaises(BaseShellError) as context:
+            self.substitute('echo `echo a` `cat missing` `echo c` `echo d` '
+                            '`echo e`', max_workers=2)
+        self.assertIn('missing', str(context.exception))
+        self.assertIn('a', started)
+        self.assertFalse({'d', 'e'} & set(started))
+
+    @parameterized.expand([
+        ('echo', 'echo a', False),
+        ('input_redirect', 'cat < file', False),
+        ('output_redirect', 'echo a > file', True),
+        ('cd', 'cd inner', True),
+        ('exit', 'exit', True),
+        ('unsafe', '_cd inner', True),
+        ('pipeline', 'echo a | cat | cd inner', True),
+        ('sequence', 'echo a; cat file; echo b', False),
+    ])
+    def test_mutates_shell_state(
+        self, _: str, cmdline: str, mutates: bool
+    ) -> None:
+        """
+        Builders should know whether they can change the state of the shell
+        """
+        self.assertEqual(RawShellParser().parse(cmdline).mutates_shell_state(),
+                         mutates)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,21 +1,43 @@
 """
 A module that contains unit tests for the echo command.
 """
+import os
+import tempfile
+import threading
+import time
 import unittest
-from io import StringIO
+from io import BytesIO, StringIO
 from unittest.mock import mock_open, patch
-from typing import List, Optional, Type
+from typing import Iterator, List, Optional, Type, cast
 
 from parameterized import parameterized
 
+from commands.command_helpers import MMAP_MIN_SIZE
 from commands.tailcommand import Tail
 from errors.command_errors import CommandError, ShellFileNotFoundError
 from errors.error_dsi import DeveloperSkillIssue
+from errors.parse_errors import UnknownFlagValueError
 from flag import Flag
+from python_shell import PythonShell
 
 # pylint: disable=line-too-long
 
 
+class CountedReads(BytesIO):
+    """
+    A file that counts how many bytes are read from it
+    """
+
+    def __init__(self, data: bytes) -> None:
+        super().__init__(data)
+        self.bytes_read = 0
+
+    def read(self, size: Optional[int] = -1) -> bytes:
+        data = super().read(size)
+        self.bytes_read += len(data)
+        return data
+
+
 class TestTail(unittest.TestCase):
     """
     A test class for the Tail class.
@@ -25,7 +47,7 @@ class TestTail(unittest.TestCase):
         self.in_stream = StringIO()
         self.out_stream = StringIO()
         self.mock_file = mock_open(
-            read_data="line1\nline2\nline3\nline4\nline5\nline6\nline7\nline8\nline9\nline10\n"  # noqa
+            read_data=b"line1\nline2\nline3\nline4\nline5\nline6\nline7\nline8\nline9\nline10\n"  # noqa
         )
 
     def tearDown(self) -> None:
@@ -93,6 +115,193 @@ class TestTail(unittest.TestCase):
                 tail.run()
                 self.assertEqual(tail.output.getvalue(), expected_output)
 
+    @parameterized.expand(
+        [
+            ("lines", [Flag("n", "2", "For testing")], 2, 1),
+            ("lines_across_blocks", [Flag("n", "40", "For testing")], 40, 7),
+            ("all_lines", [Flag("n", "200", "For testing")], 200, 7),
+            ("no_lines", [Flag("n", "0", "For testing")], 0, 7),
+            ("from_line", [Flag("n", "+99", "For testing")], 2, 7),
+            ("from_line_zero", [Flag("n", "+0", "For testing")], 100, 7),
+        ]
+    )
+    def test_tail_lines_from_file(self, _: str, flags: List[Flag],
+                                  num_lines: int, block_size: int) -> None:
+        """
+        The last lines of a file should be found reading backwards from its
+        end, however the lines fall across blocks
+        """
+        lines = [f"line{i}\n".encode() for i in range(100)]
+        for data in (b"".join(lines), b"".join(lines)[:-1]):
+            with self.subTest(data=data[-10:]), \
+                    tempfile.TemporaryDirectory() as directory, \
+                    patch("commands.tailcommand.TAIL_BLOCK_SIZE", block_size):
+                path = os.path.join(directory, "file")
+                with open(path, "wb") as file:
+                    file.write(data)
+                out_stream = cast(StringIO, BytesIO())
+                Tail(self.in_stream, out_stream, flags, [path]).run()
+                expected = data.splitlines(True)[100 - num_lines:] \
+                    if num_lines else []
+                self.assertEqual(out_stream.getvalue(), b"".join(expected))
+
+    @parameterized.expand(
+        [
+            ("last", "70000", -70_000),
+            ("from", "+5", 4),
+            ("none", "0", None),
+            ("more_than_all", "100000000", 0),
+        ]
+    )
+    def test_tail_bytes_from_file(self, _: str, count: str,
+                                  start: Optional[int]) -> None:
+        """
+        tail -c should print the bytes of a file from where they start
+        """
+        data = bytes(range(256)) * MMAP_MIN_SIZE
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "file")
+            with open(path, "wb") as file:
+                file.write(data)
+            out_stream = cast(StringIO, BytesIO())
+            Tail(self.in_stream, out_stream, [Flag("c", count, "For testing")],
+                 [path]).run()
+        self.assertEqual(out_stream.getvalue(),
+                         b"" if start is None else data[start:])
+
+    @parameterized.expand(
+        [
+            ("lines_from", [Flag("n", "+2", "For testing")], "b\nc\n"),
+            ("bytes", [Flag("c", "3", "For testing")], "\nc\n"),
+            ("bytes_from", [Flag("c", "+3", "For testing")], "a\nb\nc\n"),
+            ("bytes_last", [Flag("n", "1", "For testing"),
+                            Flag("c", "1", "For testing")], "\n"),
+            ("lines_last", [Flag("c", "1", "For testing"),
+                            Flag("n", "1", "For testing")], "c\n"),
+        ]
+    )
+    def test_tail_stdin(self, _: str, flags: List[Flag],
+                        expected: str) -> None:
+        """
+        stdin should be read from the start, holding back only what may be
+        printed
+        """
+        self.in_stream.write("éa\nb\nc\n")
+        self.in_stream.seek(0)
+        Tail(self.in_stream, self.out_stream, flags, []).run()
+        self.assertEqual(self.out_stream.getvalue(), expected)
+
+    def test_tail_reads_only_the_end(self) -> None:
+        """
+        Finding the last lines of a file should only read the blocks they are
+        in
+        """
+        file = CountedReads(b"line\n" * 1_000_000)
+        with patch("commands.tailcommand.TAIL_BLOCK_SIZE", 100):
+            self.assertEqual(Tail._line_offset(file, 5_000_000, 30),
+                             5_000_000 - 150)
+        self.assertEqual(file.bytes_read, 200)
+
+    @staticmethod
+    def wait_for(out_stream: BytesIO, expected: bytes) -> None:
+        """
+        Waits a while for out_stream to hold what is expected
+        """
+        deadline = time.monotonic() + 10
+        while out_stream.getvalue() != expected and \
+                time.monotonic() < deadline:
+            time.sleep(0.01)
+
+    def test_tail_follow(self) -> None:
+        """
+        tail -f should print the end of the file, then what is appended to
+        it as it comes, until cancelled
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "app.log")
+            with open(path, "wb") as file:
+                file.write(b"a\nb\n")
+            out_stream = BytesIO()
+            tail = Tail(self.in_stream, cast(StringIO, out_stream),
+                        [Flag("n", "1", "For testing"),
+                         Flag("f", True, "For testing")], [path])
+            thread = threading.Thread(target=tail.run)
+            thread.start()
+            self.wait_for(out_stream, b"b\n")
+            with open(path, "ab") as file:
+                file.write(b"c\n")
+            self.wait_for(out_stream, b"b\nc\n")
+            tail.cancel()
+            thread.join(timeout=10)
+            self.assertFalse(thread.is_alive())
+            self.assertEqual(out_stream.getvalue(), b"b\nc\n")
+
+    def test_tail_follow_stdin(self) -> None:
+        """
+        tail -f should end once stdin ends, as it cannot be followed
+        """
+        self.in_stream.write("a\nb\n")
+        self.in_stream.seek(0)
+        Tail(self.in_stream, self.out_stream,
+             [Flag("f", True, "For testing")], []).run()
+        self.assertEqual(self.out_stream.getvalue(), "a\nb\n")
+
+    @staticmethod
+    def read_for(chunks: Iterator[str], expected: str) -> str:
+        """
+        Reads chunks for a while, until they are as long as what is expected
+        """
+        received: List[str] = []
+
+        def read() -> None:
+            while len("".join(received)) < len(expected):
+                received.append(next(chunks))
+
+        thread = threading.Thread(target=read, daemon=True)
+        thread.start()
+        thread.join(10)
+        return "".join(received)
+
+    @parameterized.expand(
+        [
+            ("grep", "| grep ERROR", False, "ERROR old\n", "ERROR b\n"),
+            ("cat", "| cat", False, "ERROR old\n", "INFO a\nERROR b\n"),
+            ("cut", "| cut -b 1-3", False, "ERR", "\nINF\nERR"),
+            ("three_stages", "| grep ERROR | cat", False, "ERROR old\n",
+             "ERROR b\n"),
+            ("stage_processes", "| grep ERROR | cat", True, "ERROR old\n",
+             "ERROR b\n"),
+        ]
+    )
+    def test_tail_follow_pipeline(self, _: str, stages: str,
+                                  stage_processes: bool, old: str,
+                                  appended: str) -> None:
+        """
+        tail -f should stream what is appended through every later stage of
+        a pipeline, and stop once nothing reads the output any more
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "app.log")
+            with open(path, "wb") as file:
+                file.write(b"ERROR old\n")
+            chunks = PythonShell(
+                StringIO(), StringIO(), stage_processes=stage_processes
+            ).eval_iter(f"tail -f {path} {stages}")
+            self.assertEqual(self.read_for(chunks, old), old)
+            with open(path, "ab") as file:
+                file.write(b"INFO a\nERROR b\n")
+            self.assertEqual(self.read_for(chunks, appended), appended)
+            chunks.close()
+
+    def test_tail_invalid_count(self) -> None:
+        """
+        A count that is not a number should be rejected like any invalid
+        flag value
+        """
+        with self.assertRaises(UnknownFlagValueError):
+            Tail(self.in_stream, self.out_stream,
+                 [Flag("n", "+x", "For testing")], [])
+
     @parameterized.expand(
         [
             (
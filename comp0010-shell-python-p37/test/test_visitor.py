@@ -28,6 +28,7 @@ from commands.unsafe_builder import UnsafeBuilder
 from errors.error_dsi import DeveloperSkillIssue
 from errors.parse_errors import (NoCommandError, UnknownCommandError,
                                  UnknownFlagError, UnknownFlagValueError)
+from errors.redirect_errors import RedirectError
 from flag import FlagSpecification
 from parse.substitution_shell_parser import SubstitutionShellParser
 from parse.raw_shell_parser import RawShellParser
@@ -165,6 +166,23 @@ class TestRunnerVisitor(unittest.TestCase):
         ('echo `echo "hello      world"`', 'echo', [], ['hello', 'world']),
         ('`echo echo hello wor`ld', 'echo', [], ['hello', 'world']),
         ('echo ``', 'echo', [], []),
+        ('echo x`echo a b`y', 'echo', [], ['xa', 'by']),
+        ('echo "x`echo a   b`y"', 'echo', [], ['xa by']),
+        ('echo `echo` ""', 'echo', [], ['']),
+        ('echo `echo "a|b" "c;d" "<e>"`', 'echo', [], ['a|b', 'c;d', '<e>']),
+        ('echo `echo \'"a"\'`', 'echo', [], ['"a"']),
+        ('mock_command `echo -some_flag x`', 'mock_command',
+         [('some_flag', True)], ['x']),
+        ('mock_command `echo a -some_flag`', 'mock_command',
+         [('some_flag', True)], ['a']),
+        ('mock_command -other_flag `echo hi`', 'mock_command',
+         [('other_flag', 'hi')], []),
+        ('mock_command a`echo -b`', 'mock_command', [], ['a-b']),
+        ('mock_command "`echo -some_flag`"', 'mock_command', [],
+         ['-some_flag']),
+        ('mock_command -`echo some_flag x`', 'mock_command',
+         [('some_flag', True)], ['x']),
+        ('`echo mock_command a` b', 'mock_command', [], ['a', 'b']),
 
         # partial escape tests
         (r'echo \'\'', 'echo', [], ['\'\'']),
@@ -218,6 +236,10 @@ class TestRunnerVisitor(unittest.TestCase):
                 UnknownFlagValueError,
                 "Invalid value",
             ),
+            ("mock_command `echo -f`", UnknownFlagError, "Unknown flag f"),
+            ("`echo` mock_command", NoCommandError, "substituted"),
+            ("echo > `echo a b`", RedirectError, "ambiguous"),
+            ("echo > `echo`", RedirectError, "ambiguous"),
         ]
     )
     def test_commands_sad(
@@ -239,7 +261,9 @@ class TestRunnerVisitor(unittest.TestCase):
         ('echo < hi.txt hello > bye.txt', 'hi.txt', 'bye.txt'),
         ('< hi.txt echo', 'hi.txt', None),
         ('      < hi.txt echo', 'hi.txt', None),
-        ('< hi.txt < bye.txt echo', 'bye.txt', None)
+        ('< hi.txt < bye.txt echo', 'bye.txt', None),
+        ('echo < "hi.txt" > \'bye.txt\'', 'hi.txt', 'bye.txt'),
+        ('echo < `echo hi.txt` > bye`echo .txt`', 'hi.txt', 'bye.txt'),
     ])
     def test_redirect(self,
                       cmdline: str,
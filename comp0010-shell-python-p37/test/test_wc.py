@@ -1,6 +1,8 @@
 """
 File to test the wc command
 """
+import os
+import tempfile
 import unittest
 from unittest.mock import patch, mock_open
 from io import StringIO
@@ -85,12 +87,27 @@ class TestWC(unittest.TestCase):
         options = [f"file{i}.py" for i, _ in enumerate(data)]
         d = data[0] if data else ""
 
-        with patch("builtins.open", side_effect=mock_open(read_data=d)):
+        with patch("builtins.open",
+                   side_effect=mock_open(read_data=d.encode())):
             wc = WC(inp, self.out_stream, flags, options)
             exit_code = wc.run()
             self.assertEqual(self.out_stream.getvalue(), expected_out)
             self.assertEqual(exit_code, 0)
 
+    def test_files_run_together(self) -> None:
+        """
+        Files should be counted as if they were one file, so a line that one
+        file does not end carries on into the next
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            paths = []
+            for index, data in enumerate(["a b", "c\nd\n", "e"]):
+                paths.append(os.path.join(directory, f"file{index}"))
+                with open(paths[-1], "w", encoding="utf-8") as file:
+                    file.write(data)
+            WC(self.in_stream, self.out_stream, [], paths).run()
+        self.assertEqual(self.out_stream.getvalue(), "3 4 8\n")
+
 
 if __name__ == "__main__":
     unittest.main()